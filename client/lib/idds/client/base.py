@@ -28,6 +28,7 @@ except ImportError:
     from urllib.parse import urlencode, quote
 
 from idds.common import exceptions
+from idds.common import compression
 from idds.common.constants import HTTP_STATUS_CODE
 from idds.common.utils import json_dumps, json_loads, get_proxy_path
 from idds.common.authentication import OIDCAuthenticationUtils
@@ -53,6 +54,14 @@ class BaseRestClient(object):
         self.session = requests.session()
         self.retries = 3
 
+        # request bodies bigger than compress_min_size are compressed,
+        # if the server advertises the encoding with the Accept-Encoding header.
+        self.compress = True
+        self.compress_min_size = compression.COMPRESS_MIN_SIZE
+        self.server_encodings = None
+        self.transfer_stats = {'requests': 0, 'request_bytes': 0, 'request_wire_bytes': 0,
+                               'response_bytes': 0, 'response_wire_bytes': 0}
+
         self.auth_type = None
         self.oidc_token_file = None
         self.oidc_token = None
@@ -173,7 +182,58 @@ class BaseRestClient(object):
 
         return full_url
 
-    def get_request_response(self, url, type='GET', data=None, headers=None, auth_setup_step=False, return_result_directly=False):
+    def disable_compression(self):
+        self.compress = False
+
+    def update_server_encodings(self, result):
+        if result is not None and result.headers is not None and 'Accept-Encoding' in result.headers:
+            self.server_encodings = list(compression.parse_accept_encoding(result.headers['Accept-Encoding']).keys())
+
+    def get_server_encodings(self):
+        """
+        Get the content encodings accepted by the server for request bodies.
+        """
+        if self.server_encodings is None:
+            try:
+                url = self.build_url(self.host, path='ping')
+                result = self.get_request_response(url, type='GET', return_result_directly=True)
+                self.update_server_encodings(result)
+            except Exception as error:
+                logging.warning('Failed to get the content encodings of the server: %s' % str(error))
+            if self.server_encodings is None:
+                self.server_encodings = []
+        return self.server_encodings
+
+    def get_request_body(self, data, headers):
+        """
+        Get the request body and compress it if it's big enough and the server accepts it.
+
+        :returns: (body, uncompressed body, encoding)
+        """
+        body = json_dumps(data).encode('utf-8')
+        if self.compress and len(body) >= self.compress_min_size:
+            encoding = compression.select_encoding(self.get_server_encodings())
+            if encoding:
+                headers['Content-Encoding'] = encoding
+                return compression.compress(body, encoding), body, encoding
+        return body, body, None
+
+    def update_transfer_stats(self, result, request_bytes=0, request_wire_bytes=0):
+        self.transfer_stats['requests'] += 1
+        self.transfer_stats['request_bytes'] += request_bytes
+        self.transfer_stats['request_wire_bytes'] += request_wire_bytes
+        response_bytes = len(result.content) if result.content else 0
+        self.transfer_stats['response_bytes'] += response_bytes
+        self.transfer_stats['response_wire_bytes'] += int(result.headers.get('Content-Length', response_bytes))
+
+    def get_transfer_stats(self):
+        """
+        Get the bytes sent and received (uncompressed and on the wire).
+        """
+        return dict(self.transfer_stats)
+
+    def get_request_response(self, url, type='GET', data=None, headers=None, auth_setup_step=False, return_result_directly=False,
+                             stream=False):
         """
         Send request to the IDDS server and get the response.
 
@@ -181,6 +241,7 @@ class BaseRestClient(object):
         :param type: request type(GET, PUT, POST, DEL).
         :param data: data to be sent to the IDDS server.
         :param headers: http headers.
+        :param stream: not to download the response body immediately (only for GET).
 
         :returns: response data as json.
         :raises:
@@ -201,29 +262,33 @@ class BaseRestClient(object):
         if self.original_user_token:
             headers['X-IDDS-Auth-Usertoken-Original'] = self.original_user_token
 
+        body, body_encoding, raw_body = None, None, None
+        if type in ['PUT', 'POST', 'DEL']:
+            body, raw_body, body_encoding = self.get_request_body(data, headers)
+
         for retry in range(self.retries):
             try:
                 if self.auth_type in ['x509_proxy']:
                     if type == 'GET':
-                        result = self.session.get(url, cert=(self.client_proxy, self.client_proxy), timeout=self.timeout, headers=headers, verify=False)
+                        result = self.session.get(url, cert=(self.client_proxy, self.client_proxy), timeout=self.timeout, headers=headers, verify=False, stream=stream)
                     elif type == 'PUT':
-                        result = self.session.put(url, cert=(self.client_proxy, self.client_proxy), data=json_dumps(data), timeout=self.timeout, headers=headers, verify=False)
+                        result = self.session.put(url, cert=(self.client_proxy, self.client_proxy), data=body, timeout=self.timeout, headers=headers, verify=False)
                     elif type == 'POST':
-                        result = self.session.post(url, cert=(self.client_proxy, self.client_proxy), data=json_dumps(data), timeout=self.timeout, headers=headers, verify=False)
+                        result = self.session.post(url, cert=(self.client_proxy, self.client_proxy), data=body, timeout=self.timeout, headers=headers, verify=False)
                     elif type == 'DEL':
-                        result = self.session.delete(url, cert=(self.client_proxy, self.client_proxy), data=json_dumps(data), timeout=self.timeout, headers=headers, verify=False)
+                        result = self.session.delete(url, cert=(self.client_proxy, self.client_proxy), data=body, timeout=self.timeout, headers=headers, verify=False)
                     else:
                         return
                 elif self.auth_type in ['oidc']:
                     if auth_setup_step:
                         if type == 'GET':
-                            result = self.session.get(url, timeout=self.timeout, headers=headers, verify=False)
+                            result = self.session.get(url, timeout=self.timeout, headers=headers, verify=False, stream=stream)
                         elif type == 'PUT':
-                            result = self.session.put(url, data=json_dumps(data), timeout=self.timeout, headers=headers, verify=False)
+                            result = self.session.put(url, data=body, timeout=self.timeout, headers=headers, verify=False)
                         elif type == 'POST':
-                            result = self.session.post(url, data=json_dumps(data), timeout=self.timeout, headers=headers, verify=False)
+                            result = self.session.post(url, data=body, timeout=self.timeout, headers=headers, verify=False)
                         elif type == 'DEL':
-                            result = self.session.delete(url, data=json_dumps(data), timeout=self.timeout, headers=headers, verify=False)
+                            result = self.session.delete(url, data=body, timeout=self.timeout, headers=headers, verify=False)
                         else:
                             return
                     else:
@@ -231,13 +296,13 @@ class BaseRestClient(object):
                         headers['X-IDDS-Auth-Token'] = id_token
 
                         if type == 'GET':
-                            result = self.session.get(url, timeout=self.timeout, headers=headers, verify=False)
+                            result = self.session.get(url, timeout=self.timeout, headers=headers, verify=False, stream=stream)
                         elif type == 'PUT':
-                            result = self.session.put(url, data=json_dumps(data), timeout=self.timeout, headers=headers, verify=False)
+                            result = self.session.put(url, data=body, timeout=self.timeout, headers=headers, verify=False)
                         elif type == 'POST':
-                            result = self.session.post(url, data=json_dumps(data), timeout=self.timeout, headers=headers, verify=False)
+                            result = self.session.post(url, data=body, timeout=self.timeout, headers=headers, verify=False)
                         elif type == 'DEL':
-                            result = self.session.delete(url, data=json_dumps(data), timeout=self.timeout, headers=headers, verify=False)
+                            result = self.session.delete(url, data=body, timeout=self.timeout, headers=headers, verify=False)
                         else:
                             return
             except requests.exceptions.ConnectionError as error:
@@ -249,9 +314,21 @@ class BaseRestClient(object):
                     time.sleep(random_sleep)
 
             if result is not None:
+                self.update_server_encodings(result)
+                if result.status_code == HTTP_STATUS_CODE.UnsupportedMediaType and body_encoding:
+                    # the server cannot decode the body, resend it without compression
+                    logging.warning('Request body with Content-Encoding %s is not accepted, resend it without compression' % body_encoding)
+                    del headers['Content-Encoding']
+                    self.compress = False
+                    body, body_encoding = raw_body, None
+                    result = None
+                    continue
+
                 if return_result_directly:
                     return result
                 else:
+                    self.update_transfer_stats(result, request_bytes=len(raw_body) if raw_body else 0,
+                                               request_wire_bytes=len(body) if body else 0)
                     # print(result.text)
                     # print(result.headers)
                     # print(result.status_code)
@@ -298,3 +375,37 @@ class BaseRestClient(object):
                             raise exceptions.IDDSException(result.text)
         if result is None:
             raise exceptions.IDDSException('Response is None')
+
+    def get_request_stream(self, url, headers=None):
+        """
+        Send a GET request to the IDDS server and iterate the newline delimited json response,
+        without downloading the whole response.
+
+        :param url: http url to connection.
+        :param headers: http headers.
+
+        :returns: generator of the json objects.
+        :raises: the exception reported by the server, before or in the middle of the stream.
+        """
+        result = self.get_request_response(url, type='GET', headers=headers, return_result_directly=True, stream=True)
+        if result is None:
+            raise exceptions.IDDSException('Response is None')
+        try:
+            if result.status_code != HTTP_STATUS_CODE.OK:
+                if result.headers and 'ExceptionClass' in result.headers:
+                    cls = getattr(exceptions, result.headers['ExceptionClass'], exceptions.IDDSException)
+                    raise cls(result.headers['ExceptionMessage'])
+                raise exceptions.IDDSException(result.text)
+
+            for line in result.iter_lines():
+                if not line:
+                    continue
+                data = json_loads(line)
+                if isinstance(data, dict) and 'ExceptionClass' in data:
+                    cls = getattr(exceptions, data['ExceptionClass'], exceptions.IDDSException)
+                    raise cls(data['ExceptionMessage'])
+                yield data
+        except requests.exceptions.RequestException as error:
+            raise exceptions.ConnectionException('ConnectionError: ' + str(error))
+        finally:
+            result.close()
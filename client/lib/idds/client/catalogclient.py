@@ -16,6 +16,7 @@ Request Rest client to access IDDS catalog system.
 import os
 from enum import Enum
 
+from idds.common import exceptions
 from idds.client.base import BaseRestClient
 
 
@@ -69,22 +70,8 @@ class CatalogClient(BaseRestClient):
         collections = self.get_request_response(url, type='GET')
         return collections
 
-    def get_contents(self, request_id=None, transform_id=None, workload_id=None,
-                     coll_scope=None, coll_name=None, relation_type=None, status=None):
-        """
-        Get contents from the Head service.
-
-        :param request_id: the request id.
-        :param transform_id: the transform id.
-        :param workload_id: the workload id.
-        :param coll_scope: the collection scope.
-        :param coll_name: the collection name, can be wildcard.
-        :param relation_type: the relation between the collection and the transform(input, output, log)
-        :param status: The content status.
-
-        :raise exceptions if it's not got successfully.
-        """
-        path = os.path.join(self.CATALOG_BASEURL, 'contents')
+    def get_contents_url_params(self, request_id=None, transform_id=None, workload_id=None,
+                                coll_scope=None, coll_name=None, relation_type=None, status=None):
         if request_id is None:
             request_id = 'null'
         if transform_id is None:
@@ -103,13 +90,99 @@ class CatalogClient(BaseRestClient):
             status = 'null'
         elif isinstance(status, Enum):
             status = status.value
+        return [str(request_id), str(transform_id), str(workload_id), coll_scope, coll_name, str(relation_type), str(status)]
 
-        url = self.build_url(self.host, path=os.path.join(path, str(request_id), str(transform_id), str(workload_id), coll_scope,
-                                                          coll_name, str(relation_type), str(status)))
+    def get_contents(self, request_id=None, transform_id=None, workload_id=None,
+                     coll_scope=None, coll_name=None, relation_type=None, status=None):
+        """
+        Get contents from the Head service.
+
+        :param request_id: the request id.
+        :param transform_id: the transform id.
+        :param workload_id: the workload id.
+        :param coll_scope: the collection scope.
+        :param coll_name: the collection name, can be wildcard.
+        :param relation_type: the relation between the collection and the transform(input, output, log)
+        :param status: The content status.
+
+        :raise exceptions if it's not got successfully.
+        """
+        path = os.path.join(self.CATALOG_BASEURL, 'contents')
+        params = self.get_contents_url_params(request_id=request_id, transform_id=transform_id, workload_id=workload_id,
+                                              coll_scope=coll_scope, coll_name=coll_name, relation_type=relation_type,
+                                              status=status)
+
+        url = self.build_url(self.host, path=os.path.join(path, *params))
 
         contents = self.get_request_response(url, type='GET')
         return contents
 
+    def get_contents_page(self, request_id=None, transform_id=None, workload_id=None, coll_scope=None, coll_name=None,
+                          relation_type=None, status=None, last_content_id=None, page_size=1000):
+        """
+        Get one page of contents, ordered by content_id, from the Head service.
+
+        :param last_content_id: the cursor returned by the previous page. None for the first page.
+        :param page_size: the number of contents in one page.
+
+        :raise exceptions if it's not got successfully.
+        :returns: {'contents': contents, 'next_content_id': the cursor for the next page, None if it's the last page}.
+        """
+        path = os.path.join(self.CATALOG_BASEURL, 'contents_page')
+        params = self.get_contents_url_params(request_id=request_id, transform_id=transform_id, workload_id=workload_id,
+                                              coll_scope=coll_scope, coll_name=coll_name, relation_type=relation_type,
+                                              status=status)
+        params += [str(last_content_id) if last_content_id is not None else 'null', str(page_size)]
+
+        url = self.build_url(self.host, path=os.path.join(path, *params))
+
+        ret = self.get_request_response(url, type='GET')
+        if self.json_outputs and ret and 'data' in ret:
+            ret = ret['data']
+        return ret
+
+    def iter_contents(self, request_id=None, transform_id=None, workload_id=None, coll_scope=None, coll_name=None,
+                      relation_type=None, status=None, page_size=1000, stream=False):
+        """
+        Iterate contents from the Head service, ordered by content_id.
+        Only one page (or the rows in flight of the stream) is kept in memory.
+
+        :param page_size: the number of contents in one page.
+        :param stream: If True, get the contents in one newline delimited json stream,
+                       resuming from the last received content if the connection is broken.
+                       Otherwise, follow the cursors of pages.
+
+        :raise exceptions if it's not got successfully.
+        :returns: generator of contents.
+        """
+        kwargs = {'request_id': request_id, 'transform_id': transform_id, 'workload_id': workload_id,
+                  'coll_scope': coll_scope, 'coll_name': coll_name, 'relation_type': relation_type, 'status': status}
+        last_content_id = None
+        if not stream:
+            while True:
+                ret = self.get_contents_page(last_content_id=last_content_id, page_size=page_size, **kwargs)
+                if not ret:
+                    break
+                for content in ret['contents']:
+                    yield content
+                last_content_id = ret['next_content_id']
+                if last_content_id is None:
+                    break
+        else:
+            path = os.path.join(self.CATALOG_BASEURL, 'contents_stream')
+            params = self.get_contents_url_params(**kwargs)
+            for retry in range(self.retries):
+                cursor = str(last_content_id) if last_content_id is not None else 'null'
+                url = self.build_url(self.host, path=os.path.join(path, *(params + [cursor])))
+                try:
+                    for content in self.get_request_stream(url):
+                        last_content_id = content['content_id']
+                        yield content
+                    break
+                except exceptions.ConnectionException:
+                    if retry >= self.retries - 1:
+                        raise
+
     def get_match_contents(self, coll_scope=None, coll_name=None, scope=None, name=None, min_id=None, max_id=None, request_id=None, workload_id=None, only_return_best_match=None):
         """
         Get contents from the Head service.
@@ -944,6 +944,30 @@ class ClientManager:
                                             coll_scope=coll_scope, coll_name=coll_name, relation_type=relation_type, status=status)
         return contents
 
+    def iter_contents(self, request_id=None, transform_id=None, workload_id=None, coll_scope=None, coll_name=None, relation_type=None,
+                      status=None, page_size=1000, stream=False):
+        """
+        Iterate contents from the Head service page by page (or in one stream), with flat memory.
+
+        :param request_id: the request id.
+        :param transform_id: the transform id.
+        :param workload_id: the workload id.
+        :param coll_scope: the scope of the related collection.
+        :param coll_name: the name of the related collection.
+        :param relation_type: the relation type (input, output and log).
+        :param status: the status of related contents.
+        :param page_size: the number of contents in one page.
+        :param stream: get the contents in one newline delimited json stream instead of pages.
+
+        :raise exceptions if it's not got successfully.
+        :returns: generator of contents.
+        """
+        self.setup_client()
+
+        return self.client.iter_contents(request_id=request_id, transform_id=transform_id, workload_id=workload_id,
+                                         coll_scope=coll_scope, coll_name=coll_name, relation_type=relation_type,
+                                         status=status, page_size=page_size, stream=stream)
+
     @exception_handler
     def get_contents_output_ext(self, request_id=None, workload_id=None, transform_id=None, group_by_jedi_task_id=False):
         """
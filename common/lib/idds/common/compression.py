@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+HTTP content encodings (gzip and, if zstandard is installed, zstd) shared by the rest client and server.
+"""
+
+import gzip
+import io
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# bodies smaller than it are not compressed
+COMPRESS_MIN_SIZE = 4096
+# size of the chunks in which the data is decompressed
+DECOMPRESS_CHUNK_SIZE = 1024 * 1024
+
+
+class DecompressionLimitExceeded(ValueError):
+    pass
+
+
+def get_supported_encodings():
+    """
+    Get the supported content encodings, in order of preference.
+    """
+    if zstandard is not None:
+        return ['zstd', 'gzip']
+    return ['gzip']
+
+
+def compress(data, encoding, level=None):
+    """
+    Compress data with the content encoding.
+
+    :param data: bytes or str.
+    :param encoding: zstd or gzip.
+    :returns: compressed bytes.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if encoding == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=level or 3).compress(data)
+    elif encoding == 'gzip':
+        return gzip.compress(data, compresslevel=level or 6)
+    raise ValueError("Content encoding %s is not supported" % encoding)
+
+
+def check_length(length, max_length):
+    if max_length is not None and length > max_length:
+        raise DecompressionLimitExceeded("Decompressed data is bigger than %s bytes" % max_length)
+
+
+def zlib_decompress(data, wbits, max_length=None):
+    rets, length = [], 0
+    while data:
+        decompressobj = zlib.decompressobj(wbits)
+        while not decompressobj.eof:
+            ret = decompressobj.decompress(data, DECOMPRESS_CHUNK_SIZE)
+            data = decompressobj.unconsumed_tail
+            if not ret and not data and not decompressobj.eof:
+                raise ValueError("Compressed data is truncated")
+            length += len(ret)
+            check_length(length, max_length)
+            rets.append(ret)
+        # gzip data can have multiple members
+        data = decompressobj.unused_data
+    return b''.join(rets)
+
+
+def zstd_decompress(data, max_length=None):
+    rets, length = [], 0
+    # read_across_frames for the data compressed in multiple frames
+    with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data), read_across_frames=True) as reader:
+        while True:
+            ret = reader.read(DECOMPRESS_CHUNK_SIZE)
+            if not ret:
+                break
+            length += len(ret)
+            check_length(length, max_length)
+            rets.append(ret)
+    return b''.join(rets)
+
+
+def decompress(data, encoding, max_length=None):
+    """
+    Decompress data with the content encoding, in chunks.
+
+    :param max_length: maximum size of the decompressed data. It stops and raises
+                       DecompressionLimitExceeded as soon as the data is bigger than it.
+    :returns: decompressed bytes.
+    """
+    if encoding == 'zstd' and zstandard is not None:
+        return zstd_decompress(data, max_length=max_length)
+    elif encoding in ['gzip', 'x-gzip']:
+        return zlib_decompress(data, 16 + zlib.MAX_WBITS, max_length=max_length)
+    elif encoding == 'deflate':
+        return zlib_decompress(data, zlib.MAX_WBITS, max_length=max_length)
+    raise ValueError("Content encoding %s is not supported" % encoding)
+
+
+def get_compressobj(encoding, level=None):
+    """
+    Get a streaming compressor with the methods compress(data) and flush().
+    """
+    if encoding == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=level or 3).compressobj()
+    elif encoding == 'gzip':
+        return zlib.compressobj(level or 6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    raise ValueError("Content encoding %s is not supported" % encoding)
+
+
+def parse_accept_encoding(accept_encoding):
+    """
+    Parse the Accept-Encoding header.
+
+    :returns: dict of {encoding: q}.
+    """
+    rets = {}
+    if not accept_encoding:
+        return rets
+    for item in accept_encoding.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        items = item.split(';')
+        encoding, q = items[0].strip().lower(), 1.0
+        for param in items[1:]:
+            param = param.strip()
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        rets[encoding] = q
+    return rets
+
+
+def select_encoding(accept_encoding, encodings=None):
+    """
+    Select the content encoding for the Accept-Encoding header.
+
+    :param accept_encoding: the Accept-Encoding header, or a list of encodings.
+    :param encodings: the encodings supported by this side. Defaults to get_supported_encodings().
+    :returns: the encoding, or None if nothing matches.
+    """
+    if encodings is None:
+        encodings = get_supported_encodings()
+    if isinstance(accept_encoding, (list, tuple)):
+        accepted = dict([(e.lower(), 1.0) for e in accept_encoding])
+    else:
+        accepted = parse_accept_encoding(accept_encoding)
+    for encoding in encodings:
+        q = accepted.get(encoding, accepted.get('*', 0))
+        if q > 0:
+            return encoding
+    return None
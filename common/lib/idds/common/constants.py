@@ -12,6 +12,8 @@
 Constants.
 """
 
+import threading
+
 from enum import Enum
 
 
@@ -50,6 +52,7 @@ class HTTP_STATUS_CODE:
     NotFound = 404
     NoMethod = 405
     Conflict = 409
+    UnsupportedMediaType = 415
 
     # Server Errors
     InternalError = 500
@@ -632,13 +635,21 @@ class ReturnCode(IDDSEnum):
 
 class GracefulEvent(object):
     def __init__(self):
-        self.__is_set = False
+        self.__event = threading.Event()
 
     def set(self):
-        self.__is_set = True
+        self.__event.set()
 
     def is_set(self):
-        return self.__is_set
+        return self.__event.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Block until it's set or timeout.
+
+        :returns: True if it's set.
+        """
+        return self.__event.wait(timeout)
 
 
 class AsyncResultStatus(IDDSEnum):
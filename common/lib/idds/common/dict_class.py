@@ -6,7 +6,7 @@
 # http://www.apache.org/licenses/LICENSE-2.0OA
 #
 # Authors:
-# - Wen Guan, <wen.guan@cern.ch>, 2020 - 2025
+# - Wen Guan, <wen.guan@cern.ch>, 2020 - 2026
 
 """
 Dict class.
@@ -23,6 +23,11 @@ from enum import Enum
 
 
 class DictClass(object):
+    # (module, class) -> (cls, init_kwargs), filled by load_class
+    _class_cache = {}
+    # attributes which are not serialized by to_dict, the subclasses rebuild them after loading
+    transient_items = []
+
     def __init__(self, loading=False):
         self._zip_items = []
         self._not_auto_unzip_items = []
@@ -148,7 +153,9 @@ class DictClass(object):
             # print(value)
             # if not key.startswith('__') and not key.startswith('_'):
             if not key.startswith('__'):
-                if key in ['logger']:
+                if key in self.transient_items:
+                    continue
+                elif key in ['logger']:
                     new_value = None
                 elif hasattr(self, 'should_zip') and self.should_zip(key):
                     new_value = self.zip_data(value, name=key)
@@ -175,22 +182,44 @@ class DictClass(object):
             return True
         return False
 
+    @staticmethod
+    def load_class(module_name, class_name):
+        """
+        Resolve a class and the keyword arguments to construct it when loading.
+        The result is cached per (module, class) for the whole process, so
+        no import or signature introspection is needed after the first call.
+
+        :returns: (cls, init_kwargs). init_kwargs is None for Enum classes.
+        """
+        key = (module_name, class_name)
+        ret = DictClass._class_cache.get(key, None)
+        if ret is None:
+            module = __import__(module_name, fromlist=[None])
+            cls = getattr(module, class_name)
+            if issubclass(cls, Enum):
+                init_kwargs = None
+            else:
+                sig = inspect.signature(cls.__init__)
+                init_kwargs = {}
+                if 'json_load' in sig.parameters:
+                    init_kwargs['json_load'] = True
+                if 'loading' in sig.parameters:
+                    init_kwargs['loading'] = True
+            ret = (cls, init_kwargs)
+            DictClass._class_cache[key] = ret
+        return ret
+
+    @staticmethod
+    def clear_class_cache():
+        DictClass._class_cache.clear()
+
     @staticmethod
     def load_instance(d):
-        module = __import__(d['module'], fromlist=[None])
-        cls = getattr(module, d['class'])
-        if issubclass(cls, Enum):
+        cls, init_kwargs = DictClass.load_class(d['module'], d['class'])
+        if init_kwargs is None:
             impl = cls(d['attributes']['_value_'])
         else:
-            sig = inspect.signature(cls.__init__)
-            if 'json_load' in sig.parameters and 'loading' in sig.parameters:
-                impl = cls(json_load=True, loading=True)
-            elif 'json_load' in sig.parameters:
-                impl = cls(json_load=True)
-            elif 'loading' in sig.parameters:
-                impl = cls(loading=True)
-            else:
-                impl = cls()
+            impl = cls(**init_kwargs)
             impl._loading = False
         return impl
 
@@ -220,7 +249,7 @@ class DictClass(object):
             last_items = {}
             for key, value in d['attributes'].items():
                 # print(key)
-                if key in ['logger']:
+                if key in ['logger'] or key in getattr(impl, 'transient_items', []):
                     continue
                 elif key == "_metadata":
                     last_items[key] = value
@@ -654,6 +654,9 @@ class DictClassEncoder(json.JSONEncoder):
         # print(obj)
         if isinstance(obj, IDDSEnum) or isinstance(obj, DictClass):
             return obj.to_dict()
+        elif hasattr(obj, 'materialize'):
+            # lazily loaded json values, e.g. idds.orm.base.types.LazyJSONValue
+            return obj.materialize()
         elif isinstance(obj, datetime.datetime):
             return date_to_str(obj)
         elif isinstance(obj, datetime.timedelta):
@@ -1089,46 +1092,102 @@ def is_execluded_file(file, exclude_files=[]):
     return False
 
 
+def safe_relpath(path, base):
+    """Compute relative path, resolving symlinks to avoid '../' chains."""
+    rel = os.path.relpath(os.path.realpath(path), os.path.realpath(base))
+    if rel.startswith('..'):
+        # Fallback to basename if paths don't share a common prefix
+        rel = os.path.basename(path)
+    return rel
+
+
+def get_archive_files(files, exclude_files=[]):
+    """
+    Get the files to be archived, in a stable order.
+
+    :param files: list of files or directories.
+    :param exclude_files: names or patterns of files/directories to be excluded.
+    :returns: list of (file_path, arcname).
+    """
+    rets = []
+    for local_file in files:
+        if os.path.isfile(local_file):
+            if is_execluded_file(local_file, exclude_files):
+                continue
+            rets.append((local_file, os.path.basename(local_file)))
+        elif os.path.isdir(local_file):
+            for filename in sorted(os.listdir(local_file)):
+                if is_execluded_file(filename, exclude_files):
+                    continue
+                file_path = os.path.join(local_file, filename)
+                if os.path.isfile(file_path):
+                    rets.append((file_path, safe_relpath(file_path, local_file)))
+                elif os.path.isdir(file_path):
+                    for root, dirs, fs in os.walk(file_path):
+                        dirs[:] = sorted([d for d in dirs if not is_execluded_file(d, exclude_files)])
+                        for f in sorted(fs):
+                            if not is_execluded_file(f, exclude_files):
+                                sub_file_path = os.path.join(root, f)
+                                rets.append((sub_file_path, safe_relpath(sub_file_path, local_file)))
+    return rets
+
+
 def create_archive_file(work_dir, archive_filename, files, exclude_files=[]):
     if not archive_filename.startswith("/"):
         archive_filename = os.path.join(work_dir, archive_filename)
 
-    def safe_relpath(path, base):
-        """Compute relative path, resolving symlinks to avoid '../' chains."""
-        rel = os.path.relpath(os.path.realpath(path), os.path.realpath(base))
-        if rel.startswith('..'):
-            # Fallback to basename if paths don't share a common prefix
-            rel = os.path.basename(path)
-        return rel
-
     with tarfile.open(archive_filename, "w:gz", dereference=True) as tar:
-        for local_file in files:
-            if os.path.isfile(local_file):
-                if is_execluded_file(local_file, exclude_files):
-                    continue
-                # base_name = os.path.basename(local_file)
-                tar.add(local_file, arcname=os.path.basename(local_file))
-            elif os.path.isdir(local_file):
-                for filename in os.listdir(local_file):
-                    if is_execluded_file(filename, exclude_files):
-                        continue
-                    if os.path.isfile(filename):
-                        file_path = os.path.join(local_file, filename)
-                        tar.add(
-                            file_path, arcname=safe_relpath(file_path, local_file)
-                        )
-                    elif os.path.isdir(filename):
-                        for root, dirs, fs in os.walk(filename):
-                            for f in fs:
-                                if not is_execluded_file(f, exclude_files):
-                                    file_path = os.path.join(root, f)
-                                    tar.add(
-                                        file_path,
-                                        arcname=safe_relpath(file_path, local_file),
-                                    )
+        for file_path, arcname in get_archive_files(files, exclude_files=exclude_files):
+            tar.add(file_path, arcname=arcname)
     return archive_filename
 
 
+def get_file_digest(file_path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_source_manifest(files, exclude_files=[], digest_cache=None):
+    """
+    Get the content manifest of the files to be archived.
+
+    :param files: list of files or directories.
+    :param exclude_files: names or patterns of files/directories to be excluded.
+    :param digest_cache: dict of {file_path: [size, mtime, digest]} from the previous call. The digests of
+                         files with the same size and mtime are reused instead of reading the files.
+                         It's updated in place with the current files.
+    :returns: list of [arcname, size, mtime, digest].
+    """
+    manifest = []
+    new_digest_cache = {}
+    for file_path, arcname in get_archive_files(files, exclude_files=exclude_files):
+        stat = os.stat(file_path)
+        key = os.path.abspath(file_path)
+        cached = digest_cache.get(key) if digest_cache is not None else None
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            digest = cached[2]
+        else:
+            digest = get_file_digest(file_path)
+        new_digest_cache[key] = [stat.st_size, stat.st_mtime_ns, digest]
+        manifest.append([arcname, stat.st_size, stat.st_mtime_ns, digest])
+    if digest_cache is not None:
+        digest_cache.clear()
+        digest_cache.update(new_digest_cache)
+    return manifest
+
+
+def get_source_manifest_hash(manifest):
+    """
+    Get the content hash of a manifest. The mtime is not included,
+    so touching a file doesn't change the hash.
+    """
+    items = sorted([[arcname, size, digest] for arcname, size, mtime, digest in manifest])
+    return hashlib.sha256(json.dumps(items).encode("utf-8")).hexdigest()
+
+
 class SecureString(object):
     def __init__(self, value):
         self._value = value
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+Loading and caching of the dependency maps of DomaPanDAWork.
+"""
+
+import base64
+import collections
+import json
+import os
+import threading
+import zlib
+
+
+def iter_dependency_map_file(file_name, chunk_size=4 * 1024 * 1024):
+    """
+    Iterate the jobs of a dependency map file which is a json list, without reading the whole file in memory.
+
+    :param file_name: The dependency map file.
+    :param chunk_size: The size of every read.
+    :returns: generator of jobs.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_name, 'r') as fd:
+        buf, pos, eof = '', 0, False
+        started = False
+        while True:
+            # skip whitespaces and separators
+            while True:
+                while pos < len(buf) and (buf[pos].isspace() or (started and buf[pos] == ',')):
+                    pos += 1
+                if pos < len(buf) or eof:
+                    break
+                buf, pos = fd.read(chunk_size), 0
+                eof = not buf
+            if pos >= len(buf):
+                raise ValueError("Unexpected end of dependency map file %s" % file_name)
+            if not started:
+                if buf[pos] != '[':
+                    raise ValueError("Dependency map file %s is not a json list" % file_name)
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                return
+
+            try:
+                job, end = decoder.raw_decode(buf, pos)
+                # an item must be followed by ',' or ']'. Otherwise it may be truncated at the end
+                # of the buffer, for example '15000000000.' of '15000000000.5' decodes as 15000000000.
+                next_pos = end
+                while next_pos < len(buf) and buf[next_pos].isspace():
+                    next_pos += 1
+                if next_pos >= len(buf) or buf[next_pos] not in ',]':
+                    raise json.JSONDecodeError("Need more data", buf, end)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = fd.read(chunk_size)
+                eof = not more
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield job
+            pos = end
+            if pos > chunk_size:
+                buf, pos = buf[pos:], 0
+
+
+def load_dependency_map_file(file_name):
+    """
+    Load a dependency map file, which is a json list or a zipped dependency map.
+
+    :returns: (dependency map, size of the json data)
+    """
+    with open(file_name, 'r') as fd:
+        head = fd.read(1024).lstrip()
+    if head.startswith('['):
+        return list(iter_dependency_map_file(file_name)), os.path.getsize(file_name)
+
+    with open(file_name, 'r') as fd:
+        data = json.load(fd)
+    if type(data) in [str] and data.startswith("idds_zip:"):
+        return load_zipped_dependency_map(data)
+    return data, os.path.getsize(file_name)
+
+
+def load_zipped_dependency_map(data):
+    """
+    Unzip a dependency map zipped by DictClass.zip_data.
+
+    :returns: (dependency map, size of the json data)
+    """
+    json_str = zlib.decompress(base64.b64decode(data[9:])).decode()
+    return json.loads(json_str), len(json_str)
+
+
+class DependencyMapCache(object):
+    """
+    Per-process LRU cache of the loaded dependency maps.
+
+    Maps in files are keyed by (file name, mtime, size), zipped maps by their content.
+    The size is bounded by the total size of the json data of the cached maps.
+    The cached maps are shared, they should not be modified.
+    """
+
+    def __init__(self, max_size=1024 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_max_size(self, max_size):
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.size = 0
+
+    def _evict(self):
+        while self._cache and self.size > self.max_size:
+            key, (source, data, size) = self._cache.popitem(last=False)
+            self.size -= size
+
+    def _get(self, key, source=None):
+        with self._lock:
+            item = self._cache.get(key, None)
+            # the content is compared to be safe from hash collisions
+            if item is not None and (source is None or item[0] == source):
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+        return None
+
+    def _set(self, key, data, size, source=None):
+        with self._lock:
+            if key in self._cache:
+                self.size -= self._cache.pop(key)[2]
+            if size <= self.max_size:
+                self._cache[key] = (source, data, size)
+                self.size += size
+                self._evict()
+
+    def get_file(self, file_name):
+        """
+        Get the dependency map in a file. The file is reloaded when it's changed.
+        """
+        stat = os.stat(file_name)
+        key = ('file', file_name, stat.st_mtime_ns, stat.st_size)
+        data = self._get(key)
+        if data is None:
+            data, size = load_dependency_map_file(file_name)
+            self._set(key, data, size)
+        return data
+
+    def get_zipped(self, data):
+        """
+        Get the dependency map of zipped data. Not zipped data is returned directly.
+        """
+        if type(data) not in [str] or not data.startswith("idds_zip:"):
+            return data
+        key = ('zip', hash(data), len(data))
+        dependency_map = self._get(key, source=data)
+        if dependency_map is None:
+            dependency_map, size = load_zipped_dependency_map(data)
+            self._set(key, dependency_map, size + len(data), source=data)
+        return dependency_map
+
+
+dependency_map_cache = DependencyMapCache()
@@ -30,6 +30,9 @@ from idds.common.utils import get_list_chunks, split_chunks_not_continous
 from idds.workflowv2.work import Work, Processing
 from idds.workflowv2.workflow import Condition
 
+from .dependencymap import dependency_map_cache
+from .jobstatuscache import panda_job_status_cache
+
 
 class DomaCondition(Condition):
     def __init__(self, cond=None, current_work=None, true_work=None, false_work=None):
@@ -228,19 +231,20 @@ class DomaPanDAWork(Work):
 
     @property
     def dependency_map(self):
+        """
+        The unzipped dependency map, loaded from the additional data storage if it's stored there.
+        The loaded maps are cached per process and shared, they should not be modified.
+        """
         if self.should_unzip('_dependency_map'):
-            self.logger.debug("unzipping _dependency_map")
-            data = self.unzip_data(self._dependency_map)
+            data = dependency_map_cache.get_zipped(self._dependency_map)
         else:
             data = self._dependency_map
 
         if data is None:
             data = {}
 
-        if data and 'idds_dependency_map_file' in data and data['idds_dependency_map_file']:
-            with open(data['idds_dependency_map_file'], 'r') as fd:
-                data = json.load(fd)
-                data = self.unzip_data(data)
+        if data and type(data) in [dict] and 'idds_dependency_map_file' in data and data['idds_dependency_map_file']:
+            data = dependency_map_cache.get_file(data['idds_dependency_map_file'])
 
         num_inputs, num_dependencies = self.count_dependencies(data)
         self.num_inputs = num_inputs
@@ -508,6 +512,26 @@ class DomaPanDAWork(Work):
             except Exception as ex:
                 self.logger.warn(f"Failed to set max_dependency_map_length: {ex}")
 
+        if 'dependency_map_cache_size' in self.agent_attributes and self.agent_attributes['dependency_map_cache_size']:
+            try:
+                # in MB
+                dependency_map_cache.set_max_size(int(self.agent_attributes['dependency_map_cache_size']) * 1024 * 1024)
+            except Exception as ex:
+                self.logger.warn(f"Failed to set dependency_map_cache_size: {ex}")
+
+        if 'panda_job_status_cache_stale_time' in self.agent_attributes and self.agent_attributes['panda_job_status_cache_stale_time']:
+            try:
+                # in seconds
+                panda_job_status_cache.set_stale_time(int(self.agent_attributes['panda_job_status_cache_stale_time']))
+            except Exception as ex:
+                self.logger.warn(f"Failed to set panda_job_status_cache_stale_time: {ex}")
+
+        if 'panda_job_status_cache_max_tasks' in self.agent_attributes and self.agent_attributes['panda_job_status_cache_max_tasks']:
+            try:
+                panda_job_status_cache.set_max_tasks(int(self.agent_attributes['panda_job_status_cache_max_tasks']))
+            except Exception as ex:
+                self.logger.warn(f"Failed to set panda_job_status_cache_max_tasks: {ex}")
+
         if 'dependency_map_dir' in self.agent_attributes and self.agent_attributes['dependency_map_dir']:
             try:
                 self.dependency_map_dir = self.agent_attributes['dependency_map_dir']
@@ -669,7 +693,7 @@ class DomaPanDAWork(Work):
 
     def get_unmapped_jobs(self, mapped_input_output_maps={}):
         mapped_outputs = self.get_mapped_outputs(mapped_input_output_maps)
-        mapped_outputs_name = [ip['name'] for ip in mapped_outputs]
+        mapped_outputs_name = set([ip['name'] for ip in mapped_outputs])
         unmapped_jobs = []
         for job in self.dependency_map:
             output_name = job['name']
@@ -1407,9 +1431,20 @@ class DomaPanDAWork(Work):
         unterminated_jobs = all_jobs_ids - terminated_jobs_final
         return list(unterminated_jobs)
 
-    def get_panda_job_status(self, jobids, log_prefix='', debug=True):
+    def get_panda_job_status(self, jobids, log_prefix='', debug=True, task_id=None):
+        """
+        Get the job infos of the jobs. With task_id, terminated jobs are taken from panda_job_status_cache.
+        """
         if debug:
             self.logger.debug(log_prefix + "get_panda_job_status, jobids[:10]: %s" % str(jobids[:10]))
+        cached_jobs = []
+        if task_id is not None:
+            cached, jobids = panda_job_status_cache.get_jobs(task_id, [int(jobid) for jobid in jobids])
+            cached_jobs = list(cached.values())
+            if debug and cached_jobs:
+                self.logger.debug(log_prefix + "get_panda_job_status, cached terminated jobs: %s, jobs to poll: %s" % (len(cached_jobs), len(jobids)))
+            if not jobids:
+                return cached_jobs
         try:
             from pandaclient import Client
             ret = Client.getJobStatus(jobids, verbose=0)
@@ -1431,14 +1466,16 @@ class DomaPanDAWork(Work):
                     except Exception as ex:
                         self.logger.error(str(ex))
                         self.logger.error(traceback.format_exc())
-                return ret_jobs
+                if task_id is not None:
+                    panda_job_status_cache.set_jobs(task_id, ret_jobs)
+                return cached_jobs + ret_jobs
             else:
                 self.logger.warn(log_prefix + "get_panda_job_status failed: %s" % str(ret))
-                return []
+                return cached_jobs
         except Exception as ex:
             self.logger.error(str(ex))
             self.logger.error(traceback.format_exc())
-        return []
+        return cached_jobs
 
     def get_last_job_info(self, jobs):
         # job = {'panda_id': job_info.PandaID, 'status': job_status, 'job_info': job_info}
@@ -1472,30 +1509,61 @@ class DomaPanDAWork(Work):
                         pass
         return sorted(panda_ids), job_status, last_job_info
 
-    def get_panda_event_status(self, jobids, log_prefix=''):
+    def get_panda_event_status(self, jobids, log_prefix='', terminated_ids=None):
+        """
+        Get the events status of the jobs, [{'task_id': task_id, 'panda_id': panda_id}].
+
+        :param terminated_ids: panda ids of terminated jobs, whose events status is cached in panda_job_status_cache.
+        :returns: {str(panda_id): events}.
+        """
         self.logger.debug(log_prefix + "get_panda_event_status, jobids[:3]: %s" % str(jobids[:3]))
+        job_events_status = {}
+        if terminated_ids:
+            to_poll_jobids = []
+            task_terminated_ids = {}
+            for jobid in jobids:
+                if int(jobid['panda_id']) in terminated_ids:
+                    task_terminated_ids.setdefault(jobid['task_id'], []).append(int(jobid['panda_id']))
+                else:
+                    to_poll_jobids.append(jobid)
+            for task_id, panda_ids in task_terminated_ids.items():
+                cached, left = panda_job_status_cache.get_events(task_id, panda_ids)
+                for panda_id, events in cached.items():
+                    job_events_status[str(panda_id)] = events
+                to_poll_jobids.extend([{'task_id': task_id, 'panda_id': panda_id} for panda_id in left])
+            jobids = to_poll_jobids
+            if not jobids:
+                return job_events_status
         try:
             from pandaclient import Client
             ret = Client.get_events_status(jobids, verbose=True)
             if ret[0] == 0:
-                job_events_status = ret[1]
+                if terminated_ids:
+                    for jobid in jobids:
+                        panda_id = int(jobid['panda_id'])
+                        if panda_id in terminated_ids and str(panda_id) in ret[1]:
+                            panda_job_status_cache.set_events(jobid['task_id'], {panda_id: ret[1][str(panda_id)]})
+                job_events_status.update(ret[1])
                 return job_events_status
         except Exception as ex:
             self.logger.error(str(ex))
             self.logger.error(traceback.format_exc())
-        return {}
+        return job_events_status
 
-    def poll_panda_events(self, event_ids, log_prefix=''):
+    def poll_panda_events(self, event_ids, log_prefix='', terminated_ids=None):
         self.logger.debug(log_prefix + "poll_panda_events, poll_panda_jobs_chunk_size: %s, event_ids[:3]: %s" % (self.poll_panda_jobs_chunk_size, str(event_ids[:3])))
         chunksize = self.poll_panda_jobs_chunk_size
         chunks = [event_ids[i:i + chunksize] for i in range(0, len(event_ids), chunksize)]
         jobs_event_status = {}
         for chunk in chunks:
-            job_event_status = self.get_panda_event_status(chunk, log_prefix=log_prefix)
+            job_event_status = self.get_panda_event_status(chunk, log_prefix=log_prefix, terminated_ids=terminated_ids)
             jobs_event_status.update(job_event_status)
         return jobs_event_status
 
-    def poll_panda_jobs(self, job_ids, executors=None, update_panda_id=True, log_prefix=''):
+    def poll_panda_jobs(self, job_ids, executors=None, update_panda_id=True, log_prefix='', task_id=None):
+        """
+        Poll the status of the jobs. With task_id, the status of terminated jobs is cached across polls.
+        """
         job_status_info = {}
         self.logger.debug(log_prefix + "poll_panda_jobs, num job_ids: %s, poll_panda_jobs_chunk_size: %s, job_ids[:10]: %s" % (len(job_ids), self.poll_panda_jobs_chunk_size, str(job_ids[:10])))
         chunksize = self.poll_panda_jobs_chunk_size
@@ -1503,7 +1571,7 @@ class DomaPanDAWork(Work):
         if executors is None:
             for chunk in chunks:
                 # jobs_list = Client.getJobStatus(chunk, verbose=0)[1]
-                jobs_list = self.get_panda_job_status(chunk, log_prefix=log_prefix)
+                jobs_list = self.get_panda_job_status(chunk, log_prefix=log_prefix, task_id=task_id)
                 if jobs_list:
                     self.logger.debug(log_prefix + "poll_panda_jobs, input jobs: %s, output_jobs: %s" % (len(chunk), len(jobs_list)))
                     for job_info in jobs_list:
@@ -1529,7 +1597,7 @@ class DomaPanDAWork(Work):
         else:
             future_to_chunk = {}
             for i, chunk in enumerate(chunks):
-                f = executors.submit(self.get_panda_job_status, chunk, log_prefix)
+                f = executors.submit(self.get_panda_job_status, chunk, log_prefix, task_id=task_id)
                 future_to_chunk[f] = chunk
             ret_futures = set(future_to_chunk.keys())
             # Wait for all subprocess to complete
@@ -1582,6 +1650,8 @@ class DomaPanDAWork(Work):
                         job_status_info[filename]['panda_id'] = panda_ids
         else:
             es_job_ids = []
+            # the events of terminated jobs don't change. The events of a job set are not cached.
+            terminated_ids = set()
             self.logger.debug("job_status_info: %s" % (job_status_info))
             for filename in job_status_info:
                 job_set_id = job_status_info[filename]['job_set_id']
@@ -1593,13 +1663,15 @@ class DomaPanDAWork(Work):
                     if update_panda_id:
                         job_status_info[filename]['panda_id'] = panda_ids
                 if status in [ContentStatus.FinalSubAvailable, ContentStatus.FinalFailed]:
-                    task_id = job_info.jediTaskID
-                    es_job_id = {'task_id': task_id, 'panda_id': job_set_id}
+                    es_task_id = job_info.jediTaskID
+                    es_job_id = {'task_id': es_task_id, 'panda_id': job_set_id}
                     es_job_ids.append(es_job_id)
                     for panda_id in panda_ids:
-                        es_job_id = {'task_id': task_id, 'panda_id': panda_id}
+                        es_job_id = {'task_id': es_task_id, 'panda_id': panda_id}
                         es_job_ids.append(es_job_id)
-            job_events_status = self.poll_panda_events(es_job_ids)
+                        if int(panda_id) != int(job_set_id):
+                            terminated_ids.add(int(panda_id))
+            job_events_status = self.poll_panda_events(es_job_ids, terminated_ids=terminated_ids)
             self.logger.debug("poll_panda_events, es_job_ids: %s, job_events_status: %s" % (str(es_job_ids), job_events_status))
             for filename in job_status_info:
                 jobs = job_status_info[filename]['jobs']
@@ -2074,7 +2146,7 @@ class DomaPanDAWork(Work):
                     unterminated_jobs = self.get_unterminated_jobs(all_jobs_ids, input_output_maps, contents_ext)
                     self.logger.debug(log_prefix + "poll_panda_task, task_id: %s, all jobs: %s, unterminated_jobs: %s" % (str(task_id), len(all_jobs_ids), len(unterminated_jobs)))
 
-                    unterminated_jobs_status = self.poll_panda_jobs(unterminated_jobs, executors=executors, log_prefix=log_prefix)
+                    unterminated_jobs_status = self.poll_panda_jobs(unterminated_jobs, executors=executors, log_prefix=log_prefix, task_id=task_id)
                     # self.logger.debug(log_prefix + "unterminated_jobs_status: %s" % str(unterminated_jobs_status))
                     self.logger.debug(log_prefix + f"unterminated_jobs_status[:3]: {dict(list(unterminated_jobs_status.items())[:3])}")
 
@@ -2160,7 +2232,7 @@ class DomaPanDAWork(Work):
                     # self.logger.debug(log_prefix + "poll_panda_task, task_id: %s, all jobs: %s, unterminated_jobs: %s" % (str(task_id), len(all_jobs_ids), len(unterminated_jobs)))
 
                     if unterminated_jobs:
-                        unterminated_jobs_status = self.poll_panda_jobs(unterminated_jobs, executors=executors, log_prefix=log_prefix)
+                        unterminated_jobs_status = self.poll_panda_jobs(unterminated_jobs, executors=executors, log_prefix=log_prefix, task_id=task_id)
                     else:
                         unterminated_jobs_status = {}
                     # self.logger.debug(log_prefix + "unterminated_jobs_status: %s" % str(unterminated_jobs_status))
@@ -15,7 +15,9 @@ Construct tree from a generic workflow
 
 import json
 
-from idds.workflowv2.tree import JobNode, LabelNode, Tree
+from array import array
+
+from idds.workflowv2.tree import CompactDAG, LabelNode, Tree
 
 
 class DomaTree(Tree):
@@ -24,6 +26,8 @@ class DomaTree(Tree):
         self._label_grouping = {'default': {'grouping': True, 'grouping_max_jobs': 100}}
         self.job_tree_roots = None
         self.job_nodes = None
+        self.job_ranks = None
+        self.num_ranked_jobs = 0
         self.label_jobs = None
         self.label_parent_labels = None
 
@@ -35,99 +39,118 @@ class DomaTree(Tree):
         self._label_grouping[label] = {'grouping': grouping, 'max_jobs': max_jobs}
 
     def get_job_tree(self, generic_workflow):
-        job_tree_roots = []
-        job_nodes = {}
+        """
+        Construct the job graph.
 
+        :returns: (ids of root jobs, CompactDAG of jobs with gwjob as node data,
+                   {label: ids of jobs}, {label: parent labels})
+        """
+        job_nodes = CompactDAG()
         label_jobs = {}
         label_parent_labels = {}
         for job_label in generic_workflow.labels:
             if job_label not in label_jobs:
-                label_jobs[job_label] = []
+                label_jobs[job_label] = array('q')
                 label_parent_labels[job_label] = []
             jobs_by_label = generic_workflow.get_jobs_by_label(job_label)
             for gwjob in jobs_by_label:
-                deps = []
-                for parent_job_name in generic_workflow.predecessors(gwjob.name):
-                    # deps.append(parent_job_name)
-                    parent_job = generic_workflow.get_job(parent_job_name)
-                    deps.append(parent_job)
-                    if parent_job.label not in label_parent_labels[job_label]:
-                        label_parent_labels[job_label].append(parent_job.label)
-
-                node = JobNode(gwjob.name, label=job_label, gwjob=gwjob, deps=deps)
-                label_jobs[job_label].append(node)
-                job_nodes[gwjob.name] = node
-
-                if not node.deps:
-                    job_tree_roots.append(node)
-                else:
-                    for dep in node.deps:
-                        dep_node = job_nodes[dep.name]
-                        dep_node.add_child(node)
+                label_jobs[job_label].append(job_nodes.add_node(gwjob.name, gwjob))
+
+        job_tree_roots = array('q')
+        for job_id, gwjob in enumerate(job_nodes.data):
+            parent_labels = label_parent_labels[gwjob.label]
+            num_parents = 0
+            for parent_job_name in generic_workflow.predecessors(gwjob.name):
+                parent_id = job_nodes.get_node_id(parent_job_name)
+                job_nodes.add_edge(parent_id, job_id)
+                num_parents += 1
+                parent_label = job_nodes.data[parent_id].label
+                if parent_label not in parent_labels:
+                    parent_labels.append(parent_label)
+            if not num_parents:
+                job_tree_roots.append(job_id)
+        job_nodes.build()
         return job_tree_roots, job_nodes, label_jobs, label_parent_labels
 
     def get_label_tree(self, generic_workflow, label_parent_labels, label_jobs):
+        label_dag = CompactDAG()
+        for job_label in generic_workflow.labels:
+            label_dag.add_node(job_label)
+        for job_label in generic_workflow.labels:
+            for parent_label in label_parent_labels[job_label]:
+                if parent_label != job_label:
+                    label_dag.add_edge(label_dag.get_node_id(parent_label), label_dag.get_node_id(job_label))
+        ordered_labels = label_dag.order_by_level()
+        levels = label_dag.levels
+        if len(ordered_labels) < len(label_dag):
+            max_level = max([levels[i] for i in ordered_labels]) if ordered_labels else -1
+            ordered = set(ordered_labels)
+            loop_labels = [label_dag.names[i] for i in range(len(label_dag)) if i not in ordered]
+            self.logger.warning("There are loop dependencies between labels: %s" % loop_labels)
+            for i in range(len(label_dag)):
+                if i not in ordered:
+                    levels[i] = max_level + 1
+
         label_tree_roots, label_nodes = [], {}
         for job_label in generic_workflow.labels:
-            # jobs_by_label = generic_workflow.get_jobs_by_label(job_label)
             jobs_by_label = label_jobs[job_label]
-            one_gwjob = jobs_by_label[0].gwjob
+            one_gwjob = self.job_nodes.data[jobs_by_label[0]]
             label_node = LabelNode(job_label, jobs=jobs_by_label, compute_cloud=one_gwjob.compute_cloud,
                                    compute_site=one_gwjob.compute_site, queue=one_gwjob.queue,
                                    request_memory=one_gwjob.request_memory,
                                    one_gwjob=one_gwjob)
+            # the level is set before linking the children, to avoid propagating it
+            label_node.level = levels[label_dag.get_node_id(job_label)]
             label_nodes[job_label] = label_node
-            if not label_parent_labels[job_label]:
+            if not label_dag.num_parents(label_dag.get_node_id(job_label)):
                 label_tree_roots.append(label_node)
-            else:
-                for parent_label in label_parent_labels[job_label]:
-                    parent_node = label_nodes[parent_label]
-                    parent_node.add_child(label_node)
-
-        # set level here
-        for root in label_tree_roots:
-            root.level = 0
+        for job_label in generic_workflow.labels:
+            for parent_id in label_dag.get_parents(label_dag.get_node_id(job_label)):
+                label_nodes[label_dag.names[parent_id]].add_child(label_nodes[job_label])
         return label_tree_roots, label_nodes
 
     def get_ordered_nodes_by_level(self, roots):
+        """
+        Group the nodes reachable from the roots by level.
+
+        :returns: {level: [nodes]} sorted by level.
+        """
         level_dict = {}
-        has_nodes = True
-        left_nodes = roots
-        while has_nodes:
-            nodes = left_nodes
-            left_nodes = []
-            has_nodes = False
-            for node in nodes:
-                if node.level not in level_dict:
-                    level_dict[node.level] = []
-                level_dict[node.level].append(node)
-                if node.children:
-                    left_nodes.extend(node.children)
-            if left_nodes:
-                has_nodes = True
-
-        return level_dict
+        visited = set()
+        nodes = list(roots)
+        for node in nodes:
+            visited.add(id(node))
+        for node in nodes:
+            if node.level not in level_dict:
+                level_dict[node.level] = []
+            level_dict[node.level].append(node)
+            for child in node.children:
+                if id(child) not in visited:
+                    visited.add(id(child))
+                    nodes.append(child)
+        return dict(sorted(level_dict.items(), key=lambda item: int(item[0])))
 
     def order_job_nodes(self, job_nodes):
-        job_nodes_order_id = {}
-        for job_node in job_nodes:
-            potential_order_id = job_node.get_potential_order_id()
-            if potential_order_id not in job_nodes_order_id:
-                job_nodes_order_id[potential_order_id] = []
-            job_nodes_order_id[potential_order_id].append(job_node)
-        potential_order_ids = sorted(list(job_nodes_order_id.keys()))
-        ordered_job_nodes = []
-        for potential_order_id in potential_order_ids:
-            p_job_nodes = job_nodes_order_id[potential_order_id]
-            for p_job_node in p_job_nodes:
-                ordered_job_nodes.append(p_job_node)
-        order_id = 0
-        for job_node in ordered_job_nodes:
-            job_node.order_id = order_id
-            gwjob = job_node.gwjob
+        """
+        Set the order_id of the jobs of one label. The jobs are ordered by the ranks of
+        their parents in the jobs already ordered, then by their position.
+
+        :param job_nodes: ids of the jobs.
+        """
+        dag, job_ranks = self.job_nodes, self.job_ranks
+        keys = []
+        for job_id in job_nodes:
+            keys.append(tuple(sorted([job_ranks[p] for p in dag.get_parents(job_id) if job_ranks[p] >= 0])))
+        ordered_positions = sorted(range(len(job_nodes)), key=keys.__getitem__)
+        del keys
+
+        for order_id, position in enumerate(ordered_positions):
+            job_id = job_nodes[position]
+            job_ranks[job_id] = self.num_ranked_jobs
+            self.num_ranked_jobs += 1
+            gwjob = dag.data[job_id]
             # gwjob.order_id = order_id
             gwjob.attrs["order_id"] = order_id
-            order_id += 1
 
     def order_job_tree(self, label_level_dict):
         for level in label_level_dict:
@@ -145,8 +168,8 @@ class DomaTree(Tree):
                 label_name = label_node.name
                 job_nodes = label_node.jobs
                 order_id_map[label_name] = {}
-                for job_node in job_nodes:
-                    gwjob = job_node.gwjob
+                for job_id in job_nodes:
+                    gwjob = self.job_nodes.data[job_id]
                     order_id = gwjob.attrs.get("order_id", 0)
                     order_id_map[label_name][str(order_id)] = gwjob.name
         return order_id_map
@@ -161,6 +184,8 @@ class DomaTree(Tree):
         self.job_nodes = job_nodes
         self.label_jobs = label_jobs
         self.label_parent_labels = label_parent_labels
+        self.job_ranks = array('q', [-1]) * len(job_nodes)
+        self.num_ranked_jobs = 0
 
         label_tree_roots, label_nodes = self.get_label_tree(generic_workflow, label_parent_labels, label_jobs)
         self.label_tree_roots = label_tree_roots
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+Caching of the PanDA job status polled by DomaPanDAWork.
+"""
+
+import collections
+import threading
+import time
+
+
+class PanDAJobStatusCache(object):
+    """
+    Per-process cache of the status and the events of terminated PanDA jobs, per task.
+
+    The status of a terminated job doesn't change, so it's not polled again until it's older than stale_time.
+    Jobs still in flight are not cached. The number of cached tasks is bounded (LRU).
+    """
+
+    terminated_status = ['finished', 'failed', 'cancelled', 'closed']
+
+    def __init__(self, stale_time=3600, max_tasks=1000):
+        self.stale_time = stale_time
+        self.max_tasks = max_tasks
+        self.hits = 0
+        self.misses = 0
+        self._jobs = collections.OrderedDict()
+        self._events = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_stale_time(self, stale_time):
+        with self._lock:
+            self.stale_time = stale_time
+
+    def set_max_tasks(self, max_tasks):
+        with self._lock:
+            self.max_tasks = max_tasks
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._jobs.clear()
+            self._events.clear()
+
+    def is_terminated(self, job_info):
+        return job_info is not None and job_info.jobStatus in self.terminated_status
+
+    def _evict(self):
+        for cache in [self._jobs, self._events]:
+            while len(cache) > self.max_tasks:
+                cache.popitem(last=False)
+
+    def _get_task(self, cache, task_id, create=False):
+        task = cache.get(task_id, None)
+        if task is None and create:
+            task = {}
+            cache[task_id] = task
+            self._evict()
+        if task is not None:
+            cache.move_to_end(task_id)
+        return task
+
+    def _get(self, cache, task_id, keys):
+        cached, left = {}, []
+        time_now = time.time()
+        with self._lock:
+            task = self._get_task(cache, task_id) or {}
+            for key in keys:
+                item = task.get(key, None)
+                if item is not None and time_now - item[0] < self.stale_time:
+                    cached[key] = item[1]
+                else:
+                    if item is not None:
+                        del task[key]
+                    left.append(key)
+            self.hits += len(cached)
+            self.misses += len(left)
+        return cached, left
+
+    def _set(self, cache, task_id, items):
+        if not items:
+            return
+        time_now = time.time()
+        with self._lock:
+            task = self._get_task(cache, task_id, create=True)
+            for key, value in items.items():
+                task[key] = (time_now, value)
+
+    def get_jobs(self, task_id, panda_ids):
+        """
+        Get the cached status of the jobs.
+
+        :returns: ({panda_id: job_info} of the cached jobs, list of the panda ids to poll).
+        """
+        return self._get(self._jobs, task_id, panda_ids)
+
+    def set_jobs(self, task_id, job_infos):
+        """
+        Cache the terminated jobs in the list of job infos.
+        """
+        self._set(self._jobs, task_id, dict([(int(job_info.PandaID), job_info) for job_info in job_infos if self.is_terminated(job_info)]))
+
+    def get_events(self, task_id, panda_ids):
+        """
+        Get the cached events status of the jobs.
+
+        :returns: ({panda_id: events} of the cached jobs, list of the panda ids to poll).
+        """
+        return self._get(self._events, task_id, panda_ids)
+
+    def set_events(self, task_id, job_events):
+        """
+        Cache the events status of terminated jobs, {panda_id: events}.
+        """
+        self._set(self._events, task_id, job_events)
+
+
+panda_job_status_cache = PanDAJobStatusCache()
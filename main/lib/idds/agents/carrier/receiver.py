@@ -29,7 +29,7 @@ from idds.agents.common.baseagent import BaseAgent
 from idds.agents.common.eventbus.event import (EventType, MessageEvent,
                                                TriggerProcessingEvent)
 
-from .utils import handle_messages_processing
+from .utils import handle_messages_processing, handle_messages_processing_bulk
 from .iutils import handle_messages_asyncresult
 
 setup_logging(__name__)
@@ -42,7 +42,7 @@ class Receiver(BaseAgent):
 
     def __init__(self, receiver_num_threads=8, num_threads=1, bulk_message_delay=30, bulk_message_size=2000,
                  random_delay=None, use_process_pool=False, update_processing_interval=300, mode='single',
-                 separate_logger=False, **kwargs):
+                 separate_logger=False, bulk_message_handling=True, **kwargs):
         super(Receiver, self).__init__(num_threads=receiver_num_threads, name='Receiver', use_process_pool=use_process_pool, **kwargs)
         self.config_section = Sections.Carrier
         self.bulk_message_delay = int(bulk_message_delay)
@@ -56,6 +56,9 @@ class Receiver(BaseAgent):
         else:
             self.update_processing_interval = 300
 
+        # resolve the mappings of a whole bulk of messages together
+        self.bulk_message_handling = bulk_message_handling
+
         self.mode = mode
         self.selected = None
         self.selected_receiver = None
@@ -158,10 +161,16 @@ class Receiver(BaseAgent):
         output_messages_new = []
         for msg in output_messages:
             output_messages_new.append(msg['msg']['body'])
-        ret_msg_handle = handle_messages_processing(output_messages_new,
-                                                    logger=self.logger,
-                                                    log_prefix=log_prefix,
-                                                    update_processing_interval=self.update_processing_interval)
+        if self.bulk_message_handling:
+            ret_msg_handle = handle_messages_processing_bulk(output_messages_new,
+                                                             logger=self.logger,
+                                                             log_prefix=log_prefix,
+                                                             update_processing_interval=self.update_processing_interval)
+        else:
+            ret_msg_handle = handle_messages_processing(output_messages_new,
+                                                        logger=self.logger,
+                                                        log_prefix=log_prefix,
+                                                        update_processing_interval=self.update_processing_interval)
 
         update_processings, update_processings_by_job, terminated_processings, update_contents, msgs = ret_msg_handle
         if msgs:
@@ -303,7 +312,8 @@ class Receiver(BaseAgent):
             time_start = None
             while not self.graceful_stop.is_set():
                 try:
-                    self.execute_schedules()
+                    events_seq = self.event_bus.get_events_seq()
+                    num_events = self.execute_schedules()
 
                     if not time_start or time.time() > time_start + self.bulk_message_delay:
                         self.logger.info(f"is_selected: {self.is_selected()}, is_receiver_started: {self.is_receiver_started()}")
@@ -323,7 +333,8 @@ class Receiver(BaseAgent):
                             # self.process_messages_event(event)
                             self.submit(self.process_messages_event, **{"event": event})
 
-                    self.graceful_stop.wait(0.00001)
+                    if not num_events:
+                        self.wait_events(events_seq, timeout=max(time_start + self.bulk_message_delay - time.time(), 0))
                 except IDDSException as error:
                     self.logger.error("Main thread IDDSException: %s" % str(error))
                 except Exception as error:
@@ -173,7 +173,8 @@ class Submitter(Poller):
                         prs = core_processings.get_processings(
                             request_id=processing['request_id'],
                             internal_ids=parent_internal_ids,
-                            loop_index=processing['loop_index']
+                            loop_index=processing['loop_index'],
+                            lazy_metadata=True
                         )
                         if not prs:
                             pre_works_are_ok = False
@@ -366,7 +367,8 @@ class Submitter(Poller):
                     prs = core_processings.get_processings(
                         request_id=processing['request_id'],
                         internal_ids=parent_internal_ids,
-                        loop_index=processing['loop_index']
+                        loop_index=processing['loop_index'],
+                        lazy_metadata=True
                     )
                     if not prs:
                         pre_works_are_ok = False
@@ -505,7 +507,8 @@ class Submitter(Poller):
                         following_prs = core_processings.get_processings(
                             request_id=processing['request_id'],
                             parent_internal_ids=[processing['internal_id']],
-                            loop_index=processing['loop_index']
+                            loop_index=processing['loop_index'],
+                            lazy_metadata=True
                         )
                         if following_prs:
                             for following_pr in following_prs:
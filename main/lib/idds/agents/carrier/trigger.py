@@ -8,6 +8,7 @@
 # Authors:
 # - Wen Guan, <wen.guan@cern.ch>, 2019 - 2025
 
+import time
 import traceback
 
 from idds.common import exceptions
@@ -33,7 +34,8 @@ class Trigger(Poller):
     """
 
     def __init__(self, num_threads=1, trigger_max_number_workers=None, max_number_workers=3, poll_period=10, retries=3, retrieve_bulk_size=2,
-                 name='Trigger', use_process_pool=False, message_bulk_size=1000, max_updates_per_round=2000, **kwargs):
+                 name='Trigger', use_process_pool=False, message_bulk_size=1000, max_updates_per_round=2000,
+                 dependency_full_scan_period=3600, **kwargs):
         if trigger_max_number_workers:
             self.max_number_workers = int(trigger_max_number_workers)
         else:
@@ -54,6 +56,26 @@ class Trigger(Poller):
             self.max_number_workers = int(self.trigger_max_number_workers)
         self.number_msg_workers = 0
 
+        # updated outputs are pushed to the depending contents when they are triggered.
+        # The inputs of a transform are checked against all dependencies once per period.
+        self.dependency_full_scan_period = int(dependency_full_scan_period)
+        self.dependency_full_scan_times = {}
+        self.logger.info("dependency_full_scan_period: %s" % self.dependency_full_scan_period)
+
+    def is_dependency_full_scan_needed(self, transform_id):
+        last_scan_time = self.dependency_full_scan_times.get(transform_id, None)
+        if last_scan_time is None or last_scan_time + self.dependency_full_scan_period < time.time():
+            return True
+        return False
+
+    def set_dependency_full_scan_time(self, transform_id):
+        now = time.time()
+        if len(self.dependency_full_scan_times) > 10000:
+            for tf_id in list(self.dependency_full_scan_times.keys()):
+                if self.dependency_full_scan_times[tf_id] + self.dependency_full_scan_period < now:
+                    self.dependency_full_scan_times.pop(tf_id, None)
+        self.dependency_full_scan_times[transform_id] = now
+
     def is_ok_to_run_more_msg_processings(self):
         if self.get_num_free_workers() > 0:
             return True
@@ -101,13 +123,17 @@ class Trigger(Poller):
             if self.enable_executors:
                 executors = self.get_extra_executors()
 
+            full_dependency_scan = self.is_dependency_full_scan_needed(processing['transform_id'])
             ret_trigger_processing = handle_trigger_processing(processing,
                                                                self.agent_attributes,
                                                                trigger_new_updates=trigger_new_updates,
                                                                max_updates_per_round=self.max_updates_per_round,
                                                                executors=executors,
+                                                               full_dependency_scan=full_dependency_scan,
                                                                logger=self.logger,
                                                                log_prefix=log_prefix)
+            if full_dependency_scan:
+                self.set_dependency_full_scan_time(processing['transform_id'])
             process_status, update_contents, ret_msgs, parameters, update_dep_contents_status_name, update_dep_contents_status, new_update_contents, ret_update_transforms, has_updates = ret_trigger_processing
 
             self.logger.debug(log_prefix + "handle_trigger_processing: ret_update_transforms: %s" % str(ret_update_transforms))
@@ -8,6 +8,7 @@
 # Authors:
 # - Wen Guan, <wen.guan@cern.ch>, 2022 - 2025
 
+import array
 import concurrent.futures
 import json
 import logging
@@ -30,7 +31,8 @@ from idds.common.constants import (CommandType,
 from idds.common.utils import setup_logging, get_list_chunks
 from idds.core import (transforms as core_transforms,
                        processings as core_processings,
-                       catalog as core_catalog)
+                       catalog as core_catalog,
+                       counters as core_counters)
 from idds.agents.common.cache.redis import get_redis_cache
 
 
@@ -200,6 +202,186 @@ def get_collection_ids(collections):
     return coll_ids
 
 
+def filter_input_output_maps_by_panda_id(input_output_maps, with_panda_id):
+    filtered = {}
+    for map_id, map_contents in input_output_maps.items():
+        outputs = map_contents.get('outputs', [])
+        has_panda_id = any(
+            content.get('content_metadata', {}).get('panda_ids') or  # noqa W504
+            content.get('content_metadata', {}).get('panda_id')
+            for content in outputs
+        )
+        if with_panda_id == has_panda_id:
+            filtered[map_id] = map_contents
+    return filtered
+
+
+class InputOutputMapsSnapshot(object):
+    """
+    The contents of a transform, loaded once per processing update cycle and shared by all steps of the cycle.
+
+    The contents are kept in input_output_maps (keyed by map_id). The map_id, relation type, status and
+    substatus of every content are also kept in parallel arrays, to select the maps of a step without
+    scanning the content dicts or querying the database again. The content updates of the cycle
+    are applied with update_contents, to keep the snapshot consistent with the database.
+
+    With page_size, the snapshot only has the next page_size maps after last_map_id (keyset pagination),
+    to bound the memory of big transforms. The snapshots of all pages are iterated with iter_snapshots.
+    """
+
+    map_keys = {ContentRelationType.Input.value: 'inputs',
+                ContentRelationType.InputDependency.value: 'inputs_dependency',
+                ContentRelationType.Output.value: 'outputs',
+                ContentRelationType.Log.value: 'logs'}
+
+    def __init__(self, request_id, transform_id, work, with_deps=False, page_size=None, last_map_id=None):
+        self.with_sub_map_id = work.with_sub_map_id()
+        self.input_output_maps = core_transforms.get_transform_input_output_maps(request_id,
+                                                                                 transform_id,
+                                                                                 input_coll_ids=[],
+                                                                                 output_coll_ids=[],
+                                                                                 with_sub_map_id=self.with_sub_map_id,
+                                                                                 with_deps=with_deps,
+                                                                                 page_size=page_size,
+                                                                                 last_map_id=last_map_id)
+        self.last_map_id = max(self.input_output_maps) if self.input_output_maps else None
+        self.contents = []
+        self.map_ids = array.array('q')
+        self.relation_types = array.array('b')
+        self.statuses = array.array('h')
+        self.substatuses = array.array('h')
+        self.content_index = {}
+        for map_id, map_contents in self.input_output_maps.items():
+            sub_maps = map_contents.values() if self.with_sub_map_id else [map_contents]
+            for sub_map in sub_maps:
+                for key in ['inputs', 'inputs_dependency', 'outputs', 'logs', 'others']:
+                    for content in sub_map[key]:
+                        self.content_index[content['content_id']] = len(self.contents)
+                        self.contents.append(content)
+                        self.map_ids.append(map_id)
+                        self.relation_types.append(self.get_value(content['content_relation_type']))
+                        self.statuses.append(self.get_value(content['status']))
+                        self.substatuses.append(self.get_value(content['substatus']))
+
+    @classmethod
+    def iter_snapshots(cls, request_id, transform_id, work, with_deps=False, page_size=None):
+        """
+        Iterate the snapshots of the pages of page_size maps. Without page_size, there is one snapshot of all maps.
+        """
+        last_map_id = None
+        while True:
+            snapshot = cls(request_id, transform_id, work, with_deps=with_deps, page_size=page_size, last_map_id=last_map_id)
+            if snapshot.input_output_maps or last_map_id is None:
+                yield snapshot
+            if not page_size or len(snapshot) < page_size:
+                break
+            last_map_id = snapshot.last_map_id
+
+    @staticmethod
+    def get_value(status):
+        if status is None:
+            return -1
+        return status.value if hasattr(status, 'value') else status
+
+    def __len__(self):
+        return len(self.input_output_maps)
+
+    def update_contents(self, updates):
+        """
+        Apply the content updates (which are written to the database) to the snapshot.
+        """
+        for update in updates:
+            index = self.content_index.get(update['content_id'], None)
+            if index is None:
+                continue
+            self.contents[index].update(update)
+            if 'status' in update:
+                self.statuses[index] = self.get_value(update['status'])
+            if 'substatus' in update:
+                self.substatuses[index] = self.get_value(update['substatus'])
+
+    def get_maps(self, indexes, only_selected=False):
+        """
+        Get the input_output_maps of the contents at the indexes.
+
+        :param only_selected: only include the selected contents in the maps, otherwise all contents of the maps.
+        """
+        if not only_selected:
+            ret = {}
+            for index in indexes:
+                map_id = self.map_ids[index]
+                if map_id not in ret:
+                    ret[map_id] = self.input_output_maps[map_id]
+            return ret
+
+        ret = {}
+        for index in indexes:
+            map_id = self.map_ids[index]
+            content = self.contents[index]
+            if self.with_sub_map_id:
+                sub_map_id = content['sub_map_id']
+                if map_id not in ret:
+                    ret[map_id] = {}
+                if sub_map_id not in ret[map_id]:
+                    ret[map_id][sub_map_id] = {'inputs_dependency': [], 'inputs': [], 'outputs': [], 'logs': [], 'others': []}
+                sub_map = ret[map_id][sub_map_id]
+            else:
+                if map_id not in ret:
+                    ret[map_id] = {'inputs_dependency': [], 'inputs': [], 'outputs': [], 'logs': [], 'others': []}
+                sub_map = ret[map_id]
+            sub_map[self.map_keys.get(self.relation_types[index], 'others')].append(content)
+        return ret
+
+    def get_polling_maps(self, status=None, with_panda_id=None, contents_ext=None, page_size=None):
+        """
+        Get the output contents to poll, the same as get_input_output_maps with only_outputs and match_content_ext.
+
+        :param status: substatus of the outputs to poll.
+        :param contents_ext: list of ext contents. Outputs without ext contents or with different ext status are also polled.
+        :param page_size: number of output contents in one page.
+        :returns: list of input_output_maps pages.
+        """
+        output = ContentRelationType.Output.value
+        status_values = set([self.get_value(s) for s in status]) if status is not None else None
+        ext_status = None
+        if contents_ext is not None:
+            ext_status = dict([(c['content_id'], c['status'] if c['status'] is None else self.get_value(c['status'])) for c in contents_ext])
+
+        indexes = []
+        for index in range(len(self.contents)):
+            if self.relation_types[index] != output:
+                continue
+            substatus = self.substatuses[index]
+            if status_values is not None and substatus in status_values:
+                indexes.append(index)
+            elif ext_status is not None:
+                content_id = self.contents[index]['content_id']
+                if content_id not in ext_status or (ext_status[content_id] is not None and ext_status[content_id] != substatus):
+                    indexes.append(index)
+            elif status_values is None and ext_status is None:
+                indexes.append(index)
+
+        pages = []
+        for chunk in get_list_chunks(indexes, bulk_size=page_size or max(len(indexes), 1)):
+            maps = self.get_maps(chunk, only_selected=True)
+            if with_panda_id is not None:
+                maps = filter_input_output_maps_by_panda_id(maps, with_panda_id)
+            pages.append(maps)
+        return pages or [{}]
+
+    def get_missing_maps(self, with_panda_id=None):
+        """
+        Get the maps which have contents with status or substatus Missing, the same as get_input_output_maps with for_missing.
+        """
+        missing = ContentStatus.Missing.value
+        indexes = [index for index in range(len(self.contents))
+                   if self.statuses[index] == missing or self.substatuses[index] == missing]
+        maps = self.get_maps(indexes)
+        if with_panda_id is not None:
+            maps = filter_input_output_maps_by_panda_id(maps, with_panda_id)
+        return maps
+
+
 def get_input_output_maps(request_id, transform_id, work, with_deps=True, page_num=None, page_size=None,
                           with_panda_id=None, status=None, match_content_ext=False, only_outputs=False,
                           for_missing=False):
@@ -239,17 +421,7 @@ def get_input_output_maps(request_id, transform_id, work, with_deps=True, page_n
 
     unfiltered_num = len(mapped_input_output_maps)
     if with_panda_id is not None:
-        filtered = {}
-        for map_id, map_contents in mapped_input_output_maps.items():
-            outputs = map_contents.get('outputs', [])
-            has_panda_id = any(
-                content.get('content_metadata', {}).get('panda_ids') or  # noqa W504
-                content.get('content_metadata', {}).get('panda_id')
-                for content in outputs
-            )
-            if with_panda_id == has_panda_id:
-                filtered[map_id] = map_contents
-        return unfiltered_num, filtered
+        return unfiltered_num, filter_input_output_maps_by_panda_id(mapped_input_output_maps, with_panda_id)
 
     # work_name_to_coll_map = core_transforms.get_work_name_to_coll_map(request_id=transform['request_id'])
     # work.set_work_name_to_coll_map(work_name_to_coll_map)
@@ -1548,36 +1720,90 @@ def handle_update_processing(processing, agent_attributes, max_updates_per_round
     return process_status, [], [], ret_msgs, [], parameters, [], []
 
 
-def get_unmatched_panda_id_updates(processing, request_id, transform_id, work, input_output_maps, logger=None, log_prefix=''):
+def to_panda_id_list(value):
+    """Normalise a panda_id/panda_ids value to a flat list of IDs."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [int(v.strip()) for v in value.split(',') if v.strip()]
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def get_known_panda_ids(request_id, transform_id, page_size=10000):
+    """
+    Get the panda job IDs recorded in the content_metadata of the output contents of a transform,
+    without loading the input_output_maps: only the content_metadata of the outputs is loaded,
+    in keyset pages of page_size contents.
+    """
+    known_panda_ids = set()
+    last_content_id = None
+    while True:
+        contents = core_catalog.get_contents_by_request_transform(request_id=request_id, transform_id=transform_id,
+                                                                  only_outputs=True, page_size=page_size,
+                                                                  last_content_id=last_content_id,
+                                                                  columns=['content_metadata'])
+        for content in contents:
+            meta = content['content_metadata'] or {}
+            known_panda_ids.update(to_panda_id_list(meta.get('panda_ids', []) or meta.get('panda_id', [])))
+        if len(contents) < page_size:
+            break
+        last_content_id = contents[-1]['content_id']
+    return known_panda_ids
+
+
+def get_unmatched_panda_job_name_to_ids(processing, work, known_panda_ids, logger=None, log_prefix=''):
+    """
+    Get the panda job IDs of a processing which are not in known_panda_ids and resolve them to
+    input file names via work.get_processing_job_name_to_ids.
+
+    :returns: dict of {job_name: panda_ids}
+    """
+    logger = get_logger(logger)
+
+    # Step 2: get all panda job ids for this processing from PanDA
+    all_job_ids = work.get_processing_job_ids(processing, log_prefix=log_prefix)
+    all_job_ids = to_panda_id_list(all_job_ids)
+    logger.debug(log_prefix + "get_unmatched_panda_id_updates: all_job_ids: %s, known_panda_ids: %s"
+                 % (len(all_job_ids), len(known_panda_ids)))
+
+    # Step 3: find unmatched job ids
+    unmatched_job_ids = [jid for jid in all_job_ids if jid not in known_panda_ids]
+    logger.debug(log_prefix + "get_unmatched_panda_id_updates: unmatched_job_ids: %s" % len(unmatched_job_ids))
+    if not unmatched_job_ids:
+        return {}
+
+    # Step 4: resolve unmatched job ids to input file names
+    job_name_to_ids = work.get_processing_job_name_to_ids(processing, unmatched_job_ids, log_prefix=log_prefix)
+    logger.debug(log_prefix + "get_unmatched_panda_id_updates: job_name_to_ids: %s" % len(job_name_to_ids))
+    return job_name_to_ids
+
+
+def get_unmatched_panda_id_updates(processing, request_id, transform_id, work, input_output_maps, job_name_to_ids=None,
+                                   logger=None, log_prefix=''):
     """
     Find panda job IDs that are not yet recorded in any output content's content_metadata,
     resolve them to input file names via work.get_processing_job_name_to_ids, and return
     content updates that set panda_ids on the matching output contents.
 
+    :param job_name_to_ids: the unmatched job names to panda ids, when input_output_maps is only a page of the maps.
+                            None to get them from the panda ids known in input_output_maps.
     :returns: list of content update dicts {content_id, request_id, content_metadata}
     """
     logger = get_logger(logger)
 
-    def _to_id_list(value):
-        """Normalise a panda_id/panda_ids value to a flat list of IDs."""
-        if value is None:
-            return []
-        if isinstance(value, str):
-            return [int(v.strip()) for v in value.split(',') if v.strip()]
-        if isinstance(value, list):
-            return value
-        return [value]
-
     # Step 1: collect known panda_ids and build input_name -> output_contents map
     known_panda_ids = set()
     name_to_outputs = {}
     for map_id in input_output_maps:
         outputs = input_output_maps[map_id].get('outputs', [])
         inputs = input_output_maps[map_id].get('inputs', [])
-        for content in outputs:
-            meta = content.get('content_metadata') or {}
-            existing = meta.get('panda_ids', []) or meta.get('panda_id', [])
-            known_panda_ids.update(_to_id_list(existing))
+        if job_name_to_ids is None:
+            for content in outputs:
+                meta = content.get('content_metadata') or {}
+                existing = meta.get('panda_ids', []) or meta.get('panda_id', [])
+                known_panda_ids.update(to_panda_id_list(existing))
         for content in inputs:
             name = content.get('name')
             if name:
@@ -1585,21 +1811,8 @@ def get_unmatched_panda_id_updates(processing, request_id, transform_id, work, i
                     name_to_outputs[name] = []
                 name_to_outputs[name].extend(outputs)
 
-    # Step 2: get all panda job ids for this processing from PanDA
-    all_job_ids = work.get_processing_job_ids(processing, log_prefix=log_prefix)
-    all_job_ids = _to_id_list(all_job_ids)
-    logger.debug(log_prefix + "get_unmatched_panda_id_updates: all_job_ids: %s, known_panda_ids: %s"
-                 % (len(all_job_ids), len(known_panda_ids)))
-
-    # Step 3: find unmatched job ids
-    unmatched_job_ids = [jid for jid in all_job_ids if jid not in known_panda_ids]
-    logger.debug(log_prefix + "get_unmatched_panda_id_updates: unmatched_job_ids: %s" % len(unmatched_job_ids))
-    if not unmatched_job_ids:
-        return []
-
-    # Step 4: resolve unmatched job ids to input file names
-    job_name_to_ids = work.get_processing_job_name_to_ids(processing, unmatched_job_ids, log_prefix=log_prefix)
-    logger.debug(log_prefix + "get_unmatched_panda_id_updates: job_name_to_ids: %s" % len(job_name_to_ids))
+    if job_name_to_ids is None:
+        job_name_to_ids = get_unmatched_panda_job_name_to_ids(processing, work, known_panda_ids, logger=logger, log_prefix=log_prefix)
 
     # Step 5: match job names to input content names and build content_metadata updates
     update_contents = []
@@ -1608,7 +1821,7 @@ def get_unmatched_panda_id_updates(processing, request_id, transform_id, work, i
             continue
         for output_content in name_to_outputs[job_name]:
             content_metadata = dict(output_content.get('content_metadata') or {})
-            registered_panda_ids = _to_id_list(content_metadata.get('panda_ids') or content_metadata.get('panda_id'))
+            registered_panda_ids = to_panda_id_list(content_metadata.get('panda_ids') or content_metadata.get('panda_id'))
             if registered_panda_ids:
                 old_panda_ids = content_metadata.get('old_panda_ids') or []
                 content_metadata['old_panda_ids'] = sorted(set(old_panda_ids) | set(registered_panda_ids))
@@ -1621,13 +1834,13 @@ def get_unmatched_panda_id_updates(processing, request_id, transform_id, work, i
 
 def handle_update_processing_new(processing, agent_attributes, max_updates_per_round=2000, max_jobs_per_round=None, use_bulk_update_mappings=True, executors=None, logger=None, log_prefix=''):
     """
-    Handle update processing with optional paginated job polling to reduce peak memory usage.
+    Handle update processing with optional paginated job polling.
+    The contents are loaded into InputOutputMapsSnapshots, which are shared by all steps of a page.
 
-    :param max_jobs_per_round: maximum number of map_ids (jobs) to poll per round.
-        When set, input_output_maps are loaded and polled in pages of this size,
-        flushing results to DB after each page rather than accumulating everything
-        in memory at once. When None (default), all maps are loaded and polled at
-        once (same behaviour as handle_update_processing).
+    :param max_jobs_per_round: maximum number of maps (jobs) to load and poll per round.
+        When set, the maps are loaded with keyset pagination and polled in pages of this size,
+        flushing results to DB after each page rather than keeping all maps in memory at once.
+        When None (default), all maps are loaded and polled at once (same behaviour as handle_update_processing).
     """
     logger = get_logger(logger)
 
@@ -1660,8 +1873,6 @@ def handle_update_processing_new(processing, agent_attributes, max_updates_per_r
         max_jobs_per_round = None   # disable paging for ES jobs
         logger.debug(log_prefix + "handle_update_processing_new: ES job detected, paging disabled")
 
-    input_output_maps = None
-
     num_input_output_maps = core_catalog.get_input_output_map_count(request_id, transform_id)
     logger.debug(log_prefix + "get_input_output_map_count: %s" % num_input_output_maps)
     if work.has_external_content_id() and not has_external_content_id(request_id, transform_id):
@@ -1671,49 +1882,44 @@ def handle_update_processing_new(processing, agent_attributes, max_updates_per_r
             name_to_id_map, external_content_ids, request_id)
         core_catalog.update_contents(update_external_content_ids)
 
+    # Without paging, the contents are loaded once and used by all steps below.
+    # With paging, the contents are loaded page by page in the polling loop.
+    snapshot = None
+    if not max_jobs_per_round:
+        snapshot = InputOutputMapsSnapshot(request_id, transform_id, work, with_deps=False)
+        logger.debug(log_prefix + "InputOutputMapsSnapshot: maps: %s, contents: %s" % (len(snapshot), len(snapshot.contents)))
+
     has_new_inputs = work.has_new_inputs if (processing["num_unmapped"] is None) else False
     if processing["num_unmapped"] > 0 or has_new_inputs or (num_inputs is not None and num_inputs > num_input_output_maps):
         logger.debug(log_prefix + f"handle_update_processing_new: checking for new input_output_maps with num_inputs: {num_inputs}, num_input_output_maps: {num_input_output_maps},"
                      f"processing['num_unmapped']: {processing['num_unmapped']}, work.has_new_inputs: {work.has_new_inputs}")
-        _, input_output_maps = get_input_output_maps(request_id, transform_id, work, with_deps=False)
-        logger.debug(log_prefix + "get_input_output_maps: len: %s" % len(input_output_maps))
+        if snapshot is not None:
+            input_output_maps = snapshot.input_output_maps
+        else:
+            # the works need all maps to find the new inputs
+            _, input_output_maps = get_input_output_maps(request_id, transform_id, work, with_deps=False)
         new_input_output_maps = work.get_new_input_output_maps(input_output_maps)
+        input_output_maps = None
         logger.debug(log_prefix + "get_new_input_output_maps: len: %s" % len(new_input_output_maps))
         logger.debug(log_prefix + "get_new_input_output_maps.keys[:3]: %s" % str(list(new_input_output_maps.keys())[:3]))
 
     if num_inputs:
         processing["num_unmapped"] = num_inputs - num_input_output_maps
 
-    # For full-map mode: ensure input_output_maps is loaded for the polling loop.
-    if not max_jobs_per_round and input_output_maps is None:
-        _, input_output_maps = get_input_output_maps(request_id, transform_id, work, with_deps=False)
-        logger.debug(log_prefix + "get_input_output_maps: len: %s" % len(input_output_maps))
-
     # Map any newly submitted panda jobs not yet recorded in content_metadata.
-    maps_for_unmatch = input_output_maps
-    if maps_for_unmatch is None:
-        _, maps_for_unmatch = get_input_output_maps(request_id, transform_id, work, with_deps=False)
-    unmatched_updates = get_unmatched_panda_id_updates(processing, request_id, transform_id, work,
-                                                       maps_for_unmatch, logger=logger, log_prefix=log_prefix)
-    if unmatched_updates:
-        logger.debug(log_prefix + "get_unmatched_panda_id_updates: updating %s contents" % len(unmatched_updates))
-        core_catalog.update_contents(unmatched_updates)
+    # The unmatched panda jobs are found once with the panda ids of all maps, then matched page by page.
+    if snapshot is not None:
+        job_name_to_ids = None
+    else:
+        known_panda_ids = get_known_panda_ids(request_id, transform_id)
+        job_name_to_ids = get_unmatched_panda_job_name_to_ids(processing, work, known_panda_ids, logger=logger, log_prefix=log_prefix)
+        known_panda_ids = None
 
     final_terminated_status = [ContentStatus.Available, ContentStatus.FakeAvailable,
                                ContentStatus.FinalFailed, ContentStatus.Missing,
                                ContentStatus.FinalSubAvailable]
     status_filter = [s for s in ContentStatus if s not in final_terminated_status]
 
-    if max_jobs_per_round:
-        maps_for_unmatch = None  # free if we loaded it above
-        input_output_maps = None  # free full map if we loaded it above, to save memory for polling loop
-    else:
-        # reload ones filtered with panda_id to avoid keeping two full maps in memory at once
-        # ES jobs track panda IDs in contents_ext, not content_metadata, so use with_panda_id=False
-        panda_id_filter = False if (hasattr(work, 'es') and work.es) else True
-        logger.debug(log_prefix + "Reloading input_output_maps with panda_id filter for polling loop")
-        _, input_output_maps = get_input_output_maps(request_id, transform_id, work, with_deps=False, with_panda_id=panda_id_filter, status=status_filter, match_content_ext=True, only_outputs=True)
-
     if hasattr(work, 'input_dependency_coll_ids'):
         input_dependency_coll_ids = work.input_dependency_coll_ids
     else:
@@ -1722,31 +1928,44 @@ def handle_update_processing_new(processing, agent_attributes, max_updates_per_r
     ret_futures = set()
 
     # Load ext content IDs once (lightweight) for reuse across all pages.
+    all_contents_ext = get_ext_content_ids(request_id, transform_id, work)
     contents_ext = []
     if work.require_ext_contents():
-        contents_ext = get_ext_content_ids(request_id, transform_id, work)
+        contents_ext = all_contents_ext
 
     # --- Polling phase ---
     # When max_jobs_per_round is set, iterate through pages of maps, flushing
-    # updates to DB after each page to keep peak memory bounded.
+    # updates to DB after each page.
     # When max_jobs_per_round is None, run a single iteration using the full map.
     process_status = None
     parameters = {}
     new_input_output_maps_from_poll = {}
-    page_num = 0
-    unfiltered_num = 0
+
+    # ES jobs track panda IDs in contents_ext, not content_metadata, so use with_panda_id=False
+    panda_id_filter = False if (hasattr(work, 'es') and work.es) else True
+    if snapshot is not None:
+        snapshots = [snapshot]
+    else:
+        snapshots = InputOutputMapsSnapshot.iter_snapshots(request_id, transform_id, work, with_deps=False,
+                                                           page_size=max_jobs_per_round)
+    snapshot = None
 
     logger.debug(log_prefix + f"Starting polling loop with max_jobs_per_round={max_jobs_per_round}")
 
-    while True:
-        if max_jobs_per_round:
-            unfiltered_num, maps_page = get_input_output_maps(request_id, transform_id, work, with_deps=False,
-                                                              page_num=page_num, page_size=max_jobs_per_round,
-                                                              with_panda_id=True, status=status_filter, match_content_ext=True, only_outputs=True)
-            logger.debug(log_prefix + "handle_update_processing_new: polling page %d with %d maps (unfiltered: %d)"
-                         % (page_num, len(maps_page), unfiltered_num))
-        else:
-            maps_page = input_output_maps  # full map, single iteration
+    for page_num, snapshot in enumerate(snapshots):
+        unmatched_updates = get_unmatched_panda_id_updates(processing, request_id, transform_id, work,
+                                                           snapshot.input_output_maps, job_name_to_ids=job_name_to_ids,
+                                                           logger=logger, log_prefix=log_prefix)
+        if unmatched_updates:
+            logger.debug(log_prefix + "get_unmatched_panda_id_updates: updating %s contents" % len(unmatched_updates))
+            core_catalog.update_contents(unmatched_updates)
+            snapshot.update_contents(unmatched_updates)
+
+        # a snapshot page has at most max_jobs_per_round maps, so its polling maps are one page
+        maps_page = snapshot.get_polling_maps(status=status_filter, with_panda_id=panda_id_filter,
+                                              contents_ext=all_contents_ext)[0]
+        logger.debug(log_prefix + "handle_update_processing_new: polling page %d with %d maps (loaded maps: %d)"
+                     % (page_num, len(maps_page), len(snapshot)))
 
         # Poll job status for this page/batch
         if work.require_ext_contents():
@@ -1760,6 +1979,7 @@ def handle_update_processing_new(processing, agent_attributes, max_updates_per_r
             process_status, content_updates, new_input_output_maps1, updated_contents_full, parameters = ret_poll
 
         new_input_output_maps_from_poll.update(new_input_output_maps1)
+        snapshot.update_contents(content_updates)
 
         logger.debug(log_prefix + "poll_processing_updates process_status: %s" % process_status)
         logger.debug(log_prefix + "poll_processing_updates content_updates[:3]: %s" % content_updates[:3])
@@ -1774,6 +1994,7 @@ def handle_update_processing_new(processing, agent_attributes, max_updates_per_r
                                                               process_status=process_status)
         for content_updates_missing_chunk in content_updates_missing_chunks:
             content_updates_missing, updated_contents_full_missing = content_updates_missing_chunk
+            snapshot.update_contents(content_updates_missing)
             msgs = []
             if updated_contents_full_missing:
                 msgs = generate_messages(request_id, transform_id, workload_id, work, msg_type='file',
@@ -1868,10 +2089,34 @@ def handle_update_processing_new(processing, agent_attributes, max_updates_per_r
                     f = executors.submit(update_processing_contents_thread, logger, log_prefix, log_msg, kwargs)
                     ret_futures.add(f)
 
-        # Stop after first iteration for full-map mode, or when last page is reached
-        if not max_jobs_per_round or unfiltered_num < max_jobs_per_round:
-            break
-        page_num += 1
+        # poll_missing_outputs needs the input contents which are in ContentStatus.Missing.
+        # The polling above only uses the output contents, so here the maps with Missing contents are taken from the snapshot page.
+        input_output_maps = snapshot.get_missing_maps(with_panda_id=False)
+        content_updates_missing_chunks = poll_missing_outputs(input_output_maps, contents_ext=[],
+                                                              max_updates_per_round=max_updates_per_round,
+                                                              process_status=process_status)
+        for content_updates_missing_chunk in content_updates_missing_chunks:
+            content_updates_missing, updated_contents_full_missing = content_updates_missing_chunk
+            msgs = []
+            if updated_contents_full_missing:
+                msgs = generate_messages(request_id, transform_id, workload_id, work, msg_type='file',
+                                         files=updated_contents_full_missing, relation_type='output')
+            if executors is None:
+                logger.debug(log_prefix + "handle_update_processing_new: update %s missing contents" % (len(content_updates_missing)))
+                core_processings.update_processing_contents(update_processing=None,
+                                                            update_contents=content_updates_missing,
+                                                            request_id=request_id,
+                                                            use_bulk_update_mappings=False,
+                                                            messages=msgs)
+            else:
+                log_msg = "handle_update_processing_new thread: update %s missing contents" % (len(content_updates_missing))
+                kwargs = {'update_processing': None,
+                          'request_id': request_id,
+                          'update_contents': content_updates_missing,
+                          'use_bulk_update_mappings': False,
+                          'messages': msgs}
+                f = executors.submit(update_processing_contents_thread, logger, log_prefix, log_msg, kwargs)
+                ret_futures.add(f)
 
     # Merge new maps discovered during polling and save new content records
     new_input_output_maps.update(new_input_output_maps_from_poll)
@@ -1910,37 +2155,6 @@ def handle_update_processing_new(processing, agent_attributes, max_updates_per_r
         parameters = {}
     parameters["num_unmapped"] = processing["num_unmapped"]
 
-    # poll_missing_outputs needs to load the input contents which are in ContentStatus.Missing.
-    # but the processing above calls get_intput_output_maps with only_outputs=True, so the inputs are not loaded.
-    # Her we need to call get_input_output_maps again with input status equal to Missing to get the missing input contents for polling.
-    _, input_output_maps = get_input_output_maps(request_id, transform_id, work, with_deps=False, with_panda_id=False,
-                                               status=ContentStatus.Missing, match_content_ext=False, only_outputs=False, for_missing=True)
-    content_updates_missing_chunks = poll_missing_outputs(input_output_maps, contents_ext=[],
-                                                          max_updates_per_round=max_updates_per_round,
-                                                          process_status=process_status)
-    for content_updates_missing_chunk in content_updates_missing_chunks:
-        content_updates_missing, updated_contents_full_missing = content_updates_missing_chunk
-        msgs = []
-        if updated_contents_full_missing:
-            msgs = generate_messages(request_id, transform_id, workload_id, work, msg_type='file',
-                                     files=updated_contents_full_missing, relation_type='output')
-        if executors is None:
-            logger.debug(log_prefix + "handle_update_processing_new: update %s missing contents" % (len(content_updates_missing)))
-            core_processings.update_processing_contents(update_processing=None,
-                                                        update_contents=content_updates_missing,
-                                                        request_id=request_id,
-                                                        use_bulk_update_mappings=False,
-                                                        messages=msgs)
-        else:
-            log_msg = "handle_update_processing_new thread: update %s missing contents" % (len(content_updates_missing))
-            kwargs = {'update_processing': None,
-                      'request_id': request_id,
-                      'update_contents': content_updates_missing,
-                      'use_bulk_update_mappings': False,
-                      'messages': msgs}
-            f = executors.submit(update_processing_contents_thread, logger, log_prefix, log_msg, kwargs)
-            ret_futures.add(f)
-
     # return process_status, new_contents, new_input_dependency_contents, ret_msgs, content_updates + content_updates_missing, parameters, new_contents_ext, update_contents_ext
     return process_status, [], [], ret_msgs, [], parameters, [], []
 
@@ -1985,7 +2199,15 @@ def update_contents_thread(logger, log_prefix, log_msg, kwargs):
         raise Exception("update_contents_thread error")
 
 
-def handle_trigger_processing(processing, agent_attributes, trigger_new_updates=False, max_updates_per_round=2000, executors=None, logger=None, log_prefix=''):
+def handle_trigger_processing(processing, agent_attributes, trigger_new_updates=False, max_updates_per_round=2000, executors=None,
+                              full_dependency_scan=True, logger=None, log_prefix=''):
+    """
+    Trigger to release the jobs of a processing.
+
+    The updated outputs are pushed to the depending contents through the content_dep_id index.
+    The inputs of the processing itself are checked against all their dependencies only when
+    full_dependency_scan is True or the processing is terminated.
+    """
     logger = get_logger(logger)
 
     has_updates = False
@@ -2078,6 +2300,16 @@ def handle_trigger_processing(processing, agent_attributes, trigger_new_updates=
         core_catalog.delete_contents_update(request_id=request_id, transform_id=transform_id, fetch=True)
         logger.debug(log_prefix + "sync contents_update to contents done")
 
+        if new_contents_update_list:
+            logger.debug(log_prefix + "release_inputs_by_dependency_index")
+            core_catalog.release_inputs_by_dependency_index(request_id=request_id, dep_contents=new_contents_update_list,
+                                                            status_not_to_check=[ContentStatus.Available, ContentStatus.FakeAvailable,
+                                                                                 ContentStatus.FinalFailed],
+                                                            dep_status_not_to_check=[ContentStatus.Available, ContentStatus.FakeAvailable,
+                                                                                     ContentStatus.FinalFailed, ContentStatus.Missing],
+                                                            logger=logger, log_prefix=log_prefix)
+            logger.debug(log_prefix + "release_inputs_by_dependency_index done")
+
         """
         logger.debug(log_prefix + "update_contents_from_others_by_dep_id")
         # core_catalog.update_contents_from_others_by_dep_id(request_id=request_id, transform_id=transform_id)
@@ -2104,31 +2336,32 @@ def handle_trigger_processing(processing, agent_attributes, trigger_new_updates=
         logger.debug(log_prefix + "update_contents_from_others_by_dep_id done")
         """
 
-        logger.debug(log_prefix + "update_contents_from_others_by_dep_id_pages")
-        status_not_to_check = [ContentStatus.Available, ContentStatus.FakeAvailable,
-                               ContentStatus.FinalFailed, ContentStatus.Missing]
-        core_catalog.update_contents_from_others_by_dep_id_pages(request_id=request_id, transform_id=transform_id,
-                                                                 page_size=2000, status_not_to_check=status_not_to_check,
-                                                                 logger=logger, log_prefix=log_prefix)
-        logger.debug(log_prefix + "update_contents_from_others_by_dep_id_pages done")
-
         terminated_processing = False
         terminated_status = [ProcessingStatus.Finished, ProcessingStatus.Failed, ProcessingStatus.SubFinished,
                              ProcessingStatus.Terminating, ProcessingStatus.Cancelled]
         if processing['status'] in terminated_status or processing['substatus'] in terminated_status:
             terminated_processing = True
 
-        logger.debug(log_prefix + "update_input_contents_by_dependency_pages")
-        # status_not_to_check = [ContentStatus.Available, ContentStatus.FakeAvailable,
-        #                        ContentStatus.FinalFailed, ContentStatus.Missing]
-        status_not_to_check = [ContentStatus.Available, ContentStatus.FakeAvailable,
-                               ContentStatus.FinalFailed]
-        core_catalog.update_input_contents_by_dependency_pages(request_id=request_id, transform_id=transform_id,
-                                                               page_size=default_input_dep_page_size,
-                                                               terminated=terminated_processing,
-                                                               batch_size=2000, status_not_to_check=status_not_to_check,
-                                                               logger=logger, log_prefix=log_prefix)
-        logger.debug(log_prefix + "update_input_contents_by_dependency_pages done")
+        if full_dependency_scan or terminated_processing:
+            logger.debug(log_prefix + "update_contents_from_others_by_dep_id_pages")
+            status_not_to_check = [ContentStatus.Available, ContentStatus.FakeAvailable,
+                                   ContentStatus.FinalFailed, ContentStatus.Missing]
+            core_catalog.update_contents_from_others_by_dep_id_pages(request_id=request_id, transform_id=transform_id,
+                                                                     page_size=2000, status_not_to_check=status_not_to_check,
+                                                                     logger=logger, log_prefix=log_prefix)
+            logger.debug(log_prefix + "update_contents_from_others_by_dep_id_pages done")
+
+            logger.debug(log_prefix + "update_input_contents_by_dependency_pages")
+            # status_not_to_check = [ContentStatus.Available, ContentStatus.FakeAvailable,
+            #                        ContentStatus.FinalFailed, ContentStatus.Missing]
+            status_not_to_check = [ContentStatus.Available, ContentStatus.FakeAvailable,
+                                   ContentStatus.FinalFailed]
+            core_catalog.update_input_contents_by_dependency_pages(request_id=request_id, transform_id=transform_id,
+                                                                   page_size=default_input_dep_page_size,
+                                                                   terminated=terminated_processing,
+                                                                   batch_size=2000, status_not_to_check=status_not_to_check,
+                                                                   logger=logger, log_prefix=log_prefix)
+            logger.debug(log_prefix + "update_input_contents_by_dependency_pages done")
 
         with_deps = False
         _, input_output_maps = get_input_output_maps(request_id, transform_id, work, with_deps=with_deps)
@@ -2143,8 +2376,10 @@ def handle_trigger_processing(processing, agent_attributes, trigger_new_updates=
                                                                                 log_prefix=log_prefix)
 
         ret_futures = set()
+        updated_outputs = []
         for updated_contents_ret in updated_contents_ret_chunks:
             updated_contents, updated_contents_full_input, updated_contents_full_output, updated_contents_full_input_deps, new_update_contents = updated_contents_ret
+            updated_outputs.extend([{'content_id': c['content_id'], 'substatus': c['substatus']} for c in updated_contents_full_output])
 
             if updated_contents_full_input:
                 # if the content is updated by receiver, here is the place to broadcast the messages
@@ -2187,6 +2422,14 @@ def handle_trigger_processing(processing, agent_attributes, trigger_new_updates=
         if len(ret_futures) > 0:
             wait_futures_finish(ret_futures, "handle_trigger_processing", logger, log_prefix)
 
+        if updated_outputs:
+            core_catalog.release_inputs_by_dependency_index(request_id=request_id, dep_contents=updated_outputs,
+                                                            status_not_to_check=[ContentStatus.Available, ContentStatus.FakeAvailable,
+                                                                                 ContentStatus.FinalFailed],
+                                                            dep_status_not_to_check=[ContentStatus.Available, ContentStatus.FakeAvailable,
+                                                                                     ContentStatus.FinalFailed, ContentStatus.Missing],
+                                                            logger=logger, log_prefix=log_prefix)
+
         if has_updates:
             ret_update_transforms = get_updated_transforms_by_content_status(request_id=request_id,
                                                                              transform_id=transform_id,
@@ -2217,25 +2460,41 @@ def get_content_status_from_panda_msg_status(status):
     return ContentStatus.New
 
 
+# The maps below are stored as redis hashes. The releases before stored them as plain
+# strings under the same names, which fail the hash commands with WRONGTYPE. So the hash
+# keys are versioned, and the leftover string keys just expire.
+CACHE_HASH_KEY_VERSION = "hash_v2"
+
+
+def get_cache_hash_key(name):
+    return "%s:%s" % (CACHE_HASH_KEY_VERSION, name)
+
+
 def get_collection_id_transform_id_map(coll_id, request_id, request_ids=[]):
     cache = get_redis_cache()
-    coll_tf_id_map_key = "collection_id_transform_id_map"
-    coll_tf_id_map = cache.get(coll_tf_id_map_key, default={})
+    coll_tf_id_map_key = get_cache_hash_key("collection_id_transform_id_map")
+
+    ret = None
+    if coll_id is not None:
+        ret = cache.hget(coll_tf_id_map_key, coll_id, default=None)
 
-    if coll_id is None or coll_id not in coll_tf_id_map:
+    if ret is None:
         if not request_ids:
             request_ids = []
         if request_id not in request_ids:
             request_ids.append(request_id)
         colls = core_catalog.get_collections_by_request_ids(request_ids)
+        coll_tf_id_map = {}
         for coll in colls:
-            coll_tf_id_map[coll['coll_id']] = (coll['request_id'], coll['transform_id'], coll['workload_id'])
+            coll_tf_id_map[str(coll['coll_id'])] = (coll['request_id'], coll['transform_id'], coll['workload_id'])
 
-        cache.set(coll_tf_id_map_key, coll_tf_id_map)
+        cache.hset_many(coll_tf_id_map_key, coll_tf_id_map)
+        if coll_id is not None:
+            ret = coll_tf_id_map.get(str(coll_id), None)
 
-    if coll_id is None or coll_id not in coll_tf_id_map:
+    if ret is None:
         return None, None, None
-    return coll_tf_id_map[coll_id]
+    return ret
 
 
 workload_id_lock = threading.Lock()
@@ -2243,33 +2502,24 @@ workload_id_lock = threading.Lock()
 
 def get_workload_id_transform_id_map(workload_id, logger=None, log_prefix=''):
     cache = get_redis_cache()
-    workload_id_transform_id_map_key = "all_worloadid2transformid_map"
-    workload_id_transform_id_map = cache.get(workload_id_transform_id_map_key, default={})
-
-    workload_id_transform_id_map_notexist_key = "all_worloadid2transformid_map_notexist"
-    workload_id_transform_id_map_notexist = cache.get(workload_id_transform_id_map_notexist_key, default={})
-
-    if type(workload_id_transform_id_map_notexist) in (list, tuple):
-        workload_id_transform_id_map_notexist = {}
+    workload_id_transform_id_map_key = get_cache_hash_key("all_worloadid2transformid_map")
+    workload_id_transform_id_map_notexist_key = get_cache_hash_key("all_worloadid2transformid_map_notexist")
 
     workload_id_str = str(workload_id)
-    if workload_id_str in workload_id_transform_id_map:
-        return workload_id_transform_id_map[workload_id_str]
+    ret = cache.hget(workload_id_transform_id_map_key, workload_id_str, default=None)
+    if ret and len(ret) >= 5:
+        return ret
 
-    if workload_id_str in workload_id_transform_id_map_notexist and workload_id_transform_id_map_notexist[workload_id_str] + 600 < time.time():
+    notexist_time = cache.hget(workload_id_transform_id_map_notexist_key, workload_id_str, default=None)
+    if notexist_time is not None and notexist_time + 600 < time.time():
         return None
 
     # lock area
     workload_id_lock.acquire()
 
-    workload_id_transform_id_map = cache.get(workload_id_transform_id_map_key, default={})
-    workload_id_transform_id_map_notexist = cache.get(workload_id_transform_id_map_notexist_key, default={})
-
-    if type(workload_id_transform_id_map_notexist) in (list, tuple):
-        workload_id_transform_id_map_notexist = {}
-
+    ret = cache.hget(workload_id_transform_id_map_key, workload_id_str, default=None)
     request_ids = []
-    if not workload_id_transform_id_map or workload_id_str not in workload_id_transform_id_map or len(workload_id_transform_id_map[workload_id_str]) < 5:
+    if not ret or len(ret) < 5:
         processing_status = [ProcessingStatus.New,
                              ProcessingStatus.Submitting, ProcessingStatus.Submitted,
                              ProcessingStatus.Running, ProcessingStatus.FinishedOnExec,
@@ -2280,6 +2530,7 @@ def get_workload_id_transform_id_map(workload_id, logger=None, log_prefix=''):
                              ProcessingStatus.ToExpire, ProcessingStatus.Expiring,
                              ProcessingStatus.ToFinish, ProcessingStatus.ToForceFinish]
 
+        workload_id_transform_id_map = {}
         procs = core_processings.get_processings_by_status(status=processing_status)
         for proc in procs:
             processing = proc['processing_metadata']['processing']
@@ -2293,154 +2544,128 @@ def get_workload_id_transform_id_map(workload_id, logger=None, log_prefix=''):
                 if proc['request_id'] not in request_ids:
                     request_ids.append(proc['request_id'])
 
-        cache.set(workload_id_transform_id_map_key, workload_id_transform_id_map)
-
-        for key in workload_id_transform_id_map:
-            if key in workload_id_transform_id_map_notexist:
-                del workload_id_transform_id_map_notexist[key]
+        cache.hset_many(workload_id_transform_id_map_key, workload_id_transform_id_map)
+        cache.hdel(workload_id_transform_id_map_notexist_key, *list(workload_id_transform_id_map.keys()))
+        ret = workload_id_transform_id_map.get(workload_id_str, None)
 
     # renew the collection to transform map
     if request_ids:
         get_collection_id_transform_id_map(coll_id=None, request_id=request_ids[0], request_ids=request_ids)
 
-    keys = list(workload_id_transform_id_map_notexist.keys())
-    for key in keys:
-        if workload_id_transform_id_map_notexist[key] + 7200 < time.time():
-            del workload_id_transform_id_map_notexist[key]
-
-    cache.set(workload_id_transform_id_map_notexist_key, workload_id_transform_id_map_notexist)
     # for tasks running in some other instances
-    if workload_id_str not in workload_id_transform_id_map:
-        if workload_id_str not in workload_id_transform_id_map_notexist:
-            workload_id_transform_id_map_notexist[workload_id_str] = time.time()
-            cache.set(workload_id_transform_id_map_notexist_key, workload_id_transform_id_map_notexist)
+    if not ret:
+        if notexist_time is None:
+            cache.hsetnx(workload_id_transform_id_map_notexist_key, workload_id_str, time.time(),
+                         field_expire_seconds=7200)
 
         workload_id_lock.release()
         return None
     else:
         workload_id_lock.release()
 
-    return workload_id_transform_id_map[workload_id_str]
+    return ret
 
 
 content_id_lock = threading.Lock()
 
 
-def get_input_name_content_id_map(request_id, workload_id, transform_id):
+def get_input_name_content_id_map(request_id, workload_id, transform_id, names=None):
+    """
+    Get the map of input name to content ids for a transform.
+
+    The map is stored as a redis hash, one field per name. If names is given,
+    only these fields are fetched. The map is built from the database only when
+    it doesn't exist in the cache.
+    """
     cache = get_redis_cache()
-    input_name_content_id_map_key = "transform_input_contentid_map_%s" % transform_id
-    input_name_content_id_map = cache.get(input_name_content_id_map_key, default={})
+    input_name_content_id_map_key = get_cache_hash_key("transform_input_contentid_map_%s" % transform_id)
 
-    if not input_name_content_id_map:
-        content_id_lock.acquire()
+    if cache.exists(input_name_content_id_map_key):
+        if names is not None:
+            ret = cache.hmget(input_name_content_id_map_key, names, default=None)
+            return {name: content_ids for name, content_ids in ret.items() if content_ids is not None}
+        return cache.hgetall(input_name_content_id_map_key)
 
-        contents = core_catalog.get_contents_by_request_transform(request_id=request_id, transform_id=transform_id)
-        input_name_content_id_map = {}
-        for content in contents:
-            if content['content_relation_type'] == ContentRelationType.Output:
-                if content['name'] not in input_name_content_id_map:
-                    input_name_content_id_map[content['name']] = []
-                input_name_content_id_map[content['name']].append(content['content_id'])
-                if content['path']:
-                    if content['path'] not in input_name_content_id_map:
-                        input_name_content_id_map[content['path']] = []
-                    input_name_content_id_map[content['path']].append(content['content_id'])
+    content_id_lock.acquire()
+
+    contents = core_catalog.get_contents_by_request_transform(request_id=request_id, transform_id=transform_id,
+                                                              columns=['content_relation_type', 'name', 'path'])
+    input_name_content_id_map = {}
+    for content in contents:
+        if content['content_relation_type'] == ContentRelationType.Output:
+            if content['name'] not in input_name_content_id_map:
+                input_name_content_id_map[content['name']] = []
+            input_name_content_id_map[content['name']].append(content['content_id'])
+            if content['path']:
+                if content['path'] not in input_name_content_id_map:
+                    input_name_content_id_map[content['path']] = []
+                input_name_content_id_map[content['path']].append(content['content_id'])
 
-        cache.set(input_name_content_id_map_key, input_name_content_id_map)
+    cache.hset_many(input_name_content_id_map_key, input_name_content_id_map)
 
-        content_id_lock.release()
+    content_id_lock.release()
+
+    if names is not None:
+        return {name: input_name_content_id_map[name] for name in names if name in input_name_content_id_map}
     return input_name_content_id_map
 
 
+def get_input_names_from_job_inputs(inputs):
+    names = []
+    for ip in inputs:
+        if ':' in ip:
+            pos = ip.find(":")
+            ip = ip[pos + 1:]
+        names.append(ip)
+    return names
+
+
 def get_jobid_content_id_map(request_id, workload_id, transform_id, job_id, inputs):
+    """
+    Get the content ids of a PanDA job.
+
+    :returns: (content_ids, to_update_jobid). to_update_jobid is True when the
+              job_id is seen for the first time.
+    """
     cache = get_redis_cache()
-    jobid_content_id_map_key = "transform_jobid_contentid_map_%s" % transform_id
-    jobid_content_id_map = cache.get(jobid_content_id_map_key, default={})
+    jobid_content_id_map_key = get_cache_hash_key("transform_jobid_contentid_map_%s" % transform_id)
 
-    to_update_jobid = False
     job_id = str(job_id)
-    if not jobid_content_id_map or job_id not in jobid_content_id_map:
-        to_update_jobid = True
-        input_name_content_id_map = get_input_name_content_id_map(request_id, workload_id, transform_id)
-        for ip in inputs:
-            if ':' in ip:
-                pos = ip.find(":")
-                ip = ip[pos + 1:]
-            if ip in input_name_content_id_map:
-                content_ids = input_name_content_id_map[ip]
-                jobid_content_id_map[job_id] = content_ids
-                break
-
-        cache.set(jobid_content_id_map_key, jobid_content_id_map)
-    return jobid_content_id_map, to_update_jobid
+    content_ids = cache.hget(jobid_content_id_map_key, job_id, default=None)
+    if content_ids is not None:
+        return content_ids, False
+
+    names = get_input_names_from_job_inputs(inputs)
+    input_name_content_id_map = get_input_name_content_id_map(request_id, workload_id, transform_id, names=names)
+    for name in names:
+        if name in input_name_content_id_map:
+            content_ids = input_name_content_id_map[name]
+            cache.hset(jobid_content_id_map_key, job_id, content_ids)
+            break
+    return content_ids, True
 
 
 def get_content_id_from_job_id(request_id, workload_id, transform_id, job_id, inputs):
-    jobid_content_id_map, to_update_jobid = get_jobid_content_id_map(request_id, workload_id, transform_id, job_id, inputs)
-
-    if str(job_id) in jobid_content_id_map:
-        content_ids = jobid_content_id_map[str(job_id)]
-    else:
-        content_ids = None
+    content_ids, to_update_jobid = get_jobid_content_id_map(request_id, workload_id, transform_id, job_id, inputs)
     return content_ids, to_update_jobid
 
 
-pending_lock = threading.Lock()
-
-
 def whether_to_process_pending_workload_id(workload_id, logger=None, log_prefix=''):
     cache = get_redis_cache()
-    processed_pending_workload_id_map_key = "processed_pending_workload_id_map"
-    processed_pending_workload_id_map = cache.get(processed_pending_workload_id_map_key, default={})
-    processed_pending_workload_id_map_time_key = "processed_pending_workload_id_map_time"
-    processed_pending_workload_id_map_time = cache.get(processed_pending_workload_id_map_time_key, default=None)
-
-    workload_id = str(workload_id)
-    if workload_id in processed_pending_workload_id_map:
-        return False
-
-    # lock area
-    pending_lock.acquire()
-    processed_pending_workload_id_map = cache.get(processed_pending_workload_id_map_key, default={})
-
-    processed_pending_workload_id_map[workload_id] = time.time()
-    if processed_pending_workload_id_map_time is None or processed_pending_workload_id_map_time + 86400 < time.time():
-        cache.set(processed_pending_workload_id_map_time_key, int(time.time()), expire_seconds=86400)
-
-        keys = list(processed_pending_workload_id_map.keys())
-        for workload_id in keys:
-            if processed_pending_workload_id_map[workload_id] + 86400 < time.time():
-                del processed_pending_workload_id_map[workload_id]
-
-    cache.set(processed_pending_workload_id_map_key, processed_pending_workload_id_map, expire_seconds=86400)
-    pending_lock.release()
-    return True
+    processed_pending_workload_id_map_key = get_cache_hash_key("processed_pending_workload_id_map")
 
-
-update_processing_lock = threading.Lock()
+    # hsetnx is atomic, only the first caller in 24 hours gets True
+    return cache.hsetnx(processed_pending_workload_id_map_key, str(workload_id), int(time.time()),
+                        expire_seconds=86400)
 
 
 def whether_to_update_processing(processing_id, interval=300):
     cache = get_redis_cache()
-    ret = False
-
-    update_processing_lock.acquire()
-    update_processing_map_key = "update_processing_map"
-    update_processing_map = cache.get(update_processing_map_key, default={})
-
-    processing_id_str = str(processing_id)
-    if processing_id_str not in update_processing_map or update_processing_map[processing_id_str] + interval < time.time():
-        update_processing_map[processing_id_str] = time.time()
-        ret = True
-
-    keys = list(update_processing_map.keys())
-    for key in keys:
-        if update_processing_map[key] + 86400 < time.time():
-            del update_processing_map[key]
+    update_processing_map_key = get_cache_hash_key("update_processing_map")
 
-    cache.set(update_processing_map_key, update_processing_map, expire_seconds=86400)
-    update_processing_lock.release()
-    return ret
+    # the field expires after interval, then the next caller gets True again
+    return cache.hsetnx(update_processing_map_key, str(processing_id), int(time.time()),
+                        expire_seconds=86400, field_expire_seconds=interval)
 
 
 def handle_messages_processing(messages, logger=None, log_prefix='', update_processing_interval=300):
@@ -2546,6 +2771,238 @@ def handle_messages_processing(messages, logger=None, log_prefix='', update_proc
     return update_processings, update_processings_by_job, terminated_processings, update_contents, []
 
 
+def get_workload_id_transform_id_maps(workload_ids, logger=None, log_prefix=''):
+    """
+    Bulk version of get_workload_id_transform_id_map.
+
+    The cached map is read with one pipelined call. The database is queried
+    at most once, through get_workload_id_transform_id_map for the first
+    workload_id which is not cached (it refreshes the map for all active
+    processings). The other missing ones are then read from the refreshed cache.
+
+    :returns: dict of {str(workload_id): (request_id, transform_id, processing_id, status, substatus)}.
+    """
+    cache = get_redis_cache()
+    workload_id_transform_id_map_key = get_cache_hash_key("all_worloadid2transformid_map")
+    workload_id_transform_id_map_notexist_key = get_cache_hash_key("all_worloadid2transformid_map_notexist")
+
+    workload_ids = [str(workload_id) for workload_id in set(workload_ids)]
+    ret_maps = cache.hmget_multi({workload_id_transform_id_map_key: workload_ids,
+                                  workload_id_transform_id_map_notexist_key: workload_ids})
+    workload_id_transform_id_map = ret_maps.get(workload_id_transform_id_map_key, {})
+    workload_id_transform_id_map_notexist = ret_maps.get(workload_id_transform_id_map_notexist_key, {})
+
+    ret = {}
+    missing = []
+    for workload_id in workload_ids:
+        value = workload_id_transform_id_map.get(workload_id, None)
+        if value and len(value) >= 5:
+            ret[workload_id] = value
+        else:
+            notexist_time = workload_id_transform_id_map_notexist.get(workload_id, None)
+            if notexist_time is not None and notexist_time + 600 < time.time():
+                continue
+            missing.append(workload_id)
+
+    if missing:
+        # refresh the map from the database once
+        value = get_workload_id_transform_id_map(missing[0], logger=logger, log_prefix=log_prefix)
+        if value:
+            ret[missing[0]] = value
+        if len(missing) > 1:
+            values = cache.hmget(workload_id_transform_id_map_key, missing[1:], default=None)
+            notexists = {}
+            for workload_id in missing[1:]:
+                value = values.get(workload_id, None)
+                if value and len(value) >= 5:
+                    ret[workload_id] = value
+                elif workload_id_transform_id_map_notexist.get(workload_id, None) is None:
+                    notexists[workload_id] = time.time()
+            if notexists:
+                cache.hset_many(workload_id_transform_id_map_notexist_key, notexists, field_expire_seconds=7200)
+    return ret
+
+
+def get_content_ids_from_job_ids(jobs, logger=None, log_prefix=''):
+    """
+    Bulk version of get_content_id_from_job_id.
+
+    :param jobs: dict of {(request_id, workload_id, transform_id): {str(job_id): inputs}}.
+    :returns: dict of {(transform_id, str(job_id)): (content_ids, to_update_jobid)}.
+    """
+    cache = get_redis_cache()
+    jobid_keys = {}
+    for (request_id, workload_id, transform_id), job_inputs in jobs.items():
+        jobid_keys["transform_jobid_contentid_map_%s" % transform_id] = list(job_inputs.keys())
+    cached_job_contents = cache.hmget_multi(jobid_keys, default=None)
+
+    ret = {}
+    missing_jobs = {}
+    for (request_id, workload_id, transform_id), job_inputs in jobs.items():
+        jobid_content_id_map_key = get_cache_hash_key("transform_jobid_contentid_map_%s" % transform_id)
+        cached = cached_job_contents.get(jobid_content_id_map_key, {})
+        for job_id, inputs in job_inputs.items():
+            content_ids = cached.get(job_id, None)
+            if content_ids is not None:
+                ret[(transform_id, job_id)] = (content_ids, False)
+            else:
+                missing_jobs.setdefault((request_id, workload_id, transform_id), {})[job_id] = inputs
+
+    if not missing_jobs:
+        return ret
+
+    # resolve the missing jobs by input names, with one pipelined read for all transforms.
+    # the input name maps which don't exist in the cache yet are built from the database.
+    name_keys, name_key_transform_ids = {}, {}
+    input_name_content_id_maps = {}
+    for (request_id, workload_id, transform_id), job_inputs in missing_jobs.items():
+        names = set()
+        for job_id, inputs in job_inputs.items():
+            names.update(get_input_names_from_job_inputs(inputs))
+        input_name_content_id_map_key = get_cache_hash_key("transform_input_contentid_map_%s" % transform_id)
+        if cache.exists(input_name_content_id_map_key):
+            name_keys[input_name_content_id_map_key] = list(names)
+            name_key_transform_ids[input_name_content_id_map_key] = transform_id
+        else:
+            input_name_content_id_maps[transform_id] = get_input_name_content_id_map(request_id, workload_id, transform_id,
+                                                                                     names=list(names))
+    cached_names = cache.hmget_multi(name_keys, default=None)
+    for key, values in cached_names.items():
+        transform_id = name_key_transform_ids[key]
+        input_name_content_id_maps[transform_id] = {name: content_ids for name, content_ids in values.items() if content_ids is not None}
+
+    new_job_contents = {}
+    for (request_id, workload_id, transform_id), job_inputs in missing_jobs.items():
+        input_name_content_id_map = input_name_content_id_maps.get(transform_id, {})
+        jobid_content_id_map_key = get_cache_hash_key("transform_jobid_contentid_map_%s" % transform_id)
+        for job_id, inputs in job_inputs.items():
+            content_ids = None
+            for name in get_input_names_from_job_inputs(inputs):
+                if name in input_name_content_id_map:
+                    content_ids = input_name_content_id_map[name]
+                    new_job_contents.setdefault(jobid_content_id_map_key, {})[job_id] = content_ids
+                    break
+            ret[(transform_id, job_id)] = (content_ids, True)
+    cache.hset_multi(new_job_contents)
+    return ret
+
+
+def handle_messages_processing_bulk(messages, logger=None, log_prefix='', update_processing_interval=300):
+    """
+    Bulk version of handle_messages_processing.
+
+    Messages are grouped by workload_id and job_id first. All mappings are
+    then resolved with a few pipelined cache calls, instead of several cache
+    round trips per message. The outputs are the same as handle_messages_processing.
+    """
+    logger = get_logger(logger)
+    if not log_prefix:
+        log_prefix = "<Message>"
+
+    update_processings = []
+    update_processings_by_job = []
+    terminated_processings = []
+    update_contents = []
+
+    task_msgs, job_msgs, workload_ids = [], [], set()
+    for ori_msg in messages:
+        if type(ori_msg) in [dict]:
+            msg = ori_msg
+        else:
+            msg = json.loads(ori_msg)
+        if 'taskid' not in msg or not msg['taskid']:
+            continue
+
+        if msg['msg_type'] in ['task_status'] and msg['status'] in ['pending1', 'finished', 'done']:
+            task_msgs.append(msg)
+            workload_ids.add(msg['taskid'])
+        elif msg['msg_type'] in ['job_status'] and msg['inputs'] and msg['status'] in ['finished', 'activated']:
+            job_msgs.append(msg)
+            workload_ids.add(msg['taskid'])
+
+    if not workload_ids:
+        return update_processings, update_processings_by_job, terminated_processings, update_contents, []
+
+    logger.debug(log_prefix + "Received %s task messages and %s job messages for %s workloads" % (len(task_msgs), len(job_msgs), len(workload_ids)))
+    req_tf_pr_ids = get_workload_id_transform_id_maps(workload_ids, logger=logger, log_prefix=log_prefix)
+
+    for msg in task_msgs:
+        workload_id = msg['taskid']
+        status = msg['status']
+        ret_req_tf_pr_id = req_tf_pr_ids.get(str(workload_id), None)
+        if not ret_req_tf_pr_id:
+            # request is submitted by some other instances
+            logger.debug(log_prefix + "No matched workload_id, discard message: %s" % str(msg))
+            continue
+
+        req_id, tf_id, processing_id, r_status, r_substatus = ret_req_tf_pr_id
+        if status in ['pending1']:
+            if whether_to_process_pending_workload_id(workload_id, logger=logger, log_prefix=log_prefix):
+                if processing_id not in update_processings:
+                    update_processings.append(processing_id)
+                    logger.debug(log_prefix + "Add to update processing: %s" % str(processing_id))
+            else:
+                logger.debug(log_prefix + "Processing %s is already processed, not add it to update processing" % (str(processing_id)))
+        else:
+            if processing_id not in update_processings:
+                terminated_processings.append(processing_id)
+                logger.debug(log_prefix + "Add to terminated processing: %s" % str(processing_id))
+
+    jobs = {}
+    for msg in job_msgs:
+        ret_req_tf_pr_id = req_tf_pr_ids.get(str(msg['taskid']), None)
+        if not ret_req_tf_pr_id:
+            continue
+        req_id, tf_id, processing_id, r_status, r_substatus = ret_req_tf_pr_id
+        job_inputs = jobs.setdefault((req_id, msg['taskid'], tf_id), {})
+        if str(msg['jobid']) not in job_inputs:
+            job_inputs[str(msg['jobid'])] = msg['inputs']
+    job_content_ids = get_content_ids_from_job_ids(jobs, logger=logger, log_prefix=log_prefix) if jobs else {}
+
+    updated_jobids = set()
+    for msg in job_msgs:
+        workload_id = msg['taskid']
+        job_id = msg['jobid']
+        status = msg['status']
+        ret_req_tf_pr_id = req_tf_pr_ids.get(str(workload_id), None)
+        if not ret_req_tf_pr_id:
+            # request is submitted by some other instances
+            logger.debug(log_prefix + "No matched workload_id, discard message: %s" % str(msg))
+            continue
+
+        req_id, tf_id, processing_id, r_status, r_substatus = ret_req_tf_pr_id
+        content_ids, to_update_jobid = job_content_ids.get((tf_id, str(job_id)), (None, False))
+        if not content_ids:
+            continue
+        # only the first message of a new job_id updates the panda_id
+        if to_update_jobid:
+            if (tf_id, str(job_id)) in updated_jobids:
+                to_update_jobid = False
+            else:
+                updated_jobids.add((tf_id, str(job_id)))
+
+        for content_id in content_ids:
+            if to_update_jobid:
+                u_content = {'content_id': content_id,
+                             'request_id': req_id,
+                             'transform_id': tf_id,
+                             'workload_id': workload_id,
+                             'substatus': get_content_status_from_panda_msg_status(status),
+                             'content_metadata': {'panda_id': job_id}}
+            else:
+                u_content = {'content_id': content_id,
+                             'request_id': req_id,
+                             'transform_id': tf_id,
+                             'workload_id': workload_id,
+                             'substatus': get_content_status_from_panda_msg_status(status)}
+            update_contents.append(u_content)
+        if processing_id not in update_processings_by_job:
+            update_processings_by_job.append(processing_id)
+            logger.debug(log_prefix + "Add to update processing by job: %s" % str(processing_id))
+
+    return update_processings, update_processings_by_job, terminated_processings, update_contents, []
+
+
 def sync_collection_status(request_id, transform_id, workload_id, work, input_output_maps=None, log_prefix='',
                            close_collection=False, force_close_collection=False, abort=False, terminate=False):
     logger = get_logger()
@@ -2618,6 +3075,12 @@ def sync_collection_status(request_id, transform_id, workload_id, work, input_ou
     output_collections = work.get_output_collections()
     log_collections = work.get_log_collections()
 
+    if core_counters.is_enabled():
+        contents_counters = core_counters.get_contents_counters(coll_status,
+                                                                [coll.coll_id for coll in input_collections],
+                                                                [coll.coll_id for coll in output_collections])
+        core_counters.update_contents_counters(transform_id, contents_counters)
+
     update_collections = []
     for coll in input_collections + output_collections + log_collections:
         if coll.coll_id in coll_status:
@@ -2851,6 +3314,12 @@ def sync_collection_status_new(request_id, transform_id, workload_id, work, log_
     output_collections = work.get_output_collections()
     log_collections = work.get_log_collections()
 
+    if core_counters.is_enabled():
+        contents_counters = core_counters.get_contents_counters(coll_status,
+                                                                [coll.coll_id for coll in input_collections],
+                                                                [coll.coll_id for coll in output_collections])
+        core_counters.update_contents_counters(transform_id, contents_counters)
+
     messages = []
     update_collections = []
 
@@ -3117,7 +3586,8 @@ def handle_abort_processing(processing, agent_attributes, logger=None, sync=True
 
 def reactive_contents(request_id, transform_id, workload_id, work, input_output_maps):
     updated_contents = []
-    contents = core_catalog.get_contents_by_request_transform(request_id=request_id, transform_id=transform_id)
+    contents = core_catalog.get_contents_by_request_transform(request_id=request_id, transform_id=transform_id,
+                                                              columns=['request_id', 'status'])
     for content in contents:
         if content['status'] not in [ContentStatus.Available, ContentStatus.Mapped,
                                      ContentStatus.Available.value, ContentStatus.Mapped.value,
@@ -26,7 +26,8 @@ from idds.core import (requests as core_requests,
                        processings as core_processings,
                        catalog as core_catalog,
                        throttlers as core_throttlers,
-                       commands as core_commands)
+                       commands as core_commands,
+                       counters as core_counters)
 from idds.agents.common.baseagent import BaseAgent
 from idds.agents.common.eventbus.event import (EventType,
                                                # NewRequestEvent,
@@ -706,10 +707,17 @@ class Clerk(BaseAgent):
             if site is None:
                 site = 'Default'
             throttlers = self.get_throttlers()
-            num_requests = self.get_num_active_requests(site)
-            num_transforms = self.get_num_active_transforms(site)
-            num_processings, active_transforms = self.get_num_active_processings(site)
-            num_input_contents, num_output_contents = self.get_num_active_contents(site, active_transforms)
+            counters = core_counters.get_site_counters(site) if core_counters.is_enabled() else None
+            if counters is not None:
+                num_requests = counters['requests']
+                num_transforms = counters['transforms']
+                num_processings = counters['processings']
+                num_input_contents, num_output_contents = counters['input_contents'], counters['output_contents']
+            else:
+                num_requests = self.get_num_active_requests(site)
+                num_transforms = self.get_num_active_transforms(site)
+                num_processings, active_transforms = self.get_num_active_processings(site)
+                num_input_contents, num_output_contents = self.get_num_active_contents(site, active_transforms)
             self.logger.info("throttler(site: %s): active requests(%s), transforms(%s), processings(%s)" % (site, num_requests, num_transforms, num_processings))
             self.logger.info("throttler(site: %s): active input contents(%s), output contents(%s)" % (site, num_input_contents, num_output_contents))
 
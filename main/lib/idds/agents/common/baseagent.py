@@ -126,6 +126,13 @@ class BaseAgent(TimerScheduler, PluginBase):
         else:
             self.event_interval_delay = int(self.event_interval_delay)
 
+        # the main loop sleeps until new events are sent or a worker is freed.
+        # this is only the upper bound of one sleep.
+        if not hasattr(self, 'max_event_wait_time'):
+            self.max_event_wait_time = 10
+        else:
+            self.max_event_wait_time = int(self.max_event_wait_time)
+
         if not hasattr(self, 'max_worker_exec_time'):
             self.max_worker_exec_time = 3600
         else:
@@ -226,7 +233,21 @@ class BaseAgent(TimerScheduler, PluginBase):
     def get_event_function_map(self):
         return self.event_func_map
 
+    def notify_worker_done(self, future):
+        # a worker is freed, the main loop can fetch more events.
+        self.event_bus.notify_events()
+
+    def submit(self, fn, *args, **kwargs):
+        future = super(BaseAgent, self).submit(fn, *args, **kwargs)
+        if future is not None:
+            future.add_done_callback(self.notify_worker_done)
+        return future
+
     def execute_event_schedule(self):
+        """
+        :returns: number of events fetched from the event bus.
+        """
+        num_events = 0
         event_funcs = self.get_event_function_map()
         for event_type in event_funcs:
             exec_func = event_funcs[event_type]['exec_func']
@@ -235,19 +256,30 @@ class BaseAgent(TimerScheduler, PluginBase):
                 events = self.event_bus.get(event_type, num_events=bulk_size, wait=2, callback=None)
                 for event in events:
                     self.submit(exec_func, event)
+                num_events += len(events)
+        return num_events
 
     def execute_schedules(self):
         # self.execute_timer_schedule()
         self.execute_timer_schedule_thread()
-        self.execute_event_schedule()
+        return self.execute_event_schedule()
+
+    def wait_events(self, events_seq, timeout=None):
+        """
+        Sleep until events are sent after events_seq (from event_bus.get_events_seq), or timeout.
+        """
+        if timeout is None or timeout > self.max_event_wait_time:
+            timeout = self.max_event_wait_time
+        self.event_bus.wait_events(events_seq, timeout=timeout)
 
     def execute(self):
         while not self.graceful_stop.is_set():
             try:
                 # self.execute_timer_schedule()
-                self.execute_timer_schedule_thread()
-                self.execute_event_schedule()
-                self.graceful_stop.wait(0.00001)
+                events_seq = self.event_bus.get_events_seq()
+                num_events = self.execute_schedules()
+                if not num_events:
+                    self.wait_events(events_seq)
             except Exception as error:
                 self.logger.critical("Caught an exception: %s\n%s" % (str(error), traceback.format_exc()))
 
@@ -9,6 +9,7 @@
 # - Wen Guan, <wen.guan@cern.ch>, 2022
 
 import logging
+import time
 import uuid
 import redis
 
@@ -17,6 +18,43 @@ from idds.common.config import config_has_section, config_list_options
 from idds.common.utils import json_dumps, json_loads
 
 
+# Per-field ttl of hashes is emulated with a companion sorted set
+# (<key><HASH_EXPIRE_SUFFIX>, score = expire time). Expired fields are
+# purged lazily on every write, in the same server-side script.
+HASH_EXPIRE_SUFFIX = ':field_expire'
+HASH_PURGE_LIMIT = 1000
+
+# KEYS: hash key, expire zset key
+# ARGV: now, expire_at, key_expire_seconds, nx, field1, value1, field2, value2, ...
+HASH_SET_LUA = """
+local now = tonumber(ARGV[1])
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, %s)
+if #expired > 0 then
+    redis.call('HDEL', KEYS[1], unpack(expired))
+    redis.call('ZREM', KEYS[2], unpack(expired))
+end
+local nx = tonumber(ARGV[4])
+local num_set = 0
+for i = 5, #ARGV, 2 do
+    local to_set = true
+    if nx == 1 and redis.call('HEXISTS', KEYS[1], ARGV[i]) == 1 then
+        local score = redis.call('ZSCORE', KEYS[2], ARGV[i])
+        if (not score) or tonumber(score) > now then
+            to_set = false
+        end
+    end
+    if to_set then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+        redis.call('ZADD', KEYS[2], ARGV[2], ARGV[i])
+        num_set = num_set + 1
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return num_set
+""" % HASH_PURGE_LIMIT
+
+
 class Singleton(object):
     _instance = None
 
@@ -51,6 +89,7 @@ class RedisCache(Singleton):
             else:
                 self.port = 6379
             self.cache = redis.Redis(host=self.host, port=self.port, db=0)
+            self._hash_set_script = None
 
     def setup_logger(self, logger=None):
         """
@@ -89,19 +128,176 @@ class RedisCache(Singleton):
             return default
         return value
 
-    def hset(self, key, value, expire_seconds=21600):
-        value = json_dumps(value)
-        self.cache.hset(key, value)
-        self.cache.expire(key, expire_seconds)
+    def exists(self, key):
+        return bool(self.cache.exists(key))
 
-    def hget(self, key, default=None):
-        value = self.cache.hget(key)
-        if value:
-            value = json_loads(value)
-        if not value:
+    def delete(self, key):
+        self.cache.delete(key, self.get_hash_expire_key(key))
+
+    def get_hash_expire_key(self, key):
+        return "%s%s" % (key, HASH_EXPIRE_SUFFIX)
+
+    def encode_hash_value(self, value, expire_at):
+        return json_dumps({'value': value, 'expire_at': expire_at})
+
+    def decode_hash_value(self, value, now=None):
+        """
+        Decode a hash field value. Returns (found, value). Fields whose
+        per-field ttl has passed are reported as not found.
+        """
+        if value is None:
+            return False, None
+        value = json_loads(value)
+        if not isinstance(value, dict) or 'expire_at' not in value:
+            return True, value
+        if now is None:
+            now = time.time()
+        if value['expire_at'] is not None and value['expire_at'] <= now:
+            return False, None
+        return True, value['value']
+
+    def get_hash_set_script(self):
+        if self._hash_set_script is None:
+            self._hash_set_script = self.register_script(HASH_SET_LUA)
+        return self._hash_set_script
+
+    def register_script(self, script):
+        """
+        Register a lua script. The returned script is called with (keys, args, client).
+        """
+        return self.cache.register_script(script)
+
+    def pipeline(self, transaction=False):
+        return self.cache.pipeline(transaction=transaction)
+
+    def _hset_many(self, key, mapping, expire_seconds=21600, field_expire_seconds=None, nx=False, pipeline=None):
+        if not mapping:
+            return 0
+        now = time.time()
+        if field_expire_seconds is None:
+            field_expire_seconds = expire_seconds
+        expire_at = now + field_expire_seconds
+        key_expire_seconds = max(int(expire_seconds), int(field_expire_seconds))
+        args = [now, expire_at, key_expire_seconds, 1 if nx else 0]
+        for field, value in mapping.items():
+            args.append(str(field))
+            args.append(self.encode_hash_value(value, expire_at))
+        script = self.get_hash_set_script()
+        return script(keys=[key, self.get_hash_expire_key(key)], args=args, client=pipeline)
+
+    def hset(self, key, field, value, expire_seconds=21600, field_expire_seconds=None):
+        """
+        Set one field of a hash.
+
+        :param expire_seconds: ttl of the whole hash, renewed on every write.
+        :param field_expire_seconds: ttl of this field. Defaults to expire_seconds.
+        """
+        self._hset_many(key, {field: value}, expire_seconds=expire_seconds,
+                        field_expire_seconds=field_expire_seconds)
+
+    def hset_many(self, key, mapping, expire_seconds=21600, field_expire_seconds=None):
+        """
+        Set multiple fields of a hash in one round trip.
+        """
+        self._hset_many(key, mapping, expire_seconds=expire_seconds,
+                        field_expire_seconds=field_expire_seconds)
+
+    def hsetnx(self, key, field, value, expire_seconds=21600, field_expire_seconds=None):
+        """
+        Set one field of a hash only if it doesn't exist (or is expired).
+
+        :returns: True if the field is set, False if it already exists.
+        """
+        ret = self._hset_many(key, {field: value}, expire_seconds=expire_seconds,
+                              field_expire_seconds=field_expire_seconds, nx=True)
+        return bool(ret)
+
+    def hget(self, key, field, default=None):
+        value = self.cache.hget(key, str(field))
+        found, value = self.decode_hash_value(value)
+        if not found:
             return default
         return value
 
+    def hmget(self, key, fields, default=None):
+        """
+        Get multiple fields of a hash in one round trip.
+
+        :returns: dict of {field: value}. Missing or expired fields are set to default.
+        """
+        fields = [str(field) for field in fields]
+        if not fields:
+            return {}
+        values = self.cache.hmget(key, fields)
+        now = time.time()
+        ret = {}
+        for field, value in zip(fields, values):
+            found, value = self.decode_hash_value(value, now=now)
+            ret[field] = value if found else default
+        return ret
+
+    def hmget_multi(self, key_fields, default=None):
+        """
+        Get fields of multiple hashes in one pipelined round trip.
+
+        :param key_fields: dict of {key: [field1, field2, ...]}.
+        :returns: dict of {key: {field: value}}.
+        """
+        keys = []
+        pipeline = self.cache.pipeline(transaction=False)
+        for key, fields in key_fields.items():
+            fields = [str(field) for field in fields]
+            if fields:
+                keys.append((key, fields))
+                pipeline.hmget(key, fields)
+        results = pipeline.execute() if keys else []
+
+        now = time.time()
+        ret = {}
+        for (key, fields), values in zip(keys, results):
+            ret[key] = {}
+            for field, value in zip(fields, values):
+                found, value = self.decode_hash_value(value, now=now)
+                ret[key][field] = value if found else default
+        return ret
+
+    def hset_multi(self, key_mappings, expire_seconds=21600, field_expire_seconds=None):
+        """
+        Set fields of multiple hashes in one pipelined round trip.
+
+        :param key_mappings: dict of {key: {field: value}}.
+        """
+        pipeline = self.cache.pipeline(transaction=False)
+        has_cmds = False
+        for key, mapping in key_mappings.items():
+            if mapping:
+                has_cmds = True
+                self._hset_many(key, mapping, expire_seconds=expire_seconds,
+                                field_expire_seconds=field_expire_seconds, pipeline=pipeline)
+        if has_cmds:
+            pipeline.execute()
+
+    def hgetall(self, key):
+        values = self.cache.hgetall(key)
+        now = time.time()
+        ret = {}
+        for field, value in values.items():
+            found, value = self.decode_hash_value(value, now=now)
+            if found:
+                if isinstance(field, bytes):
+                    field = field.decode()
+                ret[field] = value
+        return ret
+
+    def hdel(self, key, *fields):
+        fields = [str(field) for field in fields]
+        if not fields:
+            return
+        pipeline = self.cache.pipeline(transaction=False)
+        pipeline.hdel(key, *fields)
+        pipeline.zrem(self.get_hash_expire_key(key), *fields)
+        pipeline.execute()
+
 
 def get_redis_cache():
     cache = RedisCache()
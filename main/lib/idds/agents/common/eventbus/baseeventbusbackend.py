@@ -35,6 +35,13 @@ class BaseEventBusBackend(threading.Thread):
 
         self._lock = threading.RLock()
 
+        # _events_seq is increased whenever events are sent, waiters block on _events_cond.
+        self._events_seq = 0
+        self._events_cond = threading.Condition()
+        # Backends whose events can be produced by other processes can't be notified.
+        # For them, a waiter polls at this interval (seconds). None means no polling.
+        self.poll_interval = None
+
         self.setup_logger(logger)
 
         self.coordinator = None
@@ -53,10 +60,38 @@ class BaseEventBusBackend(threading.Thread):
 
     def stop(self, signum=None, frame=None):
         self.graceful_stop.set()
+        self.notify_events()
+
+    def notify_events(self):
+        """
+        Wake up the waiters in wait_events.
+        """
+        with self._events_cond:
+            self._events_seq += 1
+            self._events_cond.notify_all()
+
+    def get_events_seq(self):
+        return self._events_seq
+
+    def wait_events(self, seq, timeout=None):
+        """
+        Block until events are sent after get_events_seq() returned seq, or timeout.
+
+        :returns: True if new events are sent.
+        """
+        if self.get_coordinator():
+            # the coordinator delays events, they can become ready without being sent.
+            timeout = min(timeout, 1) if timeout is not None else 1
+        if self.poll_interval is not None:
+            timeout = min(timeout, self.poll_interval) if timeout is not None else self.poll_interval
+        with self._events_cond:
+            return self._events_cond.wait_for(lambda: self._events_seq != seq or self.graceful_stop.is_set(), timeout)
 
     def send(self, event):
         if self.get_coordinator():
-            return self.get_coordinator().send(event)
+            ret = self.get_coordinator().send(event)
+            self.notify_events()
+            return ret
         else:
             with self._lock:
                 if event._event_type not in self._events:
@@ -64,10 +99,13 @@ class BaseEventBusBackend(threading.Thread):
                     self._events_index[event._event_type] = []
                 self._events[event._event_type][event._id] = event
                 self._events_index[event._event_type].append(event._id)
+            self.notify_events()
 
     def send_bulk(self, events):
         if self.get_coordinator():
-            return self.get_coordinator().send_bulk(events)
+            ret = self.get_coordinator().send_bulk(events)
+            self.notify_events()
+            return ret
         else:
             with self._lock:
                 for event in events:
@@ -76,6 +114,7 @@ class BaseEventBusBackend(threading.Thread):
                         self._events_index[event._event_type] = []
                     self._events[event._event_type][event._id] = event
                     self._events_index[event._event_type].append(event._id)
+            self.notify_events()
 
     def get(self, event_type, num_events=1, wait=0, callback=None):
         if self.get_coordinator():
@@ -124,7 +163,7 @@ class BaseEventBusBackend(threading.Thread):
     def execute(self):
         while not self.graceful_stop.is_set():
             try:
-                self.graceful_stop.wait(0.1)
+                self.graceful_stop.wait(60)
             except Exception as error:
                 self.logger.critical("Caught an exception: %s\n%s" % (str(error), traceback.format_exc()))
 
@@ -8,6 +8,7 @@
 # Authors:
 # - Wen Guan, <wen.guan@cern.ch>, 2023 - 2025
 
+import itertools
 import logging
 import time
 import threading
@@ -15,6 +16,7 @@ import uuid
 
 from .event import StateClaimEvent, EventBusState
 from .baseeventbusbackend import BaseEventBusBackend
+from .eventqueue import EventQueue
 
 
 class BaseEventBusBackendOpt(BaseEventBusBackend):
@@ -36,6 +38,7 @@ class BaseEventBusBackendOpt(BaseEventBusBackend):
         self._events_history = {}
         self._events_history_clean_time = time.time()
         self._events_insert_time = {}
+        self._events_counter = itertools.count()
         self._lock = threading.RLock()
 
         self.max_delay = 180
@@ -54,100 +57,81 @@ class BaseEventBusBackendOpt(BaseEventBusBackend):
     def get_class_name(self):
         return self.__class__.__name__
 
+    def get_event_sort_key(self, event_type, event):
+        """
+        Events whose act id was never processed are served first, newest first.
+        The other events are served by the time their act id was last processed,
+        oldest first. An event queued for more than max_delay is not overtaken
+        by events processed after its queuing time plus max_delay.
+        """
+        event_act_id = event.get_event_id()
+        if event_act_id not in self._events_history[event_type]:
+            return (0, -next(self._events_counter))
+        hist_time = self._events_history[event_type][event_act_id]
+        insert_time = self._events_insert_time[event_type][event._id]
+        return (1, min(hist_time, insert_time + self.max_delay))
+
     def insert_event(self, event):
         if event._event_type not in self._events:
             self._events[event._event_type] = {}
-            self._events_index[event._event_type] = []
+            self._events_index[event._event_type] = EventQueue()
             self._events_act_id_index[event._event_type] = {}
             self._events_history[event._event_type] = {}
             self._events_insert_time[event._event_type] = {}
 
-        self.logger.debug("All events: %s" % self._events)
-
         merged = False
         event_act_id = event.get_event_id()
         if event_act_id not in self._events_act_id_index[event._event_type]:
             self._events_act_id_index[event._event_type][event_act_id] = [event._id]
         else:
-            old_event_ids = self._events_act_id_index[event._event_type][event_act_id].copy()
-            for old_event_id in old_event_ids:
-                if old_event_id not in self._events[event._event_type]:
-                    self._events_act_id_index[event._event_type][event_act_id].remove(old_event_id)
-                else:
-                    old_event = self._events[event._event_type][old_event_id]
-                    if event.able_to_merge(old_event):
-                        old_event.merge(event)
-                        self._events[event._event_type][old_event_id] = old_event
-                        self.logger.debug("New event %s is merged to old event %s" % (event, old_event))
-                        merged = True
+            for old_event_id in self._events_act_id_index[event._event_type][event_act_id]:
+                old_event = self._events[event._event_type][old_event_id]
+                if event.able_to_merge(old_event):
+                    old_event.merge(event)
+                    self.logger.debug("New event %s is merged to old event %s" % (event, old_event))
+                    merged = True
+                    break
             if not merged:
                 self._events_act_id_index[event._event_type][event_act_id].append(event._id)
 
         if not merged:
-            if event_act_id not in self._events_history[event._event_type]:
-                self._events[event._event_type][event._id] = event
-                self._events_index[event._event_type].insert(0, event._id)
-                self._events_insert_time[event._event_type][event._id] = time.time()
-                self.logger.debug("Insert new event: %s" % event)
-            else:
-                hist_time = self._events_history[event._event_type][event_act_id]
-                insert_loc = len(self._events_index[event._event_type])
-                q_event_ids = self._events_index[event._event_type].copy()
-                q_event_ids.reverse()
-                for q_event_id in q_event_ids:
-                    q_event = self._events[event._event_type][q_event_id]
-                    q_event_act_id = q_event.get_event_id()
-                    if (q_event_act_id not in self._events_history[event._event_type] or self._events_insert_time[event._event_type][q_event_id] + self.max_delay < time.time()):
-                        break
-                    elif self._events_history[event._event_type][q_event_act_id] > hist_time:
-                        insert_loc -= 1
-                    else:
-                        break
-                self._events[event._event_type][event._id] = event
-                self._events_index[event._event_type].insert(insert_loc, event._id)
-                self._events_insert_time[event._event_type][event._id] = time.time()
-                self.logger.debug("Insert new event: %s" % event)
+            self._events[event._event_type][event._id] = event
+            self._events_insert_time[event._event_type][event._id] = time.time()
+            sort_key = self.get_event_sort_key(event._event_type, event)
+            self._events_index[event._event_type].push(event._id, sort_key)
+            self.logger.debug("Insert new event: %s" % event)
 
     def clean_events(self):
         if self._events_history_clean_time + 3600 * 4 < time.time():
             self._events_history_clean_time = time.time()
-            for event_type in self._events_index:
-                event_act_ids = []
-                for event_id in self._events_index[event_type]:
-                    event = self._events[event_type][event_id]
-                    act_id = event.get_event_id()
-                    event_act_ids.append(act_id)
-
+            for event_type in self._events_history:
                 event_history_keys = list(self._events_history[event_type].keys())
                 for key in event_history_keys:
-                    if key not in event_act_ids:
+                    if key not in self._events_act_id_index[event_type]:
                         del self._events_history[event_type][key]
 
-                act_id_keys = list(self._events_act_id_index[event_type].keys())
-                for act_id_key in act_id_keys:
-                    act_id2ids = self._events_act_id_index[event_type][act_id_key].copy()
-                    for q_id in act_id2ids:
-                        if q_id not in self._events_index[event_type]:
-                            self._events_act_id_index[event_type][act_id_key].remove(q_id)
-                    if not self._events_act_id_index[event_type][act_id_key]:
-                        del self._events_act_id_index[event_type][act_id_key]
-
     def send(self, event):
         if self.get_coordinator():
-            return self.get_coordinator().send(event)
+            ret = self.get_coordinator().send(event)
+            self.notify_events()
+            return ret
         else:
             with self._lock:
                 self.insert_event(event)
                 self.clean_events()
+            self.notify_events()
 
     def send_bulk(self, events):
         if self.get_coordinator():
-            return self.get_coordinator().send_bulk(events)
+            ret = self.get_coordinator().send_bulk(events)
+            self.notify_events()
+            return ret
         else:
             with self._lock:
                 for event in events:
                     self.insert_event(event)
                 self.clean_events()
+            self.notify_events()
 
     def get(self, event_type, num_events=1, wait=0, callback=None):
         if self.get_coordinator():
@@ -157,12 +141,16 @@ class BaseEventBusBackendOpt(BaseEventBusBackend):
                 events = []
                 for i in range(num_events):
                     if event_type in self._events_index and self._events_index[event_type]:
-                        event_id = self._events_index[event_type].pop(0)
+                        sort_key, event_id = self._events_index[event_type].pop()
                         event = self._events[event_type][event_id]
                         event_act_id = event.get_event_id()
                         self._events_history[event_type][event_act_id] = time.time()
                         del self._events[event_type][event_id]
                         del self._events_insert_time[event._event_type][event._id]
+                        act_id_event_ids = self._events_act_id_index[event_type][event_act_id]
+                        act_id_event_ids.remove(event_id)
+                        if not act_id_event_ids:
+                            del self._events_act_id_index[event_type][event_act_id]
                         events.append(event)
                     else:
                         break
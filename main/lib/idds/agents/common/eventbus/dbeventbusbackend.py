@@ -43,6 +43,8 @@ class DBEventBusBackend(BaseEventBusBackend):
         self.max_delay = 180
 
         self.to_archive = to_archive
+        # events can be added by other processes, poll the database.
+        self.poll_interval = 1
 
         self.setup_logger(logger)
 
@@ -60,15 +62,18 @@ class DBEventBusBackend(BaseEventBusBackend):
 
     def stop(self, signum=None, frame=None):
         self.graceful_stop.set()
+        self.notify_events()
 
     def send(self, event):
         ret = core_events.add_event(event)
         self.logger.info("add event: %s, ret: %s" % (event, ret))
+        self.notify_events()
 
     def send_bulk(self, events):
         for event in events:
             ret = core_events.add_event(event)
             self.logger.info("add event: %s, ret: %s" % (event, ret))
+        self.notify_events()
 
     def get(self, event_type, num_events=1, wait=0, callback=None):
         events = core_events.get_event_for_processing(event_type=event_type, num_events=num_events)
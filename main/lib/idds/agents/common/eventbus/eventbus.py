@@ -121,6 +121,15 @@ class EventBus(Singleton):
     def send_bulk(self, events):
         self.backend.send_bulk(events)
 
+    def get_events_seq(self):
+        return self.backend.get_events_seq()
+
+    def wait_events(self, seq, timeout=None):
+        return self.backend.wait_events(seq, timeout=timeout)
+
+    def notify_events(self):
+        self.backend.notify_events()
+
     def send_report(self, event, status, start_time, end_time, source, result):
         return self.backend.send_report(event, status, start_time, end_time, source, result)
 
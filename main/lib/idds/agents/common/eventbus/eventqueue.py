@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+import heapq
+import itertools
+
+
+class EventQueue(object):
+    """
+    Priority queue of event ids, ordered by a sort key (smallest first).
+
+    It's a binary heap with lazy deletion: removing or re-queuing an event
+    only invalidates its old heap entry, which is dropped when it reaches
+    the top. push, update, remove and pop cost O(log n).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, event_id):
+        return event_id in self._entries
+
+    def push(self, event_id, sort_key):
+        """
+        Add an event, or move it if it's already queued.
+        Events with the same sort key are popped in insertion order.
+        """
+        seq = next(self._counter)
+        self._entries[event_id] = seq
+        heapq.heappush(self._heap, (sort_key, seq, event_id))
+        self.compact()
+
+    def remove(self, event_id):
+        self._entries.pop(event_id, None)
+
+    def _drop_invalid(self):
+        while self._heap:
+            sort_key, seq, event_id = self._heap[0]
+            if self._entries.get(event_id, None) == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def peek(self):
+        """
+        :returns: (sort_key, event_id) of the first event, or (None, None) if it's empty.
+        """
+        self._drop_invalid()
+        if not self._heap:
+            return None, None
+        sort_key, seq, event_id = self._heap[0]
+        return sort_key, event_id
+
+    def pop(self):
+        """
+        :returns: (sort_key, event_id) of the first event, or (None, None) if it's empty.
+        """
+        self._drop_invalid()
+        if not self._heap:
+            return None, None
+        sort_key, seq, event_id = heapq.heappop(self._heap)
+        del self._entries[event_id]
+        return sort_key, event_id
+
+    def compact(self):
+        """
+        Rebuild the heap when invalid entries dominate, to bound the memory.
+        """
+        if len(self._heap) > 1024 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [item for item in self._heap if self._entries.get(item[2], None) == item[1]]
+            heapq.heapify(self._heap)
+
+    def event_ids(self):
+        """
+        :returns: queued event ids, in no particular order.
+        """
+        return list(self._entries.keys())
@@ -281,6 +281,9 @@ class MsgEventBusBackend(BaseEventBusBackend):
 
         self.connection_retries = connection_retries
 
+        # events are queued in the remote coordinator, poll it.
+        self.poll_interval = 0.1
+
         self.init_msg_channel()
 
     def setup_logger(self, logger=None):
@@ -298,6 +301,7 @@ class MsgEventBusBackend(BaseEventBusBackend):
     def stop(self, signum=None, frame=None):
         self.logger.debug("graceful stop")
         self.graceful_stop.set()
+        self.notify_events()
         if self.auth:
             self.logger.debug("auth stop")
             self.auth.stop()
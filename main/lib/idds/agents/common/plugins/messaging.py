@@ -6,9 +6,10 @@
 # http://www.apache.org/licenses/LICENSE-2.0OA
 #
 # Authors:
-# - Wen Guan, <wen.guan@cern.ch>, 2019 - 2023
+# - Wen Guan, <wen.guan@cern.ch>, 2019 - 2026
 
 
+import itertools
 import logging
 import random
 import socket
@@ -17,6 +18,13 @@ import time
 import traceback
 import stomp
 
+try:
+    # python 3
+    from queue import Empty
+except ImportError:
+    # Python 2
+    from Queue import Empty
+
 from idds.common.plugin.plugin_base import PluginBase
 from idds.common.utils import setup_logging, get_logger, json_dumps, json_loads
 
@@ -59,6 +67,31 @@ class MessagingListener(stomp.ConnectionListener):
         pass
 
 
+class MessagingSenderListener(stomp.ConnectionListener):
+    '''
+    Messaging sender listener, to receive the receipts of the sent messages.
+    '''
+    def __init__(self, sender, conn, logger=None):
+        self.sender = sender
+        self.conn = conn
+        if logger:
+            self.logger = logger
+        else:
+            self.logger = get_logger(self.__class__.__name__)
+
+    def on_receipt(self, frame):
+        self.sender.on_receipt(frame.headers.get('receipt-id'))
+
+    def on_error(self, frame):
+        self.logger.error('[broker] sender: %s, %s', frame.headers, frame.body)
+        receipt_id = frame.headers.get('receipt-id')
+        if receipt_id:
+            self.sender.on_receipt(receipt_id, failed=True)
+
+    def on_disconnected(self):
+        self.sender.on_disconnected(self.conn)
+
+
 class MessagingSender(PluginBase, threading.Thread):
     def __init__(self, name="MessagingSender", logger=None, **kwargs):
         threading.Thread.__init__(self, name=name)
@@ -84,6 +117,28 @@ class MessagingSender(PluginBase, threading.Thread):
         else:
             self.timetolive = int(self.timetolive)
 
+        # number of messages taken from the request queue in one loop
+        if not hasattr(self, 'send_batch_size'):
+            self.send_batch_size = 100
+        else:
+            self.send_batch_size = int(self.send_batch_size)
+        # maximum number of sent messages waiting for receipts. 0 to send without receipts.
+        if not hasattr(self, 'send_window'):
+            self.send_window = 1000
+        else:
+            self.send_window = int(self.send_window)
+        # messages without receipts after it (seconds) are not reported as sent, to be retried.
+        if not hasattr(self, 'receipt_timeout'):
+            self.receipt_timeout = 60
+        else:
+            self.receipt_timeout = int(self.receipt_timeout)
+
+        self.receipt_ids = itertools.count()
+        self.pending_receipts = {}
+        self.pending_condition = threading.Condition()
+        self.send_stats = {}
+        self.send_stats_lock = threading.Lock()
+
         self.conns = []
 
     def setup_logger(self, logger):
@@ -183,6 +238,7 @@ class MessagingSender(PluginBase, threading.Thread):
                 password = self.channels[destination]['password']
                 if not conn.is_connected():
                     # conn.start()
+                    conn.set_listener('message-sender', MessagingSenderListener(self, conn, logger=self.logger))
                     conn.connect(username, password, wait=True)
                 return conn, queue_dest, destination
             elif self.conns[destination] is None:
@@ -202,42 +258,186 @@ class MessagingSender(PluginBase, threading.Thread):
             conn = random.sample(self.conns[destination], 1)[0]
             queue_dest = self.channels[destination]['destination']
             if not conn.is_connected():
+                conn.set_listener('message-sender', MessagingSenderListener(self, conn, logger=self.logger))
                 conn.connect(self.username, self.password, wait=True)
                 return conn, queue_dest, destination
         except Exception as error:
             self.logger.error("Failed to connect to message broker(will re-resolve brokers): %s" % str(error))
 
-    def send_message(self, msg):
-        destination = msg['destination'] if 'destination' in msg else 'default'
-        conn, queue_dest, destination = self.get_connection(destination)
-
+    def send_to_conn(self, conn, queue_dest, msg, receipt_id=None):
         from_idds = 'false'
         if 'from_idds' in msg and msg['from_idds']:
             from_idds = 'true'
 
+        self.logger.debug("Sending message to message broker(%s): %s" % (queue_dest, json_dumps(msg['msg_content'])))
+        if type(msg['msg_content']) in [dict] and 'headers' in msg['msg_content'] and 'body' in msg['msg_content']:
+            msg['msg_content']['headers']['from_idds'] = from_idds
+            headers = dict(msg['msg_content']['headers'])
+            body = msg['msg_content']['body']
+        else:
+            headers = {'persistent': 'true',
+                       'ttl': self.timetolive,
+                       'vo': 'atlas',
+                       'from_idds': from_idds,
+                       'msg_type': str(msg['msg_type']).lower()}
+            body = msg['msg_content']
+        if receipt_id is not None:
+            headers['receipt'] = receipt_id
+        conn.send(body=json_dumps(body),
+                  headers=headers,
+                  destination=queue_dest,
+                  id='atlas-idds-messaging',
+                  ack='auto')
+
+    def send_message(self, msg):
+        destination = msg['destination'] if 'destination' in msg else 'default'
+        conn, queue_dest, destination = self.get_connection(destination)
+
         if conn:
             self.logger.info("Sending message to message broker(%s): %s" % (destination, msg['msg_id']))
-            self.logger.debug("Sending message to message broker(%s): %s" % (destination, json_dumps(msg['msg_content'])))
-            if type(msg['msg_content']) in [dict] and 'headers' in msg['msg_content'] and 'body' in msg['msg_content']:
-                msg['msg_content']['headers']['from_idds'] = from_idds
-                conn.send(body=json_dumps(msg['msg_content']['body']),
-                          headers=msg['msg_content']['headers'],
-                          destination=queue_dest,
-                          id='atlas-idds-messaging',
-                          ack='auto')
-            else:
-                conn.send(body=json_dumps(msg['msg_content']),
-                          destination=queue_dest,
-                          id='atlas-idds-messaging',
-                          ack='auto',
-                          headers={'persistent': 'true',
-                                   'ttl': self.timetolive,
-                                   'vo': 'atlas',
-                                   'from_idds': from_idds,
-                                   'msg_type': str(msg['msg_type']).lower()})
+            self.send_to_conn(conn, queue_dest, msg)
         else:
             self.logger.info("No brokers defined, discard(%s): %s" % (destination, msg['msg_id']))
 
+    def put_response(self, msg):
+        if self.response_queue is not None:
+            self.response_queue.put(msg)
+
+    def update_send_stats(self, destination, sent=0, acked=0, failed=0, send_time=0):
+        with self.send_stats_lock:
+            if destination not in self.send_stats:
+                self.send_stats[destination] = {'sent': 0, 'acked': 0, 'failed': 0, 'send_time': 0}
+            stats = self.send_stats[destination]
+            stats['sent'] += sent
+            stats['acked'] += acked
+            stats['failed'] += failed
+            stats['send_time'] += send_time
+
+    def get_send_stats(self):
+        """
+        Get the accumulated numbers of sent, acknowledged and failed messages per destination.
+
+        :returns: dict of {destination: {'sent': , 'acked': , 'failed': , 'send_time': , 'pending': }}.
+        """
+        with self.pending_condition:
+            pending = {}
+            for item in self.pending_receipts.values():
+                pending[item[1]] = pending.get(item[1], 0) + 1
+        with self.send_stats_lock:
+            stats = {}
+            for destination in self.send_stats:
+                stats[destination] = dict(self.send_stats[destination])
+                stats[destination]['pending'] = pending.get(destination, 0)
+            return stats
+
+    def on_receipt(self, receipt_id, failed=False):
+        with self.pending_condition:
+            item = self.pending_receipts.pop(receipt_id, None)
+            self.pending_condition.notify_all()
+        if item is None:
+            return
+
+        msg, destination, conn, sent_at = item
+        if failed:
+            self.logger.warning("Broker(%s) failed to receive message: %s" % (destination, msg['msg_id']))
+            self.update_send_stats(destination, failed=1)
+        else:
+            self.update_send_stats(destination, acked=1)
+            self.put_response(msg)
+
+    def fail_pending_receipts(self, conn=None, sent_before=None):
+        """
+        Drop the pending messages of the connection or sent before the time.
+        They are not reported as sent, so they will be retried.
+        """
+        with self.pending_condition:
+            failed_items = []
+            for receipt_id in list(self.pending_receipts.keys()):
+                item = self.pending_receipts[receipt_id]
+                if (conn is not None and item[2] is conn) or (sent_before is not None and item[3] < sent_before):
+                    failed_items.append(self.pending_receipts.pop(receipt_id))
+            if failed_items:
+                self.pending_condition.notify_all()
+
+        for msg, destination, conn, sent_at in failed_items:
+            self.update_send_stats(destination, failed=1)
+        if failed_items:
+            self.logger.warning("%s messages have no receipts from the brokers, they will be retried" % len(failed_items))
+
+    def on_disconnected(self, conn):
+        self.fail_pending_receipts(conn=conn)
+
+    def wait_for_window(self):
+        with self.pending_condition:
+            while len(self.pending_receipts) >= self.send_window and not self.graceful_stop.is_set():
+                if not self.pending_condition.wait(timeout=1):
+                    self.fail_pending_receipts(sent_before=time.time() - self.receipt_timeout)
+
+    def get_send_batch(self, timeout=1):
+        """
+        Get a batch of messages from the request queue.
+
+        :param timeout: seconds to wait for the first message. 0 not to wait.
+        :returns: list of messages, at most send_batch_size.
+        """
+        msgs = []
+        try:
+            if timeout:
+                msg = self.request_queue.get(timeout=timeout)
+            else:
+                msg = self.request_queue.get(False)
+            if msg:
+                msgs.append(msg)
+            while len(msgs) < self.send_batch_size:
+                msg = self.request_queue.get(False)
+                if msg:
+                    msgs.append(msg)
+        except Empty:
+            pass
+        return msgs
+
+    def send_messages(self, msgs):
+        """
+        Send messages, grouped by destination.
+        With send_window, the messages are reported to the response queue when the receipts arrive.
+        """
+        msgs_by_destination = {}
+        for msg in msgs:
+            destination = msg['destination'] if 'destination' in msg else 'default'
+            msgs_by_destination.setdefault(destination, []).append(msg)
+
+        for destination, dest_msgs in msgs_by_destination.items():
+            time_start = time.time()
+            conn, queue_dest, destination = self.get_connection(destination)
+            if not conn:
+                self.logger.info("No brokers defined, discard(%s): %s" % (destination, [msg['msg_id'] for msg in dest_msgs]))
+                for msg in dest_msgs:
+                    self.put_response(msg)
+                continue
+
+            self.logger.info("Sending %s messages to message broker(%s): %s"
+                             % (len(dest_msgs), destination, [msg['msg_id'] for msg in dest_msgs]))
+            num_sent, num_failed = 0, 0
+            for msg in dest_msgs:
+                receipt_id = None
+                if self.send_window > 0:
+                    self.wait_for_window()
+                    receipt_id = '%s-%s' % (self.name, next(self.receipt_ids))
+                    with self.pending_condition:
+                        self.pending_receipts[receipt_id] = (msg, destination, conn, time.time())
+                try:
+                    self.send_to_conn(conn, queue_dest, msg, receipt_id=receipt_id)
+                    num_sent += 1
+                    if receipt_id is None:
+                        self.put_response(msg)
+                except Exception as error:
+                    num_failed += 1
+                    self.logger.error("Failed to send message(%s) %s: %s" % (destination, msg['msg_id'], error))
+                    if receipt_id is not None:
+                        with self.pending_condition:
+                            self.pending_receipts.pop(receipt_id, None)
+            self.update_send_stats(destination, sent=num_sent, failed=num_failed, send_time=time.time() - time_start)
+
     def execute_send(self):
         try:
             self.conns = self.connect_to_messaging_brokers(sender=True)
@@ -246,13 +446,11 @@ class MessagingSender(PluginBase, threading.Thread):
 
         while not self.graceful_stop.is_set():
             try:
-                if not self.request_queue.empty():
-                    msg = self.request_queue.get(False)
-                    if msg:
-                        self.send_message(msg)
-                        self.response_queue.put(msg)
-                else:
-                    time.sleep(0.1)
+                # wake up when there are new messages
+                msgs = self.get_send_batch(timeout=1)
+                if msgs:
+                    self.send_messages(msgs)
+                self.fail_pending_receipts(sent_before=time.time() - self.receipt_timeout)
             except Exception as error:
                 self.logger.error("Messaging sender throws an exception: %s, %s" % (error, traceback.format_exc()))
 
@@ -360,16 +558,15 @@ class MessagingMessager(MessagingReceiver):
             # send
             while True:
                 try:
-                    if not self.request_queue.empty():
-                        msg = self.request_queue.get(False)
-                        if msg:
-                            self.send_message(msg)
-                            if self.response_queue:
-                                self.response_queue.put(msg)
+                    msgs = self.get_send_batch(timeout=0)
+                    if msgs:
+                        self.send_messages(msgs)
                     else:
                         break
                 except Exception as error:
                     self.logger.error("Messaging sender throws an exception: %s, %s" % (error, traceback.format_exc()))
+                    break
+            self.fail_pending_receipts(sent_before=time.time() - self.receipt_timeout)
 
             # subscribe
             has_failed_connection = False
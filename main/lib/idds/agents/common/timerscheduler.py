@@ -12,6 +12,7 @@
 import logging
 import heapq
 import threading
+import time
 import traceback
 from concurrent import futures
 
@@ -120,6 +121,10 @@ class TimerScheduler(threading.Thread):
 
         self._task_queue = []
         self._lock = threading.RLock()
+        # notified when a task is added or the scheduler is stopped
+        self._task_cond = threading.Condition(self._lock)
+        # upper bound of one sleep of the timer thread, in seconds
+        self.max_timer_wait = 60
 
         self.logger = logger
 
@@ -147,6 +152,8 @@ class TimerScheduler(threading.Thread):
 
     def stop(self, signum=None, frame=None):
         self.graceful_stop.set()
+        with self._task_cond:
+            self._task_cond.notify_all()
 
     def create_executors(self, name, max_workers=1):
         if self.use_process_pool:
@@ -168,8 +175,9 @@ class TimerScheduler(threading.Thread):
         return TimerTask(task_func, task_output_queue, task_args, task_kwargs, delay_time, priority, self.logger)
 
     def add_task(self, task):
-        with self._lock:
+        with self._task_cond:
             heapq.heappush(self._task_queue, task)
+            self._task_cond.notify()
 
     def remove_task(self, task):
         with self._lock:
@@ -203,14 +211,29 @@ class TimerScheduler(threading.Thread):
         task.execute()
         self.add_task(task)
 
+    def wait_ready_task(self):
+        """
+        Block until the first task is ready, a new task is added or the scheduler is stopped.
+
+        :returns: the ready task, or None.
+        """
+        with self._task_cond:
+            if self.graceful_stop.is_set():
+                return None
+            if not self._task_queue:
+                self._task_cond.wait(self.max_timer_wait)
+            else:
+                wait_time = self._task_queue[0].to_execute_time - time.time()
+                if wait_time > 0:
+                    self._task_cond.wait(min(wait_time, self.max_timer_wait))
+            return self.get_ready_task()
+
     def execute_local(self):
         while not self.graceful_stop.is_set():
             try:
-                task = self.get_ready_task()
+                task = self.wait_ready_task()
                 if task:
                     self.executors_timer.submit(self.execute_task, task)
-                else:
-                    self.graceful_stop.wait(0.0001)
             except Exception as error:
                 self.logger.critical("Caught an exception: %s\n%s" % (str(error), traceback.format_exc()))
 
@@ -6,7 +6,7 @@
 # http://www.apache.org/licenses/LICENSE-2.0OA
 #
 # Authors:
-# - Wen Guan, <wen.guan@cern.ch>, 2019 - 2024
+# - Wen Guan, <wen.guan@cern.ch>, 2019 - 2026
 
 import datetime
 import random
@@ -14,10 +14,10 @@ import time
 import traceback
 try:
     # python 3
-    from queue import Queue
+    from queue import Queue, Empty
 except ImportError:
     # Python 2
-    from Queue import Queue
+    from Queue import Queue, Empty
 
 from idds.common.constants import (Sections, MessageStatus, MessageDestination, MessageType,
                                    ProcessingStatus, ContentStatus, ContentRelationType)
@@ -41,7 +41,8 @@ class Conductor(BaseAgent):
     def __init__(self, num_threads=1, retrieve_bulk_size=200, threshold_to_release_messages=None,
                  random_delay=None, delay=300, interval_delay=10, max_retry_delay=3600,
                  max_normal_retries=10, max_retries=30, replay_times=2, mode='multiple',
-                 use_process_pool=False, retry_executor_threads=4, queue_throller=30, **kwargs):
+                 use_process_pool=False, retry_executor_threads=4, queue_throller=30,
+                 throughput_report_interval=600, **kwargs):
         super(Conductor, self).__init__(num_threads=num_threads, name='Conductor', use_process_pool=use_process_pool, **kwargs)
         self.config_section = Sections.Conductor
         self.retrieve_bulk_size = int(retrieve_bulk_size)
@@ -80,6 +81,8 @@ class Conductor(BaseAgent):
         self.selected_conductor = None
 
         self.queue_throller = int(queue_throller)
+        self.throughput_report_interval = int(throughput_report_interval)
+        self.last_send_stats = None
         self.retry_executor_threads = int(retry_executor_threads)
         self.retry_executor_name = self.executor_name + "_Retry"
         self.retry_executor = self.create_executors(self.retry_executor_name, max_workers=self.retry_executor_threads)
@@ -194,9 +197,21 @@ class Conductor(BaseAgent):
             self.logger.info("Stopping notifier: %s" % self.notifier)
             self.notifier.stop()
 
-    def get_output_messages(self):
+    def get_output_messages(self, timeout=None):
+        """
+        Get the messages sent by the notifier.
+
+        :param timeout: if set, wait at most timeout seconds for the first message.
+        """
         msgs = []
         try:
+            if timeout:
+                try:
+                    msg = self.output_message_queue.get(timeout=timeout)
+                    if msg:
+                        msgs.append(msg)
+                except Empty:
+                    pass
             while not self.output_message_queue.empty():
                 msg = self.output_message_queue.get(False)
                 if msg:
@@ -205,7 +220,82 @@ class Conductor(BaseAgent):
             self.logger.error("Failed to get output messages: %s, %s" % (error, traceback.format_exc()))
         return msgs
 
-    def is_message_processed(self, message):
+    def report_notifier_throughput(self):
+        """
+        Report the sending throughput of the notifier per destination since the last report.
+        """
+        if not hasattr(self, 'notifier') or not self.notifier or not hasattr(self.notifier, 'get_send_stats'):
+            return
+
+        stats = self.notifier.get_send_stats()
+        now = time.time()
+        if self.last_send_stats:
+            last_time, last_stats = self.last_send_stats
+            time_used = max(now - last_time, 1e-6)
+            for destination in stats:
+                dest_stats = stats[destination]
+                last_dest_stats = last_stats.get(destination, {})
+                num_sent = dest_stats['sent'] - last_dest_stats.get('sent', 0)
+                num_acked = dest_stats['acked'] - last_dest_stats.get('acked', 0)
+                num_failed = dest_stats['failed'] - last_dest_stats.get('failed', 0)
+                self.logger.info("Notifier destination %s: sent %s (%.2f/s), acknowledged %s (%.2f/s), failed %s, pending %s"
+                                 % (destination, num_sent, num_sent / time_used, num_acked, num_acked / time_used,
+                                    num_failed, dest_stats['pending']))
+        self.last_send_stats = (now, stats)
+
+    def add_report_throughput_task(self):
+        task = self.create_task(task_func=self.report_notifier_throughput, task_output_queue=None,
+                                task_args=tuple(), task_kwargs={}, delay_time=self.throughput_report_interval,
+                                priority=1)
+        self.add_task(task)
+
+    def is_processing_file_to_check(self, message):
+        """
+        Whether it's a retried ProcessingFile message, which is checked with the status of processing and contents.
+        """
+        msg_content = message['msg_content']
+        return (message['status'] not in [MessageStatus.New]
+                and message['retries'] < self.max_retries
+                and message['msg_type'] in [MessageType.ProcessingFile]
+                and 'files' in msg_content and msg_content['files']
+                and 'relation_type' in msg_content and msg_content['relation_type'] == 'input')
+
+    def get_processing_files_info(self, messages):
+        """
+        Load the processings and the output contents status of retried ProcessingFile messages,
+        with one query per (request_id, transform_id) for only the map_ids in the messages.
+
+        :returns: dict of {(request_id, transform_id): (processings, {map_id: [status]})}.
+        """
+        groups = {}
+        for message in messages:
+            try:
+                if self.is_processing_file_to_check(message):
+                    key = (message['request_id'], message['transform_id'])
+                    if key not in groups:
+                        groups[key] = set()
+                    groups[key].update([f['map_id'] for f in message['msg_content']['files']])
+            except Exception as ex:
+                self.logger.warning("Failed to check message %s: %s" % (message['msg_id'], ex))
+
+        info = {}
+        for (request_id, transform_id), map_ids in groups.items():
+            try:
+                processings = core_processings.get_processings_by_transform_id(transform_id=transform_id, lazy_metadata=True)
+                contents_status = core_catalog.get_content_status_by_map_ids(request_id=request_id, transform_id=transform_id,
+                                                                             map_ids=list(map_ids),
+                                                                             relation_type=ContentRelationType.Output)
+                info[(request_id, transform_id)] = (processings, contents_status)
+            except Exception as ex:
+                self.logger.error("Failed to load processing and contents of (request_id: %s, transform_id: %s): %s"
+                                  % (request_id, transform_id, ex))
+                self.logger.error(traceback.format_exc())
+        return info
+
+    def is_message_processed(self, message, processing_files_info=None):
+        """
+        :param processing_files_info: the processings and contents status loaded by get_processing_files_info.
+        """
         retries = message['retries']
         try:
             if message['status'] in [MessageStatus.New]:
@@ -230,8 +320,15 @@ class Conductor(BaseAgent):
                 if 'relation_type' not in msg_content or msg_content['relation_type'] != 'input':
                     return True
 
+                files = msg_content['files']
+                files_map_id = [f['map_id'] for f in files]
+                if processing_files_info and (request_id, transform_id) in processing_files_info:
+                    processings, proc_conents = processing_files_info[(request_id, transform_id)]
+                else:
+                    processings = core_processings.get_processings_by_transform_id(transform_id=transform_id, lazy_metadata=True)
+                    proc_conents = None
+
                 workload_id = msg_content['workload_id']
-                processings = core_processings.get_processings_by_transform_id(transform_id=transform_id)
                 find_processing = None
                 if processings:
                     for processing in processings:
@@ -243,17 +340,10 @@ class Conductor(BaseAgent):
                                                                      ProcessingStatus.Suspended, ProcessingStatus.Broken]:
                     return True
 
-                files = msg_content['files']
-                files_map_id = [f['map_id'] for f in files]
-                contents = core_catalog.get_contents_by_request_transform(request_id=request_id,
-                                                                          transform_id=transform_id)
-                proc_conents = {}
-                for content in contents:
-                    if content['content_relation_type'] == ContentRelationType.Output:
-                        if content['map_id'] not in proc_conents:
-                            proc_conents[content['map_id']] = []
-                        if content['status'] not in proc_conents[content['map_id']]:
-                            proc_conents[content['map_id']].append(content['status'])
+                if proc_conents is None:
+                    proc_conents = core_catalog.get_content_status_by_map_ids(request_id=request_id, transform_id=transform_id,
+                                                                              map_ids=files_map_id,
+                                                                              relation_type=ContentRelationType.Output)
                 all_map_id_processed = True
                 for map_id in files_map_id:
                     content_statuses = proc_conents.get(map_id, [])
@@ -274,12 +364,13 @@ class Conductor(BaseAgent):
     def process_messages(self, messages):
         try:
             to_discard_messages = []
+            processing_files_info = self.get_processing_files_info(messages)
             for message in messages:
                 message['destination'] = message['destination'].name
                 message['from_idds'] = True
 
                 # num_contents += message['num_contents']
-                if self.is_message_processed(message):
+                if self.is_message_processed(message, processing_files_info=processing_files_info):
                     self.logger.debug("message (msg_id: %s) is already processed, not resend it again" % message['msg_id'])
                     to_discard_messages.append(message)
                 else:
@@ -309,6 +400,7 @@ class Conductor(BaseAgent):
                 self.add_conductor_monitor_task()
 
             self.start_notifier()
+            self.add_report_throughput_task()
 
             # self.add_health_message_task()
 
@@ -333,14 +425,18 @@ class Conductor(BaseAgent):
                         new_messages = []
                         retry_messages = []
 
+                    # wake up when the notifier sends messages
                     while self.message_queue.qsize() > self.queue_throller:
-                        time.sleep(1)
-                        output_messages = self.get_output_messages()
-                        self.clean_messages(output_messages)
+                        output_messages = self.get_output_messages(timeout=1)
+                        if output_messages:
+                            self.clean_messages(output_messages)
 
                     output_messages = self.get_output_messages()
-                    self.clean_messages(output_messages)
-                    time.sleep(1)
+                    if output_messages:
+                        self.clean_messages(output_messages)
+                    if len(new_messages) < self.retrieve_bulk_size:
+                        # no more new messages waiting
+                        time.sleep(1)
                 except IDDSException as error:
                     self.logger.error("Main thread IDDSException: %s" % str(error))
                     self.logger.error(traceback.format_exc())
@@ -19,6 +19,7 @@ from idds.common.event import EventPriority
 from idds.common.utils import setup_logging, get_logger, json_loads
 from idds.core import health as core_health
 from idds.agents.common.baseagent import BaseAgent
+from idds.agents.common.eventbus.eventqueue import EventQueue
 
 
 setup_logging(__name__)
@@ -168,13 +169,12 @@ class Coordinator(BaseAgent):
         scheduled_time = self.get_schedule_time(event, interval_delay)
         return priority, scheduled_time
 
-    def get_event_position(self, event_index, event):
-        if not event_index:
-            return 0
-        for i, event_id in enumerate(event_index):
-            if self.events[event_id].scheduled_time > event.scheduled_time:
-                return i
-        return len(event_index)
+    def queue_event(self, event):
+        if event._event_type not in self.events_index:
+            self.events_index[event._event_type] = {}
+        if event.scheduled_priority not in self.events_index[event._event_type]:
+            self.events_index[event._event_type][event.scheduled_priority] = EventQueue()
+        self.events_index[event._event_type][event.scheduled_priority].push(event._id, event.scheduled_time)
 
     def insert_event(self, event):
         event.scheduled_priority, event.scheduled_time = self.get_scheduled_prio_time(event)
@@ -188,33 +188,24 @@ class Coordinator(BaseAgent):
                 old_event.merge(event)
 
                 self.events[old_event_id] = old_event
-                # old_event.scheduled_priority, old_event.scheduled_time = self.get_scheduled_prio_time(old_event)
                 new_scheduled_priority, new_scheduled_time = self.get_scheduled_prio_time(old_event)
 
                 if old_scheduled_priority != new_scheduled_priority or old_scheduled_time != new_scheduled_time:
                     self.events_index[old_event._event_type][old_scheduled_priority].remove(old_event._id)
                     old_event.scheduled_priority = new_scheduled_priority
                     old_event.scheduled_time = new_scheduled_time
-                    if old_event.scheduled_priority not in self.events_index[old_event._event_type]:
-                        self.events_index[old_event._event_type][old_event.scheduled_priority] = []
-                    insert_pos = self.get_event_position(self.events_index[old_event._event_type][old_event.scheduled_priority], old_event)
-                    self.events_index[old_event._event_type][old_event.scheduled_priority].insert(insert_pos, old_event._id)
+                    self.queue_event(old_event)
                 merge = True
                 self.logger.debug("New event %s is merged to old event %s" % (event.to_json(strip=True), old_event.to_json(strip=True)))
                 break
         if not merge:
-            if event._event_type not in self.events_index:
-                self.events_index[event._event_type] = {}
-            if event.scheduled_priority not in self.events_index[event._event_type]:
-                self.events_index[event._event_type][event.scheduled_priority] = []
             if event.get_event_id() not in self.events_ids:
                 self.events_ids[event.get_event_id()] = []
 
             self.events[event._id] = event
             self.logger.debug("New event %s" % (event.to_json(strip=True)))
 
-            insert_pos = self.get_event_position(self.events_index[event._event_type][event.scheduled_priority], event)
-            self.events_index[event._event_type][event.scheduled_priority].insert(insert_pos, event._id)
+            self.queue_event(event)
             self.events_ids[event.get_event_id()].append(event._id)
 
             if event._event_type not in self.accounts:
@@ -246,24 +237,22 @@ class Coordinator(BaseAgent):
                 try:
                     if event_type in self.events_index:
                         for scheduled_priority in [EventPriority.High, EventPriority.Medium, EventPriority.Low]:
-                            if (scheduled_priority in self.events_index[event_type] and self.events_index[event_type][scheduled_priority]):
-                                event_id = self.events_index[event_type][scheduled_priority][0]
-                                if event_id not in self.events:
-                                    self.events_index[event_type][scheduled_priority].pop(0)
-                                else:
-                                    event = self.events[event_id]
-                                    if event.scheduled_time <= time.time():
-                                        event_id = self.events_index[event_type][scheduled_priority].pop(0)
-                                        event = self.events[event_id]
-                                        del self.events[event_id]
-                                        self.events_ids[event.get_event_id()].remove(event_id)
-
-                                        if event._event_type in self.accounts:
-                                            self.accounts[event._event_type]['total_queued_events'] -= 1
-                                            self.accounts[event._event_type]['total_processed_events'] += 1
-
-                                        self.logger.debug("Get event %s" % (event.to_json(strip=True)))
-                                        events.append(event)
+                            event_queue = self.events_index[event_type].get(scheduled_priority, None)
+                            if not event_queue:
+                                continue
+                            scheduled_time, event_id = event_queue.peek()
+                            if scheduled_time is not None and scheduled_time <= time.time():
+                                event_queue.pop()
+                                event = self.events[event_id]
+                                del self.events[event_id]
+                                self.events_ids[event.get_event_id()].remove(event_id)
+
+                                if event._event_type in self.accounts:
+                                    self.accounts[event._event_type]['total_queued_events'] -= 1
+                                    self.accounts[event._event_type]['total_processed_events'] += 1
+
+                                self.logger.debug("Get event %s" % (event.to_json(strip=True)))
+                                events.append(event)
                 except Exception as ex:
                     self.logger.error(f"Failed to send event: {ex}")
                     self.logger.error(traceback.format_exc())
@@ -12,6 +12,7 @@ import logging
 import os
 import socket
 import asyncio
+import threading
 import time
 import traceback
 from nats.aio.client import Client as NATS
@@ -32,29 +33,101 @@ setup_logging(__name__)
 
 
 class IDDSNATS(Singleton):
-    def __init__(self, nats_server: dict, logger=None, debug_mode=False):
+    """
+    Client of NATS JetStream.
+
+    A long-lived asyncio loop in a daemon thread owns one connection, which is reused
+    by all publishes and fetches. The pull subscriptions are cached per event type.
+    The coroutines are executed in the loop thread with run().
+    """
+
+    def __init__(self, nats_server: dict, logger=None, debug_mode=False, timeout=30):
         if getattr(self, "_initialized", False):
             return
         self.nats_server = nats_server
         self.nc = None
         self.js = None
+        self.subscribers = {}
         self.logger = logger
+        self.timeout = timeout
         self._initialized = True
         self.debug_mode = debug_mode
 
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+        self._connect_lock = None
+
+    def set_nats_server(self, nats_server):
+        """
+        Switch to another NATS server. The current connection is closed.
+        """
+        if self.nats_server != nats_server:
+            self.run(self.close())
+            self.nats_server = nats_server
+
+    def get_loop(self):
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name="IDDSNATSLoop", daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def run(self, coro, timeout=None):
+        """
+        Run a coroutine in the loop thread and wait for the result.
+        """
+        loop = self.get_loop()
+        if threading.current_thread() is self._loop_thread:
+            coro.close()
+            raise RuntimeError("IDDSNATS.run cannot be called in the loop thread")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        return future.result(timeout=timeout or self.timeout)
+
+    def stop(self):
+        """
+        Close the connection and stop the loop thread.
+        """
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+        if loop is None or loop.is_closed():
+            return
+        try:
+            self.run(self.close())
+        except Exception as ex:
+            if self.logger:
+                self.logger.error(f"Failed to close connection: {ex}")
+        loop.call_soon_threadsafe(loop.stop)
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=10)
+        with self._loop_lock:
+            if not loop.is_running():
+                loop.close()
+            self._loop, self._loop_thread = None, None
+            self._connect_lock = None
+
     async def connect(self):
-        nc = NATS()
-        await nc.connect(
-            servers=[self.nats_server["nats_url"]],
-            token=self.nats_server["nats_token"]
-        )
-        js = nc.jetstream()
-        if self.debug_mode and self.logger:
-            self.logger.info(f"Connected to NATS: {self.nats_server}")
-        return nc, js
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.nc is not None and self.nc.is_connected:
+                return self.nc, self.js
+            await self.close()
+
+            nc = NATS()
+            await nc.connect(
+                servers=[self.nats_server["nats_url"]],
+                token=self.nats_server["nats_token"],
+                allow_reconnect=True,
+                max_reconnect_attempts=-1
+            )
+            self.nc, self.js = nc, nc.jetstream()
+            if self.debug_mode and self.logger:
+                self.logger.info(f"Connected to NATS: {self.nats_server}")
+            return self.nc, self.js
 
     async def publish_event(self, event):
-        nc = None
         try:
             nc, js = await self.connect()
             payload = json_dumps(event).encode("utf-8")
@@ -65,17 +138,48 @@ class IDDSNATS(Singleton):
         except Exception as e:
             if self.logger:
                 self.logger.error(f"Publish failed for event {event.event_type}: event: {event}, error: {e}")
-        finally:
-            await self.close(nc)
+
+    async def publish_events(self, events):
+        """
+        Publish events in a pipeline. The acks are waited together.
+
+        :returns: list of acks, None for the failed ones.
+        """
+        if not events:
+            return []
+        try:
+            nc, js = await self.connect()
+            publishes = [js.publish(f"event.{event.event_type}", json_dumps(event).encode("utf-8"), timeout=5) for event in events]
+            acks = await asyncio.gather(*publishes, return_exceptions=True)
+            await nc.flush()
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Publish failed for {len(events)} events: {e}")
+            return [None] * len(events)
+
+        rets = []
+        for event, ack in zip(events, acks):
+            if isinstance(ack, Exception):
+                if self.logger:
+                    self.logger.error(f"Publish failed for event {event.event_type}: event: {event}, error: {ack}")
+                ack = None
+            rets.append(ack)
+        if self.debug_mode and self.logger:
+            self.logger.debug(f"Published {len(events)} events")
+        return rets
+
+    async def get_subscriber(self, event_type_name):
+        subscriber = self.subscribers.get(event_type_name, None)
+        if subscriber is None:
+            nc, js = await self.connect()
+            subscriber = await js.pull_subscribe(f"event.{event_type_name}", durable=event_type_name)
+            self.subscribers[event_type_name] = subscriber
+        return subscriber
 
     async def fetch_events(self, event_type_name, num_events=1, wait=5, callback=None):
         data_all = []
-        nc = None
         try:
-            nc, js = await self.connect()
-            subject = f"event.{event_type_name}"
-            durable = event_type_name
-            subscriber = await js.pull_subscribe(subject, durable=durable)
+            subscriber = await self.get_subscriber(event_type_name)
             msgs = await subscriber.fetch(num_events, timeout=wait)
             for msg in msgs:
                 data = msg.data.decode("utf-8")
@@ -85,21 +189,20 @@ class IDDSNATS(Singleton):
                 await msg.ack()
                 data_all.append(data)
             if self.logger:
-                self.logger.debug(f"Fetched events from {event_type_name} using durable {durable}: {data_all}")
+                self.logger.debug(f"Fetched events from {event_type_name} using durable {event_type_name}: {data_all}")
         except NATSTimeoutError:
             pass
         except NATSNotFoundError:
+            self.subscribers.pop(event_type_name, None)
             if self.logger:
                 self.logger.warning(f"Stream or consumer not found for event.{event_type_name}")
         except Exception as e:
+            self.subscribers.pop(event_type_name, None)
             if self.logger:
                 self.logger.error(f"Failed to fetch event.{event_type_name}: {e}")
-        finally:
-            await self.close(nc)
         return data_all
 
     async def show(self):
-        nc = None
         try:
             nc, js = await self.connect()
             streams = await js.streams_info()
@@ -126,20 +229,22 @@ class IDDSNATS(Singleton):
         except Exception as ex:
             self.logger.error(f"Failed show stream information: {ex}")
             self.logger.error(traceback.format_exc())
-        finally:
-            await self.close(nc)
 
     async def close(self, nc=None):
+        nc = nc or self.nc
+        self.nc, self.js = None, None
+        self.subscribers = {}
         try:
-            if nc:
+            if nc and not nc.is_closed:
                 # await nc.drain()   # flush pending messages safely
                 await nc.close()
                 if self.debug_mode and self.logger:
-                    self.logger.debug("NATS connection drained and closed")
-        except Exception as ex:
-            self.logger.error(f"Failed to close connection: {ex}")
+                    self.logger.debug("NATS connection closed")
         except NATSTimeoutError:
             pass
+        except Exception as ex:
+            if self.logger:
+                self.logger.error(f"Failed to close connection: {ex}")
 
 
 class NATSCoordinator(BaseAgent):
@@ -248,7 +353,7 @@ class NATSCoordinator(BaseAgent):
             self.logger.debug(f"Set NATS server: {nats_server}")
             if not nats_server:
                 if self.idds_nats:
-                    asyncio.run(self.idds_nats.close())
+                    self.idds_nats.stop()
                 self.idds_nats = None
                 self.selected_nats_server = None
                 return None
@@ -256,10 +361,9 @@ class NATSCoordinator(BaseAgent):
             if self.selected_nats_server == nats_server and self.idds_nats:
                 return self.idds_nats
 
-            if self.idds_nats:
-                asyncio.run(self.idds_nats.close())
-
+            # IDDSNATS is a singleton, the connection is kept if the server is not changed
             self.idds_nats = IDDSNATS(nats_server, logger=self.logger, debug_mode=self.debug_mode)
+            self.idds_nats.set_nats_server(nats_server)
             self.selected_nats_server = nats_server
             return self.idds_nats
         except Exception as ex:
@@ -290,7 +394,7 @@ class NATSCoordinator(BaseAgent):
     def send(self, event):
         try:
             if self.idds_nats:
-                asyncio.run(self.idds_nats.publish_event(event))
+                self.idds_nats.run(self.idds_nats.publish_event(event))
             else:
                 self.logger.error(f"idds nats({self.idds_nats}) is not set, failed to send event {event}")
         except RuntimeError as ex:
@@ -299,13 +403,21 @@ class NATSCoordinator(BaseAgent):
             self.logger.error(f"Failed to send event: {ex}")
 
     def send_bulk(self, events):
-        for event in events:
-            self.send(event)
+        try:
+            if self.idds_nats:
+                self.idds_nats.run(self.idds_nats.publish_events(events))
+            else:
+                self.logger.error(f"idds nats({self.idds_nats}) is not set, failed to send {len(events)} events")
+        except RuntimeError as ex:
+            self.logger.error(f"Failed to send events: {ex}")
+        except Exception as ex:
+            self.logger.error(f"Failed to send events: {ex}")
 
     def get(self, event_type, num_events=1, wait=5, callback=None):
         try:
             if self.idds_nats:
-                return asyncio.run(self.idds_nats.fetch_events(event_type_name=event_type.name, num_events=num_events, wait=wait, callback=callback))
+                return self.idds_nats.run(self.idds_nats.fetch_events(event_type_name=event_type.name, num_events=num_events, wait=wait, callback=callback),
+                                          timeout=wait + self.idds_nats.timeout)
             else:
                 self.logger.error(f"idds nats({self.idds_nats}) is not set, failed to fetch events for {event_type.name}")
                 return []
@@ -328,7 +440,7 @@ class NATSCoordinator(BaseAgent):
         try:
             if self.show_queued_events_time is None or self.show_queued_events_time + self.show_queued_events_time_interval > time.time():
                 if self.idds_nats:
-                    asyncio.run(self.idds_nats.show())
+                    self.idds_nats.run(self.idds_nats.show())
                 self.show_queued_events_time = time.time()
         except RuntimeError as ex:
             self.logger.error(f"Failed to show stream info: {ex}")
@@ -368,7 +480,7 @@ class NATSCoordinator(BaseAgent):
 
     def stop(self):
         if self.idds_nats:
-            asyncio.run(self.idds_nats.close())
+            self.idds_nats.stop()
         super(NATSCoordinator, self).stop()
 
 
@@ -28,7 +28,8 @@ from idds.core import (transforms as core_transforms,
                        processings as core_processings,
                        catalog as core_catalog,
                        throttlers as core_throttlers,
-                       conditions as core_conditions)
+                       conditions as core_conditions,
+                       counters as core_counters)
 from idds.agents.common.baseagent import BaseAgent
 from idds.agents.common.eventbus.event import (EventType,
                                                NewTransformEvent,
@@ -111,6 +112,11 @@ class Transformer(BaseAgent):
         else:
             self.clean_locks_time_period = 1800
 
+        if hasattr(self, 'throttler_counters_reconcile_period'):
+            self.throttler_counters_reconcile_period = int(self.throttler_counters_reconcile_period)
+        else:
+            self.throttler_counters_reconcile_period = 3600
+
     def is_ok_to_run_more_transforms(self):
         if self.get_num_free_workers() > 0:
             return True
@@ -240,6 +246,34 @@ class Transformer(BaseAgent):
         default_value = {'new': 0, 'activated': 0, 'processed': 0}
         return num_input_contents.get(site_name, default_value), num_output_contents.get(site_name, default_value)
 
+    def reconcile_throttler_counters(self, force=False):
+        """
+        Reconcile the throttler counters with the database.
+        """
+        if not core_counters.is_enabled():
+            return
+        try:
+            ret = core_counters.reconcile_counters(period=self.throttler_counters_reconcile_period, force=force)
+            if ret:
+                self.logger.info("Reconciled throttler counters")
+        except Exception as ex:
+            self.logger.error("Failed to reconcile throttler counters: %s" % str(ex))
+            self.logger.error(traceback.format_exc())
+
+    def get_throttler_counters(self, site):
+        """
+        Get the incrementally maintained counters of a site.
+
+        :returns: None if the counters are not enabled or not initialized.
+        """
+        if not core_counters.is_enabled():
+            return None
+        counters = core_counters.get_site_counters(site)
+        if counters is None:
+            self.reconcile_throttler_counters()
+            counters = core_counters.get_site_counters(site)
+        return counters
+
     def get_closest_site(self, task_site, throttler_sites):
         try:
             self.logger.debug(f"task_site: {task_site}, throttler_sites: {throttler_sites}")
@@ -275,9 +309,15 @@ class Transformer(BaseAgent):
                     site = 'Default'
             self.logger.info(f"throttler closest site for {transform['site']} is {site}")
 
-            num_transforms = self.get_num_active_transforms(site)
-            num_processings, active_transforms = self.get_num_active_processings(site)
-            num_input_contents, num_output_contents = self.get_num_active_contents(site, active_transforms)
+            counters = self.get_throttler_counters(site)
+            if counters is not None:
+                num_transforms = counters['transforms']
+                num_processings = counters['processings']
+                num_input_contents, num_output_contents = counters['input_contents'], counters['output_contents']
+            else:
+                num_transforms = self.get_num_active_transforms(site)
+                num_processings, active_transforms = self.get_num_active_processings(site)
+                num_input_contents, num_output_contents = self.get_num_active_contents(site, active_transforms)
             self.logger.info("throttler(site: %s): transforms(%s), processings(%s)" % (site, num_transforms, num_processings))
             self.logger.info("throttler(site: %s): active input contents(%s), output contents(%s)" % (site, num_input_contents, num_output_contents))
 
@@ -1144,7 +1184,7 @@ class Transformer(BaseAgent):
 
         # work = transform['transform_metadata']['work']
 
-        prs = core_processings.get_processings(transform_id=transform['transform_id'])
+        prs = core_processings.get_processings(transform_id=transform['transform_id'], lazy_metadata=True)
 
         # track workload_id from current processing
         for pr in prs:
@@ -1655,6 +1695,10 @@ class Transformer(BaseAgent):
             self.add_task(task)
             task = self.create_task(task_func=self.load_min_request_id, task_output_queue=None, task_args=tuple(), task_kwargs={}, delay_time=600, priority=1)
             self.add_task(task)
+            if core_counters.is_enabled():
+                task = self.create_task(task_func=self.reconcile_throttler_counters, task_output_queue=None, task_args=tuple(), task_kwargs={},
+                                        delay_time=max(self.throttler_counters_reconcile_period // 10, 60), priority=1)
+                self.add_task(task)
 
             self.execute()
         except KeyboardInterrupt:
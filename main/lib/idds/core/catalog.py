@@ -18,7 +18,7 @@ from idds.common import exceptions
 from idds.common.constants import (CollectionType, CollectionStatus, CollectionLocking,
                                    CollectionRelationType, ContentType, ContentStatus,
                                    ContentLocking, ContentRelationType)
-from idds.orm.base.session import read_session, transactional_session
+from idds.orm.base.session import read_session, stream_session, transactional_session
 from idds.orm import (transforms as orm_transforms,
                       collections as orm_collections,
                       contents as orm_contents,
@@ -359,9 +359,37 @@ def update_content(content_id, parameters, session=None):
     return orm_contents.update_content(content_id, parameters, session=session)
 
 
+def get_content_relation_type(relation_type=None, content_relation_type=None):
+    """
+    Get the content relation type from the collection relation type.
+    """
+    if content_relation_type is None and relation_type is not None:
+        if relation_type == CollectionRelationType.Output:
+            content_relation_type = ContentRelationType.Output
+        elif relation_type == CollectionRelationType.Input:
+            content_relation_type = ContentRelationType.Input
+        elif relation_type == CollectionRelationType.Log:
+            content_relation_type = ContentRelationType.Log
+    return content_relation_type
+
+
+def get_contents_coll_ids(coll_scope=None, coll_name=None, coll_id=[], request_id=None, workload_id=None, transform_id=None,
+                          relation_type=None, session=None):
+    if not coll_id:
+        collections = get_collections(scope=coll_scope, name=coll_name, request_id=request_id,
+                                      workload_id=workload_id, transform_id=transform_id,
+                                      relation_type=relation_type, session=session)
+
+        coll_ids = [coll['coll_id'] for coll in collections]
+    else:
+        coll_ids = coll_id
+    return coll_ids
+
+
 @read_session
 def get_contents(coll_scope=None, coll_name=None, coll_id=[], request_id=None, workload_id=None, transform_id=None,
-                 relation_type=None, content_relation_type=None, status=None, to_json=False, session=None):
+                 relation_type=None, content_relation_type=None, status=None, to_json=False,
+                 last_content_id=None, limit=None, session=None):
     """
     Get contents with collection scope, collection name, request id, workload id and relation type.
 
@@ -372,45 +400,61 @@ def get_contents(coll_scope=None, coll_name=None, coll_id=[], request_id=None, w
     :param transform_id: The transform id related to this collection.
     :param relation_type: The relation type between the collection and transform: input, outpu, logs and etc.
     :param to_json: return json format.
+    :param last_content_id: return the contents after this content_id, ordered by content_id.
+    :param limit: max number of contents to return.
     :param session: The database session in use.
 
     :returns: list of contents
     """
-    if not coll_id:
-        collections = get_collections(scope=coll_scope, name=coll_name, request_id=request_id,
-                                      workload_id=workload_id, transform_id=transform_id,
-                                      relation_type=relation_type, to_json=to_json, session=session)
-
-        coll_ids = [coll['coll_id'] for coll in collections]
-    else:
-        coll_ids = coll_id
+    coll_ids = get_contents_coll_ids(coll_scope=coll_scope, coll_name=coll_name, coll_id=coll_id, request_id=request_id,
+                                     workload_id=workload_id, transform_id=transform_id, relation_type=relation_type,
+                                     session=session)
 
     if coll_ids:
-        if content_relation_type is None:
-            if relation_type is None:
-                content_relation_type = None
-            else:
-                if relation_type == CollectionRelationType.Output:
-                    content_relation_type = ContentRelationType.Output
-                elif relation_type == CollectionRelationType.Input:
-                    content_relation_type = ContentRelationType.Input
-                elif relation_type == CollectionRelationType.Log:
-                    content_relation_type = ContentRelationType.Log
+        content_relation_type = get_content_relation_type(relation_type, content_relation_type)
         rets = orm_contents.get_contents(request_id=request_id, transform_id=transform_id, coll_id=coll_ids, status=status,
-                                         to_json=to_json, relation_type=content_relation_type, session=session)
+                                         to_json=to_json, relation_type=content_relation_type,
+                                         last_content_id=last_content_id, limit=limit, session=session)
     else:
         rets = []
     return rets
 
 
+@stream_session
+def iter_contents(coll_scope=None, coll_name=None, coll_id=[], request_id=None, workload_id=None, transform_id=None,
+                  relation_type=None, content_relation_type=None, status=None, to_json=False,
+                  last_content_id=None, yield_per=1000, session=None):
+    """
+    Iterate contents ordered by content_id, without loading all of them in memory.
+
+    :param last_content_id: iterate the contents after this content_id.
+    :param yield_per: number of rows fetched from the database every time.
+
+    :returns: generator of contents
+    """
+    coll_ids = get_contents_coll_ids(coll_scope=coll_scope, coll_name=coll_name, coll_id=coll_id, request_id=request_id,
+                                     workload_id=workload_id, transform_id=transform_id, relation_type=relation_type,
+                                     session=session)
+    if coll_ids:
+        content_relation_type = get_content_relation_type(relation_type, content_relation_type)
+        for content in orm_contents.iter_contents(request_id=request_id, transform_id=transform_id, coll_id=coll_ids,
+                                                  status=status, to_json=to_json, relation_type=content_relation_type,
+                                                  last_content_id=last_content_id, yield_per=yield_per, session=session):
+            yield content
+
+
 @read_session
-def get_contents_by_request_transform(request_id=None, workload_id=None, transform_id=None, status=None, map_id=None, status_updated=False, by_map=False, match_content_ext=False, session=None):
+def get_contents_by_request_transform(request_id=None, workload_id=None, transform_id=None, status=None, map_id=None, status_updated=False, by_map=False, match_content_ext=False,
+                                      only_outputs=False, page_size=None, last_content_id=None, columns=None, session=None):
     """
     Get contents with request id, workload id and transform id.
 
     :param request_id: the request id.
     :param workload_id: The workload_id of the request.
     :param transform_id: The transform id related to this collection.
+    :param only_outputs: only return the output contents.
+    :param page_size: if set, return at most page_size contents after last_content_id, ordered by content_id.
+    :param columns: list of column names to return. None for all columns.
     :param session: The database session in use.
 
     :returns: list of contents
@@ -418,10 +462,28 @@ def get_contents_by_request_transform(request_id=None, workload_id=None, transfo
     ret = orm_contents.get_contents_by_request_transform(request_id=request_id, transform_id=transform_id,
                                                          workload_id=workload_id, status=status, map_id=map_id,
                                                          status_updated=status_updated, by_map=by_map,
-                                                         match_content_ext=match_content_ext, session=session)
+                                                         match_content_ext=match_content_ext, only_outputs=only_outputs, page_size=page_size,
+                                                         last_content_id=last_content_id, columns=columns, session=session)
     return ret
 
 
+@read_session
+def get_content_status_by_map_ids(request_id, transform_id, map_ids, relation_type=ContentRelationType.Output, session=None):
+    """
+    Get the distinct statuses of the contents of some map_ids.
+
+    :param request_id: the request id.
+    :param transform_id: The transform id.
+    :param map_ids: list of map ids.
+    :param relation_type: content relation type.
+    :param session: The database session in use.
+
+    :returns: dict of {map_id: [status]}.
+    """
+    return orm_contents.get_content_status_by_map_ids(request_id=request_id, transform_id=transform_id, map_ids=map_ids,
+                                                      relation_type=relation_type, session=session)
+
+
 @read_session
 def get_contents_by_content_ids(content_ids, request_id=None, session=None):
     """
@@ -812,6 +874,25 @@ def update_input_contents_by_dependency_pages(request_id=None, transform_id=None
                                                                   status_not_to_check=status_not_to_check, session=session)
 
 
+@transactional_session
+def release_inputs_by_dependency_index(request_id, dep_contents, bulk_size=2000, status_not_to_check=None,
+                                       dep_status_not_to_check=None, logger=None, log_prefix=None, session=None):
+    """
+    Release the input contents depending on the updated output contents, through the content_dep_id index.
+
+    :param request_id: The Request id.
+    :param dep_contents: list of updated output contents, with 'content_id' and 'substatus'.
+    :param status_not_to_check: The input contents with these status are not updated.
+    :param dep_status_not_to_check: The input dependency contents with these status are not updated.
+
+    :returns: list of transform ids whose contents are updated.
+    """
+    return orm_contents.release_inputs_by_dependency_index(request_id=request_id, dep_contents=dep_contents,
+                                                           bulk_size=bulk_size, status_not_to_check=status_not_to_check,
+                                                           dep_status_not_to_check=dep_status_not_to_check,
+                                                           logger=logger, log_prefix=log_prefix, session=session)
+
+
 @read_session
 def get_update_contents_from_others_by_dep_id(request_id=None, transform_id=None, session=None):
     """
@@ -0,0 +1,446 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+operations related to the throttler counters.
+
+The numbers of active requests, transforms, processings and contents per site are kept
+in redis hashes. They are updated incrementally when a status changes and reconciled
+periodically with the database. It's enabled with 'throttler_counters = true' in the
+cache section.
+
+The updates made with a database session are applied only after the session commits,
+so that a rolled back transaction doesn't change the counters.
+"""
+
+import logging
+import socket
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from idds.common.config import config_has_option, config_get_bool
+from idds.common.constants import (RequestStatus, TransformStatus, ProcessingStatus,
+                                   ContentStatus, ContentRelationType)
+from idds.common.utils import get_list_chunks
+from idds.orm import (requests as orm_requests,
+                      transforms as orm_transforms,
+                      processings as orm_processings,
+                      contents as orm_contents)
+
+
+REQUESTS = 'requests'
+TRANSFORMS = 'transforms'
+PROCESSINGS = 'processings'
+CONTENTS = 'contents'
+
+COUNTERS_KEY = 'throttler_counters:%s'
+OBJECTS_KEY = 'throttler_counters:%s:objects'
+RECONCILED_KEY = 'throttler_counters:reconciled_at'
+LOCK_KEY = 'throttler_counters:lock'
+# the key in session.info of the updates to apply after the session commits
+PENDING_KEY = 'throttler_counters'
+
+STATUS_BUCKETS = {
+    REQUESTS: {RequestStatus.New: 'new',
+               RequestStatus.Ready: 'new',
+               RequestStatus.Throttling: 'new',
+               RequestStatus.Transforming: 'processing',
+               RequestStatus.Terminating: 'processing'},
+    TRANSFORMS: {TransformStatus.New: 'new',
+                 TransformStatus.Ready: 'new',
+                 TransformStatus.Transforming: 'processing',
+                 TransformStatus.Terminating: 'processing'},
+    PROCESSINGS: {ProcessingStatus.New: 'new',
+                  ProcessingStatus.Submitting: 'processing',
+                  ProcessingStatus.Submitted: 'processing',
+                  ProcessingStatus.Running: 'processing',
+                  ProcessingStatus.Terminating: 'processing',
+                  ProcessingStatus.ToTrigger: 'processing',
+                  ProcessingStatus.Triggering: 'processing'}
+}
+STATUS_CLASSES = {REQUESTS: RequestStatus, TRANSFORMS: TransformStatus, PROCESSINGS: ProcessingStatus}
+
+CONTENT_FIELDS = ['input_new', 'input_activated', 'input_processed',
+                  'output_new', 'output_activated', 'output_processed']
+
+# The contribution of every object is recorded in the objects hash as
+# 'site\tfield\tnum\tfield\tnum...', to be reverted when the object changes.
+# An inactive object keeps only its site, so that a later status update
+# without site can still be counted.
+#
+# KEYS: counters, objects, objects to look up the site, cascade counters, cascade objects
+# ARGV: object id, site, cascade, delete, field1, num1, field2, num2, ...
+#
+# Without a site, the site is the one recorded before. With a look-up hash
+# (contents), the site is the one of the owner (transform), only if the owner
+# is active.
+# With cascade (transforms), the contribution of the same id in the cascade
+# hashes (contents) is removed when the object is deleted or becomes inactive.
+COUNTERS_LUA = """
+local function parse(value)
+    local items = {}
+    for item in string.gmatch(value, '[^\\t]+') do
+        table.insert(items, item)
+    end
+    return items
+end
+
+local function drop(counters, objects, obj_id)
+    local old = redis.call('HGET', objects, obj_id)
+    if not old then
+        return nil
+    end
+    local items = parse(old)
+    for i = 2, #items - 1, 2 do
+        redis.call('HINCRBY', counters, items[1] .. '\\t' .. items[i], -tonumber(items[i + 1]))
+    end
+    return items[1]
+end
+
+local obj_id = ARGV[1]
+local site = drop(KEYS[1], KEYS[2], obj_id)
+if KEYS[3] ~= KEYS[2] then
+    site = nil
+    local owner = redis.call('HGET', KEYS[3], obj_id)
+    if owner then
+        local items = parse(owner)
+        if #items > 1 then
+            site = items[1]
+        end
+    end
+elseif ARGV[2] ~= '' then
+    site = ARGV[2]
+end
+
+local value = site
+local num_fields = 0
+if site and ARGV[4] ~= '1' then
+    for i = 5, #ARGV - 1, 2 do
+        local num = tonumber(ARGV[i + 1])
+        if num ~= 0 then
+            redis.call('HINCRBY', KEYS[1], site .. '\\t' .. ARGV[i], num)
+            value = value .. '\\t' .. ARGV[i] .. '\\t' .. ARGV[i + 1]
+            num_fields = num_fields + 1
+        end
+    end
+end
+
+if (not site) or ARGV[4] == '1' or (num_fields == 0 and KEYS[3] ~= KEYS[2]) then
+    redis.call('HDEL', KEYS[2], obj_id)
+else
+    redis.call('HSET', KEYS[2], obj_id, value)
+end
+if ARGV[3] == '1' and (ARGV[4] == '1' or num_fields == 0) then
+    drop(KEYS[4], KEYS[5], obj_id)
+    redis.call('HDEL', KEYS[5], obj_id)
+end
+return num_fields
+"""
+
+
+_enabled = None
+_script = None
+
+
+def is_enabled():
+    """
+    Whether the throttler counters are enabled.
+    """
+    global _enabled
+    if _enabled is None:
+        try:
+            _enabled = config_has_option('cache', 'throttler_counters') and config_get_bool('cache', 'throttler_counters')
+        except Exception:
+            _enabled = False
+    return _enabled
+
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = enabled
+
+
+def get_cache():
+    from idds.agents.common.cache.redis import get_redis_cache
+    return get_redis_cache()
+
+
+def get_script():
+    global _script
+    if _script is None:
+        _script = get_cache().register_script(COUNTERS_LUA)
+    return _script
+
+
+def get_bucket(kind, status):
+    """
+    Get the counter bucket of a status.
+
+    :returns: 'new', 'processing' or None for inactive status.
+    """
+    if status is None:
+        return None
+    if type(status) in [int]:
+        try:
+            status = STATUS_CLASSES[kind](status)
+        except ValueError:
+            return None
+    return STATUS_BUCKETS[kind].get(status, None)
+
+
+def get_keys(kind):
+    counters, objects = COUNTERS_KEY % kind, OBJECTS_KEY % kind
+    if kind == CONTENTS:
+        return [counters, objects, OBJECTS_KEY % TRANSFORMS, counters, objects]
+    if kind == TRANSFORMS:
+        return [counters, objects, objects, COUNTERS_KEY % CONTENTS, OBJECTS_KEY % CONTENTS]
+    return [counters, objects, objects, counters, objects]
+
+
+def get_site(site):
+    if site is None:
+        return 'Default'
+    return site
+
+
+def _run_updates(kind, updates):
+    """
+    :param updates: list of (object id, site, delete, {field: num}).
+    """
+    script = get_script()
+    keys = get_keys(kind)
+    cascade = '1' if kind == TRANSFORMS else '0'
+    pipeline = get_cache().pipeline()
+    for obj_id, site, delete, values in updates:
+        args = [str(obj_id), site or '', cascade, '1' if delete else '0']
+        for field, num in values.items():
+            args += [field, int(num)]
+        script(keys=keys, args=args, client=pipeline)
+    pipeline.execute()
+
+
+def _apply_updates(kind, updates, session=None):
+    """
+    Run the updates now, or after the session commits if session is not None.
+    """
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, []).append((kind, updates))
+    else:
+        _run_updates(kind, updates)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_pending_updates(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    for kind, updates in pending or []:
+        try:
+            _run_updates(kind, updates)
+        except Exception as ex:
+            logging.warning("Failed to update throttler counters of %s: %s" % (kind, str(ex)))
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _discard_pending_updates(session, transaction):
+    # after a commit the updates are already applied, after a rollback they are discarded
+    if transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
+
+
+def update_counters(kind, items, session=None):
+    """
+    Update the counters with status changes.
+
+    :param kind: requests, transforms or processings.
+    :param items: list of (object id, status, site). If site is None, the site recorded before is used.
+    :param session: the database session of the status changes. The counters are updated after it commits.
+    """
+    if not is_enabled() or not items:
+        return
+    try:
+        updates = []
+        for obj_id, status, site in items:
+            if obj_id is None or status is None:
+                continue
+            bucket = get_bucket(kind, status)
+            values = {bucket: 1} if bucket else {}
+            updates.append((obj_id, site, False, values))
+        if updates:
+            _apply_updates(kind, updates, session=session)
+    except Exception as ex:
+        logging.warning("Failed to update throttler counters of %s: %s" % (kind, str(ex)))
+
+
+def update_status(kind, obj_id, parameters, site=None, session=None):
+    """
+    Update the counters with the status in the parameters of an update or add.
+
+    :param session: the database session of the update or add. The counters are updated after it commits.
+    """
+    if not is_enabled() or not parameters or 'status' not in parameters:
+        return
+    if site is None and 'site' in parameters:
+        site = get_site(parameters['site'])
+    update_counters(kind, [(obj_id, parameters['status'], site)], session=session)
+
+
+def delete_counters(kind, obj_ids, session=None):
+    """
+    Remove deleted objects from the counters.
+
+    :param session: the database session of the deletion. The counters are updated after it commits.
+    """
+    if not is_enabled() or not obj_ids:
+        return
+    if not isinstance(obj_ids, (list, tuple)):
+        obj_ids = [obj_ids]
+    try:
+        _apply_updates(kind, [(obj_id, None, True, {}) for obj_id in obj_ids], session=session)
+    except Exception as ex:
+        logging.warning("Failed to delete throttler counters of %s: %s" % (kind, str(ex)))
+
+
+def update_contents_counters(transform_id, values):
+    """
+    Set the numbers of contents of a transform. They are counted only when the transform is active.
+
+    :param values: dict of {field: num}, the fields are in CONTENT_FIELDS.
+    """
+    if not is_enabled() or transform_id is None:
+        return
+    try:
+        _run_updates(CONTENTS, [(transform_id, None, False, values)])
+    except Exception as ex:
+        logging.warning("Failed to update throttler counters of contents: %s" % str(ex))
+
+
+def get_contents_counters(coll_status, input_coll_ids, output_coll_ids):
+    """
+    Convert the collection statistics of a transform to the numbers of contents.
+
+    'processed' counts all contents which are not activated, the same as the statistics from the contents table.
+
+    :param coll_status: dict of {coll_id: {'total_files': .., 'new_files': .., 'activated_files': ..}}.
+    """
+    values = {field: 0 for field in CONTENT_FIELDS}
+    for prefix, coll_ids in [('input', input_coll_ids), ('output', output_coll_ids)]:
+        for coll_id in coll_ids:
+            if coll_id in coll_status:
+                st = coll_status[coll_id]
+                values[prefix + '_new'] += st['new_files']
+                values[prefix + '_activated'] += st['activated_files']
+                values[prefix + '_processed'] += st['total_files'] - st['activated_files']
+    return values
+
+
+def get_site_counters(site):
+    """
+    Get the counters of a site with one round trip.
+
+    :returns: dict of {kind: {bucket: num}}, or None if the counters are not initialized.
+    """
+    fields = {REQUESTS: ['new', 'processing'],
+              TRANSFORMS: ['new', 'processing'],
+              PROCESSINGS: ['new', 'processing'],
+              CONTENTS: CONTENT_FIELDS}
+    pipeline = get_cache().pipeline()
+    pipeline.exists(RECONCILED_KEY)
+    for kind in fields:
+        pipeline.hmget(COUNTERS_KEY % kind, ['%s\t%s' % (site, field) for field in fields[kind]])
+    rets = pipeline.execute()
+    if not rets[0]:
+        return None
+
+    counters = {}
+    for kind, values in zip(fields, rets[1:]):
+        counters[kind] = {field: int(value) if value else 0 for field, value in zip(fields[kind], values)}
+    contents = counters.pop(CONTENTS)
+    for prefix in ['input', 'output']:
+        counters[prefix + '_' + CONTENTS] = {'new': contents[prefix + '_new'],
+                                             'activated': contents[prefix + '_activated'],
+                                             'processed': contents[prefix + '_processed']}
+    return counters
+
+
+def add_counter(counters, objects, obj_id, site, values):
+    values = {field: num for field, num in values.items() if num}
+    value = site
+    for field, num in values.items():
+        counters['%s\t%s' % (site, field)] = counters.get('%s\t%s' % (site, field), 0) + num
+        value += '\t%s\t%s' % (field, num)
+    objects[str(obj_id)] = value
+
+
+def reconcile_counters(period=3600, force=False, bulk_size=1000):
+    """
+    Recompute the counters from the database.
+
+    Only one agent reconciles the counters in every period.
+    The updates while reconciling can be lost, they are fixed in the next period.
+
+    :param period: the reconciliation period in seconds.
+    :param force: reconcile without taking the lock.
+    :returns: True if the counters are reconciled.
+    """
+    cache = get_cache()
+    if not force:
+        lock_value = '%s:%s' % (socket.gethostname(), time.time())
+        if not cache.hsetnx(LOCK_KEY, 'reconcile', lock_value, expire_seconds=period * 2,
+                            field_expire_seconds=max(period - 60, 60)):
+            return False
+
+    mappings = {kind: ({}, {}) for kind in [REQUESTS, TRANSFORMS, PROCESSINGS, CONTENTS]}
+
+    request_status = list(STATUS_BUCKETS[REQUESTS].keys())
+    for request_id, status, site in orm_requests.get_active_requests(request_status):
+        add_counter(*mappings[REQUESTS], request_id, get_site(site), {get_bucket(REQUESTS, status): 1})
+
+    transform_sites = {}
+    transform_status = list(STATUS_BUCKETS[TRANSFORMS].keys())
+    for request_id, transform_id, site, status in orm_transforms.get_active_transforms(transform_status):
+        transform_sites[transform_id] = get_site(site)
+        add_counter(*mappings[TRANSFORMS], transform_id, get_site(site), {get_bucket(TRANSFORMS, status): 1})
+
+    processing_status = list(STATUS_BUCKETS[PROCESSINGS].keys())
+    for request_id, transform_id, processing_id, site, status in orm_processings.get_active_processings(processing_status):
+        add_counter(*mappings[PROCESSINGS], processing_id, get_site(site), {get_bucket(PROCESSINGS, status): 1})
+
+    contents = {}
+    for transform_ids in get_list_chunks(list(transform_sites.keys()), bulk_size=bulk_size):
+        rets = orm_contents.get_content_status_statistics_by_relation_type(transform_ids)
+        for status, relation_type, transform_id, count in rets:
+            if relation_type == ContentRelationType.Input:
+                prefix = 'input'
+            elif relation_type == ContentRelationType.Output:
+                prefix = 'output'
+            else:
+                continue
+            values = contents.setdefault(transform_id, {field: 0 for field in CONTENT_FIELDS})
+            if status in [ContentStatus.New]:
+                values[prefix + '_new'] += count
+            if status in [ContentStatus.Activated]:
+                values[prefix + '_activated'] += count
+            else:
+                values[prefix + '_processed'] += count
+    for transform_id, values in contents.items():
+        add_counter(*mappings[CONTENTS], transform_id, transform_sites[transform_id], values)
+
+    pipeline = cache.pipeline(transaction=True)
+    for kind, (counters, objects) in mappings.items():
+        pipeline.delete(COUNTERS_KEY % kind, OBJECTS_KEY % kind)
+        if counters:
+            pipeline.hset(COUNTERS_KEY % kind, mapping=counters)
+        if objects:
+            pipeline.hset(OBJECTS_KEY % kind, mapping=objects)
+    pipeline.set(RECONCILED_KEY, time.time())
+    pipeline.execute()
+    return True
@@ -21,6 +21,7 @@ from idds.orm import (processings as orm_processings,
                       contents as orm_contents,
                       messages as orm_messages,
                       transforms as orm_transforms)
+from idds.core import counters as core_counters
 
 
 @transactional_session
@@ -52,21 +53,23 @@ def add_processing(request_id, workload_id, transform_id, status, submitter=None
 
     :returns: processing id.
     """
-    return orm_processings.add_processing(request_id=request_id, workload_id=workload_id, transform_id=transform_id,
-                                          status=status, substatus=substatus, submitter=submitter,
-                                          granularity=granularity, granularity_type=granularity_type,
-                                          site=site, run_id=run_id,
-                                          new_poll_period=new_poll_period,
-                                          update_poll_period=update_poll_period,
-                                          new_retries=new_retries, update_retries=update_retries,
-                                          max_new_retries=max_new_retries,
-                                          max_update_retries=max_update_retries,
-                                          processing_type=processing_type,
-                                          command=command,
-                                          internal_id=internal_id, parent_internal_id=parent_internal_id,
-                                          loop_index=loop_index,
-                                          expired_at=expired_at, processing_metadata=processing_metadata,
-                                          session=session)
+    processing_id = orm_processings.add_processing(request_id=request_id, workload_id=workload_id, transform_id=transform_id,
+                                                   status=status, substatus=substatus, submitter=submitter,
+                                                   granularity=granularity, granularity_type=granularity_type,
+                                                   site=site, run_id=run_id,
+                                                   new_poll_period=new_poll_period,
+                                                   update_poll_period=update_poll_period,
+                                                   new_retries=new_retries, update_retries=update_retries,
+                                                   max_new_retries=max_new_retries,
+                                                   max_update_retries=max_update_retries,
+                                                   processing_type=processing_type,
+                                                   command=command,
+                                                   internal_id=internal_id, parent_internal_id=parent_internal_id,
+                                                   loop_index=loop_index,
+                                                   expired_at=expired_at, processing_metadata=processing_metadata,
+                                                   session=session)
+    core_counters.update_status(core_counters.PROCESSINGS, processing_id, {'status': status, 'site': site}, session=session)
+    return processing_id
 
 
 @read_session
@@ -88,12 +91,13 @@ def get_processing(processing_id=None, request_id=None, transform_id=None, to_js
 
 @read_session
 def get_processings(request_id=None, workload_id=None, transform_id=None, loop_index=None, internal_ids=None,
-                    site=None, parent_internal_ids=None, run_id=None, to_json=False, session=None):
+                    site=None, parent_internal_ids=None, run_id=None, to_json=False, lazy_metadata=False, session=None):
     """
     Get processing or raise a NoObject exception.
 
     :param processing_id: Processing id.
     :param to_json: return json format.
+    :param lazy_metadata: deserialize the metadata only when it's accessed.
     :param session: The database session in use.
 
     :raises NoObject: If no processing is founded.
@@ -108,7 +112,9 @@ def get_processings(request_id=None, workload_id=None, transform_id=None, loop_i
         internal_ids=internal_ids,
         site=site,
         run_id=run_id,
-        to_json=to_json, session=session
+        to_json=to_json,
+        lazy_metadata=lazy_metadata,
+        session=session
     )
     if not prs or not parent_internal_ids:
         return prs
@@ -127,19 +133,21 @@ def get_processings(request_id=None, workload_id=None, transform_id=None, loop_i
 
 
 @read_session
-def get_processings_by_transform_id(transform_id=None, to_json=False, session=None):
+def get_processings_by_transform_id(transform_id=None, to_json=False, lazy_metadata=False, session=None):
     """
     Get processings or raise a NoObject exception.
 
     :param tranform_id: Transform id.
     :param to_json: return json format.
+    :param lazy_metadata: deserialize the metadata only when it's accessed.
     :param session: The database session in use.
 
     :raises NoObject: If no processing is founded.
 
     :returns: Processings.
     """
-    return orm_processings.get_processings_by_transform_id(transform_id=transform_id, to_json=to_json, session=session)
+    return orm_processings.get_processings_by_transform_id(transform_id=transform_id, to_json=to_json,
+                                                           lazy_metadata=lazy_metadata, session=session)
 
 
 @transactional_session
@@ -154,7 +162,8 @@ def get_processing_by_id_status(processing_id, status=None, exclude_status=None,
 @transactional_session
 def get_processings_by_status(status, time_period=None, locking=False, bulk_size=None, to_json=False, by_substatus=False,
                               not_lock=False, next_poll_at=None, for_poller=False, only_return_id=False,
-                              min_request_id=None, locking_for_update=False, new_poll=False, update_poll=False, session=None):
+                              min_request_id=None, locking_for_update=False, new_poll=False, update_poll=False,
+                              lazy_metadata=False, session=None):
     """
     Get processing or raise a NoObject exception.
 
@@ -162,6 +171,7 @@ def get_processings_by_status(status, time_period=None, locking=False, bulk_size
     :param time_period: Time period in seconds.
     :param locking: Whether to retrieve only unlocked items and lock them.
     :param to_json: return json format.
+    :param lazy_metadata: deserialize the metadata only when it's accessed.
     :param session: The database session in use.
 
     :raises NoObject: If no processing is founded.
@@ -174,7 +184,8 @@ def get_processings_by_status(status, time_period=None, locking=False, bulk_size
                                                             new_poll=new_poll, update_poll=update_poll,
                                                             only_return_id=only_return_id,
                                                             min_request_id=min_request_id, not_lock=not_lock,
-                                                            by_substatus=by_substatus, for_poller=for_poller, session=session)
+                                                            by_substatus=by_substatus, for_poller=for_poller,
+                                                            lazy_metadata=lazy_metadata, session=session)
 
     return processings
 
@@ -192,7 +203,9 @@ def update_processing(processing_id, parameters, session=None):
     :raises DatabaseException: If there is a database error.
 
     """
-    return orm_processings.update_processing(processing_id=processing_id, parameters=parameters, session=session)
+    ret = orm_processings.update_processing(processing_id=processing_id, parameters=parameters, session=session)
+    core_counters.update_status(core_counters.PROCESSINGS, processing_id, parameters, session=session)
+    return ret
 
 
 @transactional_session
@@ -223,7 +236,9 @@ def delete_processing(processing_id=None, session=None):
     :raises NoObject: If no processing is founded.
     :raises DatabaseException: If there is a database error.
     """
-    return orm_processings.delete_processing(processing_id=processing_id, session=session)
+    ret = orm_processings.delete_processing(processing_id=processing_id, session=session)
+    core_counters.delete_counters(core_counters.PROCESSINGS, processing_id, session=session)
+    return ret
 
 
 @transactional_session
@@ -272,12 +287,17 @@ def update_processing_with_collection_contents(updated_processing, new_processin
         orm_processings.update_processing(processing_id=updated_processing['processing_id'],
                                           parameters=updated_processing['parameters'],
                                           session=session)
+        core_counters.update_status(core_counters.PROCESSINGS, updated_processing['processing_id'],
+                                    updated_processing['parameters'], session=session)
     if new_processing:
-        orm_processings.add_processing(**new_processing, session=session)
+        processing_id = orm_processings.add_processing(**new_processing, session=session)
+        core_counters.update_status(core_counters.PROCESSINGS, processing_id, new_processing, session=session)
     if transform_updates:
         orm_transforms.update_transform(transform_id=transform_updates['transform_id'],
                                         parameters=transform_updates['parameters'],
                                         session=session)
+        core_counters.update_status(core_counters.TRANSFORMS, transform_updates['transform_id'],
+                                    transform_updates['parameters'], session=session)
 
 
 def resolve_input_dependency_id(new_input_dependency_contents, request_id=None, session=None):
@@ -447,6 +467,8 @@ def update_processing_contents(update_processing, update_contents=None, update_m
         orm_processings.update_processing(processing_id=update_processing['processing_id'],
                                           parameters=update_processing['parameters'],
                                           session=session)
+        core_counters.update_status(core_counters.PROCESSINGS, update_processing['processing_id'],
+                                    update_processing['parameters'], session=session)
     return num_added_contents, num_updated_contents, num_added_messages, num_updated_messages
 
 
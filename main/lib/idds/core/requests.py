@@ -15,7 +15,7 @@ operations related to Requests.
 
 import copy
 
-from idds.common.constants import (RequestStatus, RequestLocking, WorkStatus,
+from idds.common.constants import (RequestStatus, RequestLocking, WorkStatus, TransformStatus,
                                    CollectionType, CollectionStatus, CollectionRelationType,
                                    MessageStatus, MetaStatus, CommandType)
 from idds.orm.base.session import read_session, transactional_session
@@ -28,6 +28,7 @@ from idds.orm import conditions as orm_conditions
 from idds.orm import messages as orm_messages
 from idds.orm import meta as orm_meta
 from idds.core import messages as core_messages
+from idds.core import counters as core_counters
 
 
 def create_request(scope=None, name=None, requester=None, request_type=None,
@@ -146,7 +147,9 @@ def add_request(scope=None, name=None, requester=None, request_type=None,
               'additional_data_storage': additional_data_storage,
               'request_metadata': request_metadata, 'processing_metadata': processing_metadata,
               'session': session}
-    return orm_requests.add_request(**kwargs)
+    request_id = orm_requests.add_request(**kwargs)
+    core_counters.update_status(core_counters.REQUESTS, request_id, {'status': status, 'site': site}, session=session)
+    return request_id
 
 
 @read_session
@@ -256,7 +259,9 @@ def update_request(request_id, parameters, update_request_metadata=False, sessio
     :param request_id: the request id.
     :param parameters: A dictionary of parameters.
     """
-    return orm_requests.update_request(request_id, parameters, update_request_metadata=update_request_metadata, session=session)
+    ret = orm_requests.update_request(request_id, parameters, update_request_metadata=update_request_metadata, session=session)
+    core_counters.update_status(core_counters.REQUESTS, request_id, parameters, session=session)
+    return ret
 
 
 def generate_collection(transform, collection, relation_type=CollectionRelationType.Input):
@@ -340,6 +345,8 @@ def update_request_with_transforms(request_id, parameters,
             ret_tf = orm_transforms.get_transform_by_name(request_id=request_id, name=tf['name'], session=session)
             if ret_tf is None:
                 tf_id = orm_transforms.add_transform(**tf_copy, session=session)
+                core_counters.update_status(core_counters.TRANSFORMS, tf_id,
+                                            {'status': tf.get('status', TransformStatus.New), 'site': tf.get('site', None)}, session=session)
             else:
                 tf_id = ret_tf['transform_id']
             tf['transform_id'] = tf_id
@@ -374,6 +381,7 @@ def update_request_with_transforms(request_id, parameters,
     if update_transforms:
         for tr_id in update_transforms:
             orm_transforms.update_transform(transform_id=tr_id, parameters=update_transforms[tr_id], session=session)
+            core_counters.update_status(core_counters.TRANSFORMS, tr_id, update_transforms[tr_id], session=session)
             update_tf_ids.append(tf_id)
 
     if new_messages:
@@ -384,7 +392,9 @@ def update_request_with_transforms(request_id, parameters,
     if new_conditions:
         orm_conditions.add_conditions(new_conditions, session=session)
 
-    return orm_requests.update_request(request_id, parameters, origin_status=origin_status, session=session), new_tf_ids, update_tf_ids
+    ret = orm_requests.update_request(request_id, parameters, origin_status=origin_status, session=session)
+    core_counters.update_status(core_counters.REQUESTS, request_id, parameters, session=session)
+    return ret, new_tf_ids, update_tf_ids
 
 
 @transactional_session
@@ -401,7 +411,9 @@ def update_request_with_workprogresses(request_id, parameters, new_workprogresse
     if update_workprogresses:
         for workprogress_id in update_workprogresses:
             orm_workprogresses.update_workprogress(workprogress_id, update_workprogresses[workprogress_id], session=session)
-    return orm_requests.update_request(request_id, parameters, session=session)
+    ret = orm_requests.update_request(request_id, parameters, session=session)
+    core_counters.update_status(core_counters.REQUESTS, request_id, parameters, session=session)
+    return ret
 
 
 @transactional_session
@@ -25,6 +25,7 @@ from idds.orm import (transforms as orm_transforms,
                       contents as orm_contents,
                       messages as orm_messages,
                       processings as orm_processings)
+from idds.core import counters as core_counters
 
 
 @transactional_session
@@ -79,6 +80,7 @@ def add_transform(request_id, workload_id, transform_type, transform_tag=None, p
                                                 triggered_conditions=triggered_conditions,
                                                 untriggered_conditions=untriggered_conditions,
                                                 workprogress_id=workprogress_id, run_id=run_id, session=session)
+    core_counters.update_status(core_counters.TRANSFORMS, transform_id, {'status': status, 'site': site}, session=session)
     return transform_id
 
 
@@ -142,13 +144,14 @@ def get_transform_ids(workprogress_id, request_id=None, workload_id=None, transf
 
 @read_session
 def get_transforms(request_id=None, workload_id=None, transform_id=None, loop_index=None, internal_ids=None,
-                   run_id=None, to_json=False, session=None):
+                   run_id=None, to_json=False, lazy_metadata=False, session=None):
     """
     Get transforms or raise a NoObject exception.
 
     :param workprogress_id: Workprogress id.
     :param run_id: Run id.
     :param to_json: return json format.
+    :param lazy_metadata: deserialize the metadata only when it's accessed.
     :param session: The database session in use.
 
     :raises NoObject: If no transform is founded.
@@ -161,7 +164,8 @@ def get_transforms(request_id=None, workload_id=None, transform_id=None, loop_in
                                          loop_index=loop_index,
                                          internal_ids=internal_ids,
                                          run_id=run_id,
-                                         to_json=to_json, session=session)
+                                         to_json=to_json, lazy_metadata=lazy_metadata,
+                                         session=session)
 
 
 @transactional_session
@@ -205,6 +209,7 @@ def update_transform(transform_id, parameters, session=None):
 
     """
     orm_transforms.update_transform(transform_id=transform_id, parameters=parameters, session=session)
+    core_counters.update_status(core_counters.TRANSFORMS, transform_id, parameters, session=session)
 
 
 @transactional_session
@@ -285,11 +290,13 @@ def add_transform_outputs(transform, transform_parameters, input_collections=Non
     if new_processing:
         # print(new_processing)
         processing_id = orm_processings.add_processing(**new_processing, session=session)
+        core_counters.update_status(core_counters.PROCESSINGS, processing_id, new_processing, session=session)
         new_pr_ids.append(processing_id)
         transform_parameters['current_processing_id'] = processing_id
     if update_processing:
         for proc_id in update_processing:
             orm_processings.update_processing(processing_id=proc_id, parameters=update_processing[proc_id], session=session)
+            core_counters.update_status(core_counters.PROCESSINGS, proc_id, update_processing[proc_id], session=session)
             update_pr_ids.append(proc_id)
 
     if messages:
@@ -321,6 +328,7 @@ def add_transform_outputs(transform, transform_parameters, input_collections=Non
         orm_transforms.update_transform(transform_id=transform['transform_id'],
                                         parameters=transform_parameters,
                                         session=session)
+        core_counters.update_status(core_counters.TRANSFORMS, transform['transform_id'], transform_parameters, session=session)
     return new_pr_ids, update_pr_ids
 
 
@@ -351,6 +359,7 @@ def delete_transform(transform_id=None, session=None):
     :raises DatabaseException: If there is a database error.
     """
     orm_transforms.delete_transform(transform_id=transform_id, session=session)
+    core_counters.delete_counters(core_counters.TRANSFORMS, transform_id, session=session)
 
 
 @transactional_session
@@ -377,23 +386,31 @@ def clean_next_poll_at(status, session=None):
 @read_session
 def get_transform_input_output_maps(request_id, transform_id, input_coll_ids, output_coll_ids, log_coll_ids=[], with_sub_map_id=False, is_es=False,
                                     with_deps=True, page_num=None, page_size=None, status=None, match_content_ext=False, only_outputs=False,
-                                    for_missing=False, session=None):
+                                    for_missing=False, last_map_id=None, columns=None, session=None):
     """
     Get transform input output maps.
 
     :param request_id: request id (used for virtual table partitioning).
     :param transform_id: transform id.
     :param page_num: page number (0-based) for paginated retrieval.
-    :param page_size: number of distinct map_ids per page.
+    :param page_size: number of distinct map_ids per page. Without page_num, keyset pagination is used:
+                      the maps after last_map_id (None for the first page).
+    :param columns: list of content columns to return. None for all columns.
     """
+    if columns:
+        columns = list(columns) + [c for c in ['map_id', 'sub_map_id', 'content_relation_type'] if c not in columns]
+        if is_es and 'path' not in columns:
+            columns.append('path')
     if not for_missing:
-        if only_outputs or (status is None and (page_num is None or page_size is None)):
+        if only_outputs or (status is None and page_size is None):
             by_map = False
         else:
             by_map = True
         contents = orm_contents.get_contents_by_request_transform(request_id=request_id, transform_id=transform_id, with_deps=with_deps,
                                                                   page_num=page_num, page_size=page_size, status=status, by_map=by_map,
-                                                                  match_content_ext=match_content_ext, only_outputs=only_outputs, session=session)
+                                                                  match_content_ext=match_content_ext, only_outputs=only_outputs,
+                                                                  last_map_id=last_map_id,
+                                                                  columns=columns, session=session)
     else:
         contents = orm_contents.get_contents_by_request_transform_for_missing(request_id=request_id, transform_id=transform_id, with_deps=with_deps,
                                                                               status=ContentStatus.Missing, by_map=True, only_outputs=False, session=session)
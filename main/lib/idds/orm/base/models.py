@@ -38,7 +38,7 @@ from idds.common.constants import (RequestGroupType, RequestGroupStatus, Request
 from idds.common.event import (EventType, EventStatus)
 from idds.common.utils import date_to_str
 from idds.orm.base.enum import EnumSymbol
-from idds.orm.base.types import JSON, JSONString, EnumWithValue
+from idds.orm.base.types import JSON, JSONString, EnumWithValue, LazyJSONValue
 from idds.orm.base.session import BASE, DEFAULT_SCHEMA_NAME
 from idds.common.constants import (SCOPE_LENGTH, NAME_LENGTH, LONG_NAME_LENGTH)
 
@@ -235,29 +235,38 @@ class Request(BASE, ModelBase):
     campaign_group = Column(String(NAME_LENGTH))
     campaign_tag = Column(String(100))
     errors = Column(JSONString(1024))
-    _request_metadata = Column('request_metadata', JSON())
-    _processing_metadata = Column('processing_metadata', JSON())
+    _request_metadata = Column('request_metadata', JSON(lazy=True))
+    _processing_metadata = Column('processing_metadata', JSON(lazy=True))
 
     @property
     def request_metadata(self):
-        if self._request_metadata:
-            if 'workflow' in self._request_metadata:
-                workflow = self._request_metadata['workflow']
+        if isinstance(self._request_metadata, LazyJSONValue) and not self._request_metadata.loaded:
+            # the hook is called after the session is closed, so it only uses values read here.
+            processing_metadata = self._processing_metadata
+            self._request_metadata.set_load_hook(lambda value: Request._load_request_metadata(value, processing_metadata))
+            return self._request_metadata
+        return Request._load_request_metadata(self._request_metadata, self._processing_metadata)
+
+    @staticmethod
+    def _load_request_metadata(request_metadata, processing_metadata):
+        if request_metadata:
+            if 'workflow' in request_metadata:
+                workflow = request_metadata['workflow']
                 workflow_data = None
-                if self._processing_metadata and 'workflow_data' in self._processing_metadata:
-                    workflow_data = self._processing_metadata['workflow_data']
+                if processing_metadata and 'workflow_data' in processing_metadata:
+                    workflow_data = processing_metadata['workflow_data']
                 if workflow is not None and workflow_data is not None:
                     workflow.metadata = workflow_data
-                    self._request_metadata['workflow'] = workflow
-            if 'build_workflow' in self._request_metadata:
-                build_workflow = self._request_metadata['build_workflow']
+                    request_metadata['workflow'] = workflow
+            if 'build_workflow' in request_metadata:
+                build_workflow = request_metadata['build_workflow']
                 build_workflow_data = None
-                if self._processing_metadata and 'build_workflow_data' in self._processing_metadata:
-                    build_workflow_data = self._processing_metadata['build_workflow_data']
+                if processing_metadata and 'build_workflow_data' in processing_metadata:
+                    build_workflow_data = processing_metadata['build_workflow_data']
                 if build_workflow is not None and build_workflow_data is not None:
                     build_workflow.metadata = build_workflow_data
-                    self._request_metadata['build_workflow'] = build_workflow
-        return self._request_metadata
+                    request_metadata['build_workflow'] = build_workflow
+        return request_metadata
 
     @request_metadata.setter
     def request_metadata(self, request_metadata):
@@ -403,20 +412,28 @@ class Transform(BASE, ModelBase):
     untriggered_conditions = Column('untriggered_conditions', JSON())
     errors = Column(JSONString(1024))
     run_id = Column(String(64))
-    _transform_metadata = Column('transform_metadata', JSON())
-    _running_metadata = Column('running_metadata', JSON())
+    _transform_metadata = Column('transform_metadata', JSON(lazy=True))
+    _running_metadata = Column('running_metadata', JSON(lazy=True))
 
     @property
     def transform_metadata(self):
-        if self._transform_metadata and 'work' in self._transform_metadata:
-            work = self._transform_metadata['work']
+        if isinstance(self._transform_metadata, LazyJSONValue) and not self._transform_metadata.loaded:
+            running_metadata = self._running_metadata
+            self._transform_metadata.set_load_hook(lambda value: Transform._load_transform_metadata(value, running_metadata))
+            return self._transform_metadata
+        return Transform._load_transform_metadata(self._transform_metadata, self._running_metadata)
+
+    @staticmethod
+    def _load_transform_metadata(transform_metadata, running_metadata):
+        if transform_metadata and 'work' in transform_metadata:
+            work = transform_metadata['work']
             work_data = None
-            if self._running_metadata and 'work_data' in self._running_metadata:
-                work_data = self._running_metadata['work_data']
+            if running_metadata and 'work_data' in running_metadata:
+                work_data = running_metadata['work_data']
             if work is not None and work_data is not None:
                 work.metadata = work_data
-                self._transform_metadata['work'] = work
-        return self._transform_metadata
+                transform_metadata['work'] = work
+        return transform_metadata
 
     @transform_metadata.setter
     def transform_metadata(self, transform_metadata):
@@ -521,21 +538,29 @@ class Processing(BASE, ModelBase):
     locking_thread_name = Column(String(100))
     errors = Column(JSONString(1024))
     run_id = Column(String(64))
-    _processing_metadata = Column('processing_metadata', JSON())
-    _running_metadata = Column('running_metadata', JSON())
+    _processing_metadata = Column('processing_metadata', JSON(lazy=True))
+    _running_metadata = Column('running_metadata', JSON(lazy=True))
     output_metadata = Column(JSON())
 
     @property
     def processing_metadata(self):
-        if self._processing_metadata and 'processing' in self._processing_metadata:
-            proc = self._processing_metadata['processing']
+        if isinstance(self._processing_metadata, LazyJSONValue) and not self._processing_metadata.loaded:
+            running_metadata = self._running_metadata
+            self._processing_metadata.set_load_hook(lambda value: Processing._load_processing_metadata(value, running_metadata))
+            return self._processing_metadata
+        return Processing._load_processing_metadata(self._processing_metadata, self._running_metadata)
+
+    @staticmethod
+    def _load_processing_metadata(processing_metadata, running_metadata):
+        if processing_metadata and 'processing' in processing_metadata:
+            proc = processing_metadata['processing']
             proc_data = None
-            if self._running_metadata and 'processing_data' in self._running_metadata:
-                proc_data = self._running_metadata['processing_data']
+            if running_metadata and 'processing_data' in running_metadata:
+                proc_data = running_metadata['processing_data']
             if proc is not None and proc_data is not None:
                 proc.metadata = proc_data
-                self._processing_metadata['processing'] = proc
-        return self._processing_metadata
+                processing_metadata['processing'] = proc
+        return processing_metadata
 
     @processing_metadata.setter
     def processing_metadata(self, processing_metadata):
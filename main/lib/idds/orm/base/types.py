@@ -15,6 +15,8 @@ Borrowed from:
 https://github.com/rucio/rucio/blob/master/lib/rucio/db/sqla/types.py
 """
 
+import contextlib
+import contextvars
 import uuid
 
 from sqlalchemy.dialects.postgresql import UUID, JSONB
@@ -78,16 +80,131 @@ class GUID(TypeDecorator):
             return str(uuid.UUID(value)).replace('-', '').lower()
 
 
+_lazy_json_loading = contextvars.ContextVar('lazy_json_loading', default=False)
+
+
+@contextlib.contextmanager
+def lazy_json_loading(enabled=True):
+    """
+    Within this context, the lazy JSON columns of the loaded rows are returned
+    as LazyJSONValue, which keeps the raw json text and deserializes it
+    only when it's accessed.
+    """
+    token = _lazy_json_loading.set(enabled)
+    try:
+        yield
+    finally:
+        _lazy_json_loading.reset(token)
+
+
+class LazyJSONValue(object):
+    """
+    Proxy of a json column value. The raw json text is deserialized
+    with json_loads on the first access. If it's written back without being
+    accessed, the raw text is written as it is.
+    """
+
+    __slots__ = ('_raw', '_value', '_loaded', '_load_hook')
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._value = None
+        self._loaded = False
+        self._load_hook = None
+
+    @property
+    def raw(self):
+        return self._raw
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def set_load_hook(self, hook):
+        """
+        Set a function to be called with the deserialized value when it's loaded.
+        If it's already loaded, the function is called immediately.
+        """
+        if self._loaded:
+            hook(self._value)
+        else:
+            self._load_hook = hook
+
+    def materialize(self):
+        if not self._loaded:
+            self._value = json_loads(self._raw)
+            self._loaded = True
+            if self._load_hook is not None:
+                hook, self._load_hook = self._load_hook, None
+                hook(self._value)
+        return self._value
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.materialize(), name)
+
+    def __getitem__(self, key):
+        return self.materialize()[key]
+
+    def __setitem__(self, key, value):
+        self.materialize()[key] = value
+
+    def __delitem__(self, key):
+        del self.materialize()[key]
+
+    def __contains__(self, key):
+        return key in self.materialize()
+
+    def __iter__(self):
+        return iter(self.materialize())
+
+    def __len__(self):
+        return len(self.materialize())
+
+    def __bool__(self):
+        return bool(self.materialize())
+
+    def __eq__(self, other):
+        if isinstance(other, LazyJSONValue):
+            other = other.materialize()
+        return self.materialize() == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        if not self._loaded:
+            return 'LazyJSONValue(%s)' % self._raw
+        return repr(self._value)
+
+    def __reduce__(self):
+        return (LazyJSONValue, (self.json_text(),))
+
+    def json_text(self):
+        if self._loaded:
+            return json_dumps(self._value)
+        return self._raw
+
+
 class JSON(TypeDecorator):
     """
     Platform independent json type
     JSONB for postgres , JSON for the rest
+
+    :param lazy: return LazyJSONValue in lazy_json_loading context.
     """
 
     impl = types.JSON
 
     cache_ok = True
 
+    def __init__(self, lazy=False, *args, **kwargs):
+        super(JSON, self).__init__(*args, **kwargs)
+        self.lazy = lazy
+
     def load_dialect_impl(self, dialect):
         if dialect.name == 'postgresql':
             return dialect.type_descriptor(JSONB())
@@ -102,6 +219,8 @@ class JSON(TypeDecorator):
     def process_bind_param(self, value, dialect):
         if value is None:
             return value
+        elif isinstance(value, LazyJSONValue):
+            return value.json_text()
         elif dialect.name == 'postgresql':
             return json_dumps(value)
         elif dialect.name == 'oracle':
@@ -114,6 +233,8 @@ class JSON(TypeDecorator):
     def process_result_value(self, value, dialect):
         if value is None:
             return value
+        elif self.lazy and _lazy_json_loading.get():
+            return LazyJSONValue(value)
         elif dialect.name == 'oracle':
             return json_loads(value)
         elif dialect.name == 'mysql':
@@ -29,12 +29,17 @@ from sqlalchemy.exc import DatabaseError, IntegrityError
 from sqlalchemy.sql import exists, select, expression, update
 from sqlalchemy.sql.expression import asc
 
+try:
+    import psycopg2.extras  # pylint: disable=import-error
+except ImportError:
+    psycopg2 = None
+
 from idds.common import exceptions
 from idds.common.constants import (ContentType, ContentStatus, ContentLocking,
                                    ContentFetchStatus, ContentRelationType)
 from idds.common.utils import group_list
 from idds.common.utils import json_dumps
-from idds.orm.base.session import read_session, transactional_session
+from idds.orm.base.session import read_session, stream_session, transactional_session
 from idds.orm.base import models
 
 
@@ -287,9 +292,53 @@ def get_match_contents(coll_id, scope, name, content_type=None, min_id=None, max
         raise error
 
 
+def get_contents_query(session, scope=None, name=None, request_id=None, transform_id=None, workload_id=None, coll_id=None,
+                       status=None, relation_type=None, without_content_dep_id=False, last_content_id=None):
+    """
+    Build the query of contents.
+
+    :param last_content_id: only contents with content_id bigger than it, for keyset pagination.
+    """
+    if status is not None:
+        if not isinstance(status, (tuple, list)):
+            status = [status]
+        if len(status) == 1:
+            status = [status[0], status[0]]
+    if coll_id is not None:
+        if not isinstance(coll_id, (tuple, list)):
+            coll_id = [coll_id]
+        if len(coll_id) == 1:
+            coll_id = [coll_id[0], coll_id[0]]
+
+    query = session.query(models.Content)
+
+    if request_id:
+        query = query.filter(models.Content.request_id == request_id)
+    if transform_id:
+        query = query.filter(models.Content.transform_id == transform_id)
+    if workload_id:
+        query = query.filter(models.Content.workload_id == workload_id)
+    if coll_id:
+        query = query.filter(models.Content.coll_id.in_(coll_id))
+    if scope:
+        query = query.filter(models.Content.scope == scope)
+    if name:
+        query = query.filter(models.Content.name.like(name.replace('*', '%')))
+    if status is not None:
+        query = query.filter(models.Content.status.in_(status))
+    if relation_type:
+        query = query.filter(models.Content.content_relation_type == relation_type)
+    if without_content_dep_id:
+        query = query.filter(or_(models.Content.content_dep_id == None, models.Content.content_dep_id == 0))  # noqa: E711
+    if last_content_id is not None:
+        query = query.filter(models.Content.content_id > last_content_id)
+    return query
+
+
 @read_session
 def get_contents(scope=None, name=None, request_id=None, transform_id=None, workload_id=None, coll_id=None, status=None,
-                 relation_type=None, without_content_dep_id=False, to_json=False, session=None):
+                 relation_type=None, without_content_dep_id=False, to_json=False, last_content_id=None, limit=None,
+                 session=None):
     """
     Get content or raise a NoObject exception.
 
@@ -297,6 +346,9 @@ def get_contents(scope=None, name=None, request_id=None, transform_id=None, work
     :param name: The name of the content data.
     :param coll_id: list of Collection ids.
     :param to_json: return json format.
+    :param last_content_id: With last_content_id or limit, the contents are ordered by content_id
+                            and only the ones after last_content_id are returned (keyset pagination).
+    :param limit: max number of contents to return.
 
     :param session: The database session in use.
 
@@ -306,39 +358,16 @@ def get_contents(scope=None, name=None, request_id=None, transform_id=None, work
     """
 
     try:
-        if status is not None:
-            if not isinstance(status, (tuple, list)):
-                status = [status]
-            if len(status) == 1:
-                status = [status[0], status[0]]
-        if coll_id is not None:
-            if not isinstance(coll_id, (tuple, list)):
-                coll_id = [coll_id]
-            if len(coll_id) == 1:
-                coll_id = [coll_id[0], coll_id[0]]
-
-        query = session.query(models.Content)
-
-        if request_id:
-            query = query.filter(models.Content.request_id == request_id)
-        if transform_id:
-            query = query.filter(models.Content.transform_id == transform_id)
-        if workload_id:
-            query = query.filter(models.Content.workload_id == workload_id)
-        if coll_id:
-            query = query.filter(models.Content.coll_id.in_(coll_id))
-        if scope:
-            query = query.filter(models.Content.scope == scope)
-        if name:
-            query = query.filter(models.Content.name.like(name.replace('*', '%')))
-        if status is not None:
-            query = query.filter(models.Content.status.in_(status))
-        if relation_type:
-            query = query.filter(models.Content.content_relation_type == relation_type)
-        if without_content_dep_id:
-            query = query.filter(or_(models.Content.content_dep_id == None, models.Content.content_dep_id == 0))  # noqa: E711
-
-        query = query.order_by(asc(models.Content.map_id))
+        query = get_contents_query(session, scope=scope, name=name, request_id=request_id, transform_id=transform_id,
+                                   workload_id=workload_id, coll_id=coll_id, status=status, relation_type=relation_type,
+                                   without_content_dep_id=without_content_dep_id, last_content_id=last_content_id)
+
+        if last_content_id is not None or limit:
+            query = query.order_by(asc(models.Content.content_id))
+            if limit:
+                query = query.limit(limit)
+        else:
+            query = query.order_by(asc(models.Content.map_id))
 
         tmp = query.all()
         rets = []
@@ -356,9 +385,34 @@ def get_contents(scope=None, name=None, request_id=None, transform_id=None, work
         raise error
 
 
+@stream_session
+def iter_contents(scope=None, name=None, request_id=None, transform_id=None, workload_id=None, coll_id=None, status=None,
+                  relation_type=None, without_content_dep_id=False, to_json=False, last_content_id=None, yield_per=1000,
+                  session=None):
+    """
+    Iterate contents ordered by content_id, with a server side cursor.
+
+    :param last_content_id: only contents with content_id bigger than it.
+    :param yield_per: number of rows fetched from the cursor every time.
+
+    :returns: generator of contents.
+    """
+    query = get_contents_query(session, scope=scope, name=name, request_id=request_id, transform_id=transform_id,
+                               workload_id=workload_id, coll_id=coll_id, status=status, relation_type=relation_type,
+                               without_content_dep_id=without_content_dep_id, last_content_id=last_content_id)
+    query = query.order_by(asc(models.Content.content_id))
+    query = query.yield_per(yield_per)
+    for t in query:
+        if to_json:
+            yield t.to_dict_json()
+        else:
+            yield t.to_dict()
+
+
 @read_session
 def get_contents_by_request_transform(request_id=None, transform_id=None, workload_id=None, status=None, map_id=None,
-                                      status_updated=False, with_deps=True, page_num=None, page_size=None, by_map=False, match_content_ext=False, only_outputs=False, session=None):
+                                      status_updated=False, with_deps=True, page_num=None, page_size=None, by_map=False, match_content_ext=False, only_outputs=False,
+                                      last_content_id=None, last_map_id=None, columns=None, session=None):
     """
     Get content or raise a NoObject exception.
 
@@ -367,7 +421,10 @@ def get_contents_by_request_transform(request_id=None, transform_id=None, worklo
     :param workload_id: workload id.
     :param page_num: page number (0-based) for paginated retrieval.
     :param page_size: number of distinct map_ids per page.
+                      Without page_num, the pages are fetched with keyset pagination: the contents (ordered by content_id)
+                      after last_content_id, or with by_map the map_ids after last_map_id. None for the first page.
     :param match_content_ext: Whether to match content extensions.
+    :param columns: list of column names to return. content_id is always returned. None for all columns.
     :param session: The database session in use.
 
     :raises NoObject: If no content is founded.
@@ -380,7 +437,12 @@ def get_contents_by_request_transform(request_id=None, transform_id=None, worklo
             if not isinstance(status, (tuple, list)):
                 status = [status]
 
-        query = session.query(models.Content)
+        keyset = page_size is not None and page_num is None
+        if not columns:
+            columns = [column.key for column in models.Content.__mapper__.column_attrs]
+        # the rows are loaded as tuples instead of ORM objects, which is faster and uses less memory for big transforms
+        column_names = ['content_id'] + [c for c in columns if c != 'content_id']
+        query = session.query(*[getattr(models.Content, c) for c in column_names])
         if request_id:
             query = query.filter(models.Content.request_id == request_id)
         if transform_id:
@@ -412,9 +474,14 @@ def get_contents_by_request_transform(request_id=None, transform_id=None, worklo
             if conditions:
                 combined = or_(*conditions) if len(conditions) > 1 else conditions[0]
                 query = query.filter(combined)
-            query = query.order_by(asc(models.Content.request_id), asc(models.Content.transform_id), asc(models.Content.map_id))
-            if page_num is not None and page_size is not None:
-                query = query.offset(page_num * page_size).limit(page_size)
+            if keyset:
+                if last_content_id is not None:
+                    query = query.filter(models.Content.content_id > last_content_id)
+                query = query.order_by(asc(models.Content.content_id)).limit(page_size)
+            else:
+                query = query.order_by(asc(models.Content.request_id), asc(models.Content.transform_id), asc(models.Content.map_id))
+                if page_num is not None and page_size is not None:
+                    query = query.offset(page_num * page_size).limit(page_size)
         else:
             # by_map: find qualifying map_ids, then return all contents for those maps
             qualifying_maps = session.query(models.Content.map_id.label('map_id')).distinct()
@@ -432,8 +499,12 @@ def get_contents_by_request_transform(request_id=None, transform_id=None, worklo
             if conditions:
                 combined = or_(*conditions) if len(conditions) > 1 else conditions[0]
                 qualifying_maps = qualifying_maps.filter(combined)
+            if keyset and last_map_id is not None:
+                qualifying_maps = qualifying_maps.filter(models.Content.map_id > last_map_id)
             qualifying_maps = qualifying_maps.order_by(asc(models.Content.map_id))
-            if page_num is not None and page_size is not None:
+            if keyset:
+                qualifying_maps = qualifying_maps.limit(page_size)
+            elif page_num is not None and page_size is not None:
                 qualifying_maps = qualifying_maps.offset(page_num * page_size).limit(page_size)
             qualifying_map_ids = [row[0] for row in qualifying_maps.all()]
             if not qualifying_map_ids:
@@ -445,7 +516,7 @@ def get_contents_by_request_transform(request_id=None, transform_id=None, worklo
         rets = []
         if tmp:
             for t in tmp:
-                rets.append(t.to_dict())
+                rets.append(dict(zip(column_names, t)))
         return rets
     except sqlalchemy.orm.exc.NoResultFound as error:
         raise exceptions.NoObject('No record can be found with (transform_id=%s): %s' %
@@ -454,6 +525,40 @@ def get_contents_by_request_transform(request_id=None, transform_id=None, worklo
         raise error
 
 
+@read_session
+def get_content_status_by_map_ids(request_id, transform_id, map_ids, relation_type=ContentRelationType.Output,
+                                  bulk_size=1000, session=None):
+    """
+    Get the distinct statuses of the contents of some map_ids.
+
+    :param request_id: request id.
+    :param transform_id: transform id.
+    :param map_ids: list of map ids.
+    :param relation_type: content relation type.
+    :param bulk_size: number of map ids in one query.
+    :param session: The database session in use.
+
+    :returns: dict of {map_id: [status]}.
+    """
+    try:
+        rets = {}
+        map_ids = sorted(set(map_ids))
+        for i in range(0, len(map_ids), bulk_size):
+            chunk = map_ids[i:i + bulk_size]
+            if len(chunk) == 1:
+                chunk = [chunk[0], chunk[0]]
+            query = session.query(models.Content.map_id, models.Content.status).distinct()
+            query = query.filter(models.Content.request_id == request_id,
+                                 models.Content.transform_id == transform_id,
+                                 models.Content.content_relation_type == relation_type,
+                                 models.Content.map_id.in_(chunk))
+            for map_id, status in query.all():
+                rets.setdefault(map_id, []).append(status)
+        return rets
+    except Exception as error:
+        raise error
+
+
 @read_session
 def get_contents_by_request_transform_for_missing(request_id=None, transform_id=None, status=None, with_deps=True, by_map=True, only_outputs=False, session=None):
     """
@@ -761,23 +866,31 @@ def update_content(content_id, parameters, session=None):
 def custom_bulk_insert_mappings_real(model, parameters, session=None):
     """
     insert contents in bulk
+
+    The rows are sent with psycopg2 execute_values as multi-row
+    'INSERT ... VALUES (...), (...) ON CONFLICT DO NOTHING' statements, one round trip
+    per page. The values are converted by the column types, the same as the ORM inserts.
+    A primary key generated by a sequence is filled with nextval.
     """
     if not parameters:
         return
+    if psycopg2 is None:
+        raise exceptions.IDDSException('Trying to use PostgreSQL without psycopg2 installed!')
 
     try:
         schema_prefix = f"{model.metadata.schema}." if model.metadata.schema else ""
-        sequence_name = f'"{model.metadata.schema}"."CONTENT_ID_SEQ"' if model.metadata.schema else '"CONTENT_ID_SEQ"'
         table_name = f"{schema_prefix}{model.__tablename__}"
+        dialect = session.bind.dialect
+        utc_now = datetime.datetime.utcnow()
 
         def get_row_value(row, column):
-            """Process row values to ensure correct formatting for SQL"""
+            """Fill the default values, every row needs to have all columns"""
             val = row.get(column.name, None)
             if val is None:
                 if column.name in ['map_id', 'fetch_status', 'sub_map_id', 'dep_sub_map_id', 'content_relation_type']:
                     val = 0
                 elif column.name in ['created_at', 'updated_at', 'accessed_at']:
-                    val = datetime.datetime.utcnow().isoformat()
+                    val = utc_now
                 elif column.default is not None and not column.primary_key:
                     default_val = column.default.arg
                     if callable(default_val):
@@ -788,45 +901,43 @@ def custom_bulk_insert_mappings_real(model, parameters, session=None):
                     elif isinstance(default_val, expression.ClauseElement):
                         return None
                     return default_val
-                return val
-            elif isinstance(val, Enum):
-                return val.value
-            elif isinstance(val, datetime.datetime):
-                return val.isoformat()
-            elif isinstance(val, dict):
-                return json_dumps(val)
             return val
 
-        if model.__tablename__.lower() in ['contents']:
-            exclude_columns = ['content_id']
-        else:
-            exclude_columns = []
-
-        columns = [column for column in model.__mapper__.columns if column.name not in exclude_columns]
-
-        column_key_sql = ", ".join([column.name for column in columns])
-        column_value_sql = ", ".join([f":{column.name}" for column in columns])
-
-        # Convert Enum fields to their values
-        updated_parameters = [
-            {column.name: get_row_value(row, column) for column in columns} for row in parameters
-        ]
-
-        if model.__tablename__.lower() == 'contents':
-            sql = f"""
-               INSERT INTO {table_name} (content_id, {column_key_sql})
-               VALUES (nextval('{sequence_name}'), {column_value_sql})
-               ON CONFLICT DO NOTHING
-            """
-        else:
-            sql = f"""
-               INSERT INTO {table_name} ({column_key_sql})
-               VALUES ({column_value_sql})
-               ON CONFLICT DO NOTHING
-            """
+        seq_columns, columns = [], []
+        for column in model.__mapper__.columns:
+            if column.primary_key and isinstance(column.default, sqlalchemy.Sequence):
+                seq_columns.append(column)
+            else:
+                columns.append(column)
+
+        column_key_sql = ", ".join([column.name for column in seq_columns + columns])
+        template_values = []
+        for column in seq_columns:
+            seq_name = column.default.name
+            sequence_name = f'"{model.metadata.schema}"."{seq_name}"' if model.metadata.schema else f'"{seq_name}"'
+            template_values.append(f"nextval('{sequence_name}')")
+        template_values += ["%s"] * len(columns)
+        template = f"({', '.join(template_values)})"
+
+        processors = [column.type.dialect_impl(dialect).bind_processor(dialect) for column in columns]
+        updated_parameters = []
+        for row in parameters:
+            values = []
+            for column, processor in zip(columns, processors):
+                val = get_row_value(row, column)
+                values.append(processor(val) if processor and val is not None else val)
+            updated_parameters.append(values)
 
-        stmt = sqlalchemy.text(sql)
-        session.execute(stmt, updated_parameters)
+        sql = f"""
+           INSERT INTO {table_name} ({column_key_sql})
+           VALUES %s
+           ON CONFLICT DO NOTHING
+        """
+        cursor = session.connection().connection.cursor()
+        try:
+            psycopg2.extras.execute_values(cursor, sql, updated_parameters, template=template, page_size=len(updated_parameters))
+        finally:
+            cursor.close()
         # session.commit()
     except Exception as ex:
         print(f"custom_bulk_insert_mappings Exception: {ex}")
@@ -838,6 +949,9 @@ def custom_bulk_insert_mappings_real(model, parameters, session=None):
 def custom_bulk_insert_mappings(model, parameters, batch_size=1000, session=None):
     """
     insert contents in bulk
+
+    postgresql: multi-row 'INSERT ... VALUES' statements.
+    others: executemany, which is an array bind insert on oracle.
     """
     if not parameters:
         return
@@ -1172,6 +1286,9 @@ def update_contents_from_others_by_dep_id_pages_with_coll_id(request_id, transfo
             .where(models.Content.content_dep_id == main_subquery.c.content_id)
             .where(models.Content.substatus != main_subquery.c.substatus)
         )
+        if status_not_to_check:
+            # the dependency contents already in a final status are not changed
+            to_update = to_update.where(~models.Content.substatus.in_(status_not_to_check))
 
         # Execute
         result = session.execute(to_update)
@@ -1250,6 +1367,31 @@ def update_contents_from_others_by_dep_id_pages(request_id=None, transform_id=No
         raise ex
 
 
+def get_input_status_by_dependencies(values, terminated=False):
+    """
+    Get the status of input contents from the status of their dependencies.
+
+    :param values: list of substatus of the input dependency contents.
+    :param terminated: Whether the processing is terminated.
+    """
+    # available_status = [ContentStatus.Available, ContentStatus.FakeAvailable, ContentStatus.FinalSubAvailable]
+    available_status = [ContentStatus.Available, ContentStatus.FakeAvailable]
+    final_terminated_status = [ContentStatus.Available, ContentStatus.FakeAvailable,
+                               ContentStatus.FinalFailed, ContentStatus.Missing,
+                               ContentStatus.FinalSubAvailable]
+    terminated_status = [ContentStatus.Available, ContentStatus.FakeAvailable,
+                         ContentStatus.Failed, ContentStatus.FinalFailed,
+                         ContentStatus.Missing, ContentStatus.FinalSubAvailable]
+
+    if all(v in available_status for v in values):
+        return ContentStatus.Available
+    elif all(v in final_terminated_status for v in values):
+        return ContentStatus.Missing
+    elif terminated and all(v in terminated_status for v in values):
+        return ContentStatus.Missing
+    return ContentStatus.New
+
+
 @transactional_session
 def update_input_contents_by_dependency_pages(request_id=None, transform_id=None, page_size=2000, batch_size=2000, logger=None,
                                               log_prefix=None, terminated=False, status_not_to_check=None, session=None):
@@ -1357,22 +1499,7 @@ def update_input_contents_by_dependency_pages(request_id=None, transform_id=None
                 logger.debug(f"{log_prefix}custom_aggregation, no dependencies")
                 return ContentStatus.Available
 
-            # available_status = [ContentStatus.Available, ContentStatus.FakeAvailable, ContentStatus.FinalSubAvailable]
-            available_status = [ContentStatus.Available, ContentStatus.FakeAvailable]
-            final_terminated_status = [ContentStatus.Available, ContentStatus.FakeAvailable,
-                                       ContentStatus.FinalFailed, ContentStatus.Missing,
-                                       ContentStatus.FinalSubAvailable]
-            terminated_status = [ContentStatus.Available, ContentStatus.FakeAvailable,
-                                 ContentStatus.Failed, ContentStatus.FinalFailed,
-                                 ContentStatus.Missing, ContentStatus.FinalSubAvailable]
-
-            if all(v in available_status for v in values):
-                return ContentStatus.Available
-            elif all(v in final_terminated_status for v in values):
-                return ContentStatus.Missing
-            elif terminated and all(v in terminated_status for v in values):
-                return ContentStatus.Missing
-            return ContentStatus.New
+            return get_input_status_by_dependencies(values, terminated=terminated)
 
         # Paginated Update Loop
         last_id = None
@@ -1449,6 +1576,111 @@ def update_input_contents_by_dependency_pages(request_id=None, transform_id=None
         raise ex
 
 
+@transactional_session
+def release_inputs_by_dependency_index(request_id, dep_contents, bulk_size=2000, status_not_to_check=None,
+                                       dep_status_not_to_check=None, logger=None, log_prefix=None, session=None):
+    """
+    Push the status of updated output contents to the contents depending on them, through the
+    content_dep_id index. Only the input dependency contents of the updated contents and the
+    input contents in the same (map_id, sub_map_id) are checked, instead of all contents of
+    the depending transforms.
+
+    :param request_id: The Request id.
+    :param dep_contents: list of updated output contents, with 'content_id' and 'substatus'.
+    :param status_not_to_check: The input contents with these status are not updated.
+    :param dep_status_not_to_check: The input dependency contents with these status are not updated.
+
+    :returns: list of transform ids whose contents are updated.
+    """
+    try:
+        if log_prefix is None:
+            log_prefix = ""
+
+        dep_status = {}
+        for content in dep_contents:
+            if content['substatus'] != ContentStatus.New:
+                dep_status[content['content_id']] = content['substatus']
+        dep_ids = list(dep_status.keys())
+
+        # input dependency contents depending on the updated contents
+        update_deps = []
+        updated_maps = {}
+        for i in range(0, len(dep_ids), bulk_size):
+            query = session.query(models.Content.content_id,
+                                  models.Content.transform_id,
+                                  models.Content.map_id,
+                                  models.Content.sub_map_id,
+                                  models.Content.content_dep_id,
+                                  models.Content.substatus)
+            query = query.filter(models.Content.content_dep_id.in_(dep_ids[i:i + bulk_size]))
+            query = query.filter(models.Content.request_id == request_id)
+            query = query.filter(models.Content.content_relation_type == ContentRelationType.InputDependency)
+            for content_id, transform_id, map_id, sub_map_id, content_dep_id, substatus in query.all():
+                # the dependency contents already in a final status are not changed, as the full scan
+                if dep_status_not_to_check and substatus in dep_status_not_to_check:
+                    pass
+                elif substatus != dep_status[content_dep_id]:
+                    update_deps.append({'content_id': content_id,
+                                        'request_id': request_id,
+                                        'status': dep_status[content_dep_id],
+                                        'substatus': dep_status[content_dep_id]})
+                # with postgresql, the dependency may be already updated by the trigger of contents_update
+                if transform_id not in updated_maps:
+                    updated_maps[transform_id] = set()
+                updated_maps[transform_id].add((map_id, sub_map_id))
+
+        for i in range(0, len(update_deps), bulk_size):
+            custom_bulk_update_mappings(models.Content, update_deps[i:i + bulk_size], session=session)
+
+        # input contents in the updated maps
+        update_inputs = []
+        for transform_id in updated_maps:
+            map_ids = sorted(set([map_id for map_id, sub_map_id in updated_maps[transform_id]]))
+            for j in range(0, len(map_ids), bulk_size):
+                chunk = map_ids[j:j + bulk_size]
+                query = session.query(models.Content.content_id,
+                                      models.Content.map_id,
+                                      models.Content.sub_map_id,
+                                      models.Content.content_relation_type,
+                                      models.Content.substatus)
+                query = query.filter(models.Content.transform_id == transform_id)
+                query = query.filter(models.Content.request_id == request_id)
+                query = query.filter(models.Content.map_id.in_(chunk))
+                query = query.filter(models.Content.content_relation_type.in_([ContentRelationType.Input,
+                                                                               ContentRelationType.InputDependency]))
+
+                map_deps, map_inputs = defaultdict(list), defaultdict(list)
+                for content_id, map_id, sub_map_id, relation_type, substatus in query.all():
+                    if (map_id, sub_map_id) not in updated_maps[transform_id]:
+                        continue
+                    if relation_type == ContentRelationType.InputDependency:
+                        map_deps[(map_id, sub_map_id)].append(substatus)
+                    elif not status_not_to_check or substatus not in status_not_to_check:
+                        map_inputs[(map_id, sub_map_id)].append((content_id, substatus))
+
+                for key in map_inputs:
+                    values = map_deps[key]
+                    if ContentStatus.New in values:
+                        # dependencies not ready
+                        continue
+                    status = get_input_status_by_dependencies(values)
+                    for content_id, substatus in map_inputs[key]:
+                        if substatus != status:
+                            update_inputs.append({'content_id': content_id,
+                                                  'request_id': request_id,
+                                                  'substatus': status})
+
+        for i in range(0, len(update_inputs), bulk_size):
+            custom_bulk_update_mappings(models.Content, update_inputs[i:i + bulk_size], session=session)
+
+        if logger:
+            logger.debug(f"{log_prefix}release_inputs_by_dependency_index: updated dependencies {len(update_deps)}, "
+                         f"updated inputs {len(update_inputs)}, transforms {list(updated_maps.keys())}")
+        return list(updated_maps.keys())
+    except Exception as ex:
+        raise ex
+
+
 @read_session
 def get_update_contents_from_others_by_dep_id(request_id=None, transform_id=None, session=None):
     """
@@ -15,7 +15,6 @@ operations related to Messages.
 
 import datetime
 import re
-import copy
 
 from sqlalchemy import or_, asc
 from sqlalchemy.exc import DatabaseError, IntegrityError
@@ -25,6 +24,41 @@ from idds.common.constants import MessageDestination
 from idds.common.utils import group_list
 from idds.orm.base import models
 from idds.orm.base.session import transactional_session
+from idds.orm.contents import custom_bulk_insert_mappings
+
+
+def get_message_rows(msg_type, status, source, request_id, workload_id, transform_id,
+                     num_contents, msg_content, internal_id=None, bulk_size=None, processing_id=None,
+                     destination=MessageDestination.Outside):
+    """
+    Build the message rows to be inserted. A message with more than bulk_size files
+    is split into several messages.
+
+    :returns: list of message rows.
+    """
+    num_contents_list = []
+    msg_content_list = []
+    if bulk_size and num_contents > bulk_size and 'files' in msg_content:
+        files = msg_content['files']
+        for i in range(0, len(files), bulk_size):
+            chunk = files[i:i + bulk_size]
+            # the files list is the only part which differs, a shallow copy is enough.
+            new_msg_content = dict(msg_content, files=chunk)
+            num_contents_list.append(len(chunk))
+            msg_content_list.append(new_msg_content)
+    else:
+        num_contents_list.append(num_contents)
+        msg_content_list.append(msg_content)
+
+    msgs = []
+    for msg_content, num_contents in zip(msg_content_list, num_contents_list):
+        new_message = {'msg_type': msg_type, 'status': status, 'request_id': request_id,
+                       'workload_id': workload_id, 'transform_id': transform_id,
+                       'internal_id': internal_id, 'source': source, 'num_contents': num_contents,
+                       'destination': destination, 'processing_id': processing_id,
+                       'locking': 0, 'msg_content': msg_content}
+        msgs.append(new_message)
+    return msgs
 
 
 @transactional_session
@@ -46,35 +80,11 @@ def add_message(msg_type, status, source, request_id, workload_id, transform_id,
     """
 
     try:
-        num_contents_list = []
-        msg_content_list = []
-        if bulk_size and num_contents > bulk_size:
-            if 'files' in msg_content:
-                files = msg_content['files']
-                chunks = [files[i:i + bulk_size] for i in range(0, len(files), bulk_size)]
-                for chunk in chunks:
-                    new_msg_content = copy.deepcopy(msg_content)
-                    new_msg_content['files'] = chunk
-                    new_num_contents = len(chunk)
-                    num_contents_list.append(new_num_contents)
-                    msg_content_list.append(new_msg_content)
-            else:
-                num_contents_list.append(num_contents)
-                msg_content_list.append(msg_content)
-        else:
-            num_contents_list.append(num_contents)
-            msg_content_list.append(msg_content)
-
-        msgs = []
-        for msg_content, num_contents in zip(msg_content_list, num_contents_list):
-            new_message = {'msg_type': msg_type, 'status': status, 'request_id': request_id,
-                           'workload_id': workload_id, 'transform_id': transform_id,
-                           'internal_id': internal_id, 'source': source, 'num_contents': num_contents,
-                           'destination': destination, 'processing_id': processing_id,
-                           'locking': 0, 'msg_content': msg_content}
-            msgs.append(new_message)
-
-        session.bulk_insert_mappings(models.Message, msgs)
+        msgs = get_message_rows(msg_type=msg_type, status=status, source=source, request_id=request_id,
+                                workload_id=workload_id, transform_id=transform_id, num_contents=num_contents,
+                                msg_content=msg_content, internal_id=internal_id, bulk_size=bulk_size,
+                                processing_id=processing_id, destination=destination)
+        custom_bulk_insert_mappings(models.Message, msgs, session=session)
     except TypeError as e:
         raise exceptions.DatabaseException('Invalid JSON for msg_content: %s' % str(e))
     except DatabaseError as e:
@@ -87,10 +97,19 @@ def add_message(msg_type, status, source, request_id, workload_id, transform_id,
 
 @transactional_session
 def add_messages(messages, bulk_size=1000, session=None):
+    """
+    Add messages in bulk. All message rows are built first and inserted
+    with custom_bulk_insert_mappings, in batches of bulk_size rows.
+
+    :param messages: list of messages, with the same keys as add_message.
+    :param bulk_size: max number of files per message and max number of rows per insert batch.
+    :param session: The database session.
+    """
     try:
-        # session.bulk_insert_mappings(models.Message, messages)
+        msgs = []
         for msg in messages:
-            add_message(**msg, bulk_size=bulk_size, session=session)
+            msgs.extend(get_message_rows(**msg, bulk_size=bulk_size))
+        custom_bulk_insert_mappings(models.Message, msgs, batch_size=bulk_size or 1000, session=session)
     except TypeError as e:
         raise exceptions.DatabaseException('Invalid JSON for msg_content: %s' % str(e))
     except DatabaseError as e:
@@ -25,6 +25,7 @@ from idds.common.constants import CommandType, ProcessingType, ProcessingStatus,
 from idds.common.utils import get_process_thread_info
 from idds.orm.base.session import read_session, transactional_session, safe_bulk_update_mappings
 from idds.orm.base import models
+from idds.orm.base.types import lazy_json_loading
 
 
 def create_processing(request_id, workload_id, transform_id, status=ProcessingStatus.New, locking=ProcessingLocking.Idle, submitter=None,
@@ -215,12 +216,13 @@ def get_processing_by_id_status(processing_id, status=None, exclude_status=None,
 
 @read_session
 def get_processings(request_id=None, workload_id=None, transform_id=None, loop_index=None, internal_ids=None,
-                    site=None, parent_internal_ids=None, run_id=None, to_json=False, session=None):
+                    site=None, parent_internal_ids=None, run_id=None, to_json=False, lazy_metadata=False, session=None):
     """
     Get processing or raise a NoObject exception.
 
     :param processing_id: Processing id.
     :param to_json: return json format.
+    :param lazy_metadata: deserialize the metadata only when it's accessed.
 
     :param session: The database session in use.
 
@@ -257,7 +259,8 @@ def get_processings(request_id=None, workload_id=None, transform_id=None, loop_i
         if run_id is not None:
             query = query.filter(models.Processing.run_id == str(run_id))
 
-        tmp = query.all()
+        with lazy_json_loading(lazy_metadata):
+            tmp = query.all()
         rets = []
         if tmp:
             for t in tmp:
@@ -274,11 +277,12 @@ def get_processings(request_id=None, workload_id=None, transform_id=None, loop_i
 
 
 @read_session
-def get_processings_by_transform_id(transform_id=None, to_json=False, session=None):
+def get_processings_by_transform_id(transform_id=None, to_json=False, lazy_metadata=False, session=None):
     """
     Get processings or raise a NoObject exception.
 
     :param tranform_id: Transform id.
+    :param lazy_metadata: deserialize the metadata only when it's accessed.
     :param session: The database session in use.
 
     :raises NoObject: If no processing is founded.
@@ -291,7 +295,8 @@ def get_processings_by_transform_id(transform_id=None, to_json=False, session=No
                        .filter_by(transform_id=transform_id)
         query = query.order_by(asc(models.Processing.processing_id))
 
-        ret = query.all()
+        with lazy_json_loading(lazy_metadata):
+            ret = query.all()
         if not ret:
             return []
         else:
@@ -312,7 +317,8 @@ def get_processings_by_transform_id(transform_id=None, to_json=False, session=No
 @transactional_session
 def get_processings_by_status(status, period=None, processing_ids=[], locking=False, locking_for_update=False,
                               bulk_size=None, submitter=None, to_json=False, by_substatus=False, only_return_id=False,
-                              not_lock=False, min_request_id=None, new_poll=False, update_poll=False, for_poller=False, session=None):
+                              not_lock=False, min_request_id=None, new_poll=False, update_poll=False, for_poller=False,
+                              lazy_metadata=False, session=None):
     """
     Get processing or raise a NoObject exception.
 
@@ -322,6 +328,7 @@ def get_processings_by_status(status, period=None, processing_ids=[], locking=Fa
     :param bulk_size: bulk size limitation.
     :param submitter: The submitter name.
     :param to_json: return json format.
+    :param lazy_metadata: deserialize the metadata only when it's accessed.
 
     :param session: The database session in use.
 
@@ -373,7 +380,8 @@ def get_processings_by_status(status, period=None, processing_ids=[], locking=Fa
         if bulk_size:
             query = query.limit(bulk_size)
 
-        tmp = query.all()
+        with lazy_json_loading(lazy_metadata):
+            tmp = query.all()
         rets = []
         if tmp:
             for t in tmp:
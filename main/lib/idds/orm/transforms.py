@@ -25,6 +25,7 @@ from idds.common.constants import CommandType, TransformStatus, TransformLocking
 from idds.common.utils import get_process_thread_info
 from idds.orm.base.session import read_session, transactional_session, safe_bulk_update_mappings
 from idds.orm.base import models
+from idds.orm.base.types import lazy_json_loading
 
 
 def create_transform(request_id, workload_id, transform_type, transform_tag=None,
@@ -376,7 +377,7 @@ def get_transform_ids(workprogress_id=None, request_id=None, workload_id=None, t
 
 @read_session
 def get_transforms(request_id=None, workload_id=None, transform_id=None, loop_index=None, internal_ids=None,
-                   run_id=None, to_json=False, session=None):
+                   run_id=None, to_json=False, lazy_metadata=False, session=None):
     """
     Get transforms or raise a NoObject exception.
 
@@ -384,6 +385,7 @@ def get_transforms(request_id=None, workload_id=None, transform_id=None, loop_in
     :param workload_id: Workload id.
     :param transform_id: Transform id.
     :param run_id: Run id.
+    :param lazy_metadata: deserialize the metadata only when it's accessed.
     :param session: The database session in use.
 
     :raises NoObject: If no transform is founded.
@@ -409,7 +411,8 @@ def get_transforms(request_id=None, workload_id=None, transform_id=None, loop_in
                 internal_ids = [internal_ids[0], internal_ids[0]]
             query = query.filter(models.Transform.internal_id.in_(internal_ids))
 
-        tmp = query.all()
+        with lazy_json_loading(lazy_metadata):
+            tmp = query.all()
         rets = []
         if tmp:
             for t in tmp:
@@ -6,18 +6,21 @@
 # http://www.apache.org/licenses/LICENSE-2.0OA
 #
 # Authors:
-# - Wen Guan, <wen.guan@cern.ch>, 2019 - 2024
+# - Wen Guan, <wen.guan@cern.ch>, 2019 - 2026
 
 """----------------------
    Web service app
 ----------------------"""
 
+import io
 import logging
 
 import flask
 from flask import Flask, Response
 
 from idds.common import exceptions
+from idds.common import compression
+from idds.common.config import config_has_section, config_has_option, config_get_bool, config_get_int
 # from idds.common.authentication import authenticate_x509, authenticate_oidc, authenticate_is_super_user
 from idds.common.constants import HTTP_STATUS_CODE
 from idds.common.utils import get_rest_debug, setup_logging
@@ -60,6 +63,123 @@ class LoggingMiddleware(object):
         return self._app(environ, log_response)
 
 
+# default limits of the compressed request bodies, in bytes
+MAX_COMPRESSED_LENGTH = 128 * 1024 * 1024
+MAX_DECOMPRESSED_LENGTH = 512 * 1024 * 1024
+
+
+class DecompressionMiddleware(object):
+    """
+    Decompress the request body sent with Content-Encoding (gzip or zstd).
+    It runs before the authentication, so the compressed body and the decompressed body are both bounded.
+    """
+    def __init__(self, app, max_length=MAX_DECOMPRESSED_LENGTH, max_compressed_length=MAX_COMPRESSED_LENGTH):
+        self._app = app
+        self._max_length = max_length
+        self._max_compressed_length = max_compressed_length
+
+    def get_error_response(self, resp, status, encoding, message):
+        headers = [('Content-Type', 'application/json'),
+                   ('Accept-Encoding', ', '.join(compression.get_supported_encodings())),
+                   ('ExceptionClass', exceptions.BadRequest.__name__),
+                   ('ExceptionMessage', 'Failed to decode the request body with %s: %s' % (encoding, message))]
+        resp(status, headers)
+        return [b'']
+
+    def __call__(self, environ, resp):
+        encoding = environ.get('HTTP_CONTENT_ENCODING', None)
+        if encoding:
+            encoding = encoding.strip().lower()
+        if encoding and encoding != 'identity':
+            try:
+                length = int(environ.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                length = 0
+            if length > self._max_compressed_length:
+                return self.get_error_response(resp, '413 REQUEST ENTITY TOO LARGE', encoding,
+                                               'Compressed body is bigger than %s bytes' % self._max_compressed_length)
+            try:
+                if length:
+                    data = environ['wsgi.input'].read(length)
+                else:
+                    data = environ['wsgi.input'].read(self._max_compressed_length + 1)
+                    if len(data) > self._max_compressed_length:
+                        raise compression.DecompressionLimitExceeded("Compressed body is bigger than %s bytes"
+                                                                     % self._max_compressed_length)
+                data = compression.decompress(data, encoding, max_length=self._max_length)
+            except compression.DecompressionLimitExceeded as error:
+                return self.get_error_response(resp, '413 REQUEST ENTITY TOO LARGE', encoding, str(error))
+            except Exception as error:
+                return self.get_error_response(resp, '415 UNSUPPORTED MEDIA TYPE', encoding, str(error))
+            environ['wsgi.input'] = io.BytesIO(data)
+            environ['CONTENT_LENGTH'] = str(len(data))
+            del environ['HTTP_CONTENT_ENCODING']
+        return self._app(environ, resp)
+
+
+def compress_stream(iterable, compressobj):
+    for data in iterable:
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        data = compressobj.compress(data)
+        if data:
+            yield data
+    yield compressobj.flush()
+
+
+def get_compress_response_func(min_size=compression.COMPRESS_MIN_SIZE):
+    def compress_response(response):
+        """
+        Compress the response with the encoding accepted by the client.
+        The encodings accepted for request bodies are advertised with the Accept-Encoding header.
+        """
+        response.headers['Accept-Encoding'] = ', '.join(compression.get_supported_encodings())
+        if response.status_code < 200 or response.status_code >= 300 or response.direct_passthrough:
+            return response
+        if 'Content-Encoding' in response.headers:
+            return response
+        encoding = compression.select_encoding(flask.request.headers.get('Accept-Encoding', None))
+        if not encoding:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, compression.get_compressobj(encoding))
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compression.compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+    return compress_response
+
+
+def setup_compression(application):
+    """
+    Decompress the request bodies and compress the responses.
+    With [rest] compress = false, it's disabled.
+    """
+    if config_has_section("rest") and config_has_option("rest", "compress"):
+        if not config_get_bool("rest", "compress"):
+            return application
+    min_size = compression.COMPRESS_MIN_SIZE
+    if config_has_section("rest") and config_has_option("rest", "compress_min_size"):
+        min_size = config_get_int("rest", "compress_min_size")
+    max_length = MAX_DECOMPRESSED_LENGTH
+    if config_has_section("rest") and config_has_option("rest", "max_decompressed_length"):
+        max_length = config_get_int("rest", "max_decompressed_length")
+    max_compressed_length = MAX_COMPRESSED_LENGTH
+    if config_has_section("rest") and config_has_option("rest", "max_compressed_length"):
+        max_compressed_length = config_get_int("rest", "max_compressed_length")
+
+    application.wsgi_app = DecompressionMiddleware(application.wsgi_app, max_length=max_length,
+                                                   max_compressed_length=max_compressed_length)
+    application.after_request(get_compress_response_func(min_size=min_size))
+    return application
+
+
 def get_normal_blueprints():
     bps = []
     bps.append(requests.get_blueprint())
@@ -178,6 +298,7 @@ def create_app(auth_type=None):
 
     # application.before_request(before_request)
     # application.after_request(after_request)
+    setup_compression(application)
     if get_rest_debug():
         application.wsgi_app = LoggingMiddleware(application.wsgi_app, application.logger, application.url_map)
 
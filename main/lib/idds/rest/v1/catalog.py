@@ -11,11 +11,12 @@
 
 import traceback
 
-from flask import Blueprint
+from flask import Blueprint, Response, stream_with_context
 
 from idds.common import exceptions
 from idds.common.constants import HTTP_STATUS_CODE, CollectionRelationType
-from idds.core.catalog import get_collections, get_contents, get_contents_ext, combine_contents_ext
+from idds.common.utils import json_dumps
+from idds.core.catalog import get_collections, get_contents, get_contents_ext, combine_contents_ext, iter_contents
 from idds.rest.v1.controller import IDDSController
 
 
@@ -121,6 +122,99 @@ class Contents(IDDSController):
         return self.generate_http_response(HTTP_STATUS_CODE.OK, data=rets)
 
 
+# max number of contents in one page
+MAX_CONTENTS_PAGE_SIZE = 10000
+
+
+def get_contents_parameters(request_id, transform_id, workload_id, coll_scope, coll_name, relation_type, status,
+                            last_content_id=None):
+    """
+    Convert the url parameters of contents. 'null' and 'None' are converted to None.
+    """
+    ret = {'coll_scope': coll_scope, 'coll_name': coll_name}
+    for key in ['coll_scope', 'coll_name']:
+        if ret[key] in ['null', 'None']:
+            ret[key] = None
+    for key, value in [('request_id', request_id), ('transform_id', transform_id), ('workload_id', workload_id),
+                       ('relation_type', relation_type), ('status', status), ('last_content_id', last_content_id)]:
+        if value in [None, 'null', 'None']:
+            ret[key] = None
+        else:
+            ret[key] = int(value)
+    return ret
+
+
+class ContentsPage(IDDSController):
+    """ Catalog """
+
+    def get(self, request_id, transform_id, workload_id, coll_scope, coll_name, relation_type, status, last_content_id, page_size):
+        """ Get one page of contents ordered by content_id, after last_content_id.
+        HTTP Success:
+            200 OK
+        HTTP Error:
+            404 Not Found
+            500 InternalError
+        :returns: {'contents': contents, 'next_content_id': the cursor for the next page, None if it's the last page}.
+        """
+
+        try:
+            params = get_contents_parameters(request_id, transform_id, workload_id, coll_scope, coll_name,
+                                             relation_type, status, last_content_id)
+            if page_size in ['null', 'None']:
+                page_size = MAX_CONTENTS_PAGE_SIZE
+            else:
+                page_size = max(1, min(int(page_size), MAX_CONTENTS_PAGE_SIZE))
+
+            contents = get_contents(limit=page_size, to_json=False, **params)
+            next_content_id = None
+            if len(contents) >= page_size:
+                next_content_id = contents[-1]['content_id']
+            rets = {'contents': contents, 'next_content_id': next_content_id}
+        except exceptions.NoObject as error:
+            return self.generate_http_response(HTTP_STATUS_CODE.NotFound, exc_cls=error.__class__.__name__, exc_msg=error)
+        except exceptions.IDDSException as error:
+            return self.generate_http_response(HTTP_STATUS_CODE.InternalError, exc_cls=error.__class__.__name__, exc_msg=error)
+        except Exception as error:
+            print(error)
+            print(traceback.format_exc())
+            return self.generate_http_response(HTTP_STATUS_CODE.InternalError, exc_cls=exceptions.CoreException.__name__, exc_msg=error)
+
+        return self.generate_http_response(HTTP_STATUS_CODE.OK, data=rets)
+
+
+class ContentsStream(IDDSController):
+    """ Catalog """
+
+    def get(self, request_id, transform_id, workload_id, coll_scope, coll_name, relation_type, status, last_content_id):
+        """ Stream contents ordered by content_id, after last_content_id, as newline delimited json.
+        The rows are sent while they are read from the database cursor.
+        If there is an error after the stream started, the last line is {'ExceptionClass': ..., 'ExceptionMessage': ...}.
+        HTTP Success:
+            200 OK
+        HTTP Error:
+            500 InternalError
+        :returns: contents, one json per line.
+        """
+
+        try:
+            params = get_contents_parameters(request_id, transform_id, workload_id, coll_scope, coll_name,
+                                             relation_type, status, last_content_id)
+        except Exception as error:
+            return self.generate_http_response(HTTP_STATUS_CODE.BadRequest, exc_cls=exceptions.BadRequest.__name__, exc_msg=error)
+
+        def generate():
+            try:
+                for content in iter_contents(to_json=False, **params):
+                    yield json_dumps(content) + '\n'
+            except Exception as error:
+                print(error)
+                print(traceback.format_exc())
+                exc_cls = error.__class__.__name__ if isinstance(error, exceptions.IDDSException) else exceptions.CoreException.__name__
+                yield json_dumps({'ExceptionClass': exc_cls, 'ExceptionMessage': str(error)}) + '\n'
+
+        return Response(stream_with_context(generate()), status=HTTP_STATUS_CODE.OK, mimetype='application/x-ndjson')
+
+
 class ContentsOutputExt(IDDSController):
     """ Catalog """
 
@@ -211,6 +305,14 @@ def get_blueprint():
     bp.add_url_rule('/catalog/contents/<request_id>/<transform_id>/<workload_id>/<coll_scope>/<coll_name>/<relation_type>/<status>',
                     view_func=contents_view, methods=['get', ])  # get contents
 
+    contents_page_view = ContentsPage.as_view('contents_page')
+    bp.add_url_rule('/catalog/contents_page/<request_id>/<transform_id>/<workload_id>/<coll_scope>/<coll_name>/<relation_type>/<status>/<last_content_id>/<page_size>',
+                    view_func=contents_page_view, methods=['get', ])  # get one page of contents
+
+    contents_stream_view = ContentsStream.as_view('contents_stream')
+    bp.add_url_rule('/catalog/contents_stream/<request_id>/<transform_id>/<workload_id>/<coll_scope>/<coll_name>/<relation_type>/<status>/<last_content_id>',
+                    view_func=contents_stream_view, methods=['get', ])  # stream contents
+
     contents_ext_view = ContentsOutputExt.as_view('contents_output_ext')
     bp.add_url_rule('/catalog/contents_output_ext/<request_id>/<workload_id>/<transform_id>/<group_by_jedi_task_id>',
                     view_func=contents_ext_view, methods=['get', ])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of getting the results of a map-style iworkflow with AsyncResult:
+the time of one results/percentage call while the results arrive in batches.
+With incremental aggregation, it depends on the number of new messages, not on all messages.
+
+python performance_test_asyncresult.py [num_jobs [batch_size]]
+"""
+
+import logging
+import sys
+import time
+
+from idds.common.constants import WorkflowType
+from idds.common.utils import get_unique_id_for_dict
+from idds.iworkflow.asyncresult import AsyncResult
+
+
+class PerfWorkContext(object):
+    workflow_type = WorkflowType.iWorkflow
+    request_id = 1
+    transform_id = 0
+
+    def init_brokers(self):
+        return False
+
+
+def get_results(async_result, name, multi_jobs_kwargs_list, start, end):
+    for i in range(start, end):
+        kwargs = multi_jobs_kwargs_list[i]
+        status = (i % 10 != 0)
+        async_result._queue.put({'internal_id': async_result.internal_id, 'name': name, 'key': get_unique_id_for_dict(kwargs),
+                                 'ret': (status, {'output': i}, None if status else 'error', {'walltime': i % 100})})
+
+
+def test(num_jobs=100000, batch_size=10000):
+    logging.getLogger('AsyncResult').setLevel(logging.WARNING)
+    name = 'perf_map_func'
+    multi_jobs_kwargs_list = [{'x': i, 'y': i * 2} for i in range(num_jobs)]
+    for map_results in [False, True]:
+        async_result = AsyncResult(PerfWorkContext(), name=name, multi_jobs_kwargs_list=multi_jobs_kwargs_list, map_results=map_results)
+        time_start = time.time()
+        async_result.wait_keys
+        print("map_results=%s: wait keys of %s jobs: %.3f seconds" % (map_results, num_jobs, time.time() - time_start))
+
+        for start in range(0, num_jobs, batch_size):
+            get_results(async_result, name, multi_jobs_kwargs_list, start, min(start + batch_size, num_jobs))
+            time_start = time.time()
+            async_result.get_results(nologs=True)
+            time_new = time.time() - time_start
+            # wait_results calls it once per second, without new messages
+            time_start = time.time()
+            for i in range(10):
+                async_result.get_results(nologs=True)
+            time_idle = (time.time() - time_start) / 10
+            print("  received %s results: %.4f seconds to fold %s new results, %.6f seconds per call without new results, percent %.3f"
+                  % (start + batch_size, time_new, batch_size, time_idle, async_result.get_results_percentage()))
+
+
+if __name__ == '__main__':
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    test(num_jobs, batch_size)
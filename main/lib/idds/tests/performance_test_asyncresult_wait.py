@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of AsyncResult.wait_results:
+the latency between the arrival of the last result and wait_results returning,
+and the number of wake-ups while waiting.
+
+python performance_test_asyncresult_wait.py [num_jobs [num_batches [interval]]]
+"""
+
+import logging
+import sys
+import threading
+import time
+
+from idds.common.constants import WorkflowType
+from idds.common.utils import get_unique_id_for_dict
+from idds.iworkflow.asyncresult import AsyncResult
+
+
+class PerfWorkContext(object):
+    workflow_type = WorkflowType.iWorkflow
+    request_id = 1
+    transform_id = 0
+
+    def init_brokers(self):
+        return False
+
+
+def send_results(async_result, name, multi_jobs_kwargs_list, num_batches, interval, time_last):
+    batch_size = (len(multi_jobs_kwargs_list) + num_batches - 1) // num_batches
+    for start in range(0, len(multi_jobs_kwargs_list), batch_size):
+        time.sleep(interval)
+        for kwargs in multi_jobs_kwargs_list[start:start + batch_size]:
+            async_result._queue.put({'internal_id': async_result.internal_id, 'name': name, 'key': get_unique_id_for_dict(kwargs),
+                                     'ret': (True, {'output': kwargs['x']}, None, {})})
+        time_last.append(time.time())
+        # what the messaging listener does when a message arrives
+        async_result._new_result_event.set()
+
+
+def test(num_jobs=1000, num_batches=5, interval=0.3):
+    # no rest service to poll messages from in this test
+    logging.getLogger('AsyncResult').setLevel(logging.CRITICAL)
+    name = 'perf_map_func'
+    multi_jobs_kwargs_list = [{'x': i} for i in range(num_jobs)]
+    async_result = AsyncResult(PerfWorkContext(), name=name, multi_jobs_kwargs_list=multi_jobs_kwargs_list, timeout=60)
+    async_result.wait_keys
+
+    num_calls = [0]
+    get_results = async_result.get_results
+
+    def counted_get_results(*args, **kwargs):
+        num_calls[0] += 1
+        return get_results(*args, **kwargs)
+    async_result.get_results = counted_get_results
+
+    time_last = []
+    thread = threading.Thread(target=send_results, args=(async_result, name, multi_jobs_kwargs_list, num_batches, interval, time_last))
+    time_start = time.time()
+    thread.start()
+    results = async_result.wait_results()
+    time_end = time.time()
+    thread.join()
+
+    print("%s results in %s batches every %s seconds: wait_results took %.3f seconds, %.3f seconds after the last result, "
+          "%s wake-ups, got %s results"
+          % (num_jobs, num_batches, interval, time_end - time_start, time_end - time_last[-1], num_calls[0], len(results)))
+
+
+if __name__ == '__main__':
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    num_batches = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    interval = float(sys.argv[3]) if len(sys.argv) > 3 else 0.3
+    test(num_jobs, num_batches, interval)
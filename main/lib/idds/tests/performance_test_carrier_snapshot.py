@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of loading the input/output maps in one processing update cycle (handle_update_processing_new):
+reloading the maps from the database for every step vs. one InputOutputMapsSnapshot shared by all steps
+vs. the snapshots of keyset pages of max_jobs_per_round maps.
+Every mode runs in a new process, to measure its peak RSS.
+
+python performance_test_carrier_snapshot.py [num_jobs [max_jobs_per_round]]
+"""
+
+import functools
+import multiprocessing
+import random
+import resource
+import sys
+import time
+
+from idds.common.constants import ContentType, ContentStatus, ContentRelationType, TransformType
+from idds.orm import contents as orm_contents
+from idds.orm.base import models
+from idds.orm.collections import add_collection
+from idds.orm.requests import add_request
+from idds.orm.transforms import add_transform
+from idds.agents.carrier.utils import get_input_output_maps, get_known_panda_ids, InputOutputMapsSnapshot
+
+
+class PerfWork(object):
+    def get_input_collections(self):
+        return []
+
+    def get_output_collections(self):
+        return []
+
+    def get_log_collections(self):
+        return []
+
+    def with_sub_map_id(self):
+        return False
+
+
+def setup_transform(num_jobs, seed=0):
+    rnd = random.Random(seed)
+    request_id = add_request(scope='pseudo_scope', name='pseudo_request_%s' % time.time(), request_type=0, workload_id=1)
+    transform_id = add_transform(request_id=request_id, workload_id=1, transform_type=TransformType.Processing)
+    input_coll = add_collection(request_id=request_id, workload_id=1, scope='pseudo_scope', name='input_%s' % transform_id,
+                                transform_id=transform_id)
+    output_coll = add_collection(request_id=request_id, workload_id=1, scope='pseudo_scope', name='output_%s' % transform_id,
+                                 transform_id=transform_id)
+    contents = []
+    for map_id in range(1, num_jobs + 1):
+        input_status = rnd.choice([ContentStatus.Available] * 8 + [ContentStatus.Missing] + [ContentStatus.New])
+        output_status = rnd.choice([ContentStatus.New, ContentStatus.Available, ContentStatus.Failed])
+        # jobs with missing inputs are not submitted
+        submitted = (input_status != ContentStatus.Missing)
+        for relation_type, coll_id, status in [(ContentRelationType.Input, input_coll, input_status),
+                                               (ContentRelationType.Output, output_coll, output_status)]:
+            contents.append({'request_id': request_id, 'workload_id': 1, 'transform_id': transform_id, 'coll_id': coll_id,
+                             'map_id': map_id, 'sub_map_id': 0, 'scope': 'pseudo_scope', 'name': 'file_%s' % map_id,
+                             'min_id': 0, 'max_id': 1, 'content_type': ContentType.File, 'status': status, 'substatus': status,
+                             'content_relation_type': relation_type, 'locking': 0,
+                             'content_metadata': {'panda_id': map_id} if submitted and relation_type == ContentRelationType.Output else {}})
+        if len(contents) >= 100000:
+            orm_contents.custom_bulk_insert_mappings(models.Content, contents)
+            contents = []
+    if contents:
+        orm_contents.custom_bulk_insert_mappings(models.Content, contents)
+    return request_id, transform_id
+
+
+def get_status_filter():
+    final_terminated_status = [ContentStatus.Available, ContentStatus.FakeAvailable,
+                               ContentStatus.FinalFailed, ContentStatus.Missing,
+                               ContentStatus.FinalSubAvailable]
+    return [s for s in ContentStatus if s not in final_terminated_status]
+
+
+def run_reload(request_id, transform_id, work):
+    # new inputs and unmatched panda ids
+    _, input_output_maps = get_input_output_maps(request_id, transform_id, work, with_deps=False)
+    num_maps = len(input_output_maps)
+    # maps to poll
+    _, input_output_maps = get_input_output_maps(request_id, transform_id, work, with_deps=False, with_panda_id=True,
+                                                 status=get_status_filter(), match_content_ext=True, only_outputs=True)
+    num_polling = len(input_output_maps)
+    # missing
+    _, input_output_maps = get_input_output_maps(request_id, transform_id, work, with_deps=False, with_panda_id=False,
+                                                 status=ContentStatus.Missing, match_content_ext=False, only_outputs=False,
+                                                 for_missing=True)
+    return num_maps, num_polling, len(input_output_maps)
+
+
+def run_snapshot(request_id, transform_id, work):
+    snapshot = InputOutputMapsSnapshot(request_id, transform_id, work, with_deps=False)
+    num_maps = len(snapshot.input_output_maps)
+    pages = snapshot.get_polling_maps(status=get_status_filter(), with_panda_id=True, contents_ext=[])
+    num_polling = sum([len(page) for page in pages])
+    return num_maps, num_polling, len(snapshot.get_missing_maps(with_panda_id=False))
+
+
+def run_snapshot_pages(request_id, transform_id, work, page_size=2000):
+    # the unmatched panda ids are found with the panda ids of all maps before loading the pages
+    get_known_panda_ids(request_id, transform_id)
+    num_maps, num_polling, num_missing = 0, 0, 0
+    for snapshot in InputOutputMapsSnapshot.iter_snapshots(request_id, transform_id, work, with_deps=False, page_size=page_size):
+        num_maps += len(snapshot.input_output_maps)
+        pages = snapshot.get_polling_maps(status=get_status_filter(), with_panda_id=True, contents_ext=[])
+        num_polling += sum([len(page) for page in pages])
+        num_missing += len(snapshot.get_missing_maps(with_panda_id=False))
+    return num_maps, num_polling, num_missing
+
+
+def run(func, request_id, transform_id, queue):
+    time_start = time.time()
+    ret = func(request_id, transform_id, PerfWork())
+    queue.put((ret, time.time() - time_start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def test(num_jobs=100000, max_jobs_per_round=2000):
+    time_start = time.time()
+    request_id, transform_id = setup_transform(num_jobs)
+    print("setup %s jobs (%s contents): %.1f seconds" % (num_jobs, num_jobs * 2, time.time() - time_start))
+
+    ctx = multiprocessing.get_context('spawn')
+    for name, func in [('reload for every step', run_reload), ('snapshot', run_snapshot),
+                       ('snapshot pages of %s maps' % max_jobs_per_round, functools.partial(run_snapshot_pages, page_size=max_jobs_per_round))]:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=run, args=(func, request_id, transform_id, queue))
+        proc.start()
+        ret, used_time, max_rss = queue.get()
+        proc.join()
+        print("%s: %.2f seconds, peak RSS %.0f MB, (maps, polling maps, missing maps): %s" % (name, used_time, max_rss, ret))
+
+
+if __name__ == '__main__':
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    max_jobs_per_round = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    test(num_jobs, max_jobs_per_round)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of checking whether retried ProcessingFile messages are already processed:
+loading all contents of the transform for every message vs. one query per transform for the map_ids in the bulk.
+
+python performance_test_conductor_processed.py [num_jobs [num_messages]]
+"""
+
+import logging
+import random
+import sys
+import time
+
+from idds.common.constants import (ContentType, ContentStatus, ContentRelationType, MessageStatus, MessageType,
+                                   ProcessingStatus, TransformType)
+from idds.core import catalog as core_catalog
+from idds.core import processings as core_processings
+from idds.orm import contents as orm_contents
+from idds.orm.base import models
+from idds.orm.collections import add_collection
+from idds.orm.requests import add_request
+from idds.orm.transforms import add_transform
+from idds.agents.conductor.conductor import Conductor
+
+
+def setup_transform(num_jobs, seed=0):
+    rnd = random.Random(seed)
+    request_id = add_request(scope='pseudo_scope', name='pseudo_request_%s' % time.time(), request_type=0, workload_id=1)
+    transform_id = add_transform(request_id=request_id, workload_id=1, transform_type=TransformType.Processing)
+    core_processings.add_processing(request_id=request_id, workload_id=1, transform_id=transform_id, status=ProcessingStatus.Running)
+    output_coll = add_collection(request_id=request_id, workload_id=1, scope='pseudo_scope', name='output_%s' % transform_id,
+                                 transform_id=transform_id)
+    contents = []
+    for map_id in range(num_jobs):
+        status = rnd.choice([ContentStatus.New, ContentStatus.Available, ContentStatus.Failed, ContentStatus.Missing])
+        contents.append({'request_id': request_id, 'workload_id': 1, 'transform_id': transform_id, 'coll_id': output_coll,
+                         'map_id': map_id, 'sub_map_id': 0, 'scope': 'pseudo_scope', 'name': 'output_%s' % map_id,
+                         'min_id': 0, 'max_id': 1, 'content_type': ContentType.File, 'status': status, 'substatus': status,
+                         'content_relation_type': ContentRelationType.Output, 'locking': 0})
+    orm_contents.custom_bulk_insert_mappings(models.Content, contents)
+    return request_id, transform_id
+
+
+def get_messages(request_id, transform_id, num_jobs, num_messages, seed=1):
+    rnd = random.Random(seed)
+    messages = []
+    for i in range(num_messages):
+        files = [{'map_id': map_id} for map_id in rnd.sample(range(num_jobs), 3)]
+        messages.append({'msg_id': i, 'request_id': request_id, 'transform_id': transform_id, 'retries': 1,
+                         'status': MessageStatus.Delivered, 'msg_type': MessageType.ProcessingFile,
+                         'msg_content': {'files': files, 'relation_type': 'input', 'workload_id': 1}})
+    return messages
+
+
+def is_message_processed_full_scan(message):
+    # loading all contents of the transform for every message
+    contents = core_catalog.get_contents_by_request_transform(request_id=message['request_id'], transform_id=message['transform_id'])
+    proc_conents = {}
+    for content in contents:
+        if content['content_relation_type'] == ContentRelationType.Output:
+            proc_conents.setdefault(content['map_id'], set()).add(content['status'])
+    for f in message['msg_content']['files']:
+        statuses = proc_conents.get(f['map_id'], set())
+        if statuses == set([ContentStatus.New]) or ContentStatus.Missing in statuses:
+            return False
+    return True
+
+
+def test(num_jobs=10000, num_messages=200):
+    request_id, transform_id = setup_transform(num_jobs)
+    messages = get_messages(request_id, transform_id, num_jobs, num_messages)
+
+    conductor = Conductor.__new__(Conductor)
+    conductor.logger = logging.getLogger('perf')
+    conductor.max_retries, conductor.replay_times = 3, 3
+
+    time_start = time.time()
+    old_rets = [is_message_processed_full_scan(message) for message in messages]
+    time_old = time.time() - time_start
+
+    time_start = time.time()
+    info = conductor.get_processing_files_info(messages)
+    new_rets = [conductor.is_message_processed(message, processing_files_info=info) for message in messages]
+    time_new = time.time() - time_start
+
+    print("%s messages of a transform with %s jobs: full scan per message %.3f seconds, batched %.3f seconds, same results: %s"
+          % (num_messages, num_jobs, time_old, time_new, old_rets == new_rets))
+
+
+if __name__ == '__main__':
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    num_messages = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    test(num_jobs, num_messages)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of fetching all contents of a transform page by page:
+OFFSET pagination vs. keyset pagination on content_id, with all columns or only some columns.
+With keyset pagination, the fetch time grows linearly with the number of contents.
+
+python performance_test_contents_keyset.py [page_size [num_jobs ...]]
+"""
+
+import sys
+import time
+
+from idds.common.constants import ContentType, ContentStatus, ContentRelationType, TransformType
+from idds.orm import contents as orm_contents
+from idds.orm.base import models
+from idds.orm.collections import add_collection
+from idds.orm.requests import add_request
+from idds.orm.transforms import add_transform
+
+
+def setup_transform(num_jobs):
+    request_id = add_request(scope='pseudo_scope', name='pseudo_request_%s' % time.time(), request_type=0, workload_id=1)
+    transform_id = add_transform(request_id=request_id, workload_id=1, transform_type=TransformType.Processing)
+    output_coll = add_collection(request_id=request_id, workload_id=1, scope='pseudo_scope', name='output_%s' % transform_id,
+                                 transform_id=transform_id)
+    contents = []
+    for map_id in range(num_jobs):
+        contents.append({'request_id': request_id, 'workload_id': 1, 'transform_id': transform_id, 'coll_id': output_coll,
+                         'map_id': map_id, 'sub_map_id': 0, 'scope': 'pseudo_scope', 'name': 'output_%s' % map_id,
+                         'min_id': 0, 'max_id': 1, 'content_type': ContentType.File, 'status': ContentStatus.New,
+                         'substatus': ContentStatus.New, 'content_relation_type': ContentRelationType.Output, 'locking': 0,
+                         'content_metadata': {'panda_id': map_id, 'job_info': {'site': 'pseudo_site', 'attempts': [1, 2, 3]}}})
+    orm_contents.custom_bulk_insert_mappings(models.Content, contents)
+    return request_id, transform_id
+
+
+def fetch_with_offset(request_id, transform_id, page_size, columns=None):
+    num, page_num = 0, 0
+    while True:
+        contents = orm_contents.get_contents_by_request_transform(request_id=request_id, transform_id=transform_id,
+                                                                  page_num=page_num, page_size=page_size, columns=columns)
+        num += len(contents)
+        if len(contents) < page_size:
+            return num
+        page_num += 1
+
+
+def fetch_with_keyset(request_id, transform_id, page_size, columns=None):
+    num, last_content_id = 0, None
+    while True:
+        contents = orm_contents.get_contents_by_request_transform(request_id=request_id, transform_id=transform_id,
+                                                                  page_size=page_size, last_content_id=last_content_id,
+                                                                  columns=columns)
+        num += len(contents)
+        if len(contents) < page_size:
+            return num
+        last_content_id = contents[-1]['content_id']
+
+
+def test(page_size=1000, num_jobs_list=[10000, 20000, 40000]):
+    columns = ['map_id', 'status', 'substatus']
+    for num_jobs in num_jobs_list:
+        request_id, transform_id = setup_transform(num_jobs)
+        rets = []
+        for name, func, cols in [('offset', fetch_with_offset, None), ('keyset', fetch_with_keyset, None),
+                                 ('keyset with columns %s' % columns, fetch_with_keyset, columns)]:
+            time_start = time.time()
+            num = func(request_id, transform_id, page_size, columns=cols)
+            rets.append("%s: %.3f seconds (%s contents)" % (name, time.time() - time_start, num))
+        print("%s contents, page size %s: %s" % (num_jobs, page_size, ', '.join(rets)))
+
+
+if __name__ == '__main__':
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    num_jobs_list = [int(n) for n in sys.argv[2:]] if len(sys.argv) > 2 else [10000, 20000, 40000]
+    test(page_size, num_jobs_list)
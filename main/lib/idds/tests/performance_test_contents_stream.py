@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of getting contents from the rest service:
+one json document with all contents vs. keyset paginated pages vs. one newline delimited json stream.
+It starts the catalog rest service locally without authentication.
+
+python performance_test_contents_stream.py [num_contents]
+"""
+
+import sys
+import threading
+import time
+import tracemalloc
+
+from flask import Flask
+from werkzeug.serving import make_server
+
+from idds.common.constants import ContentType, ContentStatus, ContentRelationType, TransformType, CollectionRelationType
+from idds.orm import contents as orm_contents
+from idds.orm.base import models
+from idds.orm.collections import add_collection
+from idds.orm.requests import add_request
+from idds.orm.transforms import add_transform
+from idds.rest.v1 import catalog
+from idds.client.catalogclient import CatalogClient
+
+
+def setup_transform(num_contents):
+    request_id = add_request(scope='pseudo_scope', name='pseudo_request_%s' % time.time(), request_type=0, workload_id=1)
+    transform_id = add_transform(request_id=request_id, workload_id=1, transform_type=TransformType.Processing)
+    output_coll = add_collection(request_id=request_id, workload_id=1, scope='pseudo_scope', name='output_%s' % transform_id,
+                                 transform_id=transform_id, relation_type=CollectionRelationType.Output)
+    contents = []
+    for map_id in range(num_contents):
+        contents.append({'request_id': request_id, 'workload_id': 1, 'transform_id': transform_id, 'coll_id': output_coll,
+                         'map_id': map_id, 'sub_map_id': 0, 'scope': 'pseudo_scope', 'name': 'output_%s' % map_id,
+                         'min_id': 0, 'max_id': 1, 'content_type': ContentType.File, 'status': ContentStatus.New,
+                         'substatus': ContentStatus.New, 'content_relation_type': ContentRelationType.Output, 'locking': 0})
+    orm_contents.custom_bulk_insert_mappings(models.Content, contents)
+    return request_id, transform_id
+
+
+def start_server(port=18443):
+    app = Flask('idds_perf')
+    app.register_blueprint(catalog.get_blueprint())
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, 'http://127.0.0.1:%s' % port
+
+
+def measure(name, func):
+    tracemalloc.start()
+    time_start = time.time()
+    num = func()
+    used_time = time.time() - time_start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print("%s: %s contents, %.2f seconds, client peak memory %.1f MB" % (name, num, used_time, peak / 1e6))
+
+
+def test(num_contents=20000):
+    request_id, transform_id = setup_transform(num_contents)
+    server, host = start_server()
+    client = CatalogClient(host=host, auth={'auth_type': 'oidc', 'oidc_token': 'pseudo_token', 'vo': 'pseudo_vo'})
+
+    measure("one json document", lambda: len(client.get_contents(request_id=request_id, transform_id=transform_id)))
+    measure("pages", lambda: sum(1 for c in client.iter_contents(request_id=request_id, transform_id=transform_id, page_size=1000)))
+    measure("stream", lambda: sum(1 for c in client.iter_contents(request_id=request_id, transform_id=transform_id, stream=True)))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    num_contents = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    test(num_contents)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of repeatedly loading the dependency map of a DomaPanDAWork,
+which is zipped or stored in the additional data storage.
+
+python performance_test_dependency_map.py [num_jobs ...]
+"""
+
+import logging
+import sys
+import tempfile
+import time
+
+from idds.doma.workflowv2.dependencymap import dependency_map_cache
+from idds.doma.workflowv2.domapandawork import DomaPanDAWork
+
+
+def get_work(num_jobs):
+    dependency_map = []
+    for i in range(num_jobs):
+        dependencies = [{'task': 'task_0', 'inputname': 'job_%s' % j, 'available': False} for j in range(max(0, i - 2), i)]
+        dependency_map.append({'name': 'job_%s' % i, 'order_id': i, 'dependencies': dependencies})
+    work = DomaPanDAWork(executable='echo',
+                         primary_input_collection={'scope': 'pseudo_dataset', 'name': 'pseudo_input_collection#1'},
+                         output_collections=[{'scope': 'pseudo_dataset', 'name': 'pseudo_output_collection#1'}],
+                         log_collections=[], dependency_map=dependency_map,
+                         task_name='task_1', task_queue='DOMA_LSST_GOOGLE_TEST')
+    return work
+
+
+def time_access(work, repeat=5, cache=True):
+    times = []
+    for i in range(repeat):
+        if not cache:
+            dependency_map_cache.clear()
+        time_start = time.time()
+        dependency_map = work.dependency_map
+        times.append(time.time() - time_start)
+    return min(times), len(dependency_map)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    if len(sys.argv) > 1:
+        nums = [int(n) for n in sys.argv[1:]]
+    else:
+        nums = [10000, 100000]
+
+    storage = tempfile.mkdtemp()
+    for num in nums:
+        work = get_work(num)
+        work._dependency_map = work.zip_data(work._dependency_map)
+        work.zip_items.append('_dependency_map')
+        for cache in [False, True]:
+            used, length = time_access(work, cache=cache)
+            print("zipped dependency map, num_jobs: %s, cache: %s, time: %.4f seconds" % (length, cache, used))
+
+        work.convert_data_to_additional_data_storage(storage)
+        for cache in [False, True]:
+            used, length = time_access(work, cache=cache)
+            print("dependency map file, num_jobs: %s, cache: %s, time: %.4f seconds" % (length, cache, used))
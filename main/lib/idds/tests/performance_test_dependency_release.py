@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of releasing inputs when a few outputs of the depended transform are updated:
+scanning all contents of the transform vs. pushing the updated outputs through the content_dep_id index.
+Some dependencies are already Missing, which are not changed by both.
+
+python performance_test_dependency_release.py [num_jobs [num_updated]]
+"""
+
+import random
+import sys
+import time
+
+from idds.common.constants import ContentType, ContentStatus, ContentRelationType, TransformType
+from idds.core import catalog as core_catalog
+from idds.orm import contents as orm_contents
+from idds.orm.base import models
+from idds.orm.base.session import get_session
+from idds.orm.collections import add_collection
+from idds.orm.requests import add_request
+from idds.orm.transforms import add_transform
+
+
+def get_content(request_id, transform_id, coll_id, map_id, name, relation_type, content_dep_id=None):
+    return {'request_id': request_id, 'workload_id': 1, 'transform_id': transform_id, 'coll_id': coll_id,
+            'map_id': map_id, 'sub_map_id': 0, 'scope': 'pseudo_scope', 'name': name, 'min_id': 0, 'max_id': 1,
+            'content_type': ContentType.File, 'status': ContentStatus.New, 'substatus': ContentStatus.New,
+            'content_relation_type': relation_type, 'content_dep_id': content_dep_id, 'locking': 0}
+
+
+def setup_request(num_jobs, seed=0):
+    """
+    Every consumer job depends on 2 random outputs of the producer transform.
+    """
+    rnd = random.Random(seed)
+    request_id = add_request(scope='pseudo_scope', name='pseudo_request_%s' % time.time(), request_type=0, workload_id=1)
+    producer = add_transform(request_id=request_id, workload_id=1, transform_type=TransformType.Processing)
+    consumer = add_transform(request_id=request_id, workload_id=1, transform_type=TransformType.Processing)
+    output_coll = add_collection(request_id=request_id, workload_id=1, scope='pseudo_scope', name='output_%s' % producer, transform_id=producer)
+    input_coll = add_collection(request_id=request_id, workload_id=1, scope='pseudo_scope', name='input_%s' % consumer, transform_id=consumer)
+
+    outputs = [get_content(request_id, producer, output_coll, i, 'output_%s' % i, ContentRelationType.Output) for i in range(num_jobs)]
+    orm_contents.custom_bulk_insert_mappings(models.Content, outputs)
+    session = get_session()
+    output_ids = dict(session.query(models.Content.name, models.Content.content_id).filter(models.Content.transform_id == producer).all())
+    session.close()
+
+    contents = []
+    for i in range(num_jobs):
+        contents.append(get_content(request_id, consumer, input_coll, i, 'input_%s' % i, ContentRelationType.Input))
+        for dep in rnd.sample(range(num_jobs), 2):
+            contents.append(get_content(request_id, consumer, output_coll, i, 'output_%s' % dep, ContentRelationType.InputDependency,
+                                        content_dep_id=output_ids['output_%s' % dep]))
+    orm_contents.custom_bulk_insert_mappings(models.Content, contents)
+    return request_id, consumer, output_ids
+
+
+def update_outputs(request_id, output_ids, names, status):
+    updated = [{'content_id': output_ids[name], 'request_id': request_id, 'substatus': status} for name in names]
+    orm_contents.custom_bulk_update_mappings(models.Content, updated)
+    return [{'content_id': u['content_id'], 'substatus': u['substatus']} for u in updated]
+
+
+def set_dependency_status(request_id, transform_id, map_ids, status):
+    session = get_session()
+    query = session.query(models.Content.content_id)
+    query = query.filter(models.Content.request_id == request_id, models.Content.transform_id == transform_id,
+                         models.Content.content_relation_type == ContentRelationType.InputDependency,
+                         models.Content.map_id.in_(map_ids))
+    updated = [{'content_id': content_id, 'request_id': request_id, 'status': status, 'substatus': status}
+               for content_id, in query.all()]
+    session.close()
+    orm_contents.custom_bulk_update_mappings(models.Content, updated)
+
+
+def get_dependency_status(request_id, transform_id):
+    session = get_session()
+    query = session.query(models.Content.map_id, models.Content.name, models.Content.substatus)
+    query = query.filter(models.Content.request_id == request_id, models.Content.transform_id == transform_id,
+                         models.Content.content_relation_type == ContentRelationType.InputDependency)
+    ret = dict([((map_id, name), substatus) for map_id, name, substatus in query.all()])
+    session.close()
+    return ret
+
+
+def get_input_status(request_id, transform_id):
+    session = get_session()
+    query = session.query(models.Content.map_id, models.Content.substatus)
+    query = query.filter(models.Content.request_id == request_id, models.Content.transform_id == transform_id,
+                         models.Content.content_relation_type == ContentRelationType.Input)
+    ret = dict(query.all())
+    session.close()
+    return ret
+
+
+if __name__ == '__main__':
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    num_updated = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    request_scan, consumer_scan, output_ids_scan = setup_request(num_jobs)
+    request_push, consumer_push, output_ids_push = setup_request(num_jobs)
+    names = ['output_%s' % i for i in random.Random(1).sample(range(num_jobs), num_updated)]
+    missing_map_ids = random.Random(2).sample(range(num_jobs), num_jobs // 10)
+    for request_id, consumer in [(request_scan, consumer_scan), (request_push, consumer_push)]:
+        set_dependency_status(request_id, consumer, missing_map_ids, ContentStatus.Missing)
+        # the inputs of the missing dependencies are updated before
+        core_catalog.update_input_contents_by_dependency_pages(request_id=request_id, transform_id=consumer, page_size=500,
+                                                               status_not_to_check=[ContentStatus.Available, ContentStatus.FakeAvailable,
+                                                                                    ContentStatus.FinalFailed])
+
+    update_outputs(request_scan, output_ids_scan, names, ContentStatus.Available)
+    time_start = time.time()
+    core_catalog.update_contents_from_others_by_dep_id_pages(request_id=request_scan, transform_id=consumer_scan, page_size=2000,
+                                                             status_not_to_check=[ContentStatus.Available, ContentStatus.FakeAvailable,
+                                                                                  ContentStatus.FinalFailed, ContentStatus.Missing])
+    core_catalog.update_input_contents_by_dependency_pages(request_id=request_scan, transform_id=consumer_scan, page_size=500,
+                                                           status_not_to_check=[ContentStatus.Available, ContentStatus.FakeAvailable,
+                                                                                ContentStatus.FinalFailed])
+    time_scan = time.time() - time_start
+
+    updated = update_outputs(request_push, output_ids_push, names, ContentStatus.Available)
+    time_start = time.time()
+    core_catalog.release_inputs_by_dependency_index(request_id=request_push, dep_contents=updated,
+                                                    status_not_to_check=[ContentStatus.Available, ContentStatus.FakeAvailable,
+                                                                         ContentStatus.FinalFailed],
+                                                    dep_status_not_to_check=[ContentStatus.Available, ContentStatus.FakeAvailable,
+                                                                             ContentStatus.FinalFailed, ContentStatus.Missing])
+    time_push = time.time() - time_start
+
+    status_scan = get_input_status(request_scan, consumer_scan)
+    status_push = get_input_status(request_push, consumer_push)
+    num_released = len([s for s in status_push.values() if s == ContentStatus.Available])
+    dep_status_scan = get_dependency_status(request_scan, consumer_scan)
+    dep_status_push = get_dependency_status(request_push, consumer_push)
+    num_missing = len([s for s in dep_status_push.values() if s == ContentStatus.Missing])
+    print("num_jobs: %s, updated outputs: %s, released inputs: %s, same results: %s, missing dependencies: %s, same dependencies: %s"
+          % (num_jobs, num_updated, num_released, status_scan == status_push, num_missing, dep_status_scan == dep_status_push))
+    print("scan all contents: %.3f seconds, push by dependency index: %.3f seconds" % (time_scan, time_push))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of ordering the jobs of a large BPS generic workflow with DomaTree.
+
+python performance_test_domatree.py [num_jobs ...]
+"""
+
+import logging
+import resource
+import sys
+import time
+
+from idds.doma.workflowv2.domatree import DomaTree
+
+
+class GenericWorkflowJob(object):
+    def __init__(self, name, label):
+        self.name = name
+        self.label = label
+        self.attrs = {}
+        self.compute_cloud = None
+        self.compute_site = None
+        self.queue = 'DOMA_LSST_GOOGLE_TEST'
+        self.request_memory = 2000
+
+
+class GenericWorkflow(object):
+    """
+    Minimal generic workflow with the interfaces used by DomaTree.
+    """
+    def __init__(self):
+        self.labels = []
+        self.jobs = {}
+        self.label_jobs = {}
+        self.parents = {}
+
+    def add_job(self, job):
+        if job.label not in self.label_jobs:
+            self.labels.append(job.label)
+            self.label_jobs[job.label] = []
+        self.label_jobs[job.label].append(job)
+        self.jobs[job.name] = job
+        self.parents[job.name] = []
+
+    def add_job_relationships(self, parent, child):
+        self.parents[child].append(parent)
+
+    def get_jobs_by_label(self, label):
+        return self.label_jobs[label]
+
+    def get_job(self, name):
+        return self.jobs[name]
+
+    def predecessors(self, name):
+        return iter(self.parents[name])
+
+
+def get_generic_workflow(num_jobs):
+    """
+    Diamond shaped workflow: isr -> (characterizeImage, calibrateBackground) -> calibrate -> writePreSourceTable,
+    every writePreSourceTable job depends on 100 calibrate jobs.
+    """
+    num = max(1, num_jobs // 4)
+    gwf = GenericWorkflow()
+    for label in ['isr', 'characterizeImage', 'calibrateBackground', 'calibrate']:
+        for i in range(num):
+            gwf.add_job(GenericWorkflowJob("%s_%s" % (label, i), label=label))
+    for i in range(max(1, num // 100)):
+        gwf.add_job(GenericWorkflowJob("writePreSourceTable_%s" % i, label='writePreSourceTable'))
+    for i in range(num):
+        gwf.add_job_relationships("isr_%s" % i, "characterizeImage_%s" % i)
+        gwf.add_job_relationships("isr_%s" % i, "calibrateBackground_%s" % i)
+        gwf.add_job_relationships("characterizeImage_%s" % i, "calibrate_%s" % i)
+        gwf.add_job_relationships("calibrateBackground_%s" % i, "calibrate_%s" % i)
+        gwf.add_job_relationships("calibrate_%s" % i, "writePreSourceTable_%s" % min(i // 100, max(1, num // 100) - 1))
+    return gwf
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    if len(sys.argv) > 1:
+        nums = [int(n) for n in sys.argv[1:]]
+    else:
+        nums = [1000000]
+
+    for num in nums:
+        gwf = get_generic_workflow(num)
+        rss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        time_start = time.time()
+        tree = DomaTree('test_tree')
+        order_id_map = tree.order_jobs_from_generic_workflow(gwf, None)
+        used = time.time() - time_start
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print("num_jobs: %s, labels: %s, time: %.2f seconds, max RSS: %.1f MB (workflow %.1f MB)"
+              % (len(gwf.jobs), len(order_id_map), used, rss / 1024., rss_start / 1024.))
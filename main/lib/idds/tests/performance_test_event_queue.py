@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of the in-memory event queues.
+
+python performance_test_event_queue.py [num_events ...]
+"""
+
+import logging
+import sys
+import time
+
+from idds.agents.common.eventbus.baseeventbusbackendopt import BaseEventBusBackendOpt
+from idds.agents.common.eventbus.event import EventType, UpdateProcessingEvent
+from idds.agents.coordinator.coordinator import Coordinator
+
+
+def get_events(num_events, start_id=0):
+    return [UpdateProcessingEvent(publisher_id='perf', processing_id=start_id + i) for i in range(num_events)]
+
+
+def test_backend(num_events, num_ops=10000):
+    backend = BaseEventBusBackendOpt(logger=logging.getLogger('perf'))
+    events = get_events(num_events)
+
+    time_start = time.time()
+    backend.send_bulk(events)
+    time_fill = time.time() - time_start
+
+    # half of the new events are merged to queued events, half are new.
+    new_events = get_events(num_ops // 2, start_id=num_events - num_ops // 4)
+    time_start = time.time()
+    for event in new_events:
+        backend.send(event)
+    for i in range(num_ops // 2):
+        backend.get(EventType.UpdateProcessing, num_events=1)
+    time_ops = time.time() - time_start
+
+    print("BaseEventBusBackendOpt %8s queued events: fill %.2f seconds, %s send/get: %.3f seconds (%.0f ops/second)"
+          % (num_events, time_fill, num_ops, time_ops, num_ops / time_ops))
+
+
+def test_coordinator(coordinator, num_events, num_ops=10000):
+    coordinator.events, coordinator.events_index, coordinator.events_ids = {}, {}, {}
+    coordinator.accounts, coordinator.report = {}, {}
+    events = get_events(num_events)
+
+    time_start = time.time()
+    coordinator.send_bulk(events)
+    time_fill = time.time() - time_start
+
+    new_events = get_events(num_ops // 2, start_id=num_events - num_ops // 4)
+    time_start = time.time()
+    for event in new_events:
+        coordinator.send(event)
+    for i in range(num_ops // 2):
+        coordinator.get(EventType.UpdateProcessing, num_events=1)
+    time_ops = time.time() - time_start
+
+    print("Coordinator            %8s queued events: fill %.2f seconds, %s send/get: %.3f seconds (%.0f ops/second)"
+          % (num_events, time_fill, num_ops, time_ops, num_ops / time_ops))
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    if len(sys.argv) > 1:
+        nums = [int(n) for n in sys.argv[1:]]
+    else:
+        nums = [10000, 100000, 1000000]
+
+    for num in nums:
+        test_backend(num)
+
+    coordinator = Coordinator(min_queued_events=sys.maxsize)
+    coordinator.logger.setLevel(logging.WARNING)
+    try:
+        for num in nums:
+            test_coordinator(coordinator, num)
+    finally:
+        coordinator.stop()
+        coordinator.event_bus.stop()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of an idle agent: cpu usage and the latency to handle a new event.
+
+python performance_test_idle_agent.py [seconds]
+"""
+
+import logging
+import resource
+import sys
+import threading
+import time
+
+from idds.agents.common.baseagent import BaseAgent
+from idds.agents.common.eventbus.event import EventType, UpdateProcessingEvent
+
+
+class IdleAgent(BaseAgent):
+    def __init__(self, **kwargs):
+        super(IdleAgent, self).__init__(num_threads=4, name='IdleAgent', **kwargs)
+        self.handled = {}
+        self.handled_event = threading.Event()
+
+    def handle_event(self, event):
+        self.handled[event._id] = time.time()
+        self.handled_event.set()
+
+    def init_event_function_map(self):
+        self.event_func_map = {EventType.UpdateProcessing: {'pre_check': None, 'exec_func': self.handle_event}}
+
+    def run(self):
+        self.init_event_function_map()
+        task = self.create_task(task_func=lambda: None, task_output_queue=None, task_args=tuple(), task_kwargs={}, delay_time=60, priority=1)
+        self.add_task(task)
+        self.execute()
+
+
+def get_cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    agent = IdleAgent(logger=logging.getLogger('IdleAgent'))
+    thread = threading.Thread(target=agent.run)
+    thread.start()
+    time.sleep(1)
+
+    cpu_start, time_start = get_cpu_time(), time.time()
+    time.sleep(seconds)
+    cpu_used, time_used = get_cpu_time() - cpu_start, time.time() - time_start
+    print("Idle agent cpu usage: %.3f cpu seconds in %.1f seconds (%.2f%% of one core)" % (cpu_used, time_used, cpu_used * 100 / time_used))
+
+    latencies = []
+    for i in range(20):
+        agent.handled_event.clear()
+        event = UpdateProcessingEvent(publisher_id='perf', processing_id=i)
+        time_sent = time.time()
+        agent.event_bus.send(event)
+        agent.handled_event.wait(10)
+        latencies.append(agent.handled.get(event._id, time.time()) - time_sent)
+        time.sleep(0.1)
+    latencies.sort()
+    print("New event latency: median %.3f ms, max %.3f ms" % (latencies[len(latencies) // 2] * 1000, latencies[-1] * 1000))
+
+    agent.stop()
+    thread.join()
+    agent.executors.shutdown(wait=False)
+    agent.executors_timer.shutdown(wait=False)
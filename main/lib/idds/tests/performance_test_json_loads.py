@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of json_loads on a large DOMA workflow.
+
+python performance_test_json_loads.py [num_works] [num_jobs_per_work]
+"""
+
+import sys
+import time
+
+from idds.common.dict_class import DictClass
+from idds.common.utils import json_dumps, json_loads
+from idds.workflowv2.workflow import Workflow
+from idds.doma.workflowv2.domapandawork import DomaPanDAWork
+
+
+def get_workflow(num_works, num_jobs):
+    workflow = Workflow()
+    last_task_name = None
+    for i in range(num_works):
+        task_name = 'task_%s' % i
+        dependency_map = []
+        for k in range(num_jobs):
+            job = {'name': 'job_%s_%s' % (i, k), 'submitted': False, 'dependencies': []}
+            if last_task_name:
+                job['dependencies'] = [{'task': last_task_name, 'inputname': 'job_%s_%s' % (i - 1, k), 'available': False}]
+            dependency_map.append(job)
+        work = DomaPanDAWork(executable='echo',
+                             primary_input_collection={'scope': 'pseudo_dataset', 'name': 'pseudo_input_collection#%s' % i},
+                             output_collections=[{'scope': 'pseudo_dataset', 'name': 'pseudo_output_collection#%s' % i}],
+                             log_collections=[], dependency_map=dependency_map,
+                             task_name=task_name, task_queue='DOMA_LSST_GOOGLE_TEST')
+        workflow.add_work(work)
+        last_task_name = task_name
+    return workflow
+
+
+def time_json_loads(data, repeat=5):
+    times = []
+    for i in range(repeat):
+        time_start = time.time()
+        json_loads(data)
+        times.append(time.time() - time_start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    num_works = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    num_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    data = json_dumps(get_workflow(num_works, num_jobs))
+    print("workflow with %s works, %s jobs per work: %.1f MB json" % (num_works, num_jobs, len(data) / 1024 / 1024))
+
+    load_class = DictClass.load_class
+
+    def load_class_without_cache(module_name, class_name):
+        DictClass.clear_class_cache()
+        return load_class(module_name, class_name)
+
+    DictClass.load_class = staticmethod(load_class_without_cache)
+    time_without_cache = time_json_loads(data)
+    DictClass.load_class = staticmethod(load_class)
+    print("json_loads without class cache: %.3f seconds" % time_without_cache)
+
+    time_with_cache = time_json_loads(data)
+    print("json_loads with class cache: %.3f seconds (%s classes cached), speedup %.2f"
+          % (time_with_cache, len(DictClass._class_cache), time_without_cache / time_with_cache))
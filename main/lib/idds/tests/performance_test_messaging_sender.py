@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of the messaging sender with a local stub STOMP broker:
+sending messages one by one (polling the queue every 0.1 seconds when it's empty)
+vs. waiting for the receipt of every message vs. the batched, windowed sending.
+The stub broker answers the receipts after the given latency.
+
+python performance_test_messaging_sender.py [num_messages [receipt_latency_ms]]
+"""
+
+import socket
+import sys
+import threading
+import time
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+from idds.common.utils import json_dumps
+from idds.agents.common.plugins.messaging import MessagingSender
+
+
+class StubStompBroker(object):
+    """
+    A minimal STOMP 1.2 broker: it accepts CONNECT and SEND frames and answers the receipts after a latency.
+    """
+    def __init__(self, receipt_latency=0.001, port=0):
+        self.receipt_latency = receipt_latency
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('127.0.0.1', port))
+        self.server.listen(16)
+        self.port = self.server.getsockname()[1]
+        self.num_received = 0
+        self.lock = threading.Lock()
+        thread = threading.Thread(target=self.serve)
+        thread.daemon = True
+        thread.start()
+
+    def serve(self):
+        while True:
+            client, addr = self.server.accept()
+            replies = Queue()
+            for target, args in [(self.read_frames, (client, replies)), (self.write_frames, (client, replies))]:
+                thread = threading.Thread(target=target, args=args)
+                thread.daemon = True
+                thread.start()
+
+    def read_frames(self, client, replies):
+        data = b''
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                replies.put(None)
+                return
+            data += chunk
+            while b'\x00' in data:
+                frame, data = data.split(b'\x00', 1)
+                lines = frame.decode('utf-8').lstrip('\r\n').split('\n')
+                command = lines[0]
+                headers = {}
+                for line in lines[1:]:
+                    if not line:
+                        break
+                    if ':' in line:
+                        key, value = line.split(':', 1)
+                        headers.setdefault(key, value)
+                if command in ['CONNECT', 'STOMP']:
+                    replies.put((0, 'CONNECTED\nversion:1.2\nheart-beat:0,0\n\n\x00'))
+                elif command == 'SEND':
+                    with self.lock:
+                        self.num_received += 1
+                if 'receipt' in headers:
+                    replies.put((time.time() + self.receipt_latency, 'RECEIPT\nreceipt-id:%s\n\n\x00' % headers['receipt']))
+
+    def write_frames(self, client, replies):
+        while True:
+            reply = replies.get()
+            if reply is None:
+                return
+            due_time, frame = reply
+            time.sleep(max(0, due_time - time.time()))
+            try:
+                client.sendall(frame.encode('utf-8'))
+            except Exception:
+                return
+
+
+def get_sender(port, **kwargs):
+    channel = {"brokers": ["127.0.0.1:%s" % port], "destination": "/queue/perf", "username": "perf",
+               "password": "perf", "broker_timeout": 10}
+    channels = json_dumps({"default": channel, "ContentExt": dict(channel, destination="/queue/perf.ext")})
+    sender = MessagingSender(channels=channels, **kwargs)
+    sender.set_request_queue(Queue())
+    sender.set_response_queue(Queue())
+    return sender
+
+
+def get_messages(num_messages):
+    messages = []
+    for i in range(num_messages):
+        destination = 'ContentExt' if i % 4 == 0 else 'default'
+        messages.append({'msg_id': i, 'msg_type': 'file_processing', 'destination': destination, 'from_idds': True,
+                         'msg_content': {'msg_type': 'file_processing', 'workload_id': 1, 'files': [{'map_id': i}]}})
+    return messages
+
+
+def execute_send_one_by_one(sender):
+    # the sending loop before the sending window
+    sender.conns = sender.connect_to_messaging_brokers(sender=True)
+    while not sender.graceful_stop.is_set():
+        if not sender.request_queue.empty():
+            msg = sender.request_queue.get(False)
+            if msg:
+                sender.send_message(msg)
+                sender.response_queue.put(msg)
+        else:
+            time.sleep(0.1)
+
+
+def run_sender(sender, messages, one_by_one=False, interval=0):
+    """
+    :returns: (time used to send all messages, mean time between putting a message and it being reported as sent)
+    """
+    if one_by_one:
+        thread = threading.Thread(target=execute_send_one_by_one, args=(sender,))
+    else:
+        thread = threading.Thread(target=sender.execute_send)
+    thread.daemon = True
+    thread.start()
+    time.sleep(0.5)
+
+    put_times, latencies = {}, []
+
+    def collect_responses():
+        while len(latencies) < len(messages):
+            msg = sender.response_queue.get(timeout=60)
+            latencies.append(time.time() - put_times[msg['msg_id']])
+
+    collector = threading.Thread(target=collect_responses)
+    time_start = time.time()
+    collector.start()
+    for msg in messages:
+        put_times[msg['msg_id']] = time.time()
+        sender.request_queue.put(msg)
+        if interval:
+            time.sleep(interval)
+    collector.join()
+    time_used = time.time() - time_start
+    sender.stop()
+    thread.join()
+    return time_used, sum(latencies) / len(latencies)
+
+
+def test(num_messages=20000, receipt_latency_ms=2):
+    broker = StubStompBroker(receipt_latency=receipt_latency_ms / 1000.0)
+    messages = get_messages(num_messages)
+    num_sparse = 50
+
+    for name, kwargs, one_by_one in [('one by one, no receipts', {'send_window': 0}, True),
+                                     ('receipt per message', {'send_window': 1, 'send_batch_size': 1}, False),
+                                     ('batched and windowed', {'send_window': 1000, 'send_batch_size': 100}, False)]:
+        num = num_messages if name != 'receipt per message' else min(num_messages, 2000)
+        sender = get_sender(broker.port, **kwargs)
+        time_used, latency = run_sender(sender, messages[:num], one_by_one=one_by_one)
+        stats = sender.get_send_stats()
+        sender = get_sender(broker.port, **kwargs)
+        sparse_time_used, sparse_latency = run_sender(sender, messages[:num_sparse], one_by_one=one_by_one, interval=0.05)
+        print("%s: %s messages in %.2f seconds (%.1f messages/second); sparse messages reported as sent after %.1f ms"
+              % (name, num, time_used, num / time_used, sparse_latency * 1000))
+        for destination in stats:
+            print("    %s: %s" % (destination, stats[destination]))
+    print("stub broker received %s messages" % broker.num_received)
+
+
+if __name__ == '__main__':
+    num_messages = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    receipt_latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    test(num_messages, receipt_latency_ms)
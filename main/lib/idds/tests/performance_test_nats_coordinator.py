@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of publishing and fetching events with NATS JetStream:
+a new connection for every operation vs. the persistent connection of IDDSNATS.
+
+It requires a NATS server with JetStream enabled.
+
+NATS_URL=nats://localhost:4222 NATS_TOKEN=<token> python performance_test_nats_coordinator.py [num_events]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+from nats.aio.client import Client as NATS
+
+from idds.common.utils import json_dumps
+from idds.agents.common.eventbus.event import EventType, UpdateProcessingEvent
+from idds.agents.coordinator.nats_coordinator import IDDSNATS
+
+
+def get_events(num_events):
+    return [UpdateProcessingEvent(publisher_id='perf', processing_id=i) for i in range(num_events)]
+
+
+async def publish_with_new_connection(nats_server, event):
+    nc = NATS()
+    await nc.connect(servers=[nats_server["nats_url"]], token=nats_server["nats_token"])
+    try:
+        js = nc.jetstream()
+        await js.publish(f"event.{event.event_type}", json_dumps(event).encode("utf-8"), timeout=5)
+    finally:
+        await nc.close()
+
+
+async def add_stream(idds_nats):
+    nc, js = await idds_nats.connect()
+    try:
+        await js.add_stream(name="IDDS_PERF", subjects=["event.>"])
+    except Exception as ex:
+        print("stream is not added: %s" % ex)
+
+
+def test(num_events=1000):
+    nats_server = {"nats_url": os.environ.get("NATS_URL", "nats://localhost:4222"),
+                   "nats_token": os.environ.get("NATS_TOKEN", "my_default_token")}
+    idds_nats = IDDSNATS(nats_server, logger=logging.getLogger('perf'))
+    idds_nats.run(add_stream(idds_nats))
+    events = get_events(num_events)
+
+    num_old = min(num_events, 200)
+    time_start = time.time()
+    for event in events[:num_old]:
+        asyncio.run(publish_with_new_connection(nats_server, event))
+    time_old = (time.time() - time_start) / num_old
+
+    time_start = time.time()
+    for event in events:
+        idds_nats.run(idds_nats.publish_event(event))
+    time_new = (time.time() - time_start) / num_events
+
+    time_start = time.time()
+    idds_nats.run(idds_nats.publish_events(events))
+    time_bulk = (time.time() - time_start) / num_events
+
+    time_start = time.time()
+    num_fetched = 0
+    while True:
+        ret = idds_nats.run(idds_nats.fetch_events(EventType.UpdateProcessing.name, num_events=100, wait=1))
+        if not ret:
+            break
+        num_fetched += len(ret)
+    time_fetch = time.time() - time_start
+
+    print("publish with a new connection: %.3f ms/event" % (time_old * 1000))
+    print("publish with the persistent connection: %.3f ms/event" % (time_new * 1000))
+    print("publish in a pipelined bulk: %.3f ms/event" % (time_bulk * 1000))
+    print("fetched %s events: %.3f seconds" % (num_fetched, time_fetch))
+    idds_nats.stop()
+
+
+if __name__ == '__main__':
+    num_events = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    test(num_events)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of polling the PanDA job status of DomaPanDAWork:
+the number of jobs asked to PanDA in poll cycles, without and with the job status cache.
+It uses a fake PanDA client, where some jobs terminate in every cycle and the archived jobs
+are only returned by getFullJobStatus.
+
+python performance_test_panda_job_status_cache.py [num_jobs [num_cycles]]
+"""
+
+import random
+import sys
+import types
+
+from idds.doma.workflowv2.domapandawork import DomaPanDAWork
+from idds.doma.workflowv2.jobstatuscache import panda_job_status_cache
+
+
+class FakeFile(object):
+    def __init__(self, lfn):
+        self.lfn = lfn
+        self.type = 'pseudo_input'
+
+
+class FakeJob(object):
+    def __init__(self, panda_id, status):
+        self.PandaID = panda_id
+        self.jobsetID = panda_id
+        self.jediTaskID = 1
+        self.jobStatus = status
+        self.jobSubStatus = None
+        self.eventService = None
+        self.attemptNr = 1
+        self.maxAttempt = 5
+        self.Files = [FakeFile('pseudo_dataset:job_%s' % panda_id)]
+
+
+class FakeClient(object):
+    def __init__(self, num_jobs, seed=0):
+        self.rnd = random.Random(seed)
+        self.jobs = dict([(i, 'running') for i in range(1, num_jobs + 1)])
+        self.archived = set()
+        self.calls = {'getJobStatus': 0, 'getFullJobStatus': 0}
+        self.asked = {'getJobStatus': 0, 'getFullJobStatus': 0}
+
+    def next_cycle(self, terminate_fraction=0.2):
+        # terminated jobs are archived in the next cycle
+        for panda_id, status in self.jobs.items():
+            if status in ['finished', 'failed']:
+                self.archived.add(panda_id)
+        for panda_id, status in self.jobs.items():
+            if status == 'running' and self.rnd.random() < terminate_fraction:
+                self.jobs[panda_id] = self.rnd.choice(['finished', 'finished', 'failed'])
+
+    def getJobStatus(self, ids, verbose=0):
+        self.calls['getJobStatus'] += 1
+        self.asked['getJobStatus'] += len(ids)
+        return 0, [None if i in self.archived else FakeJob(i, self.jobs[i]) for i in ids]
+
+    def getFullJobStatus(self, ids, verbose=False):
+        self.calls['getFullJobStatus'] += 1
+        self.asked['getFullJobStatus'] += len(ids)
+        return 0, [FakeJob(i, self.jobs[i]) for i in ids]
+
+
+def get_work():
+    work = DomaPanDAWork(executable='echo', primary_input_collection={'scope': 'pseudo_dataset', 'name': 'pseudo_input'},
+                         output_collections=[{'scope': 'pseudo_dataset', 'name': 'pseudo_output'}],
+                         log_collections=[], dependency_map=[], task_name='perf_task', task_queue='pseudo_queue')
+    work.poll_panda_jobs_chunk_size = 2000
+    return work
+
+
+def run(num_jobs, num_cycles, use_cache):
+    client = FakeClient(num_jobs)
+    sys.modules['pandaclient'] = types.SimpleNamespace(Client=client)
+    panda_job_status_cache.clear()
+    work = get_work()
+    job_ids = list(client.jobs.keys())
+    statuses = []
+    for i in range(num_cycles):
+        # the jobs of not terminated contents (Failed is not terminated) are polled in every cycle
+        ret = work.poll_panda_jobs(job_ids, task_id=1 if use_cache else None)
+        statuses.append(dict([(name, [(job['panda_id'], job['status']) for job in info['jobs']]) for name, info in ret.items()]))
+        client.next_cycle()
+        job_ids = [panda_id for panda_id in job_ids if client.jobs[panda_id] != 'finished' or panda_id not in client.archived]
+    return client, statuses
+
+
+def test(num_jobs=20000, num_cycles=10):
+    rets = []
+    for use_cache in [False, True]:
+        client, statuses = run(num_jobs, num_cycles, use_cache)
+        rets.append(statuses)
+        print("use_cache=%s: %s cycles of %s jobs, getJobStatus %s calls for %s jobs, getFullJobStatus %s calls for %s jobs"
+              % (use_cache, num_cycles, num_jobs, client.calls['getJobStatus'], client.asked['getJobStatus'],
+                 client.calls['getFullJobStatus'], client.asked['getFullJobStatus']))
+    print("same job status: %s" % (rets[0] == rets[1]))
+
+
+if __name__ == '__main__':
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    num_cycles = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    test(num_jobs, num_cycles)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of the prompt transformer with an in-process fake broker:
+processing slices one by one and publishing every result vs. the worker pool with batched result publishes.
+It also checks that the results of every run are published in the order the slices are received,
+and that the number of received but unpublished slices is bounded.
+
+python performance_test_prompt_transformer.py [num_slices [payload_ms [send_ms]]]
+"""
+
+import random
+import sys
+import threading
+import time
+
+import idds.prompt.transformer as prompt_transformer
+from idds.prompt.transformer import Transformer
+
+
+class FakeBroker(object):
+    """
+    Delivers the slices to the handler one by one in one thread, like the stomp receiver thread.
+    The publisher costs send_time for every send (or every committed transaction).
+    """
+    def __init__(self, num_runs, num_slices, send_time):
+        self.send_time = send_time
+        self.messages = []
+        for i in range(num_slices):
+            run_id = i % num_runs
+            self.messages.append({'msg_type': 'slice', 'run_id': run_id, 'created_at': time.time(),
+                                  'content': {'run_id': run_id, 'slice_id': i // num_runs}})
+        self.num_delivered = 0
+        self.published = []
+        self.num_sends = 0
+        self.max_unpublished = 0
+        self.lock = threading.Lock()
+
+    def deliver(self, handler):
+        for msg in self.messages:
+            with self.lock:
+                self.num_delivered += 1
+                self.max_unpublished = max(self.max_unpublished, self.num_delivered - len(self.published))
+            handler({}, msg, {'result_publisher': self})
+
+    def publish(self, msg, headers=None):
+        time.sleep(self.send_time)
+        with self.lock:
+            self.num_sends += 1
+            self.published.append(msg)
+
+    def publish_batch(self, msgs, headers=None):
+        time.sleep(self.send_time)
+        with self.lock:
+            self.num_sends += 1
+            self.published.extend(msgs)
+        return True
+
+    def is_ordered(self):
+        slice_ids = {}
+        for msg in self.published:
+            slice_ids.setdefault(msg['run_id'], []).append(msg['content']['result']['result']['slice_id'])
+        return all(ids == sorted(ids) for ids in slice_ids.values())
+
+
+def get_slow_payload(payload_time, seed=0):
+    rnd = random.Random(seed)
+
+    def process_payload(payload):
+        # jitter so that the slices finish out of order
+        time.sleep(payload_time * rnd.uniform(0.5, 1.5))
+        processed_payload = payload.copy()
+        processed_payload['processed'] = True
+        return True, processed_payload, None
+    return process_payload
+
+
+def run_transformer(num_runs, num_slices, send_time, **kwargs):
+    broker = FakeBroker(num_runs, num_slices, send_time)
+    transformer = Transformer(**kwargs)
+    time_start = time.time()
+    broker.deliver(transformer.transformer_handler)
+    transformer.stop_pool()
+    time_used = time.time() - time_start
+    return broker, time_used
+
+
+def test(num_slices=2000, payload_ms=5, send_ms=2, num_runs=3):
+    prompt_transformer.process_payload = get_slow_payload(payload_ms / 1000.0)
+
+    for kwargs in [{'num_workers': 1, 'max_in_flight': 1, 'result_batch_size': 1},
+                   {'num_workers': 4, 'result_batch_size': 50},
+                   {'num_workers': 8, 'result_batch_size': 50}]:
+        broker, time_used = run_transformer(num_runs, num_slices, send_ms / 1000.0, **kwargs)
+        print("%s: %s slices of %s runs in %.2f seconds (%.1f slices/second), %s sends, max unpublished %s, "
+              "all published: %s, ordered per run: %s"
+              % (kwargs, num_slices, num_runs, time_used, num_slices / time_used, broker.num_sends, broker.max_unpublished,
+                 len(broker.published) == num_slices, broker.is_ordered()))
+
+
+if __name__ == '__main__':
+    num_slices = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    payload_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    send_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 2
+    test(num_slices, payload_ms, send_ms)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of the compressed rest transport:
+bytes on the wire and submit time of a large DOMA workflow, with and without compression.
+It starts a local rest service with the compression of the iDDS rest app and a pseudo request endpoint,
+and estimates the transfer time on a WAN link with the given bandwidth.
+It also checks that a small compressed body which decompresses to more than the limit is rejected early.
+
+python performance_test_rest_compression.py [num_jobs [bandwidth_mbps]]
+"""
+
+import gzip
+import resource
+import sys
+import threading
+import time
+
+import requests
+
+from flask import Blueprint, Flask, request
+
+from werkzeug.serving import make_server
+
+from idds.common.constants import RequestType, RequestStatus
+from idds.common.utils import json_dumps, json_loads
+from idds.client.requestclient import RequestClient
+from idds.doma.workflowv2.domapandawork import DomaPanDAWork
+from idds.rest.v1.app import setup_compression, MAX_DECOMPRESSED_LENGTH
+from idds.workflowv2.workflow import Workflow
+
+
+def setup_workflow(num_jobs):
+    works = []
+    task_names = ['perf_step%s' % i for i in range(3)]
+    for i, task_name in enumerate(task_names):
+        dependency_map = []
+        for k in range(num_jobs // len(task_names)):
+            dependencies = []
+            if i > 0:
+                dependencies = [{"task": task_names[i - 1], "inputname": "%s_%06d" % (task_names[i - 1], k), "available": False}]
+            dependency_map.append({"name": "%s_%06d" % (task_name, k), "dependencies": dependencies, "submitted": False})
+        work = DomaPanDAWork(executable='echo; sleep 180',
+                             primary_input_collection={'scope': 'pseudo_dataset', 'name': 'pseudo_input_collection#%s' % i},
+                             output_collections=[{'scope': 'pseudo_dataset', 'name': 'pseudo_output_collection#%s' % i}],
+                             log_collections=[], dependency_map=dependency_map,
+                             task_name=task_name, task_queue='pseudo_queue',
+                             encode_command_line=True,
+                             task_priority=981,
+                             prodSourceLabel='managed',
+                             task_log={"dataset": "PandaJob_#{pandaid}/",
+                                       "destination": "local",
+                                       "param_type": "log",
+                                       "token": "local",
+                                       "type": "template",
+                                       "value": "log.tgz"},
+                             task_cloud='US')
+        works.append(work)
+
+    workflow = Workflow()
+    for work in works:
+        workflow.add_work(work)
+    workflow.name = 'perf_test_workflow.idds.%s.test' % time.time()
+    return workflow
+
+
+def get_request_props(workflow):
+    return {'scope': 'workflow', 'name': workflow.name, 'requester': 'panda',
+            'request_type': RequestType.Workflow, 'transform_tag': 'workflow', 'status': RequestStatus.New,
+            'priority': 0, 'lifetime': 30, 'workload_id': workflow.get_workload_id(),
+            'request_metadata': {'version': 'perf', 'workload_id': workflow.get_workload_id(), 'workflow': workflow}}
+
+
+def get_pseudo_blueprint():
+    bp = Blueprint('pseudo_request', __name__)
+
+    @bp.route('/request', methods=['POST'])
+    def add_request():
+        data = json_loads(request.data)
+        return json_dumps({'request_id': 1, 'name': data['name']})
+
+    @bp.route('/ping', methods=['GET'])
+    def ping():
+        return json_dumps({'Status': 'OK'})
+
+    @bp.route('/request/<num_requests>', methods=['GET'])
+    def get_requests(num_requests):
+        return json_dumps([{'request_id': i, 'status': 'Transforming', 'name': 'pseudo_request_%s' % i,
+                            'scope': 'workflow', 'created_at': '2026-01-01 00:00:00'} for i in range(int(num_requests))])
+    return bp
+
+
+def start_server(port=18444):
+    app = Flask('idds_perf')
+    app.register_blueprint(get_pseudo_blueprint())
+    setup_compression(app)
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, 'http://127.0.0.1:%s' % port
+
+
+def check_compression_bomb(host, size=4 * 1024 * 1024 * 1024):
+    bomb = gzip.compress(b'\0' * (64 * 1024 * 1024))
+    # gzip members can be concatenated
+    bomb = bomb * (size // (64 * 1024 * 1024))
+    rss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    time_start = time.time()
+    ret = requests.post(host + '/request', data=bomb, headers={'Content-Encoding': 'gzip'})
+    print("compression bomb: %.2f MB decompressing to %.2f GB: status %s in %.2f seconds, "
+          "max rss increased by %.2f MB (decompressed limit %.2f MB)"
+          % (len(bomb) / 1e6, size / 1e9, ret.status_code, time.time() - time_start,
+             (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_start) / 1024., MAX_DECOMPRESSED_LENGTH / 1e6))
+
+
+def test(num_jobs=60000, bandwidth_mbps=100):
+    workflow = setup_workflow(num_jobs)
+    server, host = start_server()
+
+    for compress in [False, True]:
+        client = RequestClient(host=host, auth={'auth_type': 'oidc', 'oidc_token': 'pseudo_token', 'vo': 'pseudo_vo'})
+        if not compress:
+            client.disable_compression()
+            client.session.headers['Accept-Encoding'] = 'identity'
+
+        time_start = time.time()
+        client.add_request(**get_request_props(workflow))
+        submit_time = time.time() - time_start
+        url = client.build_url(host, path='request/%s' % num_jobs)
+        client.get_request_response(url, type='GET')
+        stats = client.get_transfer_stats()
+
+        wire_bytes = stats['request_wire_bytes'] + stats['response_wire_bytes']
+        wan_time = wire_bytes * 8 / (bandwidth_mbps * 1e6)
+        print("compress=%s: submit %.3f seconds, request %.2f MB (on the wire %.2f MB), response %.2f MB (on the wire %.2f MB), "
+              "estimated transfer time at %s Mbps %.2f seconds"
+              % (compress, submit_time, stats['request_bytes'] / 1e6, stats['request_wire_bytes'] / 1e6,
+                 stats['response_bytes'] / 1e6, stats['response_wire_bytes'] / 1e6, bandwidth_mbps, wan_time))
+    check_compression_bomb(host)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 60000
+    bandwidth_mbps = float(sys.argv[2]) if len(sys.argv) > 2 else 100
+    test(num_jobs, bandwidth_mbps)
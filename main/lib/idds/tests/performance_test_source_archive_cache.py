@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of preparing the source archive of an iworkflow:
+re-tarring the source directory for every submission vs. the content-addressed local archive cache.
+
+python performance_test_source_archive_cache.py [num_files [file_size]]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from idds.common.utils import create_archive_file, json_dumps, json_loads
+from idds.iworkflow.workflow import WorkflowContext
+
+
+def setup_source_dir(num_files, file_size, seed=0):
+    rnd = random.Random(seed)
+    source_dir = tempfile.mkdtemp(prefix="idds_perf_source_")
+    for i in range(num_files):
+        sub_dir = os.path.join(source_dir, "pkg%s" % (i % 20), "sub%s" % (i % 7))
+        os.makedirs(sub_dir, exist_ok=True)
+        with open(os.path.join(sub_dir, "module_%s.py" % i), "w") as f:
+            f.write("".join(rnd.choice("abcdefgh \n") for _ in range(file_size)))
+    os.makedirs(os.path.join(source_dir, "__pycache__"))
+    with open(os.path.join(source_dir, "__pycache__", "cached.pyc"), "w") as f:
+        f.write("pyc")
+    return source_dir
+
+
+def test(num_files=2000, file_size=10000):
+    source_dir = setup_source_dir(num_files, file_size)
+    cache_dir = tempfile.mkdtemp(prefix="idds_perf_source_cache_")
+    os.environ["IDDS_SOURCE_CACHE_DIR"] = cache_dir
+    os.environ["PANDACACHE_URL"] = "https://pseudo-panda-cache:25443/server/panda"
+
+    context = WorkflowContext(name="perf_test_workflow", source_dir=source_dir, exclude_source_files=["__pycache__"])
+
+    time_start = time.time()
+    archive_file = create_archive_file("/tmp", "perf_test_workflow.tar.gz", [source_dir], exclude_files=["__pycache__"])
+    time_tar = time.time() - time_start
+    os.remove(archive_file)
+
+    time_start = time.time()
+    source_hash, archive_file, record_file = context.get_source_archive()
+    time_first = time.time() - time_start
+
+    # pretend the archive was uploaded, as upload_source_files_to_panda records it
+    with open(record_file) as f:
+        record = json_loads(f.read())
+    cache_url = "https://pseudo-panda-cache:25443"
+    record["remote_files"][os.environ["PANDACACHE_URL"]] = {"filename": "%s/cache/%s" % (cache_url, os.path.basename(archive_file)),
+                                                            "cache_url": cache_url, "uploaded_at": time.time()}
+    with open(record_file, "w") as f:
+        f.write(json_dumps(record))
+
+    time_start = time.time()
+    remote_file = context.upload_source_files_to_panda()
+    time_unchanged = time.time() - time_start
+
+    changed_file = os.path.join(source_dir, "pkg0", "sub0", "module_0.py")
+    with open(changed_file, "a") as f:
+        f.write("\n# changed\n")
+    time_start = time.time()
+    new_source_hash, new_archive_file, new_record_file = context.get_source_archive()
+    time_changed = time.time() - time_start
+
+    print("%s files of %s bytes" % (num_files, file_size))
+    print("re-tar for every submission: %.3f seconds" % time_tar)
+    print("first submission (hash + tar): %.3f seconds" % time_first)
+    print("unchanged sources (hash with the digest cache, reuse the uploaded file %s): %.3f seconds" % (remote_file, time_unchanged))
+    print("one changed file (hash + tar): %.3f seconds, new archive: %s" % (time_changed, new_source_hash != source_hash))
+
+    shutil.rmtree(source_dir)
+    shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    file_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    test(num_files, file_size)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of the throttler numbers of a site:
+GROUP BY scans of requests/transforms/processings/contents vs. the incrementally maintained counters.
+It also checks that the incremental counters are the same as the reconciled ones.
+
+It requires redis (the cache section in the configuration).
+
+python performance_test_throttler_counters.py [num_transforms [num_jobs]]
+"""
+
+import random
+import sys
+import time
+
+from idds.common.constants import (ContentType, ContentStatus, ContentRelationType,
+                                   TransformType, RequestStatus, TransformStatus, ProcessingStatus,
+                                   CollectionRelationType)
+from idds.core import (requests as core_requests,
+                       transforms as core_transforms,
+                       processings as core_processings,
+                       counters as core_counters)
+from idds.orm import contents as orm_contents
+from idds.orm.base import models
+from idds.orm.collections import add_collection
+
+
+def get_content(request_id, transform_id, coll_id, map_id, relation_type, status):
+    return {'request_id': request_id, 'workload_id': 1, 'transform_id': transform_id, 'coll_id': coll_id,
+            'map_id': map_id, 'sub_map_id': 0, 'scope': 'pseudo_scope', 'name': '%s_%s_%s' % (relation_type.name, transform_id, map_id),
+            'min_id': 0, 'max_id': 1, 'content_type': ContentType.File, 'status': status, 'substatus': status,
+            'content_relation_type': relation_type, 'locking': 0}
+
+
+def setup_transforms(site, num_transforms, num_jobs, seed=0):
+    rnd = random.Random(seed)
+    request_id = core_requests.add_request(scope='pseudo_scope', name='pseudo_request_%s' % time.time(), request_type=0,
+                                           workload_id=1, site=site)
+    transforms = []
+    for i in range(num_transforms):
+        transform_id = core_transforms.add_transform(request_id=request_id, workload_id=1, transform_type=TransformType.Processing,
+                                                     site=site)
+        processing_id = core_processings.add_processing(request_id=request_id, workload_id=1, transform_id=transform_id,
+                                                        status=ProcessingStatus.New, site=site)
+        input_coll = add_collection(request_id=request_id, workload_id=1, scope='pseudo_scope', name='input_%s' % transform_id,
+                                    transform_id=transform_id)
+        output_coll = add_collection(request_id=request_id, workload_id=1, scope='pseudo_scope', name='output_%s' % transform_id,
+                                     transform_id=transform_id, relation_type=CollectionRelationType.Output)
+        contents = []
+        coll_status = {input_coll: {'total_files': 0, 'new_files': 0, 'activated_files': 0},
+                       output_coll: {'total_files': 0, 'new_files': 0, 'activated_files': 0}}
+        for map_id in range(num_jobs):
+            for relation_type, coll_id in [(ContentRelationType.Input, input_coll), (ContentRelationType.Output, output_coll)]:
+                status = rnd.choice([ContentStatus.New, ContentStatus.Activated, ContentStatus.Available])
+                contents.append(get_content(request_id, transform_id, coll_id, map_id, relation_type, status))
+                coll_status[coll_id]['total_files'] += 1
+                if status == ContentStatus.New:
+                    coll_status[coll_id]['new_files'] += 1
+                elif status == ContentStatus.Activated:
+                    coll_status[coll_id]['activated_files'] += 1
+        orm_contents.custom_bulk_insert_mappings(models.Content, contents)
+        transforms.append((transform_id, processing_id, coll_status, input_coll, output_coll))
+    return request_id, transforms
+
+
+def test(num_transforms=100, num_jobs=1000, num_loops=10):
+    core_counters.set_enabled(True)
+    site = 'pseudo_site_%s' % int(time.time())
+
+    t0 = time.time()
+    request_id, transforms = setup_transforms(site, num_transforms, num_jobs)
+    print("setup %s transforms with %s jobs: %.2f seconds" % (num_transforms, num_jobs, time.time() - t0))
+
+    core_counters.reconcile_counters(force=True)
+    rnd = random.Random(1)
+    for transform_id, processing_id, coll_status, input_coll, output_coll in transforms:
+        # the transformer and the carrier update the status
+        core_transforms.update_transform(transform_id, {'status': TransformStatus.Transforming})
+        core_processings.update_processing(processing_id, {'status': rnd.choice([ProcessingStatus.Submitted, ProcessingStatus.Running])})
+        values = core_counters.get_contents_counters(coll_status, [input_coll], [output_coll])
+        core_counters.update_contents_counters(transform_id, values)
+    incremental = core_counters.get_site_counters(site)
+
+    t0 = time.time()
+    for i in range(num_loops):
+        core_counters.reconcile_counters(force=True)
+    reconcile_time = (time.time() - t0) / num_loops
+    reconciled = core_counters.get_site_counters(site)
+
+    t0 = time.time()
+    for i in range(num_loops * 100):
+        core_counters.get_site_counters(site)
+    lookup_time = (time.time() - t0) / (num_loops * 100)
+
+    print("incremental counters: %s" % incremental)
+    print("reconciled counters: %s" % reconciled)
+    print("incremental counters are the same as reconciled: %s" % (incremental == reconciled))
+    print("GROUP BY scans (reconciliation): %.4f seconds" % reconcile_time)
+    print("counters lookup: %.6f seconds" % lookup_time)
+
+    for transform_id, processing_id, coll_status, input_coll, output_coll in transforms:
+        core_transforms.update_transform(transform_id, {'status': TransformStatus.Finished})
+        core_processings.update_processing(processing_id, {'status': ProcessingStatus.Finished})
+    core_requests.update_request(request_id, {'status': RequestStatus.Finished})
+    print("counters after all finished: %s" % core_counters.get_site_counters(site))
+
+
+if __name__ == '__main__':
+    num_transforms = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    num_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    test(num_transforms, num_jobs)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of ordering the independent works of a large workflow.
+
+python performance_test_workflow_order.py [num_works ...]
+"""
+
+import logging
+import random
+import sys
+import time
+
+from idds.workflowv2.workflow import Workflow
+from idds.doma.workflowv2.domapandawork import DomaPanDAWork
+
+
+def get_workflow(num_works, max_parents=3, seed=0, shuffle=True):
+    """
+    Random DAG: every work depends on up to max_parents earlier works.
+    Without shuffle, the parents are added before their children and add_work keeps the works ordered.
+    """
+    rnd = random.Random(seed)
+    workflow = Workflow()
+    works = []
+    for i in range(num_works):
+        dependency_map = [{'name': 'job_%s' % i, 'submitted': False, 'dependencies': []}]
+        if i > 0:
+            parents = set([rnd.randrange(max(0, i - 100), i) for k in range(rnd.randrange(max_parents + 1))])
+            for parent in parents:
+                dependency_map[0]['dependencies'].append({'task': 'task_%s' % parent, 'inputname': 'job_%s' % parent, 'available': False})
+        work = DomaPanDAWork(executable='echo',
+                             primary_input_collection={'scope': 'pseudo_dataset', 'name': 'pseudo_input_collection#%s' % i},
+                             output_collections=[{'scope': 'pseudo_dataset', 'name': 'pseudo_output_collection#%s' % i}],
+                             log_collections=[], dependency_map=dependency_map,
+                             task_name='task_%s' % i, task_queue='DOMA_LSST_GOOGLE_TEST')
+        works.append(work)
+    if shuffle:
+        # add the works in random order
+        rnd.shuffle(works)
+    for work in works:
+        workflow.add_work(work)
+    return workflow
+
+
+def check_order(workflow):
+    works = workflow.template.works
+    ordered = {}
+    for work_id in workflow.template.independent_works:
+        for dep_work_id in workflow.template.get_work_dependencies()[work_id]:
+            assert dep_work_id in ordered, "work %s is ordered before its dependency %s" % (works[work_id].task_name, works[dep_work_id].task_name)
+        ordered[work_id] = True
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    if len(sys.argv) > 1:
+        nums = [int(n) for n in sys.argv[1:]]
+    else:
+        nums = [1000, 10000, 50000]
+
+    for num in nums:
+        workflow = get_workflow(num)
+        time_start = time.time()
+        workflow.template.order_independent_works()
+        time_order = time.time() - time_start
+        check_order(workflow)
+
+        # add 1% new works, only the new works are resolved when re-ordering
+        new_workflow = get_workflow(num // 100, seed=1)
+        for work in new_workflow.template.works.values():
+            work.task_name = 'new_' + work.task_name
+            workflow.add_work(work)
+        time_start = time.time()
+        workflow.template.order_independent_works()
+        time_reorder = time.time() - time_start
+        check_order(workflow)
+
+        work_id = workflow.template.independent_works[-1]
+        time_start = time.time()
+        deps = workflow.template.get_dependency_works(work_id, 0, len(workflow.template.works))
+        time_deps = time.time() - time_start
+
+        # parents added before their children: add_work puts every work at its position
+        time_start = time.time()
+        workflow = get_workflow(num, shuffle=False)
+        time_add = time.time() - time_start
+        ordered_works = list(workflow.template.independent_works)
+        workflow.template.work_levels = None
+        workflow.template.order_independent_works()
+        check_order(workflow)
+        same_order = ordered_works == workflow.template.independent_works
+
+        print("%6s works: order %.3f seconds, re-order after adding %s works %.3f seconds, %s dependency works of the last work %.3f seconds, "
+              "add_work in order %.3f seconds (same order as ordering all works: %s)"
+              % (num, time_order, num // 100, time_reorder, len(deps), time_deps, time_add, same_order))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+performance test of synchronizing a large workflow when only a few works change status.
+
+python performance_test_workflow_sync.py [num_works ...]
+"""
+
+import logging
+import sys
+import time
+
+from idds.common.utils import json_dumps, json_loads
+from idds.workflowv2.work import WorkStatus
+from idds.workflowv2.workflow import Workflow
+from idds.doma.workflowv2.domapandawork import DomaPanDAWork
+
+
+def get_workflow(num_works):
+    workflow = Workflow()
+    for i in range(num_works):
+        dependency_map = [{'name': 'job_%s' % i, 'submitted': False, 'dependencies': []}]
+        work = DomaPanDAWork(executable='echo',
+                             primary_input_collection={'scope': 'pseudo_dataset', 'name': 'pseudo_input_collection#%s' % i},
+                             output_collections=[{'scope': 'pseudo_dataset', 'name': 'pseudo_output_collection#%s' % i}],
+                             log_collections=[], dependency_map=dependency_map,
+                             task_name='task_%s' % i, task_queue='DOMA_LSST_GOOGLE_TEST')
+        workflow.add_work(work)
+    return workflow
+
+
+def time_sync(workflow, repeat=5):
+    times = []
+    for i in range(repeat):
+        time_start = time.time()
+        workflow.sync_works()
+        times.append(time.time() - time_start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    if len(sys.argv) > 1:
+        nums = [int(n) for n in sys.argv[1:]]
+    else:
+        nums = [1000, 10000]
+
+    for num in nums:
+        workflow = get_workflow(num)
+        works = workflow.get_new_works()
+        for work in works:
+            work.transforming = True
+            work.submitted = True
+            work.status = WorkStatus.Transforming
+        workflow.sync_works()
+
+        time_unchanged = time_sync(workflow)
+
+        time_changed = []
+        for i in range(5):
+            works[i].status = WorkStatus.Finished
+            time_start = time.time()
+            workflow.sync_works()
+            time_changed.append(time.time() - time_start)
+        assert workflow.runs[str(workflow.num_run)].num_finished_works == 5
+
+        # the workflow is reloaded from json for every update, the changed works are kept in its metadata
+        workflow = json_loads(json_dumps(workflow))
+        workflow.runs[str(workflow.num_run)].works[works[5].get_internal_id()].status = WorkStatus.Finished
+        time_start = time.time()
+        workflow.sync_works()
+        time_reloaded = time.time() - time_start
+        assert workflow.runs[str(workflow.num_run)].num_finished_works == 6
+
+        print("%6s works: sync_works without changes %.3f seconds, with 1 finished work %.3f seconds, after reloading %.3f seconds"
+              % (num, time_unchanged, min(time_changed), time_reloaded))
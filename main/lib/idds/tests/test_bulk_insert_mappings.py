@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+Test custom_bulk_insert_mappings on postgresql: the multi-row inserts store the same rows as the ORM inserts.
+"""
+
+import datetime
+import time
+
+import unittest2 as unittest
+
+import sqlalchemy
+
+from idds.common.config import config_get
+from idds.common.constants import (ContentType, ContentStatus, ContentLocking, ContentRelationType,
+                                   MessageType, MessageStatus, MessageSource, MessageDestination, MessageLocking)
+from idds.common.utils import check_database, has_config, setup_logging
+from idds.orm.base import models
+from idds.orm.base.session import read_session, transactional_session
+from idds.orm.contents import custom_bulk_insert_mappings
+
+
+setup_logging(__name__)
+
+
+def is_postgresql():
+    return has_config() and check_database() and config_get('database', 'default').startswith('postgresql')
+
+
+@transactional_session
+def orm_bulk_insert_mappings(model, parameters, session=None):
+    session.bulk_insert_mappings(model, parameters)
+
+
+@read_session
+def get_rows(model, where, session=None):
+    table = model.__table__
+    query = sqlalchemy.select(table).where(where).order_by(*table.primary_key.columns)
+    return [dict(row) for row in session.execute(query).mappings().all()]
+
+
+@transactional_session
+def delete_rows(model, where, session=None):
+    session.execute(sqlalchemy.delete(model.__table__).where(where))
+
+
+@unittest.skipIf(not has_config(), "No config file")
+@unittest.skipIf(not is_postgresql(), "Database is not postgresql")
+class TestBulkInsertMappings(unittest.TestCase):
+
+    def setUp(self):
+        # ids out of the range of the sequences
+        self.base_id = 9000000000 + int(time.time() * 1000) % 100000000 * 10
+        self.utc_now = datetime.datetime.utcnow().replace(microsecond=123456)
+
+    def get_contents(self, transform_id):
+        contents = []
+        for i in range(5):
+            contents.append({'request_id': 1, 'workload_id': 1, 'transform_id': transform_id, 'coll_id': 1, 'map_id': i,
+                             'scope': 'pseudo_scope', 'name': "pseudo_name's_%s" % i, 'min_id': 0, 'max_id': 0,
+                             'content_type': ContentType.File, 'status': ContentStatus.New,
+                             'substatus': ContentStatus.Available if i % 2 else None,
+                             'locking': ContentLocking.Idle, 'content_relation_type': ContentRelationType.Output,
+                             'bytes': 0, 'retries': 0, 'name_md5': 'md5', 'scope_name_md5': 'md5',
+                             'expired_at': self.utc_now, 'content_dep_id': i if i % 3 else None,
+                             'content_metadata': {'panda_id': i, 'name': "a'b", 'ids': [1, None]} if i % 2 else None})
+        return contents
+
+    def get_contents_update(self, content_id):
+        return [{'content_id': content_id + i, 'substatus': ContentStatus.Available, 'request_id': 1, 'transform_id': 1,
+                 'workload_id': 1, 'coll_id': 1, 'content_metadata': {'map_id': i} if i % 2 else None} for i in range(5)]
+
+    def get_contents_ext(self, content_id):
+        return [{'content_id': content_id + i, 'transform_id': 1, 'coll_id': 1, 'request_id': 1, 'workload_id': 1,
+                 'map_id': i, 'status': ContentStatus.Available, 'panda_id': i, 'scheduler_id': 'pseudo_scheduler',
+                 'creation_time': self.utc_now, 'start_time': None, 'attempt_nr': i} for i in range(5)]
+
+    def get_messages(self, request_id):
+        return [{'msg_type': MessageType.StageInFile, 'status': MessageStatus.New, 'locking': MessageLocking.Idle,
+                 'source': MessageSource.Transformer, 'destination': MessageDestination.Outside,
+                 'request_id': request_id, 'workload_id': 1, 'transform_id': 1, 'internal_id': 'pseudo_internal_id',
+                 'num_contents': i, 'msg_content': {'files': [{'map_id': i, 'name': "a'b"}]}} for i in range(5)]
+
+    def check_same_as_orm(self, model, get_parameters, id_column, num_ids, ignore_columns):
+        custom_id, orm_id = self.base_id, self.base_id + num_ids
+        custom_where = id_column.between(custom_id, custom_id + num_ids - 1)
+        orm_where = id_column.between(orm_id, orm_id + num_ids - 1)
+        try:
+            custom_bulk_insert_mappings(model, get_parameters(custom_id))
+            orm_bulk_insert_mappings(model, get_parameters(orm_id))
+
+            custom_rows = get_rows(model, custom_where)
+            orm_rows = get_rows(model, orm_where)
+            self.assertEqual(len(custom_rows), 5)
+            for rows in [custom_rows, orm_rows]:
+                for row in rows:
+                    for column in ignore_columns + [id_column.name]:
+                        row.pop(column)
+            self.assertEqual(custom_rows, orm_rows)
+        finally:
+            delete_rows(model, custom_where)
+            delete_rows(model, orm_where)
+
+    def test_contents(self):
+        """ Bulk insert mappings: contents """
+        self.check_same_as_orm(models.Content, self.get_contents, models.Content.transform_id, 1,
+                               ['content_id', 'created_at', 'updated_at', 'accessed_at'])
+
+    def test_contents_update(self):
+        """ Bulk insert mappings: contents_update """
+        self.check_same_as_orm(models.Content_update, self.get_contents_update, models.Content_update.content_id, 5, [])
+
+    def test_contents_ext(self):
+        """ Bulk insert mappings: contents_ext """
+        self.check_same_as_orm(models.Content_ext, self.get_contents_ext, models.Content_ext.content_id, 5, [])
+
+    def test_messages(self):
+        """ Bulk insert mappings: messages get their msg_id from the sequence """
+        self.check_same_as_orm(models.Message, self.get_messages, models.Message.request_id, 1,
+                               ['msg_id', 'created_at', 'updated_at'])
+
+    def test_duplicates(self):
+        """ Bulk insert mappings: the rows with existing primary keys are skipped """
+        where = models.Content_update.content_id.between(self.base_id, self.base_id + 5)
+        try:
+            custom_bulk_insert_mappings(models.Content_update, self.get_contents_update(self.base_id))
+            contents = self.get_contents_update(self.base_id + 1)
+            for content in contents:
+                content['substatus'] = ContentStatus.Missing
+            custom_bulk_insert_mappings(models.Content_update, contents)
+
+            rows = get_rows(models.Content_update, where)
+            self.assertEqual([row['content_id'] - self.base_id for row in rows], list(range(6)))
+            self.assertEqual([row['substatus'] for row in rows], [ContentStatus.Available] * 5 + [ContentStatus.Missing])
+        finally:
+            delete_rows(models.Content_update, where)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2026
+
+
+"""
+Test the throttler counters (COUNTERS_LUA) with fakeredis.
+"""
+
+import time
+
+import unittest2 as unittest
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+from idds.common.constants import RequestStatus, TransformStatus, ProcessingStatus
+from idds.common.utils import check_database, has_config, setup_logging
+from idds.core import counters as core_counters
+
+
+setup_logging(__name__)
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+@unittest.skipIf(not has_config(), "No config file")
+class TestThrottlerCounters(unittest.TestCase):
+
+    def setUp(self):
+        from idds.agents.common.cache.redis import get_redis_cache
+        self.redis_cache = get_redis_cache()
+        self.orig_cache = self.redis_cache.cache
+        self.redis_cache.cache = fakeredis.FakeRedis()
+        self.redis_cache.cache.set(core_counters.RECONCILED_KEY, time.time())
+        self.orig_enabled = core_counters.is_enabled()
+        core_counters.set_enabled(True)
+        core_counters._script = None
+
+    def tearDown(self):
+        self.redis_cache.cache = self.orig_cache
+        core_counters.set_enabled(self.orig_enabled)
+        core_counters._script = None
+
+    def get_counters(self, kind):
+        counters = self.redis_cache.cache.hgetall(core_counters.COUNTERS_KEY % kind)
+        return {k.decode(): int(v) for k, v in counters.items() if int(v)}
+
+    def get_objects(self, kind):
+        objects = self.redis_cache.cache.hgetall(core_counters.OBJECTS_KEY % kind)
+        return {k.decode(): v.decode() for k, v in objects.items()}
+
+    def test_bucket_moves(self):
+        """ Throttler counters: the status changes move an object between the buckets of its site """
+        kind = core_counters.REQUESTS
+        core_counters.update_counters(kind, [(1, RequestStatus.New, 'site1'), (2, RequestStatus.Ready, 'site1')])
+        self.assertEqual(self.get_counters(kind), {'site1\tnew': 2})
+
+        # without site, the site recorded before is used
+        core_counters.update_counters(kind, [(1, RequestStatus.Transforming, None)])
+        self.assertEqual(self.get_counters(kind), {'site1\tnew': 1, 'site1\tprocessing': 1})
+        self.assertEqual(self.get_objects(kind)['1'], 'site1\tprocessing\t1')
+
+        # an update with the same status doesn't count twice
+        core_counters.update_counters(kind, [(1, RequestStatus.Transforming, None)])
+        self.assertEqual(self.get_counters(kind), {'site1\tnew': 1, 'site1\tprocessing': 1})
+
+        # an inactive object keeps only its site
+        core_counters.update_counters(kind, [(1, RequestStatus.Finished, None)])
+        self.assertEqual(self.get_counters(kind), {'site1\tnew': 1})
+        self.assertEqual(self.get_objects(kind)['1'], 'site1')
+        core_counters.update_counters(kind, [(1, RequestStatus.Transforming, None)])
+        self.assertEqual(self.get_counters(kind), {'site1\tnew': 1, 'site1\tprocessing': 1})
+
+        # moving to another site
+        core_counters.update_counters(kind, [(2, RequestStatus.Transforming, 'site2')])
+        self.assertEqual(self.get_counters(kind), {'site1\tprocessing': 1, 'site2\tprocessing': 1})
+
+        counters = core_counters.get_site_counters('site2')
+        self.assertEqual(counters[kind], {'new': 0, 'processing': 1})
+
+        # an object without a recorded site is not counted
+        core_counters.update_counters(kind, [(3, RequestStatus.New, None)])
+        self.assertEqual(self.get_counters(kind), {'site1\tprocessing': 1, 'site2\tprocessing': 1})
+        self.assertNotIn('3', self.get_objects(kind))
+
+    def test_deletes(self):
+        """ Throttler counters: deleted objects are removed from the counters """
+        kind = core_counters.PROCESSINGS
+        core_counters.update_counters(kind, [(1, ProcessingStatus.New, 'site1'), (2, ProcessingStatus.Running, 'site1')])
+        core_counters.delete_counters(kind, [1])
+        self.assertEqual(self.get_counters(kind), {'site1\tprocessing': 1})
+        self.assertEqual(list(self.get_objects(kind).keys()), ['2'])
+
+        # a deleted object doesn't keep its site
+        core_counters.update_counters(kind, [(1, ProcessingStatus.Running, None)])
+        self.assertEqual(self.get_counters(kind), {'site1\tprocessing': 1})
+
+        core_counters.delete_counters(kind, 2)
+        self.assertEqual(self.get_counters(kind), {})
+        self.assertEqual(self.get_objects(kind), {})
+
+    def test_contents_cascade(self):
+        """ Throttler counters: the contents are counted only when their transform is active """
+        values = {'input_new': 3, 'input_activated': 2, 'input_processed': 5,
+                  'output_new': 0, 'output_activated': 4, 'output_processed': 6}
+        expected = {'site1\t%s' % field: num for field, num in values.items() if num}
+
+        # the transform is not active yet
+        core_counters.update_contents_counters(10, values)
+        self.assertEqual(self.get_counters(core_counters.CONTENTS), {})
+
+        core_counters.update_counters(core_counters.TRANSFORMS, [(10, TransformStatus.Transforming, 'site1')])
+        core_counters.update_contents_counters(10, values)
+        self.assertEqual(self.get_counters(core_counters.CONTENTS), expected)
+
+        # the new numbers replace the old ones
+        core_counters.update_contents_counters(10, dict(values, input_new=1))
+        self.assertEqual(self.get_counters(core_counters.CONTENTS), dict(expected, **{'site1\tinput_new': 1}))
+
+        counters = core_counters.get_site_counters('site1')
+        self.assertEqual(counters['input_contents'], {'new': 1, 'activated': 2, 'processed': 5})
+        self.assertEqual(counters['output_contents'], {'new': 0, 'activated': 4, 'processed': 6})
+
+        # the transform becomes inactive: its contents are dropped
+        core_counters.update_counters(core_counters.TRANSFORMS, [(10, TransformStatus.Finished, None)])
+        self.assertEqual(self.get_counters(core_counters.CONTENTS), {})
+        self.assertEqual(self.get_objects(core_counters.CONTENTS), {})
+        core_counters.update_contents_counters(10, values)
+        self.assertEqual(self.get_counters(core_counters.CONTENTS), {})
+
+        # the transform is deleted: its contents are dropped
+        core_counters.update_counters(core_counters.TRANSFORMS, [(10, TransformStatus.Transforming, None)])
+        core_counters.update_contents_counters(10, values)
+        self.assertEqual(self.get_counters(core_counters.CONTENTS), expected)
+        core_counters.delete_counters(core_counters.TRANSFORMS, [10])
+        self.assertEqual(self.get_counters(core_counters.CONTENTS), {})
+        self.assertEqual(self.get_counters(core_counters.TRANSFORMS), {})
+        self.assertEqual(self.get_objects(core_counters.CONTENTS), {})
+
+    @unittest.skipIf(not check_database(), "Database is not defined")
+    def test_after_commit(self):
+        """ Throttler counters: the updates in a transaction are applied only after it commits """
+        from idds.core import requests as core_requests
+        from idds.orm.base.session import transactional_session
+
+        kind = core_counters.REQUESTS
+        site = 'site_%s' % time.time()
+
+        @transactional_session
+        def add_request(fail=False, session=None):
+            request_id = core_requests.add_request(scope='pseudo_scope', name='pseudo_request_%s' % time.time(),
+                                                   request_type=0, workload_id=1, site=site, session=session)
+            # not applied before the commit
+            self.assertEqual(self.get_counters(kind), {})
+            if fail:
+                raise Exception("failed transaction")
+            return request_id
+
+        with self.assertRaises(Exception):
+            add_request(fail=True)
+        self.assertEqual(self.get_counters(kind), {})
+        self.assertEqual(self.get_objects(kind), {})
+
+        request_id = add_request()
+        self.assertEqual(self.get_counters(kind), {'%s\tnew' % site: 1})
+
+        core_requests.update_request(request_id, parameters={'status': RequestStatus.Transforming})
+        self.assertEqual(self.get_counters(kind), {'%s\tprocessing' % site: 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,7 @@
 # http://www.apache.org/licenses/LICENSE-2.0
 #
 # Authors:
-# - Wen Guan, <wen.guan@cern.ch>, 2025
+# - Wen Guan, <wen.guan@cern.ch>, 2025 - 2026
 
 
 import logging
@@ -302,6 +302,72 @@ class Publisher(BaseActiveMQ):
         )
         self.broadcast = broadcast
 
+    def get_send_headers(self, msg, headers=None):
+        namespace = getattr(self, "namespace", None)
+        send_headers = {
+            "persistent": "true",
+            "ttl": self.timetolive,
+            "vo": "eic",
+            "msg_type": str(msg.get("msg_type", "unknown")).lower(),
+            "run_id": msg.get("run_id", "unknown"),
+            "client-id": self.internal_id,
+        }
+        if namespace is not None:
+            send_headers["namespace"] = namespace
+
+        # Caller-provided headers take precedence
+        if headers:
+            send_headers.update(headers)
+        return send_headers
+
+    def publish_batch(self, msgs, headers=None):
+        """
+        Publish a batch of messages to the broker in one transaction.
+        The messages are still delivered one by one, in order, but the broker commits them together.
+
+        :param msgs: List of message dictionaries to publish.
+        :param headers: Optional headers dictionary (overrides defaults)
+        :returns: True if the batch is published.
+        """
+        if not msgs:
+            return True
+
+        self.logger.debug(f"Publishing {len(msgs)} messages in one transaction")
+
+        conn = self.get_connection()
+        if not conn:
+            self.logger.error(f"No connection available to send {len(msgs)} messages")
+            return False
+
+        transaction = None
+        try:
+            transaction = conn.begin()
+            for msg in msgs:
+                conn.send(
+                    body=json_dumps(msg),
+                    destination=self.broker["destination"],
+                    id=self.internal_id,
+                    ack="auto",
+                    headers=self.get_send_headers(msg, headers),
+                    transaction=transaction,
+                )
+            conn.commit(transaction)
+            self.logger.debug(
+                f"{len(msgs)} messages published successfully to destination={self.broker['destination']}"
+            )
+            return True
+        except Exception as ex:
+            self.logger.error(
+                f"Failed to publish {len(msgs)} messages to destination={self.broker['destination']}, error={ex}",
+                exc_info=True,
+            )
+            if transaction is not None:
+                try:
+                    conn.abort(transaction)
+                except Exception:
+                    pass
+            return False
+
     def publish(self, msg, headers=None):
         """
         Publish a message to the broker.
@@ -309,7 +375,6 @@ class Publisher(BaseActiveMQ):
         :param msg: Message dictionary to publish (should contain 'msg_type' and 'run_id')
         :param headers: Optional headers dictionary (overrides defaults)
         """
-        namespace = getattr(self, "namespace", None)
         msg_type = msg.get("msg_type", "unknown")
         run_id = msg.get("run_id", "unknown")
 
@@ -322,20 +387,7 @@ class Publisher(BaseActiveMQ):
             )
             return
 
-        send_headers = {
-            "persistent": "true",
-            "ttl": self.timetolive,
-            "vo": "eic",
-            "msg_type": str(msg_type).lower(),
-            "run_id": run_id,
-            "client-id": self.internal_id,
-        }
-        if namespace is not None:
-            send_headers["namespace"] = namespace
-
-        # Caller-provided headers take precedence
-        if headers:
-            send_headers.update(headers)
+        send_headers = self.get_send_headers(msg, headers)
 
         try:
             conn.send(
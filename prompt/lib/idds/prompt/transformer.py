@@ -6,16 +6,20 @@
 # http://www.apache.org/licenses/LICENSE-2.0
 #
 # Authors:
-# - Wen Guan, <wen.guan@cern.ch>, 2023 - 2025
+# - Wen Guan, <wen.guan@cern.ch>, 2023 - 2026
 
 
 import datetime
 import logging
 import os
 import socket
+import threading
 import time
 import traceback
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 from idds.common.utils import setup_logging, json_loads, is_panda_client_verbose
 
 try:
@@ -32,7 +36,16 @@ setup_logging(__name__)
 
 
 class Transformer:
-    def __init__(self, run_id=None, workdir=None, namespace=None, idle_timeout=1800):
+    def __init__(self, run_id=None, workdir=None, namespace=None, idle_timeout=1800,
+                 num_workers=4, max_in_flight=None, result_batch_size=50, result_batch_interval=1):
+        """
+        :param num_workers: number of threads processing slices.
+        :param max_in_flight: maximum number of received slices whose results are not queued for publishing yet.
+                              When it's reached, the message handler blocks, which stops the subscriber
+                              from receiving new messages. Defaults to 2 * num_workers.
+        :param result_batch_size: number of slice results published in one transaction.
+        :param result_batch_interval: maximum seconds a slice result waits for its batch.
+        """
         self._transformer_broker = None
         self._transformer_broadcast_broker = None
         self._result_broker = None
@@ -44,6 +57,23 @@ class Transformer:
         self._to_stop = False
         self.idle_timeout = idle_timeout
 
+        self.num_workers = max(1, int(num_workers))
+        self.max_in_flight = max(self.num_workers, int(max_in_flight or 2 * self.num_workers))
+        self.result_batch_size = max(1, int(result_batch_size))
+        self.result_batch_interval = result_batch_interval
+
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self._num_in_flight = 0
+        # per run, the slices in the order they are received. Results are published in this order.
+        self._run_slices = {}
+        self._results = []
+        self._results_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._last_publish_time = time.time()
+        self._result_publisher = None
+
         self.last_message_time = time.time()
         self.logger = logging.getLogger(self.__class__.__name__)
 
@@ -169,7 +199,7 @@ class Transformer:
             )
 
     def transformer_handler(self, header, msg, handler_kwargs={}):
-        """Receive slice message and process the payload.
+        """Receive slice message and submit it to the processing pool.
 
         message = {
             'msg_type': 'slice',
@@ -192,6 +222,9 @@ class Transformer:
 
         Types:
           - 'slice': processed slice payload
+
+        It blocks when max_in_flight slices are not finished, to apply backpressure to the subscriber.
+        The results of the slices of a run are published in the order the slices are received.
         """
         msg_type = msg.get("msg_type")
         run_id = msg.get("run_id")
@@ -199,68 +232,167 @@ class Transformer:
             f"Received result message: msg_type={msg_type}, run_id={run_id}"
         )
 
-        result_publisher = None
+        if isinstance(handler_kwargs, dict) and handler_kwargs.get("result_publisher") is not None:
+            self._result_publisher = handler_kwargs.get("result_publisher")
+
+        self._in_flight.acquire()
         try:
-            if isinstance(handler_kwargs, dict):
-                result_publisher = handler_kwargs.get("result_publisher")
+            entry = {"run_id": run_id, "result_msg": None, "done": False}
+            with self._results_lock:
+                self._num_in_flight += 1
+                self._run_slices.setdefault(run_id, deque()).append(entry)
+            self.get_executor().submit(self.process_slice, msg, entry)
+        except Exception as error:
+            self.logger.critical(
+                f"result_handler exception for msg_type={msg_type}: {error}\n{traceback.format_exc()}"
+            )
+            with self._results_lock:
+                self._num_in_flight -= 1
+                self._run_slices[run_id].remove(entry)
+            self._in_flight.release()
+            # propagate to inform the message listener
+            raise
 
-            processing_start_at = datetime.datetime.utcnow()
-            status = False
-            result = None
-            error = None
+    def get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="SliceWorker")
+            return self._executor
 
-            if msg_type == "slice":
-                content = msg.get("content") or {}
-                try:
-                    status, result, error = process_payload(content)
-                    if status:
-                        self.logger.info(
-                            f"Processed slice message successfully: run_id={run_id}, result={result}, error={error}"
-                        )
-                    else:
-                        self.logger.error(
-                            f"Failed to process slice message: run_id={run_id}, result={result}, error={error}"
-                        )
-                except Exception as ex:
-                    error = str(ex)
-                    self.logger.exception(
-                        f"Exception while processing payload for run_id={run_id}: {ex}"
+    def process_slice(self, msg, entry):
+        """
+        Process a slice in a worker thread and queue its result to be published.
+        """
+        try:
+            entry["result_msg"] = self.get_slice_result_msg(msg)
+        except Exception as error:
+            self.logger.critical(
+                f"Exception while processing slice for run_id={msg.get('run_id')}: {error}\n{traceback.format_exc()}"
+            )
+        finally:
+            num_results = self.collect_results(entry)
+            if num_results >= self.result_batch_size:
+                self.publish_results()
+
+    def get_slice_result_msg(self, msg):
+        msg_type = msg.get("msg_type")
+        run_id = msg.get("run_id")
+
+        processing_start_at = datetime.datetime.utcnow()
+        status = False
+        result = None
+        error = None
+
+        if msg_type == "slice":
+            content = msg.get("content") or {}
+            try:
+                status, result, error = process_payload(content)
+                if status:
+                    self.logger.info(
+                        f"Processed slice message successfully: run_id={run_id}, result={result}, error={error}"
                     )
-            else:
-                self.logger.warning(
-                    f"Unknown msg_type received in result_handler: {msg_type}"
+                else:
+                    self.logger.error(
+                        f"Failed to process slice message: run_id={run_id}, result={result}, error={error}"
+                    )
+            except Exception as ex:
+                error = str(ex)
+                self.logger.exception(
+                    f"Exception while processing payload for run_id={run_id}: {ex}"
                 )
+        else:
+            self.logger.warning(
+                f"Unknown msg_type received in result_handler: {msg_type}"
+            )
 
-            slice_result_msg = {
-                "msg_type": "slice_result",
-                "run_id": run_id,
-                "created_at": datetime.datetime.utcnow(),
-                "content": {
-                    "requested_at": msg.get("created_at"),
-                    "processing_start_at": processing_start_at,
-                    "processed_at": datetime.datetime.utcnow(),
-                    "state": "done" if status else "failed",
-                    "hostname": socket.getfqdn(),
-                    "panda_task_id": os.environ.get("PanDA_TaskID"),
-                    "panda_id": os.environ.get("PANDAID"),
-                    "harvester_id": os.environ.get("HARVESTER_WORKER_ID"),
-                    "result": {"state": status, "result": result, "error": error},
-                },
-            }
+        slice_result_msg = {
+            "msg_type": "slice_result",
+            "run_id": run_id,
+            "created_at": datetime.datetime.utcnow(),
+            "content": {
+                "requested_at": msg.get("created_at"),
+                "processing_start_at": processing_start_at,
+                "processed_at": datetime.datetime.utcnow(),
+                "state": "done" if status else "failed",
+                "hostname": socket.getfqdn(),
+                "panda_task_id": os.environ.get("PanDA_TaskID"),
+                "panda_id": os.environ.get("PANDAID"),
+                "harvester_id": os.environ.get("HARVESTER_WORKER_ID"),
+                "result": {"state": status, "result": result, "error": error},
+            },
+        }
+        return slice_result_msg
+
+    def collect_results(self, entry):
+        """
+        Mark the slice as done and move the finished results at the head of its run to the publish queue.
 
+        :returns: the number of results waiting to be published.
+        """
+        num_released = 0
+        with self._results_lock:
+            entry["done"] = True
+            slices = self._run_slices.get(entry["run_id"])
+            while slices and slices[0]["done"]:
+                done_entry = slices.popleft()
+                if done_entry["result_msg"] is not None:
+                    self._results.append(done_entry["result_msg"])
+                num_released += 1
+            if not slices:
+                self._run_slices.pop(entry["run_id"], None)
+            self._num_in_flight -= num_released
+            num_results = len(self._results)
+        # a slice is in flight until its result is queued
+        for _ in range(num_released):
+            self._in_flight.release()
+        return num_results
+
+    def publish_results(self, force=True):
+        """
+        Publish the queued slice results in batches.
+
+        :param force: If False, only publish when a full batch is queued or result_batch_interval passed.
+        """
+        # taking and publishing the batches under one lock keeps the publish order
+        with self._publish_lock:
+            with self._results_lock:
+                if not self._results:
+                    return
+                if (not force and len(self._results) < self.result_batch_size
+                        and self._last_publish_time + self.result_batch_interval > time.time()):
+                    return
+                results, self._results = self._results, []
+                self._last_publish_time = time.time()
+
+            result_publisher = self._result_publisher
             if result_publisher is None:
-                self.logger.warning("No result_publisher provided in handler_kwargs; skipping publish")
-            else:
+                self.logger.warning(f"No result_publisher provided in handler_kwargs; skipping publish of {len(results)} results")
+                return
+
+            for i in range(0, len(results), self.result_batch_size):
+                batch = results[i:i + self.result_batch_size]
                 try:
-                    result_publisher.publish(slice_result_msg)
+                    if hasattr(result_publisher, "publish_batch"):
+                        result_publisher.publish_batch(batch)
+                    else:
+                        for slice_result_msg in batch:
+                            result_publisher.publish(slice_result_msg)
                 except Exception:
-                    self.logger.exception("Failed to publish slice_result_msg")
-        except Exception as error:
-            self.logger.critical(
-                f"result_handler exception for msg_type={msg_type}: {error}\n{traceback.format_exc()}"
-            )
-            # propagate to inform the message listener
-            raise
+                    self.logger.exception(f"Failed to publish {len(batch)} slice_result_msg")
+
+    def has_pending_slices(self):
+        with self._results_lock:
+            return self._num_in_flight > 0 or len(self._results) > 0
+
+    def stop_pool(self):
+        """
+        Wait for the submitted slices and publish all results.
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        self.publish_results()
 
     def run(self):
         """
@@ -294,12 +426,14 @@ class Transformer:
             )
 
             while True:
-                if transformer_subscriber.is_idle(idle_seconds=5) and self._to_stop:
+                # the subscriber is not idle until all received slices are processed and published
+                is_idle = not self.has_pending_slices()
+                if is_idle and transformer_subscriber.is_idle(idle_seconds=5) and self._to_stop:
                     self.logger.debug(
                         "No message received from transformer broker for 5 seconds and stop requested, stopping transformer."
                     )
                     break
-                elif transformer_subscriber.is_idle(idle_seconds=self.idle_timeout):
+                elif is_idle and transformer_subscriber.is_idle(idle_seconds=self.idle_timeout):
                     self.logger.debug(
                         f"No message received from transformer broker for {self.idle_timeout} seconds, stopping transformer."
                     )
@@ -308,10 +442,13 @@ class Transformer:
                 transformer_broadcast_subscriber.monitor()
                 transformer_subscriber.monitor()
                 result_publisher.monitor()
+                self.publish_results(force=False)
 
-                time.sleep(1)
+                time.sleep(max(0.05, min(1, self.result_batch_interval)))
 
             return 0
         except Exception as ex:
             self.logger.error("Error running transformer: %s" % str(ex), exc_info=True)
             return -1
+        finally:
+            self.stop_pool()
@@ -41,13 +41,16 @@ class MessagingListener(stomp.ConnectionListener):
     '''
     Messaging Listener
     '''
-    def __init__(self, broker, output_queue, logger=None):
+    def __init__(self, broker, output_queue, logger=None, new_message_event=None):
         '''
         __init__
+
+        :param new_message_event: threading.Event to be set when a new message is received.
         '''
         self.name = "MessagingListener"
         self.__broker = broker
         self.__output_queue = output_queue
+        self.__new_message_event = new_message_event
         # self.logger = logging.getLogger(self.__class__.__name__)
         if logger:
             self.logger = logger
@@ -63,6 +66,8 @@ class MessagingListener(stomp.ConnectionListener):
     def on_message(self, frame):
         self.logger.debug('[broker] [%s]: headers: %s, body: %s', self.__broker, frame.headers, frame.body)
         self.__output_queue.put(json_loads(frame.body))
+        if self.__new_message_event is not None:
+            self.__new_message_event.set()
 
 
 class MapResult(object):
@@ -184,12 +189,23 @@ class AsyncResult(Base):
         self._graceful_stop = False
         self._is_stop = False
         self._subscribe_thread = None
+        # set when new results are put in the queue, or when it's stopped
+        self._new_result_event = threading.Event()
+        # set when the subscriber finishes the first subscription
+        self._subscriber_started = threading.Event()
         self._subscribed = False
 
         self._results = []
         self._bad_results = []
         self._results_percentage = 0
         self._map_results = map_results
+
+        # indexes of the results, updated incrementally when new results arrive
+        self._result_outputs = []
+        self._result_map_keys = set()
+        self._result_map = MapResult()
+        self._num_failed_results = 0
+        self._indexed_wait_keys = None
         self.waiting_result_terminated = False
 
         self._metrics = {}
@@ -244,10 +260,10 @@ class AsyncResult(Base):
             self._wait_num = len(self._wait_keys)
             return self._wait_keys
         if self._multi_jobs_kwargs_list:
+            request_id, transform_id, internal_id = self.get_request_id_internal_id()
             for kwargs in self._multi_jobs_kwargs_list:
                 k = get_unique_id_for_dict(kwargs)
                 k = "%s:%s" % (self._name, k)
-                request_id, transform_id, internal_id = self.get_request_id_internal_id()
                 self.logger.info(f"request_id {request_id} transform_id {transform_id} internal_id {internal_id} args ({kwargs}) to key: {k}")
                 self._wait_keys.add(k)
             self._wait_num = len(self._wait_keys)
@@ -319,110 +335,92 @@ class AsyncResult(Base):
     def is_terminated(self, value):
         raise Exception(f"{self.internal_id} Not allowd to set is_terminated")
 
-    @property
-    def results(self):
-        has_new_data = False
+    def reset_result_indexes(self):
+        self._result_outputs = []
+        self._result_map_keys = set()
+        self._result_map = MapResult()
+        self._num_failed_results = 0
+
+    def add_result_to_indexes(self, result, wait_keys):
+        """
+        Fold one result into the result indexes.
+        """
+        name = result['name']
+        key = result['key']
+        status, output, error, metrics = result['ret']
+        if status is not True:
+            self._num_failed_results += 1
+            return
+
+        name_key = f"{name}:{key}"
+        is_waited = len(wait_keys) == 0 or name_key in wait_keys
+        if self._map_results:
+            self._metrics[name_key] = metrics
+            details = {"status": status, "error": error, "metrics": metrics}
+            self._result_map.add_result(name=name, key=key, result=output, details=details)
+            if is_waited:
+                self._result_map_keys.add(name_key)
+        elif is_waited:
+            self._metrics[name_key] = metrics
+            self._result_outputs.append(output)
+
+    def update_result_indexes(self):
+        """
+        Move the received results from the queue to the result indexes.
+        Only the new results are processed, except when the wait keys are changed.
+
+        :returns: list of new results.
+        """
+        new_results = []
         while not self._queue.empty():
             ret = self._queue.get()
-            has_new_data = True
             try:
                 internal_id = ret['internal_id']
                 if internal_id == self.internal_id:
                     self._results.append(ret)
+                    new_results.append(ret)
                 else:
                     self._bad_results.append(ret)
+                    self.logger.error(f"{self.internal_id} Received bad result: {ret}")
             except Exception as ex:
                 self.logger.error(f"{self.internal_id} Received bad result: {ret}: {ex}")
-        if self._bad_results:
-            self.logger.error(f"{self.internal_id} Received bad results: {self._bad_results}")
 
-        if not self._nologs:
-            self.logger.debug(f"{self.internal_id} _results: {self._results}, bad_results: {self._bad_results}")
-            self.logger.debug(f"{self.internal_id} wait_keys: {self.wait_keys}, wait_num: {self._wait_num}")
-
-        rets_list = []
-        failure_list = []
-        for result in self._results:
-            # name = result['name']
-            # key = result['key']
-            ret = result['ret']
-            status, output, error, metrics = ret
-            if status is True:
-                rets_list.append(result)
-            else:
-                failure_list.append(result)
-        if not self._nologs:
-            self.logger.debug(f"{self.internal_id} rets_list: {rets_list}, failure_list: {failure_list}")
-
-        if self._map_results:
-            rets = {}
-            if len(self.wait_keys) > 0:
-                for result in rets_list:
-                    name = result['name']
-                    key = result['key']
-                    name_key = f"{name}:{key}"
-                    if name_key in self.wait_keys:
-                        ret = result['ret']
-                        status, output, error, metrics = ret
-                        rets[name_key] = output
-                self._results_percentage = len(list(rets.keys())) * 1.0 / len(self.wait_keys)
-            else:
-                for result in rets_list:
-                    name = result['name']
-                    key = result['key']
-                    name_key = f"{name}:{key}"
-                    ret = result['ret']
-                    status, output, error, metrics = ret
+        wait_keys = self.wait_keys
+        indexed_wait_keys = (id(wait_keys), len(wait_keys))
+        to_index_results = new_results
+        if indexed_wait_keys != self._indexed_wait_keys:
+            self.reset_result_indexes()
+            self._indexed_wait_keys = indexed_wait_keys
+            to_index_results = self._results
 
-                    rets[name_key] = output
-                self._results_percentage = len(list(rets.keys())) * 1.0 / self._wait_num
-
-            ret_map = MapResult()
-            for k in rets_list:
-                name = result['name']
-                key = result['key']
-                name_key = f"{name}:{key}"
-                ret = result['ret']
-                status, output, error, metrics = ret
-                self._metrics[name_key] = metrics
-
-                details = {"status": status, "error": error, "metrics": metrics}
-
-                ret_map.add_result(name=name, key=key, result=output, details=details)
-
-            if has_new_data:
-                self.logger.debug(f'{self.internal_id} percent {self._results_percentage}, results: {ret_map}')
+        for result in to_index_results:
+            try:
+                self.add_result_to_indexes(result, wait_keys)
+            except Exception as ex:
+                self.logger.error(f"{self.internal_id} Failed to process result: {result}: {ex}")
 
-            return ret_map
+        if self._map_results:
+            num_results = len(self._result_map_keys)
         else:
-            rets = []
-            if len(self.wait_keys) > 0:
-                for result in rets_list:
-                    name = result['name']
-                    key = result['key']
-                    name_key = f"{name}:{key}"
-                    if name_key in self.wait_keys:
-                        ret = result['ret']
-                        status, output, error, metrics = ret
-                        self._metrics[name_key] = metrics
-                        rets.append(output)
-
-                self._results_percentage = len(rets) * 1.0 / len(self.wait_keys)
-            else:
-                for result in rets_list:
-                    name = result['name']
-                    key = result['key']
-                    name_key = f"{name}:{key}"
-                    ret = result['ret']
-                    status, output, error, metrics = ret
-                    self._metrics[name_key] = metrics
+            num_results = len(self._result_outputs)
+        if len(wait_keys) > 0:
+            self._results_percentage = num_results * 1.0 / len(wait_keys)
+        else:
+            self._results_percentage = num_results * 1.0 / self._wait_num
+        return new_results
 
-                    rets.append(output)
-                self._results_percentage = len(rets) * 1.0 / self._wait_num
+    @property
+    def results(self):
+        new_results = self.update_result_indexes()
 
-            if has_new_data:
-                self.logger.debug(f'{self.internal_id} percent {self._results_percentage}, results: {rets}')
+        if new_results and not self._nologs:
+            self.logger.debug(f"{self.internal_id} new results: {new_results}, number of failed results: {self._num_failed_results}")
+            self.logger.debug(f"{self.internal_id} wait_num: {self._wait_num}, percent {self._results_percentage}")
 
+        if self._map_results:
+            return self._result_map
+        else:
+            rets = self._result_outputs
             if self._wait_num == 1:
                 if rets:
                     return rets[0]
@@ -536,7 +534,7 @@ class AsyncResult(Base):
 
         self.disconnect_subscribe()
 
-        listener = MessagingListener(brokers, self._queue, logger=self.logger)
+        listener = MessagingListener(brokers, self._queue, logger=self.logger, new_message_event=self._new_result_event)
         conns = []
         for broker, port in broker_addresses:
             conn = stomp.Connection12(host_and_ports=[(broker, port)],
@@ -767,6 +765,8 @@ class AsyncResult(Base):
             for message in messages:
                 body = message['body']
                 self._queue.put(body)
+            if messages:
+                self._new_result_event.set()
         except Exception as ex:
             self.logger.error(f"{self.internal_id} Failed to poll message: {ex}")
 
@@ -781,6 +781,7 @@ class AsyncResult(Base):
                     self._num_stomp_failures += 1
                     self._is_messaging_ok = False
                     self._broker_initialized = False
+            self._subscriber_started.set()
 
             time_poll = None
             time_start = time.time()
@@ -798,7 +799,7 @@ class AsyncResult(Base):
                             self._num_stomp_failures += 1
                             self._is_messaging_ok = False
                             self._broker_initialized = False
-                    time.sleep(1)
+                    self._graceful_stop.wait(1)
                 else:
                     if self._timeout:
                         sleep_time = min(self._timeout / 3, self._poll_period)
@@ -811,7 +812,7 @@ class AsyncResult(Base):
                         except Exception as ex:
                             self.logger.info(f"{self.internal_id} run subscriber fails to poll messages: {ex}")
                         time_poll = time.time()
-                    time.sleep(1)
+                    self._graceful_stop.wait(1)
 
                 if self._timeout and time.time() - time_start > self._timeout:
                     self.logger.info(f"{self.internal_id} timeout reached")
@@ -834,6 +835,8 @@ class AsyncResult(Base):
             self.logger.error(traceback.format_exc())
             self._is_stop = True
             self.stop()
+        finally:
+            self._subscriber_started.set()
 
     def get_results(self, nologs=True):
         old_nologs = self._nologs
@@ -852,33 +855,53 @@ class AsyncResult(Base):
     def get_results_percentage(self):
         return self._results_percentage
 
-    def subscribe(self, force=False):
+    def subscribe(self, force=False, timeout=60):
         if not self._subscribed:
             atexit.register(self.stop)
 
             self._graceful_stop = GracefulEvent()
+            self._subscriber_started.clear()
+            self._is_stop = False
             thread = threading.Thread(target=self.run_subscriber, kwargs={'force': force}, name="RunSubscriber")
-            thread.start()
-            time.sleep(1)
-            self._subscribed = True
             self._subscribe_thread = thread
-            self._is_stop = False
+            self._subscribed = True
+            thread.start()
+            # wait for the subscription, so that results published from now on are received
+            self._subscriber_started.wait(timeout)
+
+    def join_subscriber(self, timeout=60):
+        """
+        Wait for the subscriber thread to finish (it polls the messages for the last time before finishing).
+        """
+        thread = self._subscribe_thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout)
 
     def stop(self):
         if self._graceful_stop:
             self._graceful_stop.set()
+        # wake up the waiters
+        self._new_result_event.set()
         self.disconnect()
         self._subscribed = False
+        self.join_subscriber(timeout=60)
         self._subscribe_thread = None
-        time_start = time.time()
-        while not self._is_stop and time.time() - time_start < 60:
-            time.sleep(1)
         self._is_stop = True
 
     def __del__(self):
         # self.stop()
         pass
 
+    def get_wait_interval(self, time_start, timeout=None, max_interval=600):
+        """
+        Get how long to wait for new results, bounded by the global and the local timeouts.
+        """
+        interval = max_interval
+        for t in [self._timeout, timeout]:
+            if t is not None and t > 0:
+                interval = min(interval, t - (time.time() - time_start))
+        return max(interval, 0.01)
+
     def wait_results(self, timeout=None, force_return_results=False):
         self.subscribe()
 
@@ -889,12 +912,13 @@ class AsyncResult(Base):
             self.logger.info(f"{self.internal_id} waiting for results")
         try:
             while not get_results and self._graceful_stop and not self._graceful_stop.is_set():
+                # clear it before draining the queue, so that results arriving afterwards wake up the wait below
+                self._new_result_event.clear()
                 self.get_results(nologs=True)
                 percent = self.get_results_percentage()
                 if time.time() - time_log > 600:  # 10 minutes
                     self.logger.info(f"{self.internal_id} waiting for results: {percent} (number of wrong keys: {self._num_wrong_keys})")
                     time_log = time.time()
-                time.sleep(1)
                 if self.is_all_results_available:
                     get_results = True
                     self.waiting_result_terminated = True
@@ -908,6 +932,8 @@ class AsyncResult(Base):
                     # local timeout
                     self.logger.info(f"{self.internal_id} timeout reached")
                     break
+                if not get_results:
+                    self._new_result_event.wait(self.get_wait_interval(time_start, timeout))
 
             percent = self.get_results_percentage()
             if timeout is None or time.time() - time_start > 600:
@@ -918,10 +944,8 @@ class AsyncResult(Base):
             self._graceful_stop.set()
 
         if get_results or self._graceful_stop.is_set() or self.is_all_results_available or force_return_results:
-            # stop the subscriber
-            self._graceful_stop.set()
-            # wait the subscriber to finish
-            time.sleep(2)
+            # stop the subscriber and wait it to finish
+            self.stop()
             percent = self.get_results_percentage()
             self.logger.info(f"{self.internal_id} Got results: {percent} (number of wrong keys: {self._num_wrong_keys})")
 
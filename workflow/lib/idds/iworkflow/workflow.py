@@ -13,11 +13,14 @@ import base64
 import collections
 import datetime
 import functools
+import hashlib
 import logging
 import inspect
 import os
 import pickle
+import re
 import tarfile
+import time
 import traceback
 import uuid
 import zlib
@@ -26,7 +29,8 @@ import zlib
 
 from idds.common import exceptions
 from idds.common.constants import WorkflowType
-from idds.common.utils import setup_logging, create_archive_file, json_dumps, json_loads, encode_base64, modified_environ, is_panda_client_verbose
+from idds.common.utils import (setup_logging, create_archive_file, json_dumps, json_loads, encode_base64, modified_environ, is_panda_client_verbose,
+                               get_source_manifest, get_source_manifest_hash)
 from .asyncresult import AsyncResult
 from .base import Base, Context
 
@@ -56,6 +60,9 @@ class WorkflowCanvas(object):
 
 
 class WorkflowContext(Context):
+    # seconds to reuse the uploaded source archive without checking the remote cache
+    source_cache_remote_ttl = 3600
+
     def __init__(self, name=None, service='panda', source_dir=None, workflow_type=WorkflowType.iWorkflow, distributed=True,
                  max_walltime=24 * 3600, init_env=None, exclude_source_files=[], clean_env=None, enable_separate_log=False,
                  cloud=None, site=None, queue=None, vo=None, container_options=None, task_type=None, working_group=None,
@@ -746,13 +753,99 @@ class WorkflowContext(Context):
         archive_name = "%s.tar.gz" % name
         return archive_name
 
+    def get_source_cache_dir(self):
+        """
+        Get the local cache directory of source archives ($IDDS_SOURCE_CACHE_DIR or ~/.cache/idds/source_archives).
+        """
+        cache_dir = os.environ.get("IDDS_SOURCE_CACHE_DIR", None)
+        if not cache_dir:
+            cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "idds", "source_archives")
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError as ex:
+            self.logger.warning(f"Failed to create source cache directory {cache_dir}: {ex}, use /tmp")
+            cache_dir = "/tmp"
+        return cache_dir
+
+    def load_source_cache_file(self, filename):
+        if os.path.exists(filename):
+            try:
+                with open(filename, "r") as f:
+                    return json_loads(f.read())
+            except Exception as ex:
+                self.logger.warning(f"Failed to load source cache file {filename}: {ex}")
+        return {}
+
+    def save_source_cache_file(self, filename, data):
+        tmp_filename = "%s.%s.tmp" % (filename, uuid.uuid4().hex[:8])
+        with open(tmp_filename, "w") as f:
+            f.write(json_dumps(data))
+        os.replace(tmp_filename, filename)
+
+    def clean_source_cache(self, cache_dir, max_archives=20):
+        archives = [os.path.join(cache_dir, f) for f in os.listdir(cache_dir) if f.endswith(".tar.gz")]
+        if len(archives) > max_archives:
+            archives = sorted(archives, key=lambda f: os.path.getmtime(f))
+            for archive_file in archives[:len(archives) - max_archives]:
+                try:
+                    os.remove(archive_file)
+                except OSError:
+                    pass
+
+    def get_source_archive(self):
+        """
+        Get the archive of the source files from the local cache, keyed by the content hash of the sources.
+        The archive is only created when the sources are changed.
+
+        :returns: (source_hash, archive_file, record file of the archive).
+        """
+        cache_dir = self.get_source_cache_dir()
+        source_dir = os.path.abspath(self._source_dir)
+
+        # digests of the source files, reused if the size and mtime are not changed
+        dir_key = hashlib.sha1(source_dir.encode("utf-8")).hexdigest()
+        digest_file = os.path.join(cache_dir, "digests.%s.json" % dir_key)
+        digest_cache = self.load_source_cache_file(digest_file)
+        old_digest_cache = dict(digest_cache)
+        manifest = get_source_manifest([self._source_dir], exclude_files=self._exclude_source_files, digest_cache=digest_cache)
+        if digest_cache != old_digest_cache:
+            self.save_source_cache_file(digest_file, digest_cache)
+
+        source_hash = get_source_manifest_hash(manifest)
+        record_file = os.path.join(cache_dir, "%s.json" % source_hash)
+        record = self.load_source_cache_file(record_file)
+        archive_file = record.get("archive_file", None)
+        if archive_file and os.path.exists(archive_file):
+            self.logger.info(f"reuse archive file {archive_file} of [{self._source_dir}] (source hash {source_hash})")
+            os.utime(archive_file)
+        else:
+            archive_name = self.get_archive_name().replace(".tar.gz", ".%s.tar.gz" % source_hash[:16])
+            tmp_archive_name = "%s.%s.tmp" % (archive_name, uuid.uuid4().hex[:8])
+            tmp_archive_file = create_archive_file(cache_dir, tmp_archive_name, [self._source_dir], exclude_files=self._exclude_source_files)
+            archive_file = os.path.join(cache_dir, archive_name)
+            os.replace(tmp_archive_file, archive_file)
+            self.logger.info(f"created archive file {archive_file} from [{self._source_dir}] (source hash {source_hash})")
+            record = {"source_hash": source_hash, "archive_file": archive_file, "manifest": manifest, "remote_files": {}}
+            self.save_source_cache_file(record_file, record)
+            self.clean_source_cache(cache_dir)
+        return source_hash, archive_file, record_file
+
     def upload_source_files_to_panda(self):
         if not self._source_dir:
             return None
 
-        archive_name = self.get_archive_name()
-        archive_file = create_archive_file('/tmp', archive_name, [self._source_dir], exclude_files=self._exclude_source_files)
-        self.logger.info(f"created archive file {archive_file} from [{self._source_dir}]")
+        source_hash, archive_file, record_file = self.get_source_archive()
+
+        # the same sources are uploaded recently, reuse them without checking the remote cache
+        panda_cache_url = os.environ.get("PANDACACHE_URL", None)
+        record = self.load_source_cache_file(record_file)
+        remote_file = record.get("remote_files", {}).get(str(panda_cache_url), None)
+        if (remote_file and remote_file.get("filename", None) and remote_file.get("cache_url", None)
+           and remote_file["filename"].startswith(remote_file["cache_url"] + "/cache/")
+           and remote_file["uploaded_at"] + self.source_cache_remote_ttl > time.time()):
+            self.logger.info(f"reuse the uploaded source file {remote_file['filename']} (source hash {source_hash})")
+            return remote_file["filename"]
+
         from pandaclient import Client
 
         attempt = 0
@@ -760,20 +853,39 @@ class WorkflowContext(Context):
         done = False
         while attempt < max_attempts and not done:
             attempt += 1
-            status, out = Client.putFile(archive_file, True)
+            # with reuseSandbox, the archive is not uploaded if the same one is already in the panda cache
+            status, out = Client.putFile(archive_file, True, reuseSandbox=True)
             if status == 0:
                 done = True
         self.logger.info(f"copy_files_to_pandacache: status: {status}, out: {out}")
+        if status != 0:
+            self.logger.error(out)
+            return None
         if out.startswith("NewFileName:"):
-            # found the same input sandbox to reuse
-            archive_file = out.split(":")[-1]
-        elif out != "True":
+            # found the same input sandbox to reuse, which can be on another cache server
+            remote_name = out.split(":")[-1]
+        elif out == "True":
+            remote_name = os.path.basename(archive_file)
+        else:
             self.logger.error(out)
             return None
 
-        filename = os.path.basename(archive_file)
-        cache_path = os.path.join(os.environ["PANDACACHE_URL"], "cache")
-        filename = os.path.join(cache_path, filename)
+        # putFile (setCacheServer) switches Client.baseURLCSRVSSL to the cache server of the reused sandbox,
+        # the same as pathena/prun, take the cache server from there.
+        cache_url = None
+        match_url = re.search("(http.*://[^/]+)/", getattr(Client, "baseURLCSRVSSL", None) or "")
+        if match_url:
+            cache_url = match_url.group(1)
+        elif panda_cache_url:
+            cache_url = panda_cache_url.rstrip("/")
+        if not cache_url:
+            self.logger.error(f"Failed to get the panda cache server of the source file {remote_name}")
+            return None
+        filename = "%s/cache/%s" % (cache_url, remote_name)
+
+        record.setdefault("remote_files", {})[str(panda_cache_url)] = {"filename": filename, "cache_url": cache_url,
+                                                                       "uploaded_at": time.time()}
+        self.save_source_cache_file(record_file, record)
         return filename
 
     def prepare_with_panda(self):
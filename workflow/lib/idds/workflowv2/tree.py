@@ -13,6 +13,8 @@
 Construct tree from a workflow
 """
 
+from array import array
+
 from idds.common.utils import setup_logging
 
 from .base import Base
@@ -196,3 +198,108 @@ class Tree(Base):
         self.roots = []
 
         self.setup_logger()
+
+
+class CompactDAG(object):
+    """
+    Integer-indexed directed acyclic graph, for graphs with millions of nodes.
+
+    Nodes are identified by their position. Edges are kept in arrays and converted to
+    compressed adjacency arrays (offsets and node ids) for parents and children when needed.
+    """
+
+    __slots__ = ('names', 'data', 'node_ids', 'levels', '_edges', '_parent_offsets', '_parent_ids',
+                 '_child_offsets', '_child_ids')
+
+    def __init__(self):
+        self.names = []
+        self.data = []
+        self.node_ids = {}
+        self.levels = None
+        self._edges = array('q')
+        self._parent_offsets = None
+        self._parent_ids = None
+        self._child_offsets = None
+        self._child_ids = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def add_node(self, name, data=None):
+        """
+        Add a node.
+
+        :param name: The node name.
+        :param data: Object attached to the node.
+        :returns: the node id.
+        """
+        node_id = len(self.names)
+        self.names.append(name)
+        self.data.append(data)
+        self.node_ids[name] = node_id
+        return node_id
+
+    def get_node_id(self, name):
+        return self.node_ids[name]
+
+    def add_edge(self, parent_id, child_id):
+        self._edges.append(parent_id)
+        self._edges.append(child_id)
+        self._parent_offsets = None
+
+    def _get_adjacency(self, from_pos):
+        num_nodes = len(self.names)
+        offsets = array('q', [0]) * (num_nodes + 1)
+        ids = array('q', [0]) * (len(self._edges) // 2)
+        to_nodes = self._edges[1 - from_pos::2]
+        from_nodes = self._edges[from_pos::2]
+        for node_id in to_nodes:
+            offsets[node_id + 1] += 1
+        for i in range(num_nodes):
+            offsets[i + 1] += offsets[i]
+        positions = offsets[:-1]
+        for node_id, from_id in zip(to_nodes, from_nodes):
+            ids[positions[node_id]] = from_id
+            positions[node_id] += 1
+        return offsets, ids
+
+    def build(self):
+        if self._parent_offsets is None:
+            self._parent_offsets, self._parent_ids = self._get_adjacency(0)
+            self._child_offsets, self._child_ids = self._get_adjacency(1)
+
+    def get_parents(self, node_id):
+        self.build()
+        return self._parent_ids[self._parent_offsets[node_id]:self._parent_offsets[node_id + 1]]
+
+    def get_children(self, node_id):
+        self.build()
+        return self._child_ids[self._child_offsets[node_id]:self._child_offsets[node_id + 1]]
+
+    def num_parents(self, node_id):
+        self.build()
+        return self._parent_offsets[node_id + 1] - self._parent_offsets[node_id]
+
+    def order_by_level(self):
+        """
+        Kahn's algorithm. The level of a node is the longest path from the roots and is stored in self.levels.
+
+        :returns: node ids sorted by (level, node id). Nodes in loops are not included.
+        """
+        self.build()
+        num_nodes = len(self.names)
+        parent_offsets, child_offsets, child_ids = self._parent_offsets, self._child_offsets, self._child_ids
+        indegrees = array('q', [parent_offsets[i + 1] - parent_offsets[i] for i in range(num_nodes)])
+        levels = array('q', [0]) * num_nodes
+        queue = [i for i in range(num_nodes) if indegrees[i] == 0]
+        for node_id in queue:
+            level = levels[node_id] + 1
+            for child_id in child_ids[child_offsets[node_id]:child_offsets[node_id + 1]]:
+                if levels[child_id] < level:
+                    levels[child_id] = level
+                indegrees[child_id] -= 1
+                if indegrees[child_id] == 0:
+                    queue.append(child_id)
+        self.levels = levels
+        queue.sort(key=lambda node_id: (levels[node_id], node_id))
+        return queue
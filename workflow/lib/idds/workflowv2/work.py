@@ -6,7 +6,7 @@
 # http://www.apache.org/licenses/LICENSE-2.0OA
 #
 # Authors:
-# - Wen Guan, <wen.guan@cern.ch>, 2020 - 2025
+# - Wen Guan, <wen.guan@cern.ch>, 2020 - 2026
 
 import copy
 import datetime
@@ -438,6 +438,9 @@ class Processing(Base):
 
 class Work(Base):
 
+    # the dict of the workflow which the changed works are pushed to, set by the workflow
+    transient_items = ['dirty_tracker']
+
     def __init__(self, executable=None, arguments=None, parameters=None, setup=None, work_type=None,
                  work_tag=None, exec_type='local', sandbox=None, request_id=None, work_id=None, work_name=None,
                  primary_input_collection=None, other_input_collections=None, input_collections=None,
@@ -468,6 +471,7 @@ class Work(Base):
         self._other_output_collections = []
 
         self._processings = {}
+        self.dirty_tracker = None
 
         super(Work, self).__init__(loading=loading)
 
@@ -640,6 +644,16 @@ class Work(Base):
     def is_data_work(self):
         return False
 
+    def set_dirty_tracker(self, tracker):
+        """
+        Set the dict of the workflow which the work pushes its internal id to when its state changes.
+        """
+        self.dirty_tracker = tracker
+
+    def mark_dirty(self):
+        if getattr(self, 'dirty_tracker', None) is not None:
+            self.dirty_tracker[self.get_internal_id()] = True
+
     @property
     def internal_id(self):
         return self.get_metadata_item('internal_id')
@@ -679,6 +693,7 @@ class Work(Base):
     @workload_id.setter
     def workload_id(self, value):
         self.add_metadata_item('workload_id', value)
+        self.mark_dirty()
 
     @property
     def external_id(self):
@@ -687,6 +702,7 @@ class Work(Base):
     @external_id.setter
     def external_id(self, value):
         self.add_metadata_item('external_id', value)
+        self.mark_dirty()
 
     def get_workload_id(self):
         return self.workload_id
@@ -752,6 +768,7 @@ class Work(Base):
     @work_id.setter
     def work_id(self, value):
         self.add_metadata_item('work_id', value)
+        self.mark_dirty()
 
     @property
     def parent_workload_id(self):
@@ -768,6 +785,7 @@ class Work(Base):
     @transforming.setter
     def transforming(self, value):
         self.add_metadata_item('transforming', value)
+        self.mark_dirty()
 
     @property
     def submitted(self):
@@ -776,6 +794,7 @@ class Work(Base):
     @submitted.setter
     def submitted(self, value):
         self.add_metadata_item('submitted', value)
+        self.mark_dirty()
 
     @property
     def workdir(self):
@@ -826,6 +845,7 @@ class Work(Base):
                                    WorkStatus.Running]:
                 self.transforming = True
         self.add_metadata_item('status', value.value if value else value)
+        self.mark_dirty()
 
     @property
     def substatus(self):
@@ -837,6 +857,7 @@ class Work(Base):
     @substatus.setter
     def substatus(self, value):
         self.add_metadata_item('substatus', value.value if value else value)
+        self.mark_dirty()
 
     @property
     def is_build_work(self):
@@ -858,6 +879,7 @@ class Work(Base):
     @signature.setter
     def signature(self, value):
         self.add_metadata_item('signature', value)
+        self.mark_dirty()
 
     def sign(self):
         self.signature = str(uuid.uuid4())
@@ -888,6 +910,7 @@ class Work(Base):
     @next_works.setter
     def next_works(self, value):
         self.add_metadata_item('next_works', value)
+        self.mark_dirty()
 
     @property
     def collections(self):
@@ -1070,6 +1093,7 @@ class Work(Base):
     @last_updated_at.setter
     def last_updated_at(self, value):
         self.add_metadata_item('last_updated_at', value)
+        self.mark_dirty()
 
     def has_new_updates(self):
         self.last_updated_at = datetime.datetime.utcnow()
@@ -41,10 +41,15 @@ class ConditionTrigger(IDDSEnum):
 
 
 class CompositeCondition(Base):
+
+    # the dict of the workflow which the pre works are pushed to when the condition is cleaned, set by the workflow
+    transient_items = ['dirty_tracker']
+
     def __init__(self, operator=ConditionOperator.And, conditions=[], true_works=None, false_works=None, logger=None):
         self._conditions = []
         self._true_works = []
         self._false_works = []
+        self.dirty_tracker = None
 
         super(CompositeCondition, self).__init__()
 
@@ -212,7 +217,9 @@ class CompositeCondition(Base):
             # print(value)
             # if not key.startswith('__') and not key.startswith('_'):
             if not key.startswith('__'):
-                if key == 'logger':
+                if key in self.transient_items:
+                    continue
+                elif key == 'logger':
                     value = None
                 elif key == '_conditions':
                     new_value = []
@@ -260,15 +267,34 @@ class CompositeCondition(Base):
     def get_work_from_id(self, work_id, works):
         return works[work_id]
 
+    def set_dirty_tracker(self, tracker):
+        """
+        Set the dict of the workflow which the condition pushes its pre works to when it's cleaned.
+        """
+        self.dirty_tracker = tracker
+
     def clean(self):
+        """
+        Reset the triggered true works which are not submitted yet.
+
+        :returns: True if any work is reset, the pre works are pushed to the dirty tracker to check the condition again.
+        """
+        cleaned = False
         for work in self.true_works:
             if isinstance(work, CompositeCondition):
-                work.clean()
+                if work.clean():
+                    cleaned = True
             else:
                 true_work_meta = self.get_metadata_item('true_works', {})
                 if work.get_internal_id() in true_work_meta:
                     if true_work_meta[work.get_internal_id()]['triggered'] and not work.submitted:
                         true_work_meta[work.get_internal_id()]['triggered'] = False
+                        cleaned = True
+        if cleaned and getattr(self, 'dirty_tracker', None) is not None:
+            for work in self.all_pre_works():
+                if isinstance(work, (Work, Workflow)):
+                    self.dirty_tracker[work.get_internal_id()] = True
+        return cleaned
 
     def load_conditions(self, works):
         # print("load_conditions")
@@ -624,6 +650,9 @@ class ParameterLink(Base):
 
 class WorkflowBase(Base):
 
+    # rebuilt from the works after loading
+    transient_items = ['work_positions', 'sub_workflow_ids', 'work_ancestries', 'work_dependencies', 'work_levels', 'work_task_names']
+
     def __init__(self, name=None, workload_id=None, lifetime=None, pending_time=None, logger=None):
         """
         Init a workflow.
@@ -673,12 +702,24 @@ class WorkflowBase(Base):
         # if the primary initial_work is not set, it's the first initial work.
         self.primary_initial_work = None
         self.independent_works = []
+        # internal_id -> internal ids of the parent works, only the fully resolved ones, see get_work_ancestries
+        self.work_ancestries = {}
+        # the parent works of the independent works, see get_work_dependencies
+        self.work_dependencies = None
+        # internal_id -> level of the ordered independent works, None when they need to be ordered again
+        self.work_levels = {}
+        # task name -> internal_id of all works, see get_work_task_names
+        self.work_task_names = None
 
         self.first_initial = False
         self.new_to_run_works = []
         self.submitting_works = []
         self.current_running_works = []
 
+        # internal_id -> position in works, and the internal ids of the sub workflows, see get_work_positions
+        self.work_positions = None
+        self.sub_workflow_ids = None
+
         self.num_subfinished_works = 0
         self.num_finished_works = 0
         self.num_failed_works = 0
@@ -891,52 +932,111 @@ class WorkflowBase(Base):
     @works.setter
     def works(self, value):
         self._works = value
+        self.work_positions = None
+        self.sub_workflow_ids = None
         work_metadata = {}
         if self._works:
             for k in self._works:
-                work = self._works[k]
-                if isinstance(work, Workflow):
-                    work_metadata[k] = {'type': 'workflow',
-                                        'metadata': work.metadata}
-                else:
-                    work_metadata[k] = {'type': 'work',
-                                        'work_id': work.work_id,
-                                        'workload_id': work.workload_id,
-                                        'external_id': work.external_id,
-                                        'status': work.status.value if work.status else work.status,
-                                        'substatus': work.substatus.value if work.substatus else work.substatus,
-                                        'next_works': work.next_works,
-                                        'signature': work.signature,
-                                        'transforming': work.transforming}
+                self.set_work_dirty_tracker(self._works[k])
+                work_metadata[k] = self.get_work_metadata(self._works[k])
         self.add_metadata_item('works', work_metadata)
 
-    def refresh_works(self, clean=False):
-        work_metadata = {}
+    @property
+    def dirty_works(self):
+        """
+        The internal ids of the works changed since the last sync_works, pushed by the works and the conditions.
+        """
+        dirty_works = self.get_metadata_item('dirty_works', None)
+        if dirty_works is None:
+            dirty_works = {}
+            self.add_metadata_item('dirty_works', dirty_works)
+        return dirty_works
+
+    @property
+    def work_counters(self):
+        # internal_id -> the counter the terminated work is counted in. None before the first sync_works.
+        return self.get_metadata_item('work_counters', None)
+
+    @work_counters.setter
+    def work_counters(self, value):
+        self.add_metadata_item('work_counters', value)
+
+    def set_work_dirty_tracker(self, work):
+        # sub workflows are always checked, they don't need the tracker
+        if isinstance(work, Work):
+            work.set_dirty_tracker(self.dirty_works)
+
+    def get_work_positions(self):
+        """
+        Get the positions of the works. The positions and the sub workflow ids are rebuilt after loading or adding works.
+
+        :returns: dict of internal_id -> position.
+        """
+        if self.work_positions is None or len(self.work_positions) != len(self._works):
+            self.work_positions = {}
+            self.sub_workflow_ids = []
+            for k in self._works:
+                self.work_positions[k] = len(self.work_positions)
+                if isinstance(self._works[k], Workflow):
+                    self.sub_workflow_ids.append(k)
+        return self.work_positions
+
+    def get_sub_workflow_ids(self):
+        self.get_work_positions()
+        return self.sub_workflow_ids
+
+    def get_work_metadata(self, work):
+        if isinstance(work, Workflow):
+            return {'type': 'workflow',
+                    'metadata': work.metadata}
+        else:
+            return {'type': 'work',
+                    'work_id': work.work_id,
+                    'workload_id': work.workload_id,
+                    'external_id': work.external_id,
+                    'status': work.status.value if work.status else work.status,
+                    'substatus': work.substatus.value if work.substatus else work.substatus,
+                    'next_works': work.next_works,
+                    'signature': work.signature,
+                    'transforming': work.transforming}
+
+    def refresh_work_metadata(self, work_id):
+        """
+        Refresh the metadata of one work, instead of all works with 'self.works = works'.
+        """
+        work_metadata = self.get_metadata_item('works', {})
+        work_metadata[work_id] = self.get_work_metadata(self._works[work_id])
+        self.add_metadata_item('works', work_metadata)
+
+    def refresh_works(self, clean=False, work_ids=None):
+        """
+        Refresh the metadata of the changed works (dirty_works and work_ids) and the sub workflows.
+        The metadata of the other works is not changed since the last refresh or loading.
+
+        :param clean: Reset the triggered works of the conditions which are not submitted yet.
+        :param work_ids: The internal ids of other works to refresh.
+        """
         if clean:
             self.submitting_works = []
             for cond_id in self.conditions:
                 cond = self.conditions[cond_id]
                 cond.clean()
 
-        if self._works:
-            for k in self._works:
-                work = self._works[k]
-                if isinstance(work, Workflow):
-                    work.refresh_works()
-                    work_metadata[k] = {'type': 'workflow',
-                                        'metadata': work.metadata}
-                else:
-                    work_metadata[k] = {'type': 'work',
-                                        'work_id': work.work_id,
-                                        'workload_id': work.workload_id,
-                                        'external_id': work.external_id,
-                                        'status': work.status.value if work.status else work.status,
-                                        'substatus': work.substatus.value if work.substatus else work.substatus,
-                                        'next_works': work.next_works,
-                                        'signature': work.signature,
-                                        'transforming': work.transforming}
-                if work.last_updated_at and (not self.last_updated_at or work.last_updated_at > self.last_updated_at):
-                    self.last_updated_at = work.last_updated_at
+        work_metadata = self.get_metadata_item('works', {})
+        if len(work_metadata) != len(self._works):
+            work_ids = list(self._works.keys())
+        else:
+            work_ids = list(work_ids or []) + list(self.dirty_works.keys()) + self.get_sub_workflow_ids()
+
+        for k in dict.fromkeys(work_ids):
+            if k not in self._works:
+                continue
+            work = self._works[k]
+            if isinstance(work, Workflow):
+                work.refresh_works()
+            work_metadata[k] = self.get_work_metadata(work)
+            if work.last_updated_at and (not self.last_updated_at or work.last_updated_at > self.last_updated_at):
+                self.last_updated_at = work.last_updated_at
         self.add_metadata_item('works', work_metadata)
 
     def load_works(self):
@@ -944,6 +1044,8 @@ class WorkflowBase(Base):
         for k in self._works:
             if k in work_metadata:
                 if work_metadata[k]['type'] == 'work':
+                    # loading is not a change of the work
+                    self._works[k].set_dirty_tracker(None)
                     self._works[k].work_id = work_metadata[k]['work_id']
                     self._works[k].workload_id = work_metadata[k]['workload_id'] if 'workload_id' in work_metadata[k] else None
                     self._works[k].external_id = work_metadata[k]['external_id'] if 'external_id' in work_metadata[k] else None
@@ -957,6 +1059,7 @@ class WorkflowBase(Base):
                     self._works[k].metadata = work_metadata[k]['metadata']
 
             work = self._works[k]
+            self.set_work_dirty_tracker(work)
             if work.last_updated_at and (not self.last_updated_at or work.last_updated_at > self.last_updated_at):
                 self.last_updated_at = work.last_updated_at
 
@@ -978,6 +1081,8 @@ class WorkflowBase(Base):
         conditions_metadata = {}
         if self._conditions:
             for k in self._conditions:
+                if isinstance(self._conditions[k], CompositeCondition):
+                    self._conditions[k].set_dirty_tracker(self.dirty_works)
                 conditions_metadata[k] = self._conditions[k].metadata
         self.add_metadata_item('conditions', conditions_metadata)
 
@@ -1005,7 +1110,7 @@ class WorkflowBase(Base):
                 pass
             elif isinstance(self.conditions[cond_internal_id], CompositeCondition):
                 self.conditions[cond_internal_id].load_conditions(self.works)
-                pass
+                self.conditions[cond_internal_id].set_dirty_tracker(self.dirty_works)
         # work_conds = self.get_metadata_item('work_conds', {})
         # self._work_conds = work_conds
 
@@ -1413,8 +1518,7 @@ class WorkflowBase(Base):
 
             work.sequence_id = self.num_total_works
 
-            works = self.works
-            self.works = works
+            self.refresh_work_metadata(work.get_internal_id())
             # self.work_sequence.append(new_work.get_internal_id())
             self.work_sequence[str(self.num_total_works)] = work.get_internal_id()
             self.num_total_works += 1
@@ -1439,8 +1543,7 @@ class WorkflowBase(Base):
                     if isinstance(last_work, Work):
                         work.parent_workload_id = last_work.workload_id
                     last_work.add_next_work(work.get_internal_id())
-                works = self.works
-                self.works = works
+                self.refresh_work_metadata(work.get_internal_id())
                 # self.work_sequence.append(new_work.get_internal_id())
                 self.work_sequence[str(self.num_total_works)] = work.get_internal_id()
                 self.num_total_works += 1
@@ -1458,8 +1561,7 @@ class WorkflowBase(Base):
         work.initialize_work()
         work.sync_global_parameters(self.global_parameters, self.sliced_global_parameters)
         work.renew_parameters_from_attributes()
-        works = self.works
-        self.works = works
+        self.refresh_work_metadata(work.get_internal_id())
         return work
 
     def register_user_defined_condition(self, condition):
@@ -1524,12 +1626,20 @@ class WorkflowBase(Base):
     def add_work(self, work, initial=False, primary=False):
         self.first_initial = False
         self.works[work.get_internal_id()] = work
+        self.set_work_dirty_tracker(work)
+        self.dirty_works[work.get_internal_id()] = True
+        if self.work_task_names is not None:
+            if isinstance(work, Work) and getattr(work, 'task_name', None) is not None:
+                self.work_task_names[work.task_name] = work.get_internal_id()
+            else:
+                self.work_task_names = None
         if initial:
             if primary:
                 self.primary_initial_work = work.get_internal_id()
             self.add_initial_works(work)
 
         self.independent_works.append(work.get_internal_id())
+        self.order_new_independent_work(work)
 
     def add_build_work(self, work, initial=False, primary=False):
         self.build_work = work
@@ -1580,6 +1690,8 @@ class WorkflowBase(Base):
         for next_work in cond_next_works:
             if next_work.get_internal_id() in self.independent_works:
                 self.independent_works.remove(next_work.get_internal_id())
+                # the levels of the left works can change
+                self.work_levels = None
 
     def find_workflow_from_work(self, work):
         if work.get_internal_id() in self._works:
@@ -1877,65 +1989,233 @@ class WorkflowBase(Base):
         return None
 
     def get_dependency_works(self, work_id, depth, max_depth):
+        """
+        Get the works which the work depends on, directly or through other works, up to max_depth.
+
+        :param work_id: The internal id of the work.
+        :param depth: The depth of the work.
+        :param max_depth: The max depth to search.
+        :returns: list of internal ids, in the order they are first found.
+        """
         if depth > max_depth:
             return []
 
-        deps = []
-        for dep_work_id in self.work_dependencies[work_id]:
-            deps.append(dep_work_id)
-            l_deps = self.get_dependency_works(dep_work_id, depth + 1, max_depth)
-            deps += l_deps
-        deps = list(dict.fromkeys(deps))
-        return deps
+        work_dependencies = self.get_work_dependencies()
+        deps = {}
+        if max_depth - depth >= len(work_dependencies):
+            # the depth limit can not be reached, every work is expanded once.
+            visited, stack = set([work_id]), [work_id]
+            while stack:
+                w_id = stack.pop()
+                children = []
+                for dep_work_id in work_dependencies.get(w_id, []):
+                    deps[dep_work_id] = None
+                    if dep_work_id not in visited:
+                        visited.add(dep_work_id)
+                        children.append(dep_work_id)
+                stack.extend(reversed(children))
+            return list(deps.keys())
+
+        # the smallest depth at which a work has been expanded. A work is only expanded
+        # again when it's reached at a smaller depth, so shared ancestors are not re-walked.
+        visited_depth = {work_id: depth}
+        stack = [(work_id, depth)]
+        while stack:
+            w_id, w_depth = stack.pop()
+            if w_depth > max_depth:
+                continue
+            children = []
+            for dep_work_id in work_dependencies.get(w_id, []):
+                deps[dep_work_id] = None
+                if visited_depth.get(dep_work_id, max_depth + 1) > w_depth + 1:
+                    visited_depth[dep_work_id] = w_depth + 1
+                    children.append((dep_work_id, w_depth + 1))
+            stack.extend(reversed(children))
+        return list(deps.keys())
+
+    def find_dependency_loop(self, work_ids):
+        """
+        Find a dependency loop between the works.
+
+        :param work_ids: The internal ids of the works to search.
+        :returns: list of internal ids in the loop, with the first one repeated at the end, or None.
+        """
+        work_ids = set(work_ids)
+        # 1: in the current path, 2: done
+        states = {}
+        for start_id in work_ids:
+            if start_id in states:
+                continue
+            path = [start_id]
+            iters = [iter(self.work_dependencies.get(start_id, []))]
+            states[start_id] = 1
+            while path:
+                dep_work_id = next(iters[-1], None)
+                if dep_work_id is None:
+                    states[path.pop()] = 2
+                    iters.pop()
+                elif dep_work_id not in work_ids:
+                    continue
+                elif states.get(dep_work_id, None) == 1:
+                    return path[path.index(dep_work_id):] + [dep_work_id]
+                elif dep_work_id not in states:
+                    states[dep_work_id] = 1
+                    path.append(dep_work_id)
+                    iters.append(iter(self.work_dependencies.get(dep_work_id, [])))
+        return None
+
+    def get_work_task_names(self):
+        """
+        Get the internal ids of all works, including the works of the sub workflows, by task name.
+        """
+        if self.work_task_names is None:
+            self.work_task_names = {}
+            for work in self.get_all_works(synchronize=False):
+                if getattr(work, 'task_name', None) is not None:
+                    self.work_task_names[work.task_name] = work.get_internal_id()
+        return self.work_task_names
+
+    def get_work_ancestries(self, work_ids):
+        """
+        Get the parent works of the works. The parents of a work are resolved only once and kept
+        in work_ancestries, so ordering after adding works only resolves the new ones. A work with
+        parent tasks which can not be found is not kept, it's resolved again in the next ordering.
+
+        :param work_ids: The internal ids of the works.
+        :returns: dict of internal id to the list of parent internal ids (or task names if not found).
+        """
+        unresolved = {}
+        new_work_ids = [work_id for work_id in work_ids if work_id not in self.work_ancestries]
+        if new_work_ids:
+            task_names = None
+            refreshed = False
+            for work_id in new_work_ids:
+                parent_task_names = self.works[work_id].get_ancestry_works()
+                parent_internal_ids = []
+                resolved = True
+                for t_name in (parent_task_names or []):
+                    if task_names is None:
+                        task_names = self.get_work_task_names()
+                    if t_name not in task_names and not refreshed:
+                        # works can be added to the sub workflows, refresh the task names once
+                        self.work_task_names = None
+                        task_names = self.get_work_task_names()
+                        refreshed = True
+                    if t_name in task_names:
+                        parent_internal_ids.append(task_names[t_name])
+                    else:
+                        self.log_info("Work %s depends on unknown task %s" % (work_id, t_name))
+                        # keep it unresolvable, it will be ordered at the end.
+                        parent_internal_ids.append(t_name)
+                        resolved = False
+                parent_internal_ids = list(dict.fromkeys(parent_internal_ids))
+                if resolved:
+                    self.work_ancestries[work_id] = parent_internal_ids
+                else:
+                    unresolved[work_id] = parent_internal_ids
+        return {work_id: unresolved[work_id] if work_id in unresolved else self.work_ancestries[work_id] for work_id in work_ids}
+
+    def get_work_dependencies(self):
+        """
+        Get the parent works of the independent works. They are not stored with the workflow, but rebuilt after loading.
+        """
+        if self.work_dependencies is None:
+            self.work_dependencies = self.get_work_ancestries(list(dict.fromkeys(self.independent_works)))
+        return self.work_dependencies
+
+    def order_new_independent_work(self, work):
+        """
+        Put a new independent work (already appended to independent_works) at the position
+        order_independent_works would put it, so adding works doesn't order all works again.
+        If the independent works are not ordered yet, or the parents of the work are not ordered,
+        the works are ordered by order_independent_works in first_initialize.
+
+        :param work: The new work.
+        """
+        work_id = work.get_internal_id()
+        ind_work_ids = self.independent_works
+        if (self.work_levels is None or isinstance(work, Workflow) or len(self.work_levels) != len(ind_work_ids) - 1
+           or not ind_work_ids or ind_work_ids[-1] != work_id):
+            self.work_levels = None
+            return
+
+        deps = self.get_work_ancestries([work_id])[work_id]
+        if [dep_work_id for dep_work_id in deps if dep_work_id not in self.work_levels]:
+            self.work_levels = None
+            return
+        level = max([self.work_levels[dep_work_id] + 1 for dep_work_id in deps] + [0])
+
+        # the levels of the ordered works are not decreasing, the new work goes after the works at its level
+        ind_work_ids.pop()
+        pos = len(ind_work_ids)
+        while pos > 0 and self.work_levels[ind_work_ids[pos - 1]] > level:
+            pos -= 1
+        ind_work_ids.insert(pos, work_id)
+        self.independent_works = ind_work_ids
+        self.work_levels[work_id] = level
+        if self.work_dependencies is not None:
+            self.work_dependencies[work_id] = deps
+
+        internal_id_relation_map = self.internal_id_relation_map or {}
+        if pos > 0:
+            work.parent_internal_id = ind_work_ids[pos - 1]
+        internal_id_relation_map[work_id] = work.parent_internal_id
+        if pos + 1 < len(ind_work_ids):
+            next_work = self.works[ind_work_ids[pos + 1]]
+            next_work.parent_internal_id = work_id
+            internal_id_relation_map[next_work.get_internal_id()] = work_id
+        self.internal_id_relation_map = internal_id_relation_map
 
     def order_independent_works(self):
+        """
+        Order the independent works topologically (Kahn's algorithm).
+        Works are ordered by their depth in the dependency graph, then by their current position.
+        Works in a dependency loop, or depending on works which are not independent works, are put at the end.
+        """
+        ind_work_ids = list(dict.fromkeys(self.independent_works))
+        if self.work_levels is not None and len(self.work_levels) == len(ind_work_ids) and set(self.work_levels) == set(ind_work_ids):
+            self.log_debug("independent works are already ordered when adding works")
+            return
+
         self.log_debug("ordering independent works")
-        ind_work_ids = self.independent_works
         self.log_debug("independent works: %s" % (str(ind_work_ids)))
-        self.independent_works = []
-        self.work_dependencies = {}
 
-        all_works = self.get_all_works(synchronize=False)
-        task_name_to_internal_id_map = {}
-        for work in all_works:
-            task_name_to_internal_id_map[work.task_name] = work.get_internal_id()
-
-        for ind_work_id in ind_work_ids:
-            work = self.works[ind_work_id]
-            parent_task_names = work.get_ancestry_works()
-            self.work_dependencies[ind_work_id] = []
-            if parent_task_names:
-                parent_internal_ids = [task_name_to_internal_id_map[t_name] for t_name in parent_task_names]
-                self.work_dependencies[ind_work_id] = parent_internal_ids
+        self.work_dependencies = self.get_work_ancestries(ind_work_ids)
         self.log_debug('work dependencies: %s' % str(self.work_dependencies))
 
-        while True:
-            # self.log_debug('independent_works N: %s' % str(self.independent_works))
-            # self.log_debug('work dependencies N: %s' % str(self.work_dependencies))
-            has_changes = False
-            for work_id in self.work_dependencies:
-                if work_id not in self.independent_works and len(self.work_dependencies[work_id]) == 0:
-                    self.independent_works.append(work_id)
-                    has_changes = True
-            for work_id in self.independent_works:
-                if work_id in self.work_dependencies:
-                    del self.work_dependencies[work_id]
-                    has_changes = True
-            for work_id in self.work_dependencies:
-                for in_work_id in self.independent_works:
-                    if in_work_id in self.work_dependencies[work_id]:
-                        self.work_dependencies[work_id].remove(in_work_id)
-                        has_changes = True
-            if not self.work_dependencies:
-                break
-            if not has_changes:
-                self.log_debug("There are loop dependencies between works.")
-                self.log_debug('independent_works N: %s' % str(self.independent_works))
-                self.log_debug('work dependencies N: %s' % str(self.work_dependencies))
-                for work_id in self.work_dependencies:
-                    if work_id not in self.independent_works:
-                        self.independent_works.append(work_id)
-                break
+        position = {work_id: i for i, work_id in enumerate(ind_work_ids)}
+        num_deps, children = {}, {}
+        for work_id in ind_work_ids:
+            num_deps[work_id] = len(self.work_dependencies[work_id])
+            for dep_work_id in self.work_dependencies[work_id]:
+                children.setdefault(dep_work_id, []).append(work_id)
+
+        levels = {}
+        queue = [work_id for work_id in ind_work_ids if num_deps[work_id] == 0]
+        for work_id in queue:
+            levels[work_id] = 0
+        for work_id in queue:
+            for child_id in children.get(work_id, []):
+                levels[child_id] = max(levels.get(child_id, 0), levels[work_id] + 1)
+                num_deps[child_id] -= 1
+                if num_deps[child_id] == 0:
+                    queue.append(child_id)
+        self.independent_works = sorted(queue, key=lambda work_id: (levels[work_id], position[work_id]))
+
+        if len(self.independent_works) < len(ind_work_ids):
+            unresolved = [work_id for work_id in ind_work_ids if num_deps[work_id] > 0]
+            loop = self.find_dependency_loop(unresolved)
+            if loop:
+                self.log_info("There are loop dependencies between works: %s" % ' -> '.join([str(w) for w in loop]))
+            outside_deps = {work_id: [d for d in self.work_dependencies[work_id] if d not in position] for work_id in unresolved}
+            outside_deps = {k: v for k, v in outside_deps.items() if v}
+            if outside_deps:
+                self.log_info("Works depend on works which are not independent works: %s" % str(outside_deps))
+            self.log_debug("unresolved works: %s" % str(unresolved))
+            self.independent_works = self.independent_works + unresolved
+            self.work_levels = None
+        else:
+            self.work_levels = levels
         self.log_debug('independent_works: %s' % str(self.independent_works))
         self.log_debug("ordered independent works")
 
@@ -1969,15 +2249,69 @@ class WorkflowBase(Base):
             self.to_start_works = to_start_works
             self.log_debug("first initialized")
 
+    def get_work_terminated_counter(self, work):
+        """
+        Get the name of the counter which a terminated work is counted in.
+
+        :param work: The work.
+        :returns: the counter name, or None if the work is not terminated.
+        """
+        if work.is_terminated():
+            if work.is_finished(synchronize=False):
+                return 'num_finished_works'
+            elif work.is_subfinished(synchronize=False):
+                return 'num_subfinished_works'
+            elif work.is_failed(synchronize=False):
+                return 'num_failed_works'
+            elif work.is_expired(synchronize=False):
+                return 'num_expired_works'
+            elif work.is_cancelled(synchronize=False):
+                return 'num_cancelled_works'
+            elif work.is_suspended(synchronize=False):
+                return 'num_suspended_works'
+        return None
+
+    def pop_dirty_works(self):
+        """
+        Get the works changed since the last sync_works, in the order of the works, and clear them.
+        The works and the conditions push their internal ids to dirty_works when their states change.
+        Sub workflows are always checked, since their works can change.
+
+        :returns: list of internal ids.
+        """
+        positions = self.get_work_positions()
+        dirty_works = [k for k in self.dirty_works if k in positions]
+        dirty_works = sorted(set(dirty_works + self.get_sub_workflow_ids()), key=lambda k: positions[k])
+        self.dirty_works.clear()
+        return dirty_works
+
+    def reset_work_sync_states(self):
+        """
+        Reset the counters and mark all works as changed, the next sync_works will check all works.
+        """
+        self.work_counters = {}
+        for k in self._works:
+            self.dirty_works[k] = True
+        self.num_finished_works = 0
+        self.num_subfinished_works = 0
+        self.num_failed_works = 0
+        self.num_expired_works = 0
+        self.num_cancelled_works = 0
+        self.num_suspended_works = 0
+
     def sync_works(self, to_cancel=False):
         if to_cancel:
             self.to_cancel = to_cancel
         self.log_debug("%s num_run %s synchroning works" % (self.get_internal_id(), self.num_run))
         self.first_initialize()
 
-        self.refresh_works()
+        if self.work_counters is None:
+            # stored before the works were tracked, check all works once
+            self.reset_work_sync_states()
+        dirty_works = self.pop_dirty_works()
+        self.log_debug("%s dirty works: %s" % (self.get_internal_id(), len(dirty_works)))
 
-        for k in self.works:
+        for k in dirty_works:
             work = self.works[k]
             self.log_debug("work %s is_terminated(%s:%s), is_submitted: %s, transforming: %s" % (work.get_internal_id(),
                                                                                                  work.is_terminated(synchronize=False),
@@ -2033,46 +2367,38 @@ class WorkflowBase(Base):
                     if work.get_internal_id() in self.current_running_works:
                         self.current_running_works.remove(work.get_internal_id())
 
-        for k in self.work_conds:
+        # only the conditions of changed works can change status.
+        # refresh_works(clean=True) pushes the pre works of the cleaned conditions to dirty_works.
+        for k in dirty_works:
+            if k not in self.work_conds:
+                continue
             work = self.works[k]
-            # self.log_debug("Work %s has condition dependencies %s" % (work.get_internal_id(),
-            #                                                           json_dumps(self.work_conds[work.get_internal_id()], sort_keys=True, indent=4)))
             self.log_debug("Work %s has condition dependencies %s" % (work.get_internal_id(), self.work_conds[work.get_internal_id()]))
             for cond_id in self.work_conds[work.get_internal_id()]:
                 cond = self.conditions[cond_id]
-                # self.log_debug("Work %s has condition dependencie %s" % (work.get_internal_id(),
-                #                                                          json_dumps(cond, sort_keys=True, indent=4)))
                 self.log_debug("Work %s has condition dependencie %s" % (work.get_internal_id(), cond.get_internal_id()))
-
                 self.enable_next_works(work, cond)
 
-        self.num_finished_works = 0
-        self.num_subfinished_works = 0
-        self.num_failed_works = 0
-        self.num_expired_works = 0
-        self.num_cancelled_works = 0
-        self.num_suspended_works = 0
-
-        for k in self.works:
+        work_counters = self.work_counters
+        for k in dirty_works:
             work = self.works[k]
-            if work.is_terminated():
-                if work.is_finished(synchronize=False):
-                    self.num_finished_works += 1
-                elif work.is_subfinished(synchronize=False):
-                    self.num_subfinished_works += 1
-                elif work.is_failed(synchronize=False):
-                    self.num_failed_works += 1
-                elif work.is_expired(synchronize=False):
-                    self.num_expired_works += 1
-                elif work.is_cancelled(synchronize=False):
-                    self.num_cancelled_works += 1
-                elif work.is_suspended(synchronize=False):
-                    self.num_suspended_works += 1
-
+            old_counter = work_counters.get(k, None)
+            new_counter = self.get_work_terminated_counter(work)
+            if old_counter != new_counter:
+                if old_counter:
+                    setattr(self, old_counter, getattr(self, old_counter) - 1)
+                if new_counter:
+                    setattr(self, new_counter, getattr(self, new_counter) + 1)
+            if new_counter:
+                work_counters[k] = new_counter
+            else:
+                work_counters.pop(k, None)
             # if work.is_terminated():
             #    # if it's a loop workflow, to generate new loop
             #    if isinstance(work, Workflow):
             #        work.sync_works()
+        self.work_counters = work_counters
+
         log_str = "%s num_run %s num_total_works: %s" % (self.get_internal_id(), self.num_run, self.num_total_works)
         log_str += ", num_finished_works: %s" % self.num_finished_works
         log_str += ", num_subfinished_works: %s" % self.num_subfinished_works
@@ -2084,17 +2410,12 @@ class WorkflowBase(Base):
         log_str += ", current_running_works: %s" % len(self.current_running_works)
         self.log_debug(log_str)
 
-        self.refresh_works()
+        self.refresh_works(work_ids=dirty_works)
         self.log_debug("%s synchronized works" % self.get_internal_id())
 
     def resume_works(self):
         self.to_cancel = False
-        self.num_subfinished_works = 0
-        self.num_finished_works = 0
-        self.num_failed_works = 0
-        self.num_cancelled_works = 0
-        self.num_suspended_works = 0
-        self.num_expired_works = 0
+        self.reset_work_sync_states()
 
         self.last_updated_at = datetime.datetime.utcnow()
 
@@ -2188,12 +2509,7 @@ class WorkflowBase(Base):
         return ret
 
     def clean_works(self):
-        self.num_subfinished_works = 0
-        self.num_finished_works = 0
-        self.num_failed_works = 0
-        self.num_cancelled_works = 0
-        self.num_suspended_works = 0
-        self.num_expired_works = 0
+        self.reset_work_sync_states()
         self.num_total_works = 0
 
         self.last_updated_at = datetime.datetime.utcnow()
@@ -3032,7 +3348,6 @@ class Workflow(Base):
             elif build_work.is_terminated() and not build_work.is_finished():
                 return
 
-        self.refresh_works()
         # position is end.
         if self.num_run < 1:
             self.num_run = 1
@@ -3071,9 +3386,10 @@ class Workflow(Base):
 
                         self.runs[str(self.num_run)].global_parameters = self.runs[str(self.num_run - 1)].global_parameters
                         self.logger.info("%s new num_run is %s" % (self.get_internal_id(), self.num_run))
+                        # the current run is refreshed at the end of its sync_works, only the new run needs it.
+                        self.refresh_works()
                     else:
                         self.logger.info("%s num_run %s get_loop_condition_status %s, terminated loop" % (self.get_internal_id(), self.num_run, self.runs[str(self.num_run)].get_loop_condition_status()))
-        self.refresh_works()
 
     def get_relation_map(self):
         if not self.runs: